@@ -41,6 +41,7 @@ ALLOWED_HOSTS = ['pokerstats.lol', 'www.pokerstats.lol', '67.205.147.15', 'local
 INSTALLED_APPS = [
     # My apps
     'root',
+    'task_queue',
     'tournament',
     'tournament_analytics',
     'tournament_group',
@@ -67,6 +68,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'root.profiling.SQLProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -183,8 +185,39 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Local memory by default. Set CACHE_BACKEND/CACHE_LOCATION to use something else, like
+# django.core.cache.backends.filebased.FileBasedCache and a directory.
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': env('CACHE_LOCATION', default='pokerstats'),
+        'KEY_PREFIX': env('CACHE_KEY_PREFIX', default='pokerstats'),
+        'TIMEOUT': env.int('CACHE_TIMEOUT', default=60 * 60 * 24),
+    }
+}
+
+# Task queue
+# Tasks are stored in the database and run by `python manage.py run_task_worker`.
+# Set TASK_QUEUE_ALWAYS_EAGER=True to run them in-process as soon as they are queued (no worker needed).
+TASK_QUEUE_ALWAYS_EAGER = env.bool('TASK_QUEUE_ALWAYS_EAGER', default=False)
+# A task still RUNNING after this many seconds is assumed to belong to a worker that died and is run again.
+TASK_QUEUE_VISIBILITY_TIMEOUT = env.int('TASK_QUEUE_VISIBILITY_TIMEOUT', default=15 * 60)
+
+# SQL profiling
+# Set SQL_PROFILING=True to record the queries of every request (see root.profiling.SQLProfilingMiddleware).
+# Requests that exceed one of the thresholds are appended to SQL_PROFILING_LOG_FILE (one line of JSON per request)
+# and listed at /sql_profiling/ for staff users.
+SQL_PROFILING = env.bool('SQL_PROFILING', default=False)
+SQL_PROFILING_LOG_FILE = env('SQL_PROFILING_LOG_FILE', default=str(BASE_DIR / 'sql_profiling.jsonl'))
+SQL_PROFILING_MAX_QUERIES = env.int('SQL_PROFILING_MAX_QUERIES', default=50)
+SQL_PROFILING_MAX_DUPLICATE_QUERIES = env.int('SQL_PROFILING_MAX_DUPLICATE_QUERIES', default=10)
+SQL_PROFILING_MAX_DB_TIME_MS = env.int('SQL_PROFILING_MAX_DB_TIME_MS', default=500)
+
 # Email configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Set EMAIL_BACKEND=django.core.mail.backends.console.EmailBackend to print emails instead of sending them.
+EMAIL_BACKEND = env('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -7,6 +7,7 @@ from root.views import (
     contact_view,
     error_view,
     root_view,
+    sql_profiling_view,
 )
 
 from user.views import CustomPasswordChangeView
@@ -18,6 +19,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('contact/', contact_view, name="contact"),
     path('error/<str:error_message>/', error_view, name="error"),
+    path('sql_profiling/', sql_profiling_view, name="sql_profiling"),
     path('tournament/', include("tournament.urls"), name="tournament"),
     path('user/', include("user.urls"), name="user"),
     path('tournament_analytics/', include("tournament_analytics.urls"), name="tournament_analytics"),
@@ -0,0 +1,225 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+"""
+The thresholds a request is compared against when SQL_PROFILING is enabled. A request is logged if it exceeds any of
+them. Each one can be overridden in settings.
+"""
+SQL_PROFILING_DEFAULTS = {
+	"SQL_PROFILING_MAX_QUERIES": 50,
+	"SQL_PROFILING_MAX_DUPLICATE_QUERIES": 10,
+	"SQL_PROFILING_MAX_DB_TIME_MS": 500,
+}
+
+"""
+How many of the most repeated fingerprints are written for a logged request.
+"""
+SQL_PROFILING_MAX_FINGERPRINTS = 10
+
+"""
+How many call sites are kept for each fingerprint.
+"""
+SQL_PROFILING_MAX_CALL_SITES = 5
+
+"""
+How many frames of the project's own code are included in a call site.
+"""
+SQL_PROFILING_CALL_SITE_DEPTH = 3
+
+_log_file_lock = threading.Lock()
+
+"""
+Replace the literals in a query with placeholders so the same query with different parameters has the same fingerprint.
+"""
+def build_sql_fingerprint(sql):
+	sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+	sql = re.sub(r"\b\d+(\.\d+)?\b", "?", sql)
+	sql = re.sub(r"\(\s*\?(\s*,\s*\?)*\s*\)", "(...)", sql)
+	return re.sub(r"\s+", " ", sql).strip()
+
+"""
+Count the queries that have the same fingerprint as an earlier query in 'queries' (a list of {'sql', ...}).
+"""
+def count_duplicate_queries(queries):
+	fingerprints = Counter(build_sql_fingerprint(query['sql']) for query in queries)
+	return sum(count - 1 for count in fingerprints.values())
+
+def get_sql_profiling_setting(name):
+	return getattr(settings, name, SQL_PROFILING_DEFAULTS.get(name))
+
+"""
+The closest frames in the project's own code (not Django, not a third party package and not this module) that led to
+a query, innermost first. Formatted as
+'tournament/models.py:775 in get_joined_tournaments <- tournament/views.py:82 in tournament_list_view'.
+"""
+def find_call_site():
+	base_dir = str(settings.BASE_DIR)
+	frames = []
+	frame = sys._getframe(1)
+	while frame != None and len(frames) < SQL_PROFILING_CALL_SITE_DEPTH:
+		filename = frame.f_code.co_filename
+		if filename.startswith(base_dir) and filename != __file__ and "site-packages" not in filename:
+			frames.append(f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}")
+		frame = frame.f_back
+	if len(frames) == 0:
+		return None
+	return " <- ".join(frames)
+
+"""
+The queries run by one fingerprint during a request.
+"""
+@dataclass
+class FingerprintProfile:
+	fingerprint: str
+	count: int = 0
+	db_time_ms: float = 0.0
+	call_sites: Counter = field(default_factory = Counter)
+
+"""
+Records every query run through the connections it's installed on (see connection.execute_wrapper). Works without
+DEBUG, so it can run in production.
+"""
+class QueryProfiler:
+
+	def __init__(self):
+		self.num_queries = 0
+		self.db_time_ms = 0.0
+		self.fingerprints = {}
+
+	def __call__(self, execute, sql, params, many, context):
+		start = time.perf_counter()
+		try:
+			return execute(sql, params, many, context)
+		finally:
+			duration = (time.perf_counter() - start) * 1000
+			fingerprint = build_sql_fingerprint(sql)
+			profile = self.fingerprints.get(fingerprint)
+			if profile == None:
+				profile = FingerprintProfile(fingerprint = fingerprint)
+				self.fingerprints[fingerprint] = profile
+			profile.count += 1
+			profile.db_time_ms += duration
+			call_site = find_call_site()
+			if call_site != None:
+				profile.call_sites[call_site] += 1
+			self.num_queries += 1
+			self.db_time_ms += duration
+
+	@property
+	def num_duplicate_queries(self):
+		return sum(profile.count - 1 for profile in self.fingerprints.values())
+
+	"""
+	The names of the thresholds this profile exceeds (queries, duplicate_queries, db_time).
+	"""
+	def get_exceeded_thresholds(self):
+		exceeded = []
+		if self.num_queries > get_sql_profiling_setting("SQL_PROFILING_MAX_QUERIES"):
+			exceeded.append("queries")
+		if self.num_duplicate_queries > get_sql_profiling_setting("SQL_PROFILING_MAX_DUPLICATE_QUERIES"):
+			exceeded.append("duplicate_queries")
+		if self.db_time_ms > get_sql_profiling_setting("SQL_PROFILING_MAX_DB_TIME_MS"):
+			exceeded.append("db_time")
+		return exceeded
+
+	"""
+	The JSON written to the log file for a request. Only fingerprints that ran more than once are included, most
+	repeated first.
+	"""
+	def build_entry(self, request, response, duration_ms, exceeded):
+		duplicates = sorted(
+			[profile for profile in self.fingerprints.values() if profile.count > 1],
+			key = lambda profile: profile.count,
+			reverse = True
+		)[:SQL_PROFILING_MAX_FINGERPRINTS]
+		return {
+			"timestamp": timezone.now().isoformat(),
+			"method": request.method,
+			"path": request.get_full_path(),
+			"status_code": response.status_code,
+			"duration_ms": round(duration_ms, 3),
+			"num_queries": self.num_queries,
+			"num_duplicate_queries": self.num_duplicate_queries,
+			"db_time_ms": round(self.db_time_ms, 3),
+			"exceeded": exceeded,
+			"duplicates": [
+				{
+					"fingerprint": profile.fingerprint,
+					"count": profile.count,
+					"db_time_ms": round(profile.db_time_ms, 3),
+					"call_sites": [
+						call_site for call_site, count in profile.call_sites.most_common(SQL_PROFILING_MAX_CALL_SITES)
+					],
+				} for profile in duplicates
+			],
+		}
+
+def write_sql_profiling_entry(entry):
+	with _log_file_lock:
+		with open(settings.SQL_PROFILING_LOG_FILE, "a") as file:
+			file.write(json.dumps(entry) + "\n")
+
+"""
+The most recent 'limit' entries in the log file, newest first.
+"""
+def read_sql_profiling_entries(limit=100):
+	path = settings.SQL_PROFILING_LOG_FILE
+	if not os.path.exists(path):
+		return []
+	with open(path) as file:
+		lines = file.readlines()[-limit:]
+	entries = []
+	for line in reversed(lines):
+		try:
+			entries.append(json.loads(line))
+		except ValueError:
+			# A partially written line.
+			continue
+	return entries
+
+"""
+Profiles the queries of every request when settings.SQL_PROFILING is True. Requests that exceed one of the thresholds
+(see SQL_PROFILING_DEFAULTS) are appended to settings.SQL_PROFILING_LOG_FILE as a line of JSON and logged as a warning.
+
+Queries run while a StreamingHttpResponse is being streamed are not included.
+"""
+class SQLProfilingMiddleware:
+
+	def __init__(self, get_response):
+		if not getattr(settings, "SQL_PROFILING", False):
+			raise MiddlewareNotUsed()
+		self.get_response = get_response
+
+	def __call__(self, request):
+		profiler = QueryProfiler()
+		start = time.perf_counter()
+		with ExitStack() as stack:
+			for connection in connections.all():
+				stack.enter_context(connection.execute_wrapper(profiler))
+			response = self.get_response(request)
+		duration_ms = (time.perf_counter() - start) * 1000
+
+		exceeded = profiler.get_exceeded_thresholds()
+		if len(exceeded) > 0:
+			entry = profiler.build_entry(request, response, duration_ms, exceeded)
+			logger.warning(
+				f"{entry['method']} {entry['path']}: {entry['num_queries']} queries "
+				f"({entry['num_duplicate_queries']} duplicate), {entry['db_time_ms']}ms in the database."
+			)
+			write_sql_profiling_entry(entry)
+		return response
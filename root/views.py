@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, redirect, reverse
 from django.utils import timezone
 from decimal import Decimal
 import random
 
+from root.profiling import get_sql_profiling_setting, read_sql_profiling_entries
 from tournament.models import (
 	TournamentInvite,
 	TournamentPlayer,
@@ -53,6 +56,19 @@ def error_view(request, *args, **kwargs):
 	context['message'] = message
 	return render(request=request, template_name="root/error.html", context=context)
 
+"""
+The most recent requests recorded by root.profiling.SQLProfilingMiddleware. Staff only.
+"""
+@staff_member_required
+def sql_profiling_view(request):
+	context = {}
+	context['enabled'] = getattr(settings, "SQL_PROFILING", False)
+	context['entries'] = read_sql_profiling_entries()
+	context['max_queries'] = get_sql_profiling_setting("SQL_PROFILING_MAX_QUERIES")
+	context['max_duplicate_queries'] = get_sql_profiling_setting("SQL_PROFILING_MAX_DUPLICATE_QUERIES")
+	context['max_db_time_ms'] = get_sql_profiling_setting("SQL_PROFILING_MAX_DB_TIME_MS")
+	return render(request=request, template_name="root/sql_profiling.html", context=context)
+
 
 
 
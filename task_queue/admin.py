@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from task_queue.models import Task
+
+class TaskAdmin(admin.ModelAdmin):
+    fieldsets = (
+        (None, {'fields': ('name', 'payload', 'status', 'attempts', 'max_attempts', 'error', 'created_at', 'run_after', 'started_at', 'completed_at')}),
+    )
+    readonly_fields = ['created_at']
+
+    list_display = ('name', 'status', 'attempts', 'created_at', 'completed_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name',)
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from task_queue.models import Task
+
+"""
+Runs queued tasks.
+
+python manage.py run_task_worker
+python manage.py run_task_worker --once
+"""
+class Command(BaseCommand):
+	help = "Run tasks from the task queue."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--once", action="store_true", help="Run every task that is ready, then exit.")
+		parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+
+	def handle(self, *args, **options):
+		while True:
+			num_tasks = Task.objects.run_pending_tasks()
+			if num_tasks > 0:
+				self.stdout.write(f"Ran {num_tasks} task(s).")
+			if options["once"]:
+				break
+			if num_tasks == 0:
+				time.sleep(options["sleep"])
@@ -0,0 +1,169 @@
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from enum import Enum
+
+from task_queue.util import get_task_handler, get_retry_delay, get_visibility_timeout
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+"""
+The error recorded on a task that was still RUNNING after the visibility timeout on its last attempt.
+"""
+STALE_TASK_ERROR = "The worker running this task stopped before it finished."
+
+"""
+The states a Task can be in.
+PENDING: Waiting to be run (or waiting for a retry).
+RUNNING: Claimed by a worker. Claimed again if it's still RUNNING after the visibility timeout.
+COMPLETED: The handler finished without raising.
+FAILED: The handler raised on every attempt.
+"""
+class TaskStatus(Enum):
+	PENDING = 0
+	RUNNING = 1
+	COMPLETED = 2
+	FAILED = 3
+
+class TaskManager(models.Manager):
+
+	"""
+	Add a task to the queue.
+
+	If settings.TASK_QUEUE_ALWAYS_EAGER is True, the task is run in-process before returning. Tests use this so
+	nothing depends on a worker.
+	"""
+	def enqueue(self, name, payload, max_attempts=DEFAULT_MAX_ATTEMPTS):
+		return self.enqueue_tasks([(name, payload)], max_attempts)[0]
+
+	"""
+	Add multiple tasks to the queue in a single query.
+
+	tasks: list of (name, payload) tuples.
+	"""
+	def enqueue_tasks(self, tasks, max_attempts=DEFAULT_MAX_ATTEMPTS):
+		now = timezone.now()
+		created_tasks = self.bulk_create([
+			self.model(
+				name = name,
+				payload = payload,
+				max_attempts = max_attempts,
+				run_after = now
+			) for name, payload in tasks
+		])
+		if getattr(settings, "TASK_QUEUE_ALWAYS_EAGER", False):
+			for task in created_tasks:
+				self.run_task(task)
+		return created_tasks
+
+	"""
+	Claim the oldest PENDING task that is ready to run and mark it RUNNING. Locked rows are skipped so multiple
+	workers never claim the same task.
+
+	A task that is still RUNNING after the visibility timeout (see task_queue.util.get_visibility_timeout) belonged
+	to a worker that crashed or was killed, so it is claimed again as another attempt. If that was its last attempt it
+	is marked FAILED instead.
+
+	Returns None if there is nothing to run.
+	"""
+	def claim_next_task(self):
+		while True:
+			with transaction.atomic(using=self._db):
+				now = timezone.now()
+				task = super().get_queryset().select_for_update(skip_locked=True).filter(
+					models.Q(status = TaskStatus.PENDING.value, run_after__lte = now)
+					| models.Q(status = TaskStatus.RUNNING.value, started_at__lte = now - get_visibility_timeout())
+				).order_by("run_after", "id").first()
+				if task == None:
+					return None
+				if task.status == TaskStatus.RUNNING.value and task.attempts >= task.max_attempts:
+					task.status = TaskStatus.FAILED.value
+					task.error = STALE_TASK_ERROR
+					task.save(using=self._db)
+					continue
+				task.status = TaskStatus.RUNNING.value
+				task.attempts += 1
+				task.started_at = now
+				task.save(using=self._db)
+				return task
+
+	"""
+	Run a task and record the outcome.
+
+	If the handler raises, the task goes back to PENDING with a delay until it has been attempted max_attempts
+	times. After that it is FAILED.
+	"""
+	def run_task(self, task):
+		if task.status != TaskStatus.RUNNING.value:
+			task.status = TaskStatus.RUNNING.value
+			task.attempts += 1
+			task.started_at = timezone.now()
+		try:
+			handler = get_task_handler(task.name)
+			if handler == None:
+				raise ValueError(f"No handler is registered for '{task.name}'.")
+			handler(**task.payload)
+			task.status = TaskStatus.COMPLETED.value
+			task.completed_at = timezone.now()
+			task.error = None
+		except Exception as e:
+			task.error = f"{type(e).__name__}: {e}"
+			if task.attempts < task.max_attempts:
+				task.status = TaskStatus.PENDING.value
+				task.run_after = timezone.now() + get_retry_delay(task.attempts)
+			else:
+				task.status = TaskStatus.FAILED.value
+		task.save(using=self._db)
+		return task
+
+	"""
+	Run tasks until there are none ready. Returns the number of tasks that were run.
+
+	max_tasks: Stop after this many. None to run until the queue is empty.
+	"""
+	def run_pending_tasks(self, max_tasks=None):
+		num_tasks = 0
+		while max_tasks == None or num_tasks < max_tasks:
+			task = self.claim_next_task()
+			if task == None:
+				break
+			self.run_task(task)
+			num_tasks += 1
+		return num_tasks
+
+	def get_tasks_by_status(self, status):
+		return super().get_queryset().filter(status=status.value)
+
+
+"""
+A unit of background work.
+
+name: The name the handler was registered with (see task_queue.util.register_task).
+payload: Keyword arguments passed to the handler. Must be JSON serializable.
+run_after: The task won't be claimed before this. Pushed back after a failed attempt.
+error: The exception from the most recent failed attempt.
+"""
+class Task(models.Model):
+	name						= models.CharField(max_length=254, blank=False, null=False)
+	payload						= models.JSONField(default=dict)
+	status						= models.IntegerField(default=TaskStatus.PENDING.value)
+	attempts					= models.IntegerField(default=0)
+	max_attempts				= models.IntegerField(default=DEFAULT_MAX_ATTEMPTS)
+	error						= models.TextField(null=True, blank=True)
+	created_at					= models.DateTimeField(auto_now_add=True)
+	run_after					= models.DateTimeField(default=timezone.now)
+	started_at					= models.DateTimeField(null=True, blank=True)
+	completed_at				= models.DateTimeField(null=True, blank=True)
+
+	objects = TaskManager()
+
+	class Meta:
+		indexes = [
+			models.Index(fields=["status", "run_after"]),
+		]
+
+	def __str__(self):
+		return f"{self.name} ({TaskStatus(self.status).name})"
+
+	def get_status(self):
+		return TaskStatus(self.status)
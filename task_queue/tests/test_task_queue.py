@@ -0,0 +1,226 @@
+import datetime
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from io import StringIO
+
+from task_queue.models import STALE_TASK_ERROR, Task, TaskStatus
+from task_queue.util import register_task
+from tournament.models import Tournament, TournamentResultsEmail
+from tournament.test_util import (
+	build_tournament,
+	build_structure,
+	add_players_to_tournament,
+	eliminate_players_and_complete_tournament
+)
+from tournament.util import EMAIL_TOURNAMENT_RESULTS_TASK, REFRESH_TOURNAMENT_TOTALS_TASK
+from tournament_analytics.models import TournamentTotals
+from user.test_util import create_users
+
+# Arguments the test handlers were called with.
+handled_payloads = []
+
+@register_task("task_queue.tests.record")
+def record(value):
+	handled_payloads.append(value)
+
+@register_task("task_queue.tests.fail")
+def fail(value):
+	raise ValueError(f"Failed {value}")
+
+
+class TaskQueueTestCase(TransactionTestCase):
+
+	# Reset primary keys after each test function run
+	reset_sequences = True
+
+	def setUp(self):
+		handled_payloads.clear()
+
+	"""
+	Queued tasks are not run until a worker picks them up.
+	"""
+	def test_enqueue_and_run_pending_tasks(self):
+		task = Task.objects.enqueue("task_queue.tests.record", {'value': 1})
+		Task.objects.enqueue("task_queue.tests.record", {'value': 2})
+		self.assertEqual(task.get_status(), TaskStatus.PENDING)
+		self.assertEqual(handled_payloads, [])
+
+		num_tasks = Task.objects.run_pending_tasks()
+
+		self.assertEqual(num_tasks, 2)
+		self.assertEqual(handled_payloads, [1, 2])
+		task = Task.objects.get(pk=task.id)
+		self.assertEqual(task.get_status(), TaskStatus.COMPLETED)
+		self.assertEqual(task.attempts, 1)
+		self.assertTrue(task.completed_at != None)
+
+		# Nothing left to run.
+		self.assertEqual(Task.objects.run_pending_tasks(), 0)
+
+	"""
+	A failing task is retried later until it runs out of attempts.
+	"""
+	def test_failed_task_is_retried_then_marked_failed(self):
+		task = Task.objects.enqueue("task_queue.tests.fail", {'value': 1}, max_attempts=2)
+
+		Task.objects.run_pending_tasks()
+		task = Task.objects.get(pk=task.id)
+		self.assertEqual(task.get_status(), TaskStatus.PENDING)
+		self.assertEqual(task.attempts, 1)
+		self.assertEqual(task.error, "ValueError: Failed 1")
+		self.assertTrue(task.run_after > timezone.now())
+
+		# Not ready for a retry yet.
+		self.assertEqual(Task.objects.run_pending_tasks(), 0)
+
+		# Make it ready.
+		task.run_after = timezone.now()
+		task.save()
+		Task.objects.run_pending_tasks()
+		task = Task.objects.get(pk=task.id)
+		self.assertEqual(task.get_status(), TaskStatus.FAILED)
+		self.assertEqual(task.attempts, 2)
+
+	"""
+	A task with no registered handler fails.
+	"""
+	def test_task_without_handler_fails(self):
+		task = Task.objects.enqueue("does.not.exist", {}, max_attempts=1)
+		Task.objects.run_pending_tasks()
+		task = Task.objects.get(pk=task.id)
+		self.assertEqual(task.get_status(), TaskStatus.FAILED)
+		self.assertEqual(task.error, "ValueError: No handler is registered for 'does.not.exist'.")
+
+	"""
+	A task left RUNNING by a worker that died is claimed again after the visibility timeout, and marked FAILED if that
+	was its last attempt.
+	"""
+	@override_settings(TASK_QUEUE_VISIBILITY_TIMEOUT=60)
+	def test_stale_running_task_is_claimed_again(self):
+		task = Task.objects.enqueue("task_queue.tests.record", {'value': 1}, max_attempts=2)
+		last_attempt = Task.objects.enqueue("task_queue.tests.record", {'value': 2}, max_attempts=1)
+
+		# A worker claims both tasks and dies before running them.
+		self.assertEqual(Task.objects.claim_next_task().id, task.id)
+		self.assertEqual(Task.objects.claim_next_task().id, last_attempt.id)
+		self.assertEqual(Task.objects.run_pending_tasks(), 0)
+
+		# Still within the visibility timeout.
+		Task.objects.filter(pk=task.id).update(started_at=timezone.now() - datetime.timedelta(seconds=30))
+		self.assertEqual(Task.objects.run_pending_tasks(), 0)
+
+		Task.objects.all().update(started_at=timezone.now() - datetime.timedelta(seconds=61))
+		self.assertEqual(Task.objects.run_pending_tasks(), 1)
+		self.assertEqual(handled_payloads, [1])
+		task = Task.objects.get(pk=task.id)
+		self.assertEqual(task.get_status(), TaskStatus.COMPLETED)
+		self.assertEqual(task.attempts, 2)
+		last_attempt = Task.objects.get(pk=last_attempt.id)
+		self.assertEqual(last_attempt.get_status(), TaskStatus.FAILED)
+		self.assertEqual(last_attempt.error, STALE_TASK_ERROR)
+		self.assertEqual(last_attempt.attempts, 1)
+
+	"""
+	With TASK_QUEUE_ALWAYS_EAGER tasks run as soon as they are queued.
+	"""
+	@override_settings(TASK_QUEUE_ALWAYS_EAGER=True)
+	def test_eager_tasks_run_immediately(self):
+		task = Task.objects.enqueue("task_queue.tests.record", {'value': 1})
+		self.assertEqual(handled_payloads, [1])
+		self.assertEqual(task.get_status(), TaskStatus.COMPLETED)
+		self.assertEqual(Task.objects.get(pk=task.id).get_status(), TaskStatus.COMPLETED)
+
+	"""
+	The worker command runs everything that is ready.
+	"""
+	def test_run_task_worker_command(self):
+		Task.objects.enqueue("task_queue.tests.record", {'value': 1})
+		out = StringIO()
+		call_command("run_task_worker", "--once", stdout=out)
+		self.assertEqual(handled_payloads, [1])
+		self.assertIn("Ran 1 task(s).", out.getvalue())
+
+	"""
+	Completing a Tournament queues the results email and a TournamentTotals refresh for every player instead of
+	doing them during the request.
+	"""
+	def test_complete_tournament_queues_email_and_totals_refresh(self):
+		users = create_users(identifiers = ["cat", "dog", "monkey"])
+		cat = users[0]
+		structure = build_structure(
+			admin = cat,
+			buyin_amount = 100,
+			bounty_amount = 10,
+			payout_percentages = [100],
+			allow_rebuys = False
+		)
+		tournament = build_tournament(structure)
+		add_players_to_tournament(
+			users = users,
+			tournament = tournament
+		)
+		Tournament.objects.start_tournament(user = cat, tournament_id = tournament.id)
+		eliminate_players_and_complete_tournament(
+			admin = cat,
+			tournament = tournament
+		)
+
+		# Nothing was sent or built during completion.
+		self.assertEqual(len(mail.outbox), 0)
+		self.assertEqual(TournamentTotals.objects.all().count(), 0)
+		self.assertEqual(Task.objects.filter(name = EMAIL_TOURNAMENT_RESULTS_TASK).count(), 1)
+		self.assertEqual(Task.objects.filter(name = REFRESH_TOURNAMENT_TOTALS_TASK).count(), 3)
+
+		Task.objects.run_pending_tasks()
+
+		self.assertEqual(Task.objects.get_tasks_by_status(TaskStatus.COMPLETED).count(), 4)
+		# Every player gets their own email.
+		self.assertEqual(len(mail.outbox), 3)
+		self.assertEqual(
+			sorted([message.to[0] for message in mail.outbox]),
+			sorted([user.email for user in users])
+		)
+		for user in users:
+			tournament_totals = TournamentTotals.objects.filter(user = user)
+			self.assertEqual(tournament_totals.count(), 1)
+			self.assertFalse(TournamentTotals.objects.do_tournament_totals_need_rebuild(user))
+
+	"""
+	If the completion is undone before the worker runs the email task, the task does nothing.
+	"""
+	@override_settings(TASK_QUEUE_ALWAYS_EAGER=False)
+	def test_email_task_after_undo_complete_tournament(self):
+		users = create_users(identifiers = ["cat", "dog", "monkey"])
+		cat = users[0]
+		structure = build_structure(
+			admin = cat,
+			buyin_amount = 100,
+			bounty_amount = 10,
+			payout_percentages = [100],
+			allow_rebuys = False
+		)
+		tournament = build_tournament(structure)
+		add_players_to_tournament(
+			users = users,
+			tournament = tournament
+		)
+		Tournament.objects.start_tournament(user = cat, tournament_id = tournament.id)
+		eliminate_players_and_complete_tournament(
+			admin = cat,
+			tournament = tournament
+		)
+		Tournament.objects.undo_complete_tournament(user = cat, tournament_id = tournament.id)
+
+		Task.objects.run_pending_tasks()
+
+		email_task = Task.objects.get(name = EMAIL_TOURNAMENT_RESULTS_TASK)
+		self.assertEqual(email_task.get_status(), TaskStatus.COMPLETED)
+		self.assertEqual(len(mail.outbox), 0)
+		self.assertFalse(TournamentResultsEmail.objects.get_results_emails_for_tournament(tournament.id).exists())
+
+		# Sending directly fails cleanly too.
+		with self.assertRaisesMessage(ValidationError, "The tournament is not completed."):
+			TournamentResultsEmail.objects.send_results_emails(tournament.id)
@@ -0,0 +1,43 @@
+import datetime
+
+from django.conf import settings
+
+"""
+Task handlers by name. Populated by the register_task decorator in each app's tasks.py.
+"""
+TASK_HANDLERS = {}
+
+"""
+Register a function as the handler for tasks with the given name. The handler is called with the task payload
+as keyword arguments.
+
+@register_task("tournament.email_tournament_results")
+def email_tournament_results(tournament_id):
+	...
+"""
+def register_task(name):
+	def decorator(handler):
+		TASK_HANDLERS[name] = handler
+		return handler
+	return decorator
+
+"""
+Returns None if there is no handler registered for that name.
+"""
+def get_task_handler(name):
+	return TASK_HANDLERS.get(name)
+
+"""
+How long to wait before retrying a task that failed 'attempts' times. 30s, 60s, 120s, ...
+"""
+def get_retry_delay(attempts):
+	return datetime.timedelta(seconds = 30 * (2 ** (attempts - 1)))
+
+"""
+A RUNNING task whose started_at is older than this is assumed to belong to a worker that crashed or was killed, and
+can be claimed again. Must be longer than the slowest task. Set with settings.TASK_QUEUE_VISIBILITY_TIMEOUT (seconds).
+"""
+DEFAULT_VISIBILITY_TIMEOUT = 15 * 60
+
+def get_visibility_timeout():
+	return datetime.timedelta(seconds = getattr(settings, "TASK_QUEUE_VISIBILITY_TIMEOUT", DEFAULT_VISIBILITY_TIMEOUT))
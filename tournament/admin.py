@@ -4,11 +4,15 @@ from .models import (
     TournamentStructure,
     Tournament,
     TournamentPlayer,
+    TournamentPlayerLedger,
     TournamentElimination,
     TournamentInvite,
     TournamentPlayerResult,
     TournamentRebuy,
-    TournamentSplitElimination
+    TournamentResultsEmail,
+    TournamentSplitElimination,
+    TournamentSummary,
+    UserTournamentResultsVersion
 )
 
 
@@ -110,6 +114,29 @@ class TournamentRebuyAdmin(admin.ModelAdmin):
 
 admin.site.register(TournamentRebuy, TournamentRebuyAdmin)
 
+class TournamentPlayerLedgerAdmin(admin.ModelAdmin):
+    fieldsets = (
+        (None, {'fields': ('player', 'eliminations', 'split_eliminations', 'times_eliminated', 'rebuys')}),
+    )
+    readonly_fields = ['player']
+
+    list_display = ('player', 'eliminations', 'split_eliminations', 'times_eliminated', 'rebuys')
+
+
+admin.site.register(TournamentPlayerLedger, TournamentPlayerLedgerAdmin)
+
+class UserTournamentResultsVersionAdmin(admin.ModelAdmin):
+
+    fieldsets = (
+        (None, {'fields': ('user', 'version')}),
+    )
+    readonly_fields = ['user']
+
+    list_display = ('user', 'version')
+
+
+admin.site.register(UserTournamentResultsVersion, UserTournamentResultsVersionAdmin)
+
 class TournamentPlayerResultAdmin(admin.ModelAdmin):
 
     fieldsets = (
@@ -122,12 +149,26 @@ class TournamentPlayerResultAdmin(admin.ModelAdmin):
 
 admin.site.register(TournamentPlayerResult, TournamentPlayerResultAdmin)
 
+class TournamentSummaryAdmin(admin.ModelAdmin):
 
+    fieldsets = (
+        (None, {'fields': ('tournament', 'results_version', 'data')}),
+    )
+    readonly_fields = ['tournament']
 
+    list_display = ('tournament', 'results_version')
 
 
+admin.site.register(TournamentSummary, TournamentSummaryAdmin)
 
+class TournamentResultsEmailAdmin(admin.ModelAdmin):
 
+    fieldsets = (
+        (None, {'fields': ('tournament', 'user', 'status', 'attempts', 'error', 'sent_at')}),
+    )
+    readonly_fields = ['tournament', 'user']
 
+    list_display = ('tournament', 'user', 'status', 'attempts', 'sent_at')
 
 
+admin.site.register(TournamentResultsEmail, TournamentResultsEmailAdmin)
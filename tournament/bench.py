@@ -0,0 +1,370 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+from django.core.cache import cache
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from root.profiling import count_duplicate_queries
+from tournament.models import (
+	Tournament,
+	TournamentPlayer,
+	TournamentPlayerResult,
+	TournamentSummary,
+)
+from tournament.test_util import (
+	add_players_to_tournament,
+	build_structure,
+	build_tournament,
+	eliminate_all_players_except,
+	eliminate_player,
+	rebuy_for_test,
+	split_eliminate_player,
+)
+from tournament_analytics.models import TournamentTotals
+from tournament_group.models import TournamentGroup
+from user.test_util import create_users
+
+"""
+The size of the synthetic data set the benchmarks run against.
+
+num_users: Users that can be picked as players. The admin plays in every tournament.
+num_tournaments: Completed tournaments. One more tournament is left active (everyone but one player eliminated) for
+	the completion and active tournament view benchmarks.
+players_per_tournament: Players in each tournament, including the admin.
+rebuys_per_tournament: Rebuys spread over the players of each tournament.
+split_eliminations_per_tournament: How many of the eliminations in each tournament are split eliminations.
+num_groups: TournamentGroups. Every group has every user and the completed tournaments are spread evenly over them.
+seed: Seed for picking players. The same config always generates the same data set.
+"""
+@dataclass
+class BenchConfig:
+	num_users: int = 20
+	num_tournaments: int = 10
+	players_per_tournament: int = 8
+	rebuys_per_tournament: int = 4
+	split_eliminations_per_tournament: int = 2
+	num_groups: int = 2
+	seed: int = 0
+
+"""
+The objects generated by seed_bench_data. 'client' is a django.test.Client logged in as the admin.
+"""
+@dataclass
+class BenchData:
+	admin: object
+	users: list
+	completed_tournaments: list
+	active_tournament: object
+	groups: list
+	client: object
+
+"""
+A single benchmark.
+
+setup: Called before every run, outside of the measurement. Receives the BenchData.
+run: The code being measured. Receives the BenchData.
+"""
+@dataclass
+class BenchScenario:
+	name: str
+	run: object
+	setup: object = None
+
+"""
+The measurements for one BenchScenario.
+
+queries: Number of queries executed by one run.
+duplicate_queries: Number of those queries that have the same fingerprint (see root.profiling.build_sql_fingerprint) as an earlier
+	query in the same run. A number that grows with the data set usually means a query is being run in a loop.
+wall_time_ms: Median wall time over the timed runs.
+peak_memory_kb: Peak memory allocated by one run, measured with tracemalloc.
+"""
+@dataclass
+class BenchResult:
+	name: str
+	queries: int
+	duplicate_queries: int
+	wall_time_ms: float
+	peak_memory_kb: float
+
+"""
+A change in one metric of a scenario between two reports.
+"""
+@dataclass
+class BenchComparison:
+	name: str
+	metric: str
+	previous: float
+	current: float
+
+	def get_change_percent(self):
+		if self.previous == 0:
+			return 0.0 if self.current == 0 else 100.0
+		return (self.current - self.previous) / self.previous * 100
+
+"""
+Generate the data set described by 'config' with the tournament/test_util.py helpers, so the tournaments go through
+the same code paths (joining, rebuys, eliminations, completion) as real ones.
+
+Passwords are hashed with MD5 while seeding. The default hasher would take most of the time.
+"""
+@override_settings(PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"])
+def seed_bench_data(config):
+	if config.players_per_tournament > config.num_users:
+		raise ValueError("There must be at least as many users as players per tournament.")
+	if config.players_per_tournament < 2:
+		raise ValueError("There must be at least 2 players per tournament.")
+	rng = random.Random(config.seed)
+	run_id = int(time.time() * 1000)
+	users = create_users([f"bench{run_id}-{i}" for i in range(0, config.num_users)])
+	admin = users[0]
+	structure = build_structure(
+		admin = admin,
+		buyin_amount = 100,
+		bounty_amount = 10,
+		payout_percentages = (60, 30, 10),
+		allow_rebuys = True
+	)
+
+	completed_tournaments = []
+	for i in range(0, config.num_tournaments + 1):
+		tournament = build_tournament(structure, admin_user = admin)
+		add_players_to_tournament(rng.sample(users[1:], config.players_per_tournament - 1), tournament)
+		Tournament.objects.start_tournament(user = admin, tournament_id = tournament.id)
+		players = TournamentPlayer.objects.get_tournament_players(tournament.id)
+		# players[0] wins. Everyone else can be eliminated and rebuy.
+		winner = players[0]
+		for j in range(0, config.rebuys_per_tournament):
+			player = players[1 + j % (len(players) - 1)]
+			eliminate_player(
+				tournament_id = tournament.id,
+				eliminator_id = winner.id,
+				eliminatee_id = player.id
+			)
+			rebuy_for_test(tournament.id, player.id)
+
+		# Split eliminations need two eliminators that are still in. Keep players[0] and players[1] in until the end.
+		num_split_eliminations = min(config.split_eliminations_per_tournament, len(players) - 2)
+		for player in players[2:2 + num_split_eliminations]:
+			split_eliminate_player(
+				tournament_id = tournament.id,
+				eliminator_ids = [players[0].id, players[1].id],
+				eliminatee_id = player.id
+			)
+		eliminate_all_players_except(
+			players = [player for player in players if player not in players[2:2 + num_split_eliminations]],
+			except_player = winner,
+			tournament = tournament
+		)
+		if i < config.num_tournaments:
+			Tournament.objects.complete_tournament(user = admin, tournament_id = tournament.id)
+			completed_tournaments.append(Tournament.objects.get_by_id(tournament.id))
+		else:
+			active_tournament = Tournament.objects.get_by_id(tournament.id)
+
+	groups = []
+	for i in range(0, config.num_groups):
+		group = TournamentGroup.objects.create_tournament_group(admin = admin, title = f"Bench group {i}")
+		group = TournamentGroup.objects.add_users_to_group(admin = admin, group = group, users = users[1:])
+		tournaments = completed_tournaments[i::config.num_groups]
+		if len(tournaments) > 0:
+			group = TournamentGroup.objects.add_tournaments_to_group(admin = admin, group = group, tournaments = tournaments)
+		groups.append(group)
+
+	client = Client(SERVER_NAME = "localhost")
+	client.force_login(admin)
+
+	return BenchData(
+		admin = admin,
+		users = users,
+		completed_tournaments = completed_tournaments,
+		active_tournament = active_tournament,
+		groups = groups,
+		client = client
+	)
+
+"""
+GET 'url' as the admin of the data set (data.client is logged in as them). Raises if the response isn't a 200.
+"""
+def get_view(data, url):
+	response = data.client.get(url)
+	if response.status_code != 200:
+		raise ValueError(f"GET {url} returned {response.status_code}.")
+	return response
+
+def delete_results(data):
+	TournamentPlayerResult.objects.filter(tournament = data.completed_tournaments[-1]).delete()
+
+"""
+The hot paths that are benchmarked.
+"""
+def build_bench_scenarios():
+	return [
+		BenchScenario(
+			name = "complete_tournament",
+			run = lambda data: Tournament.objects.complete_tournament(
+				user = data.admin,
+				tournament_id = data.active_tournament.id
+			)
+		),
+		BenchScenario(
+			name = "build_results_for_tournament",
+			setup = delete_results,
+			run = lambda data: TournamentPlayerResult.objects.build_results_for_tournament(data.completed_tournaments[-1].id)
+		),
+		BenchScenario(
+			name = "build_tournament_summary",
+			run = lambda data: TournamentSummary.objects.build_summary(data.completed_tournaments[-1].id)
+		),
+		BenchScenario(
+			name = "generate_tournament_totals",
+			run = lambda data: TournamentTotals.objects.generate_tournament_totals_retroactively_for_user(data.admin)
+		),
+		BenchScenario(
+			name = "get_or_build_tournament_totals",
+			run = lambda data: TournamentTotals.objects.get_or_build_tournament_totals_by_user_id(data.admin.id)
+		),
+		BenchScenario(
+			name = "build_group_data",
+			run = lambda data: TournamentGroup.objects.build_group_data(data.groups[0])
+		),
+		BenchScenario(
+			name = "view:tournament_view (completed)",
+			run = lambda data: get_view(data, reverse("tournament:tournament_view", kwargs = {'pk': data.completed_tournaments[-1].id}))
+		),
+		BenchScenario(
+			name = "view:tournament_view (active)",
+			run = lambda data: get_view(data, reverse("tournament:tournament_view", kwargs = {'pk': data.active_tournament.id}))
+		),
+		BenchScenario(
+			name = "view:tournament_list",
+			run = lambda data: get_view(data, reverse("tournament:tournament_list"))
+		),
+		BenchScenario(
+			name = "view:root",
+			run = lambda data: get_view(data, reverse("home"))
+		),
+		BenchScenario(
+			name = "view:tournament_group_stats",
+			run = lambda data: get_view(data, reverse("tournament_group:fetch_group_stats_data", kwargs = {'pk': data.groups[0].id}))
+		),
+	]
+
+"""
+Call scenario.setup and scenario.run inside a savepoint that is rolled back, so every run starts from the same data
+and an empty cache. Returns the result of 'measure' (called with scenario.run).
+"""
+def run_isolated(scenario, data, measure):
+	cache.clear()
+	with transaction.atomic():
+		if scenario.setup != None:
+			scenario.setup(data)
+		result = measure(lambda: scenario.run(data))
+		transaction.set_rollback(True)
+	return result
+
+"""
+Measure the queries and peak memory of one run.
+"""
+def measure_queries_and_memory(function):
+	# The query log is capped (see BaseDatabaseWrapper.queries_limit). Seeding fills it, so start from an empty log.
+	reset_queries()
+	tracemalloc.start()
+	try:
+		with CaptureQueriesContext(connection) as context:
+			function()
+		_, peak = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	return context.captured_queries, peak
+
+"""
+Measure the wall time of one run. This run is separate from the query and memory run since both slow it down.
+"""
+def measure_wall_time(function):
+	start = time.perf_counter()
+	function()
+	return (time.perf_counter() - start) * 1000
+
+"""
+Run every scenario against 'data'. The queries and memory are measured on the first run and the wall time is the
+median of 'repeat' more runs.
+"""
+def run_bench(data, scenarios, repeat=5):
+	results = []
+	for scenario in scenarios:
+		queries, peak = run_isolated(scenario, data, measure_queries_and_memory)
+		timings = [run_isolated(scenario, data, measure_wall_time) for i in range(0, repeat)]
+		results.append(
+			BenchResult(
+				name = scenario.name,
+				queries = len(queries),
+				duplicate_queries = count_duplicate_queries(queries),
+				wall_time_ms = round(statistics.median(timings), 3) if len(timings) > 0 else 0.0,
+				peak_memory_kb = round(peak / 1024, 1)
+			)
+		)
+	return results
+
+"""
+Build the JSON report for a benchmark run.
+Format:
+{
+	"created_at": "2023-03-01T12:00:00+00:00",
+	"config": {"num_users": 20, ...},
+	"results": {
+		"complete_tournament": {"queries": 120, "duplicate_queries": 3, "wall_time_ms": 45.2, "peak_memory_kb": 310.4},
+		...
+	}
+}
+"""
+def build_bench_report(config, results):
+	return {
+		"created_at": timezone.now().isoformat(),
+		"config": asdict(config),
+		"results": {
+			result.name: {
+				"queries": result.queries,
+				"duplicate_queries": result.duplicate_queries,
+				"wall_time_ms": result.wall_time_ms,
+				"peak_memory_kb": result.peak_memory_kb,
+			} for result in results
+		}
+	}
+
+def write_bench_report(report, path):
+	with open(path, "w") as file:
+		json.dump(report, file, indent = 2)
+
+def read_bench_report(path):
+	with open(path) as file:
+		return json.load(file)
+
+"""
+Compare every metric of the scenarios that are in both reports.
+Returns a list of BenchComparison.
+"""
+def compare_bench_reports(previous, current):
+	comparisons = []
+	for name, result in current["results"].items():
+		previous_result = previous["results"].get(name)
+		if previous_result == None:
+			continue
+		for metric in ["queries", "duplicate_queries", "wall_time_ms", "peak_memory_kb"]:
+			comparisons.append(
+				BenchComparison(
+					name = name,
+					metric = metric,
+					previous = previous_result[metric],
+					current = result[metric]
+				)
+			)
+	return comparisons
@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from tournament.bench import (
+	BenchConfig,
+	build_bench_report,
+	build_bench_scenarios,
+	compare_bench_reports,
+	run_bench,
+	seed_bench_data,
+)
+
+"""
+Scenarios that are known to run a query per tournament. Remove a scenario from here once it's fixed so it can't
+regress again.
+"""
+QUERY_COUNT_GROWS_WITH_DATA = [
+	"view:tournament_list",
+	"view:root",
+]
+
+"""
+The benchmark tests. These are not part of the default test run (the module doesn't match the test*.py pattern).
+Run them with:
+
+python manage.py test tournament.bench_tests
+"""
+class BenchTestCase(TransactionTestCase):
+
+	reset_sequences = True
+
+	def run_bench_for_config(self, config):
+		with transaction.atomic():
+			data = seed_bench_data(config)
+			results = run_bench(
+				data = data,
+				scenarios = build_bench_scenarios(),
+				repeat = 1
+			)
+			transaction.set_rollback(True)
+		return {result.name: result for result in results}
+
+	"""
+	Doubling the number of tournaments and players must not change the number of queries run by any scenario.
+	"""
+	def test_query_counts_do_not_grow_with_data_set(self):
+		small = self.run_bench_for_config(
+			BenchConfig(
+				num_users = 10,
+				num_tournaments = 3,
+				players_per_tournament = 5,
+				rebuys_per_tournament = 2,
+				split_eliminations_per_tournament = 1,
+				num_groups = 1
+			)
+		)
+		large = self.run_bench_for_config(
+			BenchConfig(
+				num_users = 20,
+				num_tournaments = 6,
+				players_per_tournament = 10,
+				rebuys_per_tournament = 4,
+				split_eliminations_per_tournament = 2,
+				num_groups = 1
+			)
+		)
+
+		self.assertEqual(set(small.keys()), set(scenario.name for scenario in build_bench_scenarios()))
+		for name, result in small.items():
+			self.assertGreater(result.queries, 0)
+			self.assertGreater(result.wall_time_ms, 0)
+			self.assertGreater(result.peak_memory_kb, 0)
+			if name in QUERY_COUNT_GROWS_WITH_DATA:
+				continue
+			self.assertEqual(result.queries, large[name].queries, f"The number of queries for {name} grew with the data set.")
+
+	"""
+	The report written by the bench command can be compared with a later run, and --fail-on-query-increase fails if
+	any scenario runs more queries.
+	"""
+	def test_bench_command_compares_reports(self):
+		with tempfile.TemporaryDirectory() as directory:
+			before = os.path.join(directory, "before.json")
+			after = os.path.join(directory, "after.json")
+			options = {
+				"users": 6,
+				"tournaments": 2,
+				"players_per_tournament": 4,
+				"groups": 1,
+				"repeat": 1,
+				"only": ["build_group_data", "view:tournament_view (completed)"],
+				"stdout": open(os.devnull, "w"),
+			}
+			call_command("bench", output = before, **options)
+			with open(before) as file:
+				report = json.load(file)
+			self.assertEqual(report["config"]["num_tournaments"], 2)
+			self.assertEqual(set(report["results"].keys()), {"build_group_data", "view:tournament_view (completed)"})
+
+			# Same data set: the query counts are identical.
+			call_command("bench", output = after, compare = before, fail_on_query_increase = True, **options)
+
+			# Pretend build_group_data used to run fewer queries.
+			report["results"]["build_group_data"]["queries"] -= 1
+			with open(before, "w") as file:
+				json.dump(report, file)
+			with self.assertRaisesMessage(CommandError, "The number of queries increased for: build_group_data."):
+				call_command("bench", output = after, compare = before, fail_on_query_increase = True, **options)
+
+	def test_compare_bench_reports(self):
+		config = BenchConfig()
+		previous = build_bench_report(config, [])
+		previous["results"] = {
+			"a": {"queries": 10, "duplicate_queries": 0, "wall_time_ms": 2.0, "peak_memory_kb": 100.0},
+			"removed": {"queries": 1, "duplicate_queries": 0, "wall_time_ms": 1.0, "peak_memory_kb": 1.0},
+		}
+		current = build_bench_report(config, [])
+		current["results"] = {
+			"a": {"queries": 20, "duplicate_queries": 10, "wall_time_ms": 1.0, "peak_memory_kb": 100.0},
+			"added": {"queries": 1, "duplicate_queries": 0, "wall_time_ms": 1.0, "peak_memory_kb": 1.0},
+		}
+
+		comparisons = {comparison.metric: comparison for comparison in compare_bench_reports(previous, current)}
+		self.assertEqual(set(comparisons.keys()), {"queries", "duplicate_queries", "wall_time_ms", "peak_memory_kb"})
+		self.assertEqual(comparisons["queries"].get_change_percent(), 100.0)
+		self.assertEqual(comparisons["duplicate_queries"].get_change_percent(), 100.0)
+		self.assertEqual(comparisons["wall_time_ms"].get_change_percent(), -50.0)
+		self.assertEqual(comparisons["peak_memory_kb"].get_change_percent(), 0.0)
@@ -0,0 +1,242 @@
+import csv
+from enum import Enum
+from itertools import chain, islice
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.exceptions import ValidationError
+from django.http import StreamingHttpResponse
+
+from tournament.models import (
+	TournamentElimination,
+	TournamentPlayerResult,
+	TournamentRebuy,
+)
+from tournament.util import get_split_elimination_fraction
+
+"""
+How many rows are pulled from the database per round trip while streaming. Rows are read with
+queryset.iterator(chunk_size) so an export never holds the full history in memory.
+"""
+EXPORT_CHUNK_SIZE = 2000
+
+"""
+How many rows go into each parquet row group. Every row group is flushed to the response as soon as it is written.
+"""
+EXPORT_ROW_GROUP_SIZE = 10000
+
+"""
+The tables that can be exported.
+RESULTS: One row per TournamentPlayerResult.
+ELIMINATIONS: One row per elimination. Split eliminations have one row per eliminator.
+REBUYS: One row per TournamentRebuy.
+"""
+class ExportTable(Enum):
+	RESULTS = "results"
+	ELIMINATIONS = "eliminations"
+	REBUYS = "rebuys"
+
+"""
+The file formats an export can be written in.
+CSV: Plain text, one line per row.
+PARQUET: Columnar and compressed. Much smaller than CSV and keeps the column types.
+"""
+class ExportFormat(Enum):
+	CSV = "csv"
+	PARQUET = "parquet"
+
+"""
+The columns of each table. The order matches the values_list querysets built by the managers
+(see get_results_for_export, get_eliminations_for_export and get_rebuys_for_export).
+"""
+EXPORT_COLUMNS = {
+	ExportTable.RESULTS: [
+		("tournament_id", pa.int64()),
+		("tournament_title", pa.string()),
+		("completed_at", pa.timestamp("us", tz="UTC")),
+		("username", pa.string()),
+		("placement", pa.int32()),
+		("investment", pa.decimal128(9, 2)),
+		("placement_earnings", pa.decimal128(9, 2)),
+		("bounty_earnings", pa.decimal128(9, 2)),
+		("gross_earnings", pa.decimal128(9, 2)),
+		("net_earnings", pa.decimal128(9, 2)),
+		("is_backfill", pa.bool_()),
+	],
+	ExportTable.ELIMINATIONS: [
+		("tournament_id", pa.int64()),
+		("tournament_title", pa.string()),
+		("eliminated_at", pa.timestamp("us", tz="UTC")),
+		("eliminator_username", pa.string()),
+		("eliminatee_username", pa.string()),
+		("eliminations", pa.float64()),
+		("is_split", pa.bool_()),
+		("is_backfill", pa.bool_()),
+	],
+	ExportTable.REBUYS: [
+		("tournament_id", pa.int64()),
+		("tournament_title", pa.string()),
+		("timestamp", pa.timestamp("us", tz="UTC")),
+		("username", pa.string()),
+		("is_backfill", pa.bool_()),
+	],
+}
+
+"""
+Convert a string like 'results' to an ExportTable. Raises a ValidationError if it's not a valid table.
+"""
+def get_export_table(table):
+	try:
+		return ExportTable(table)
+	except ValueError:
+		raise ValidationError(f"Unknown export table '{table}'. Options are: {', '.join(t.value for t in ExportTable)}.")
+
+"""
+Convert a string like 'csv' to an ExportFormat. Raises a ValidationError if it's not a valid format.
+"""
+def get_export_format(file_format):
+	try:
+		return ExportFormat(file_format)
+	except ValueError:
+		raise ValidationError(f"Unknown export format '{file_format}'. Options are: {', '.join(f.value for f in ExportFormat)}.")
+
+"""
+Lazily iterate the rows of 'table' for 'users' in 'tournaments'. Every row is a tuple in the order of EXPORT_COLUMNS.
+"""
+def iter_export_rows(table, tournaments, users):
+	if table == ExportTable.RESULTS:
+		return TournamentPlayerResult.objects.get_results_for_export(
+			tournaments = tournaments,
+			users = users
+		).iterator(chunk_size = EXPORT_CHUNK_SIZE)
+	elif table == ExportTable.ELIMINATIONS:
+		eliminations, split_eliminations = TournamentElimination.objects.get_eliminations_for_export(
+			tournaments = tournaments,
+			users = users
+		)
+		# The split elimination rows have the number of eliminators in the eliminations column.
+		split_eliminations = (
+			row[:5] + (float(get_split_elimination_fraction(row[5])),) + row[6:]
+			for row in split_eliminations.iterator(chunk_size = EXPORT_CHUNK_SIZE)
+		)
+		return chain(
+			eliminations.iterator(chunk_size = EXPORT_CHUNK_SIZE),
+			split_eliminations
+		)
+	elif table == ExportTable.REBUYS:
+		return TournamentRebuy.objects.get_rebuys_for_export(
+			tournaments = tournaments,
+			users = users
+		).iterator(chunk_size = EXPORT_CHUNK_SIZE)
+	raise ValidationError(f"Unknown export table '{table}'.")
+
+"""
+A file-like object that csv.writer can write to. Returns the line instead of storing it so each row can be yielded
+straight to the response.
+"""
+class Echo:
+	def write(self, value):
+		return value
+
+"""
+Yields the CSV header and then one line per row.
+"""
+def stream_csv(table, rows):
+	writer = csv.writer(Echo())
+	yield writer.writerow([name for name, _ in EXPORT_COLUMNS[table]])
+	for row in rows:
+		yield writer.writerow(row)
+
+"""
+A write-only sink for pq.ParquetWriter. Keeps the bytes written since the last call to read_pending() so they can be
+yielded to the response as each row group is finished.
+"""
+class ParquetStreamSink:
+	def __init__(self):
+		self.pending = []
+		self.position = 0
+		self.closed = False
+
+	def write(self, data):
+		data = bytes(data)
+		self.pending.append(data)
+		self.position += len(data)
+		return len(data)
+
+	def tell(self):
+		return self.position
+
+	def flush(self):
+		pass
+
+	def close(self):
+		self.closed = True
+
+	def read_pending(self):
+		data = b"".join(self.pending)
+		self.pending = []
+		return data
+
+"""
+Yields a parquet file one row group at a time. Only EXPORT_ROW_GROUP_SIZE rows are held in memory.
+"""
+def stream_parquet(table, rows, row_group_size = EXPORT_ROW_GROUP_SIZE):
+	schema = pa.schema(EXPORT_COLUMNS[table])
+	sink = ParquetStreamSink()
+	writer = pq.ParquetWriter(sink, schema)
+	try:
+		rows = iter(rows)
+		while True:
+			batch = list(islice(rows, row_group_size))
+			if len(batch) == 0:
+				break
+			columns = list(zip(*batch))
+			writer.write_table(
+				pa.Table.from_arrays(
+					[pa.array(column, type = field.type) for column, field in zip(columns, schema)],
+					schema = schema
+				),
+				row_group_size = row_group_size
+			)
+			data = sink.read_pending()
+			if len(data) > 0:
+				yield data
+	finally:
+		writer.close()
+	yield sink.read_pending()
+
+"""
+Yields the bytes of an export of 'table' for 'users' in 'tournaments'.
+"""
+def stream_export(table, file_format, tournaments, users):
+	rows = iter_export_rows(
+		table = table,
+		tournaments = tournaments,
+		users = users
+	)
+	if file_format == ExportFormat.CSV:
+		return stream_csv(table, rows)
+	return stream_parquet(table, rows)
+
+"""
+Build a StreamingHttpResponse that downloads an export of 'table' for 'users' in 'tournaments'.
+'filename' is used without an extension.
+"""
+def build_export_response(table, file_format, tournaments, users, filename):
+	table = get_export_table(table)
+	file_format = get_export_format(file_format)
+	if file_format == ExportFormat.CSV:
+		content_type = "text/csv"
+	else:
+		content_type = "application/vnd.apache.parquet"
+	response = StreamingHttpResponse(
+		stream_export(
+			table = table,
+			file_format = file_format,
+			tournaments = tournaments,
+			users = users
+		),
+		content_type = content_type
+	)
+	response['Content-Disposition'] = f'attachment; filename="{filename}_{table.value}.{file_format.value}"'
+	return response
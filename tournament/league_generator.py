@@ -0,0 +1,376 @@
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from tournament.models import (
+	Tournament,
+	TournamentElimination,
+	TournamentPlayer,
+	TournamentPlayerLedger,
+	TournamentPlayerResult,
+	TournamentRebuy,
+	TournamentSplitElimination,
+	TournamentStructure,
+)
+from tournament_analytics.models import PlayerEliminationAnalytics, PlayerTournamentAnalytics
+from tournament_group.models import TournamentGroup
+from user.models import User
+
+"""
+The structures every league plays with: (title, buyin_amount, bounty_amount, payout_percentages, allow_rebuys)
+"""
+LEAGUE_STRUCTURES = [
+	("Rebuys and bounties", Decimal("100.00"), Decimal("10.00"), [60, 30, 10], True),
+	("Rebuys", Decimal("50.00"), None, [70, 30], True),
+	("Freezeout", Decimal("20.00"), None, [100], False),
+]
+
+"""
+The size and shape of a generated data set.
+
+num_users: Users in total. They are split evenly between the leagues.
+num_leagues: Groups of users that play together. Every league has a TournamentGroup with its users and tournaments.
+num_tournaments: Completed tournaments in total. Each one is played by a single league.
+min_players / max_players: Players per tournament, including the admin (the first user in the league).
+rebuy_probability: Chance that an eliminated player rebuys (only for structures that allow rebuys).
+split_elimination_probability: Chance that an elimination is a split elimination.
+seed: The same config (including the seed) always generates the same tournaments, players, eliminations and results.
+username_prefix: Users are named <username_prefix><n>. Their password is 'password'.
+start_date: When the first tournament of each league was played. Each league plays one tournament a day.
+batch_size: Tournaments generated and written per round of bulk inserts.
+"""
+@dataclass
+class LeagueConfig:
+	num_users: int = 1000
+	num_leagues: int = 20
+	num_tournaments: int = 10000
+	min_players: int = 6
+	max_players: int = 12
+	rebuy_probability: float = 0.2
+	split_elimination_probability: float = 0.1
+	seed: int = 0
+	username_prefix: str = "league"
+	start_date: datetime = field(default_factory = lambda: datetime(2020, 1, 1, 19, tzinfo = timezone.utc))
+	batch_size: int = 500
+
+"""
+The users, structures and TournamentGroup of one league.
+"""
+@dataclass
+class League:
+	admin_id: int
+	user_ids: list
+	structures: list
+	group: TournamentGroup
+	num_tournaments: int = 0
+
+"""
+A tournament generated in memory before it's written. Players are referred to by their index in 'user_ids'.
+
+eliminations: list of (eliminator index, eliminatee index, eliminated_at)
+split_eliminations: list of ([eliminator indexes], eliminatee index, eliminated_at)
+rebuys: list of (player index, timestamp)
+"""
+@dataclass
+class GeneratedTournament:
+	league: League
+	tournament: Tournament
+	structure: TournamentStructure
+	user_ids: list
+	eliminations: list = field(default_factory = list)
+	split_eliminations: list = field(default_factory = list)
+	rebuys: list = field(default_factory = list)
+
+def validate_league_config(config):
+	if config.num_leagues < 1:
+		raise ValidationError("There must be at least one league.")
+	if config.min_players < 2:
+		raise ValidationError("There must be at least 2 players per tournament.")
+	if config.min_players > config.max_players:
+		raise ValidationError("min_players can't be more than max_players.")
+	if config.min_players < max(len(structure[3]) for structure in LEAGUE_STRUCTURES):
+		raise ValidationError(f"There must be at least {max(len(structure[3]) for structure in LEAGUE_STRUCTURES)} players per tournament to pay out every structure.")
+	if config.num_users // config.num_leagues < config.max_players:
+		raise ValidationError(f"Every league needs at least {config.max_players} users. There are only {config.num_users // config.num_leagues}.")
+	if not 0 <= config.rebuy_probability < 1:
+		raise ValidationError("rebuy_probability must be at least 0 and less than 1.")
+	if not 0 <= config.split_elimination_probability <= 1:
+		raise ValidationError("split_elimination_probability must be between 0 and 1.")
+
+"""
+Play a tournament in memory: players are eliminated (sometimes split) one at a time until only one is left. Eliminated
+players rebuy with 'rebuy_probability' if the structure allows it.
+"""
+def simulate_tournament(generated, rng, config):
+	started_at = generated.tournament.started_at
+	now = started_at
+	remaining = list(range(0, len(generated.user_ids)))
+	while len(remaining) > 1:
+		now += timedelta(minutes = rng.randint(1, 15))
+		eliminatee = rng.choice(remaining)
+		others = [player for player in remaining if player != eliminatee]
+		if len(others) >= 2 and rng.random() < config.split_elimination_probability:
+			eliminators = rng.sample(others, min(len(others), rng.choice([2, 2, 3])))
+			generated.split_eliminations.append((eliminators, eliminatee, now))
+		else:
+			generated.eliminations.append((rng.choice(others), eliminatee, now))
+		if generated.structure.allow_rebuys and rng.random() < config.rebuy_probability:
+			generated.rebuys.append((eliminatee, now + timedelta(seconds = 30)))
+		else:
+			remaining.remove(eliminatee)
+	generated.tournament.completed_at = now + timedelta(minutes = 1)
+	generated.tournament.num_buyins = len(generated.user_ids) + len(generated.rebuys)
+	generated.tournament.num_rebuys = len(generated.rebuys)
+	generated.tournament.num_eliminations = len(generated.eliminations) + len(generated.split_eliminations)
+
+def generate_users(config):
+	password = make_password("password")
+	return User.objects.bulk_create([
+		User(
+			email = f"{config.username_prefix}{i}@{config.username_prefix}.com",
+			username = f"{config.username_prefix}{i}",
+			password = password
+		) for i in range(0, config.num_users)
+	], batch_size = config.batch_size * 10)
+
+def generate_leagues(config, user_ids):
+	leagues = []
+	for i in range(0, config.num_leagues):
+		league_user_ids = user_ids[i::config.num_leagues]
+		structures = TournamentStructure.objects.bulk_create([
+			TournamentStructure(
+				title = title,
+				user_id = league_user_ids[0],
+				buyin_amount = buyin_amount,
+				bounty_amount = bounty_amount,
+				payout_percentages = payout_percentages,
+				allow_rebuys = allow_rebuys
+			) for title, buyin_amount, bounty_amount, payout_percentages, allow_rebuys in LEAGUE_STRUCTURES
+		])
+		group = TournamentGroup.objects.create(
+			admin_id = league_user_ids[0],
+			title = f"League {i}"
+		)
+		group.users.add(*league_user_ids)
+		leagues.append(
+			League(
+				admin_id = league_user_ids[0],
+				user_ids = league_user_ids,
+				structures = structures,
+				group = group
+			)
+		)
+	return leagues
+
+"""
+Build the next 'num_tournaments' tournaments in memory. The rng is only used here, in a fixed order, so the output
+only depends on the config.
+"""
+def generate_tournaments(config, rng, leagues, num_tournaments):
+	generated_tournaments = []
+	for i in range(0, num_tournaments):
+		league = leagues[rng.randrange(0, len(leagues))]
+		structure = rng.choice(league.structures)
+		num_players = rng.randint(config.min_players, config.max_players)
+		user_ids = [league.admin_id] + rng.sample(league.user_ids[1:], num_players - 1)
+		started_at = config.start_date + timedelta(days = league.num_tournaments)
+		league.num_tournaments += 1
+		generated = GeneratedTournament(
+			league = league,
+			tournament = Tournament(
+				title = f"{league.group.title} #{league.num_tournaments}",
+				admin_id = league.admin_id,
+				tournament_structure = structure,
+				started_at = started_at,
+				results_version = 1
+			),
+			structure = structure,
+			user_ids = user_ids
+		)
+		simulate_tournament(generated, rng, config)
+		generated_tournaments.append(generated)
+	return generated_tournaments
+
+"""
+TournamentElimination.eliminated_at, TournamentSplitElimination.eliminated_at and TournamentRebuy.timestamp are
+auto_now_add, so bulk_create replaces the generated timestamps with the current time. Put them back with a
+bulk_update. Placements are determined by the elimination timestamps so they have to be kept.
+
+rows: The created rows, in the same order as 'timestamps'.
+"""
+def set_generated_timestamps(model, field_name, rows, timestamps):
+	for row, timestamp in zip(rows, timestamps):
+		setattr(row, field_name, timestamp)
+	model.objects.bulk_update(rows, [field_name], batch_size = 1000)
+
+"""
+Write a batch of generated tournaments with bulk inserts: the tournaments, players, rebuys, eliminations, split
+eliminations, ledgers and results, the analytics read models and the TournamentGroup tournaments.
+
+The ledgers, results and analytics are built in memory with the same manager methods that build them when a
+tournament is completed (see TournamentPlayerLedgerManager.count_ledgers, TournamentPlayerResultManager.build_results
+and the build_analytics methods of the analytics managers).
+"""
+def write_tournaments(generated_tournaments):
+	Tournament.objects.bulk_create([generated.tournament for generated in generated_tournaments])
+
+	created_players = TournamentPlayer.objects.bulk_create([
+		TournamentPlayer(user_id = user_id, tournament = generated.tournament)
+		for generated in generated_tournaments
+		for user_id in generated.user_ids
+	])
+	# The TournamentPlayers of each generated tournament, in the same order as its 'user_ids'.
+	tournament_players = []
+	offset = 0
+	for generated in generated_tournaments:
+		tournament_players.append(created_players[offset:offset + len(generated.user_ids)])
+		offset += len(generated.user_ids)
+
+	rebuys = TournamentRebuy.objects.bulk_create([
+		TournamentRebuy(player_id = players[player].id)
+		for generated, players in zip(generated_tournaments, tournament_players)
+		for player, timestamp in generated.rebuys
+	])
+	set_generated_timestamps(
+		model = TournamentRebuy,
+		field_name = "timestamp",
+		rows = rebuys,
+		timestamps = [timestamp for generated in generated_tournaments for player, timestamp in generated.rebuys]
+	)
+	eliminations = TournamentElimination.objects.bulk_create([
+		TournamentElimination(eliminator_id = players[eliminator].id, eliminatee_id = players[eliminatee].id)
+		for generated, players in zip(generated_tournaments, tournament_players)
+		for eliminator, eliminatee, timestamp in generated.eliminations
+	])
+	set_generated_timestamps(
+		model = TournamentElimination,
+		field_name = "eliminated_at",
+		rows = eliminations,
+		timestamps = [timestamp for generated in generated_tournaments for eliminator, eliminatee, timestamp in generated.eliminations]
+	)
+	split_eliminations = TournamentSplitElimination.objects.bulk_create([
+		TournamentSplitElimination(eliminatee_id = players[eliminatee].id)
+		for generated, players in zip(generated_tournaments, tournament_players)
+		for eliminators, eliminatee, timestamp in generated.split_eliminations
+	])
+	set_generated_timestamps(
+		model = TournamentSplitElimination,
+		field_name = "eliminated_at",
+		rows = split_eliminations,
+		timestamps = [timestamp for generated in generated_tournaments for eliminators, eliminatee, timestamp in generated.split_eliminations]
+	)
+	split_eliminator_ids = [
+		[players[eliminator].id for eliminator in eliminators]
+		for generated, players in zip(generated_tournaments, tournament_players)
+		for eliminators, eliminatee, timestamp in generated.split_eliminations
+	]
+	Eliminator = TournamentSplitElimination.eliminators.through
+	Eliminator.objects.bulk_create([
+		Eliminator(
+			tournamentsplitelimination_id = split_elimination.id,
+			tournamentplayer_id = eliminator_id
+		)
+		for split_elimination, eliminator_ids in zip(split_eliminations, split_eliminator_ids)
+		for eliminator_id in eliminator_ids
+	])
+
+	ledgers = []
+	results = []
+	player_analytics = []
+	elimination_analytics = []
+	for generated, players in zip(generated_tournaments, tournament_players):
+		tournament_ledgers = {player.id: TournamentPlayerLedger(player = player) for player in players}
+		TournamentPlayerLedger.objects.count_ledgers(
+			ledgers = tournament_ledgers,
+			eliminations = [
+				(players[eliminator].id, players[eliminatee].id)
+				for eliminator, eliminatee, timestamp in generated.eliminations
+			],
+			split_eliminations = [
+				([players[eliminator].id for eliminator in eliminators], players[eliminatee].id)
+				for eliminators, eliminatee, timestamp in generated.split_eliminations
+			],
+			rebuys = [players[player].id for player, timestamp in generated.rebuys]
+		)
+		tournament_results = TournamentPlayerResult.objects.build_results(
+			tournament = generated.tournament,
+			players = players,
+			ledgers = tournament_ledgers,
+			eliminations = [
+				(players[eliminatee].id, timestamp)
+				for eliminator, eliminatee, timestamp in generated.eliminations + generated.split_eliminations
+			]
+		)
+		ledgers += tournament_ledgers.values()
+		results += tournament_results
+		player_analytics += PlayerTournamentAnalytics.objects.build_analytics(
+			results = tournament_results,
+			ledgers = tournament_ledgers
+		)
+		elimination_analytics += PlayerEliminationAnalytics.objects.build_analytics(
+			tournament_id = generated.tournament.id,
+			eliminations = [
+				(generated.user_ids[eliminator], generated.user_ids[eliminatee], 1)
+				for eliminator, eliminatee, timestamp in generated.eliminations
+			],
+			split_eliminations = [
+				([generated.user_ids[eliminator] for eliminator in eliminators], generated.user_ids[eliminatee])
+				for eliminators, eliminatee, timestamp in generated.split_eliminations
+			]
+		)
+
+	TournamentPlayerLedger.objects.bulk_create(ledgers)
+	TournamentPlayerResult.objects.bulk_create(results)
+	PlayerTournamentAnalytics.objects.bulk_create(player_analytics)
+	PlayerEliminationAnalytics.objects.bulk_create(elimination_analytics)
+	TournamentGroup.tournaments.through.objects.bulk_create([
+		TournamentGroup.tournaments.through(
+			tournamentgroup_id = generated.league.group.id,
+			tournament_id = generated.tournament.id
+		) for generated in generated_tournaments
+	])
+
+"""
+Generate the leagues described by 'config' with bulk inserts. Each batch of tournaments is written in its own
+transaction. 'on_progress' is called with the number of tournaments written after every batch.
+
+TournamentSummary and TournamentTotals aren't generated. They are built the first time they're needed, like for any
+other tournament.
+
+Returns the list of League.
+"""
+def generate_league_data(config, on_progress=None):
+	validate_league_config(config)
+	usernames = [f"{config.username_prefix}{i}" for i in range(0, config.num_users)]
+	if User.objects.filter(username__in = usernames).exists():
+		raise ValidationError(f"There are already users named {config.username_prefix}<n>. Use a different username_prefix.")
+
+	rng = random.Random(config.seed)
+	with transaction.atomic():
+		users = generate_users(config)
+		leagues = generate_leagues(config, [user.id for user in users])
+
+	num_written = 0
+	while num_written < config.num_tournaments:
+		generated_tournaments = generate_tournaments(
+			config = config,
+			rng = rng,
+			leagues = leagues,
+			num_tournaments = min(config.batch_size, config.num_tournaments - num_written)
+		)
+		with transaction.atomic():
+			write_tournaments(generated_tournaments)
+		num_written += len(generated_tournaments)
+		if on_progress != None:
+			on_progress(num_written)
+
+	for league in leagues:
+		league.group.stats_version += 1
+	TournamentGroup.objects.bulk_update([league.group for league in leagues], ["stats_version"])
+	return leagues
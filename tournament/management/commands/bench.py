@@ -0,0 +1,122 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from tournament.bench import (
+	BenchConfig,
+	build_bench_report,
+	build_bench_scenarios,
+	compare_bench_reports,
+	read_bench_report,
+	run_bench,
+	seed_bench_data,
+	write_bench_report,
+)
+
+"""
+Measures the query count, wall time and peak memory of the hot paths (completion, result building, TournamentTotals,
+group charts and the tournament, tournament list and root views) against a synthetic data set and writes a JSON report.
+
+The data set is generated inside a transaction that is rolled back when the benchmark finishes. Emails are kept in
+memory and background tasks are only queued, never run.
+
+Pass --compare with an earlier report to print what changed. With --fail-on-query-increase the command fails if any
+scenario runs more queries than it did in that report.
+
+python manage.py bench
+python manage.py bench --tournaments 100 --players-per-tournament 20 --output bench/after.json --compare bench/before.json
+"""
+class Command(BaseCommand):
+	help = "Benchmark the views and manager hot paths against a synthetic data set and write a JSON report."
+
+	def add_arguments(self, parser):
+		defaults = BenchConfig()
+		parser.add_argument("--users", type=int, default=defaults.num_users)
+		parser.add_argument("--tournaments", type=int, default=defaults.num_tournaments, help="Number of completed tournaments.")
+		parser.add_argument("--players-per-tournament", type=int, default=defaults.players_per_tournament)
+		parser.add_argument("--rebuys-per-tournament", type=int, default=defaults.rebuys_per_tournament)
+		parser.add_argument("--split-eliminations-per-tournament", type=int, default=defaults.split_eliminations_per_tournament)
+		parser.add_argument("--groups", type=int, default=defaults.num_groups)
+		parser.add_argument("--seed", type=int, default=defaults.seed)
+		parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs per scenario.")
+		parser.add_argument("--only", nargs="+", help="Only run the scenarios with these names.")
+		parser.add_argument("--output", help="Path of the JSON report. Defaults to bench_<timestamp>.json.")
+		parser.add_argument("--compare", help="Path of an earlier JSON report to compare against.")
+		parser.add_argument("--fail-on-query-increase", action="store_true", help="Fail if a scenario runs more queries than in the --compare report.")
+
+	def handle(self, *args, **options):
+		if options["fail_on_query_increase"] and options["compare"] == None:
+			raise CommandError("--fail-on-query-increase requires --compare.")
+		previous_report = None
+		if options["compare"] != None:
+			if not os.path.exists(options["compare"]):
+				raise CommandError(f"There is no report at {options['compare']}.")
+			previous_report = read_bench_report(options["compare"])
+
+		scenarios = build_bench_scenarios()
+		if options["only"] != None:
+			names = [scenario.name for scenario in scenarios]
+			for name in options["only"]:
+				if name not in names:
+					raise CommandError(f"Unknown scenario '{name}'. Options are: {', '.join(names)}.")
+			scenarios = [scenario for scenario in scenarios if scenario.name in options["only"]]
+
+		config = BenchConfig(
+			num_users = options["users"],
+			num_tournaments = options["tournaments"],
+			players_per_tournament = options["players_per_tournament"],
+			rebuys_per_tournament = options["rebuys_per_tournament"],
+			split_eliminations_per_tournament = options["split_eliminations_per_tournament"],
+			num_groups = options["groups"],
+			seed = options["seed"]
+		)
+		with override_settings(
+			EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend",
+			TASK_QUEUE_ALWAYS_EAGER = False
+		):
+			with transaction.atomic():
+				self.stdout.write(f"Generating {config.num_tournaments} tournaments of {config.players_per_tournament} players...")
+				try:
+					data = seed_bench_data(config)
+				except ValueError as e:
+					raise CommandError(e.args[0])
+				results = run_bench(
+					data = data,
+					scenarios = scenarios,
+					repeat = options["repeat"]
+				)
+				transaction.set_rollback(True)
+
+		for result in results:
+			self.stdout.write(
+				f"{result.name}: {result.queries} queries ({result.duplicate_queries} duplicate), "
+				f"{result.wall_time_ms:.3f}ms, {result.peak_memory_kb:.1f}KB"
+			)
+
+		report = build_bench_report(config, results)
+		output = options["output"]
+		if output == None:
+			output = f"bench_{timezone.now().strftime('%Y%m%d_%H%M%S')}.json"
+		if os.path.dirname(output) != "":
+			os.makedirs(os.path.dirname(output), exist_ok = True)
+		write_bench_report(report, output)
+		self.stdout.write(f"Wrote {output}")
+
+		if previous_report != None:
+			if previous_report["config"] != report["config"]:
+				self.stdout.write(self.style.WARNING("The reports were generated with different configs."))
+			query_increases = []
+			for comparison in compare_bench_reports(previous_report, report):
+				if comparison.previous == comparison.current:
+					continue
+				self.stdout.write(
+					f"{comparison.name} {comparison.metric}: {comparison.previous} -> {comparison.current} "
+					f"({comparison.get_change_percent():+.1f}%)"
+				)
+				if comparison.metric == "queries" and comparison.current > comparison.previous:
+					query_increases.append(comparison.name)
+			if options["fail_on_query_increase"] and len(query_increases) > 0:
+				raise CommandError(f"The number of queries increased for: {', '.join(query_increases)}.")
@@ -0,0 +1,161 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tournament.models import (
+	Tournament,
+	TournamentInvite,
+	TournamentPlayer,
+	TournamentPlayerResult,
+	TournamentRebuy,
+	TournamentStructure
+)
+from user.models import User
+
+BATCH_SIZE = 10000
+
+"""
+Measures the latency of the hot tournament lookups against a large, generated data set.
+
+The data is generated inside a transaction that is rolled back when the benchmark finishes, unless --keep is passed.
+
+python manage.py benchmark_tournament_lookups
+python manage.py benchmark_tournament_lookups --results 100000 --iterations 500
+"""
+class Command(BaseCommand):
+	help = "Benchmark the tournament lookups (players, invites, results and rebuys) against generated data."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--results", type=int, default=1000000, help="Number of TournamentPlayerResult rows to generate.")
+		parser.add_argument("--players-per-tournament", type=int, default=10)
+		parser.add_argument("--users", type=int, default=1000)
+		parser.add_argument("--iterations", type=int, default=200, help="Number of times each lookup is run.")
+		parser.add_argument("--keep", action="store_true", help="Keep the generated data instead of rolling it back.")
+
+	def handle(self, *args, **options):
+		with transaction.atomic():
+			samples = self.generate_data(
+				num_results = options["results"],
+				players_per_tournament = options["players_per_tournament"],
+				num_users = options["users"]
+			)
+			with connection.cursor() as cursor:
+				for model in [TournamentPlayer, TournamentInvite, TournamentPlayerResult, TournamentRebuy]:
+					cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+			lookups = {
+				"TournamentPlayer by (user, tournament)": lambda sample: TournamentPlayer.objects.get_tournament_player_by_user_id(
+					user_id = sample["user_id"],
+					tournament_id = sample["tournament_id"]
+				),
+				"TournamentInvite by (send_to, tournament)": lambda sample: list(TournamentInvite.objects.find_pending_invites(
+					send_to_user_id = sample["user_id"],
+					tournament_id = sample["tournament_id"]
+				)),
+				"TournamentPlayerResult by (tournament, user)": lambda sample: list(TournamentPlayerResult.objects.get_results_for_user_by_tournament(
+					user_id = sample["user_id"],
+					tournament_id = sample["tournament_id"]
+				)),
+				"TournamentPlayerResult by tournament": lambda sample: list(TournamentPlayerResult.objects.get_results_for_tournament(
+					tournament_id = sample["tournament_id"]
+				)),
+				"TournamentRebuy by player": lambda sample: list(TournamentRebuy.objects.filter(
+					player_id = sample["player_id"]
+				).order_by("timestamp")),
+			}
+			for name, lookup in lookups.items():
+				timings = []
+				for i in range(0, options["iterations"]):
+					sample = random.choice(samples)
+					start = time.perf_counter()
+					lookup(sample)
+					timings.append((time.perf_counter() - start) * 1000)
+				timings.sort()
+				self.stdout.write(
+					f"{name}: median {statistics.median(timings):.3f}ms, "
+					f"p95 {timings[int(len(timings) * 0.95) - 1]:.3f}ms, "
+					f"max {timings[-1]:.3f}ms"
+				)
+
+			if not options["keep"]:
+				transaction.set_rollback(True)
+
+	"""
+	Generate 'num_results' completed tournament players (each with a TournamentPlayerResult). Every player also gets
+	a TournamentInvite and every tenth player a TournamentRebuy.
+
+	Returns a list of {'user_id', 'tournament_id', 'player_id'} to run the lookups with.
+	"""
+	def generate_data(self, num_results, players_per_tournament, num_users):
+		if players_per_tournament > num_users:
+			raise ValueError("There must be at least as many users as players per tournament.")
+		self.stdout.write(f"Generating {num_results} results...")
+		run_id = int(time.time())
+		users = User.objects.bulk_create([
+			User(
+				email = f"benchmark_{run_id}_{i}@benchmark.com",
+				username = f"benchmark_{run_id}_{i}"
+			) for i in range(0, num_users)
+		], batch_size = BATCH_SIZE)
+		user_ids = [user.id for user in users]
+		structure = TournamentStructure.objects.create(
+			title = "Benchmark",
+			user = users[0],
+			buyin_amount = 100,
+			bounty_amount = None,
+			payout_percentages = [100],
+			allow_rebuys = True
+		)
+
+		samples = []
+		num_tournaments = (num_results + players_per_tournament - 1) // players_per_tournament
+		tournaments_per_batch = max(1, BATCH_SIZE // players_per_tournament)
+		now = timezone.now()
+		num_created = 0
+		while num_created < num_tournaments:
+			tournaments = Tournament.objects.bulk_create([
+				Tournament(
+					title = f"Benchmark {num_created + i}",
+					admin = users[0],
+					tournament_structure = structure,
+					started_at = now,
+					completed_at = now
+				) for i in range(0, min(tournaments_per_batch, num_tournaments - num_created))
+			])
+			num_created += len(tournaments)
+
+			players = []
+			for tournament in tournaments:
+				for user_id in random.sample(user_ids, players_per_tournament):
+					players.append(TournamentPlayer(user_id = user_id, tournament = tournament))
+			players = TournamentPlayer.objects.bulk_create(players)
+			TournamentInvite.objects.bulk_create([
+				TournamentInvite(send_to_id = player.user_id, tournament_id = player.tournament_id) for player in players
+			])
+			TournamentRebuy.objects.bulk_create([
+				TournamentRebuy(player = player) for player in players[::10]
+			])
+			TournamentPlayerResult.objects.bulk_create([
+				TournamentPlayerResult(
+					player = player,
+					tournament_id = player.tournament_id,
+					investment = 100,
+					placement = i % players_per_tournament,
+					placement_earnings = 0,
+					bounty_earnings = 0,
+					gross_earnings = 0,
+					net_earnings = -100
+				) for i, player in enumerate(players)
+			])
+			for player in random.sample(players, min(10, len(players))):
+				samples.append({
+					"user_id": player.user_id,
+					"tournament_id": player.tournament_id,
+					"player_id": player.id
+				})
+			self.stdout.write(f"{min(num_created * players_per_tournament, num_results)} / {num_results}")
+		return samples
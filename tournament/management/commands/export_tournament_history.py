@@ -0,0 +1,59 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.export import ExportFormat, ExportTable, stream_export
+from tournament.models import Tournament
+from tournament_group.models import TournamentGroup
+from user.models import User
+
+"""
+Exports the full tournament history of a user or a TournamentGroup. Writes one file per table (results, eliminations
+and rebuys) to the output directory. The rows are streamed from the database to the files, so memory use doesn't grow
+with the size of the history.
+
+python manage.py export_tournament_history --user mitch
+python manage.py export_tournament_history --group 3 --format parquet --output-dir exports/
+"""
+class Command(BaseCommand):
+	help = "Export the tournament history of a user or a tournament group to CSV or parquet files."
+
+	def add_arguments(self, parser):
+		target = parser.add_mutually_exclusive_group(required=True)
+		target.add_argument("--user", help="Username of the user to export.")
+		target.add_argument("--group", type=int, help="Id of the TournamentGroup to export.")
+		parser.add_argument("--format", choices=[f.value for f in ExportFormat], default=ExportFormat.CSV.value)
+		parser.add_argument("--tables", nargs="+", choices=[t.value for t in ExportTable], default=[t.value for t in ExportTable], help="Defaults to every table.")
+		parser.add_argument("--output-dir", default=".", help="Directory the files are written to.")
+
+	def handle(self, *args, **options):
+		if options["user"] != None:
+			user = User.objects.get_by_username(options["user"])
+			if user == None:
+				raise CommandError(f"There is no user with the username {options['user']}.")
+			tournaments = Tournament.objects.exclude(completed_at = None)
+			users = [user]
+			filename = f"{user.username}_tournament_history"
+		else:
+			tournament_group = TournamentGroup.objects.get_by_id(options["group"])
+			if tournament_group == None:
+				raise CommandError(f"There is no TournamentGroup with the id {options['group']}.")
+			tournaments = tournament_group.tournaments.exclude(completed_at = None)
+			users = tournament_group.get_users()
+			filename = f"tournament_group_{tournament_group.id}"
+
+		file_format = ExportFormat(options["format"])
+		os.makedirs(options["output_dir"], exist_ok = True)
+		for table in options["tables"]:
+			table = ExportTable(table)
+			path = os.path.join(options["output_dir"], f"{filename}_{table.value}.{file_format.value}")
+			mode = "w" if file_format == ExportFormat.CSV else "wb"
+			with open(path, mode, newline = "" if file_format == ExportFormat.CSV else None) as file:
+				for data in stream_export(
+					table = table,
+					file_format = file_format,
+					tournaments = tournaments,
+					users = users
+				):
+					file.write(data)
+			self.stdout.write(f"Wrote {path}")
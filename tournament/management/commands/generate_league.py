@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tournament.league_generator import LeagueConfig, generate_league_data
+
+"""
+Generates large, realistic leagues for load and scale testing: users, TournamentGroups and completed tournaments with
+rebuys, eliminations, split eliminations, ledgers, results and the analytics read models. Everything is written with
+bulk inserts, one batch of tournaments at a time.
+
+The same options (including --seed) always generate the same data, so a slow analytics or group query can be
+reproduced on another machine. Every user's password is 'password'.
+
+python manage.py generate_league
+python manage.py generate_league --users 5000 --leagues 100 --tournaments 50000 --seed 7 --username-prefix load
+"""
+class Command(BaseCommand):
+	help = "Generate users, groups and completed tournaments for load and scale testing."
+
+	def add_arguments(self, parser):
+		defaults = LeagueConfig()
+		parser.add_argument("--users", type=int, default=defaults.num_users)
+		parser.add_argument("--leagues", type=int, default=defaults.num_leagues, help="Number of TournamentGroups. The users are split evenly between them.")
+		parser.add_argument("--tournaments", type=int, default=defaults.num_tournaments)
+		parser.add_argument("--min-players", type=int, default=defaults.min_players)
+		parser.add_argument("--max-players", type=int, default=defaults.max_players)
+		parser.add_argument("--rebuy-probability", type=float, default=defaults.rebuy_probability)
+		parser.add_argument("--split-elimination-probability", type=float, default=defaults.split_elimination_probability)
+		parser.add_argument("--seed", type=int, default=defaults.seed)
+		parser.add_argument("--username-prefix", default=defaults.username_prefix)
+		parser.add_argument("--start-date", default=defaults.start_date.date().isoformat(), help="Date of the first tournament (YYYY-MM-DD).")
+		parser.add_argument("--batch-size", type=int, default=defaults.batch_size, help="Number of tournaments written per batch.")
+
+	def handle(self, *args, **options):
+		try:
+			start_date = datetime.strptime(options["start_date"], "%Y-%m-%d").replace(hour = 19, tzinfo = timezone.utc)
+		except ValueError:
+			raise CommandError(f"{options['start_date']} is not a valid date. Use YYYY-MM-DD.")
+		config = LeagueConfig(
+			num_users = options["users"],
+			num_leagues = options["leagues"],
+			num_tournaments = options["tournaments"],
+			min_players = options["min_players"],
+			max_players = options["max_players"],
+			rebuy_probability = options["rebuy_probability"],
+			split_elimination_probability = options["split_elimination_probability"],
+			seed = options["seed"],
+			username_prefix = options["username_prefix"],
+			start_date = start_date,
+			batch_size = options["batch_size"]
+		)
+		try:
+			generate_league_data(
+				config = config,
+				on_progress = lambda num_written: self.stdout.write(f"{num_written} / {config.num_tournaments}")
+			)
+		except ValidationError as e:
+			raise CommandError(e.messages[0])
+		self.stdout.write(f"Done. Generated {config.num_users} user(s), {config.num_leagues} league(s) and {config.num_tournaments} tournament(s).")
@@ -0,0 +1,98 @@
+import json
+import os
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.models import Tournament
+from tournament.util import (
+	iter_backfill_tournaments_from_csv,
+	iter_backfill_tournaments_from_json
+)
+from user.models import User
+
+"""
+Imports historical tournaments from a CSV or JSON lines file. See tournament.util.iter_backfill_tournaments_from_csv
+and iter_backfill_tournaments_from_json for the file formats.
+
+The file is read one tournament at a time and the tournaments are imported in batches. Each batch is its own
+transaction. After every batch the number of imported tournaments is saved to a checkpoint file, so if the import
+fails it continues after the last batch that was imported when it's run again.
+
+python manage.py import_tournaments tournaments.csv --admin mitch
+python manage.py import_tournaments tournaments.jsonl --admin mitch --batch-size 500
+"""
+class Command(BaseCommand):
+	help = "Import historical tournaments from a CSV or JSON lines file."
+
+	def add_arguments(self, parser):
+		parser.add_argument("path", help="CSV or JSON lines file.")
+		parser.add_argument("--admin", required=True, help="Username of the admin for the imported tournaments.")
+		parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to csv unless the file ends with .json or .jsonl.")
+		parser.add_argument("--batch-size", type=int, default=100, help="Number of tournaments imported in each transaction.")
+		parser.add_argument("--checkpoint", help="Checkpoint file. Defaults to <path>.checkpoint.")
+		parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and import from the start of the file.")
+
+	def handle(self, *args, **options):
+		admin = User.objects.get_by_username(options["admin"])
+		if admin == None:
+			raise CommandError(f"There is no user with the username {options['admin']}.")
+		if options["batch_size"] < 1:
+			raise CommandError("--batch-size must be at least 1.")
+		path = options["path"]
+		file_format = options["format"]
+		if file_format == None:
+			file_format = "jsonl" if os.path.splitext(path)[1] in (".json", ".jsonl") else "csv"
+		checkpoint_path = options["checkpoint"] or f"{path}.checkpoint"
+
+		num_imported = 0
+		if not options["restart"]:
+			num_imported = read_checkpoint(checkpoint_path)
+			if num_imported > 0:
+				self.stdout.write(f"Resuming after {num_imported} tournament(s).")
+
+		with open(path, newline="") as file:
+			if file_format == "csv":
+				tournaments = iter_backfill_tournaments_from_csv(file)
+			else:
+				tournaments = iter_backfill_tournaments_from_json(file)
+			tournaments = islice(tournaments, num_imported, None)
+			while True:
+				batch = list(islice(tournaments, options["batch_size"]))
+				if len(batch) == 0:
+					break
+				try:
+					Tournament.objects.import_backfill_tournaments(
+						admin = admin,
+						tournaments = batch
+					)
+				except ValidationError as e:
+					raise CommandError(
+						f"Import stopped after {num_imported} tournament(s): {e.messages[0]} "
+						f"Fix the file and run the command again to continue."
+					)
+				num_imported += len(batch)
+				write_checkpoint(checkpoint_path, num_imported)
+				self.stdout.write(f"Imported {num_imported} tournament(s).")
+
+		if os.path.exists(checkpoint_path):
+			os.remove(checkpoint_path)
+		self.stdout.write(self.style.SUCCESS(f"Done. {num_imported} tournament(s) imported."))
+
+"""
+Number of tournaments already imported according to the checkpoint file. 0 if there is no checkpoint.
+"""
+def read_checkpoint(checkpoint_path):
+	if not os.path.exists(checkpoint_path):
+		return 0
+	with open(checkpoint_path) as file:
+		return json.load(file)["imported"]
+
+"""
+Written to a temporary file first so an interrupted write can't leave a broken checkpoint.
+"""
+def write_checkpoint(checkpoint_path, num_imported):
+	with open(f"{checkpoint_path}.tmp", "w") as file:
+		json.dump({"imported": num_imported}, file)
+	os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
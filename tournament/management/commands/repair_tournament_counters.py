@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournament.models import Tournament
+
+"""
+Recomputes the live counters of each Tournament (num_buyins, num_rebuys and num_eliminations) from the
+TournamentPlayer, TournamentRebuy, TournamentElimination and TournamentSplitElimination rows. Only the tournaments
+with wrong counters are written.
+
+python manage.py repair_tournament_counters
+python manage.py repair_tournament_counters --tournament 12
+"""
+class Command(BaseCommand):
+	help = "Recompute the tournament buyin, rebuy and elimination counters from the database rows."
+
+	def add_arguments(self, parser):
+		parser.add_argument("--tournament", type=int, help="Only repair this tournament.")
+		parser.add_argument("--batch-size", type=int, default=1000, help="Number of tournaments checked in each transaction.")
+
+	def handle(self, *args, **options):
+		if options["batch_size"] < 1:
+			raise CommandError("--batch-size must be at least 1.")
+		tournament_ids = Tournament.objects.order_by("id").values_list("id", flat=True)
+		if options["tournament"] != None:
+			tournament_ids = tournament_ids.filter(id=options["tournament"])
+			if not tournament_ids.exists():
+				raise CommandError(f"There is no tournament with the id {options['tournament']}.")
+		tournament_ids = list(tournament_ids)
+
+		num_fixed = 0
+		for i in range(0, len(tournament_ids), options["batch_size"]):
+			fixed_tournaments = Tournament.objects.rebuild_counters(
+				Tournament.objects.filter(id__in=tournament_ids[i:i + options["batch_size"]])
+			)
+			for tournament in fixed_tournaments:
+				self.stdout.write(f"Fixed {tournament.title} ({tournament.id}).")
+			num_fixed += len(fixed_tournaments)
+		self.stdout.write(f"Done. Checked {len(tournament_ids)} tournament(s), fixed {num_fixed}.")
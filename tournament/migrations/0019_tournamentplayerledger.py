@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-17 04:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+from decimal import Decimal
+
+
+def build_ledgers(apps, schema_editor):
+    TournamentPlayer = apps.get_model('tournament', 'TournamentPlayer')
+    TournamentPlayerLedger = apps.get_model('tournament', 'TournamentPlayerLedger')
+    TournamentElimination = apps.get_model('tournament', 'TournamentElimination')
+    TournamentSplitElimination = apps.get_model('tournament', 'TournamentSplitElimination')
+    TournamentRebuy = apps.get_model('tournament', 'TournamentRebuy')
+
+    ledgers = {
+        player_id: TournamentPlayerLedger(player_id=player_id)
+        for player_id in TournamentPlayer.objects.values_list('id', flat=True)
+    }
+    for eliminator_id, eliminatee_id in TournamentElimination.objects.values_list('eliminator_id', 'eliminatee_id'):
+        ledgers[eliminator_id].eliminations += 1
+        ledgers[eliminatee_id].times_eliminated += 1
+    for split_elimination in TournamentSplitElimination.objects.prefetch_related('eliminators'):
+        eliminators = split_elimination.eliminators.all()
+        for eliminator in eliminators:
+            ledgers[eliminator.id].split_eliminations += round(Decimal(1.00 / len(eliminators)), 2)
+        ledgers[split_elimination.eliminatee_id].times_eliminated += 1
+    for player_id in TournamentRebuy.objects.values_list('player_id', flat=True):
+        ledgers[player_id].rebuys += 1
+    TournamentPlayerLedger.objects.bulk_create(ledgers.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0018_tournamentsplitelimination'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TournamentPlayerLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('eliminations', models.IntegerField(default=0)),
+                ('split_eliminations', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('times_eliminated', models.IntegerField(default=0)),
+                ('rebuys', models.IntegerField(default=0)),
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ledger', to='tournament.tournamentplayer')),
+            ],
+        ),
+        migrations.RunPython(build_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-17 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0019_tournamentplayerledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='results_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-17 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tournament', '0020_tournament_results_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTournamentResultsVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tournament_results_version', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
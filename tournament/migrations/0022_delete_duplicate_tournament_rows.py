@@ -0,0 +1,123 @@
+# Generated by Django 3.2 on 2026-10-17 04:56
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, F, Min
+
+
+def delete_duplicates(model, fields):
+    duplicates = model.objects.values(*fields).annotate(
+        min_id=Min('id'),
+        count=Count('id')
+    ).filter(count__gt=1)
+    for duplicate in duplicates:
+        model.objects.filter(
+            **{field: duplicate[field] for field in fields}
+        ).exclude(id=duplicate['min_id']).delete()
+
+
+def merge_duplicate_players(apps):
+    """
+    Deleting a duplicate TournamentPlayer would cascade to its eliminations, rebuys and results. Move them to the
+    oldest TournamentPlayer of the same user first, then delete the duplicate.
+
+    Returns the ids of the Tournaments that had duplicates.
+    """
+    TournamentPlayer = apps.get_model('tournament', 'TournamentPlayer')
+    TournamentPlayerLedger = apps.get_model('tournament', 'TournamentPlayerLedger')
+    TournamentPlayerResult = apps.get_model('tournament', 'TournamentPlayerResult')
+    TournamentElimination = apps.get_model('tournament', 'TournamentElimination')
+    TournamentSplitElimination = apps.get_model('tournament', 'TournamentSplitElimination')
+    TournamentRebuy = apps.get_model('tournament', 'TournamentRebuy')
+    SplitEliminators = TournamentSplitElimination.eliminators.through
+
+    duplicates = TournamentPlayer.objects.values('user_id', 'tournament_id').annotate(
+        min_id=Min('id'),
+        count=Count('id')
+    ).filter(count__gt=1)
+    tournament_ids = set()
+    for duplicate in duplicates:
+        kept_id = duplicate['min_id']
+        duplicate_ids = list(
+            TournamentPlayer.objects.filter(
+                user_id=duplicate['user_id'],
+                tournament_id=duplicate['tournament_id']
+            ).exclude(id=kept_id).values_list('id', flat=True)
+        )
+        TournamentElimination.objects.filter(eliminator_id__in=duplicate_ids).update(eliminator_id=kept_id)
+        TournamentElimination.objects.filter(eliminatee_id__in=duplicate_ids).update(eliminatee_id=kept_id)
+        TournamentSplitElimination.objects.filter(eliminatee_id__in=duplicate_ids).update(eliminatee_id=kept_id)
+        # A split elimination can't list the same player twice. Drop the duplicate where the kept player is already
+        # one of the eliminators.
+        SplitEliminators.objects.filter(
+            tournamentplayer_id__in=duplicate_ids,
+            tournamentsplitelimination_id__in=SplitEliminators.objects.filter(
+                tournamentplayer_id=kept_id
+            ).values('tournamentsplitelimination_id')
+        ).delete()
+        SplitEliminators.objects.filter(tournamentplayer_id__in=duplicate_ids).update(tournamentplayer_id=kept_id)
+        TournamentRebuy.objects.filter(player_id__in=duplicate_ids).update(player_id=kept_id)
+        # Duplicate results for the kept player are removed below with the other duplicate results.
+        TournamentPlayerResult.objects.filter(player_id__in=duplicate_ids).update(player_id=kept_id)
+        TournamentPlayerLedger.objects.filter(player_id__in=duplicate_ids).delete()
+        TournamentPlayer.objects.filter(id__in=duplicate_ids).delete()
+        tournament_ids.add(duplicate['tournament_id'])
+    return tournament_ids
+
+
+def rebuild_ledgers(apps, tournament_ids):
+    """
+    Same as build_ledgers in 0019, for the players of 'tournament_ids'.
+    """
+    TournamentPlayer = apps.get_model('tournament', 'TournamentPlayer')
+    TournamentPlayerLedger = apps.get_model('tournament', 'TournamentPlayerLedger')
+    TournamentElimination = apps.get_model('tournament', 'TournamentElimination')
+    TournamentSplitElimination = apps.get_model('tournament', 'TournamentSplitElimination')
+    TournamentRebuy = apps.get_model('tournament', 'TournamentRebuy')
+
+    TournamentPlayerLedger.objects.filter(player__tournament_id__in=tournament_ids).delete()
+    ledgers = {
+        player_id: TournamentPlayerLedger(player_id=player_id)
+        for player_id in TournamentPlayer.objects.filter(tournament_id__in=tournament_ids).values_list('id', flat=True)
+    }
+    eliminations = TournamentElimination.objects.filter(eliminatee__tournament_id__in=tournament_ids)
+    for eliminator_id, eliminatee_id in eliminations.values_list('eliminator_id', 'eliminatee_id'):
+        ledgers[eliminator_id].eliminations += 1
+        ledgers[eliminatee_id].times_eliminated += 1
+    split_eliminations = TournamentSplitElimination.objects.filter(eliminatee__tournament_id__in=tournament_ids)
+    for split_elimination in split_eliminations.prefetch_related('eliminators'):
+        eliminators = split_elimination.eliminators.all()
+        for eliminator in eliminators:
+            ledgers[eliminator.id].split_eliminations += round(Decimal(1.00 / len(eliminators)), 2)
+        ledgers[split_elimination.eliminatee_id].times_eliminated += 1
+    rebuys = TournamentRebuy.objects.filter(player__tournament_id__in=tournament_ids)
+    for player_id in rebuys.values_list('player_id', flat=True):
+        ledgers[player_id].rebuys += 1
+    TournamentPlayerLedger.objects.bulk_create(ledgers.values(), batch_size=1000)
+
+
+def delete_duplicate_rows(apps, schema_editor):
+    """
+    The unique constraints can't be added while duplicates exist. Keep the oldest row of each duplicate. The history
+    of duplicate TournamentPlayers is merged into the oldest one, and the ledgers of those Tournaments are rebuilt.
+    """
+    tournament_ids = merge_duplicate_players(apps)
+    if len(tournament_ids) > 0:
+        rebuild_ledgers(apps, tournament_ids)
+        # The cached tournament views are keyed on results_version.
+        Tournament = apps.get_model('tournament', 'Tournament')
+        Tournament.objects.filter(id__in=tournament_ids).update(results_version=F('results_version') + 1)
+    delete_duplicates(apps.get_model('tournament', 'TournamentInvite'), ['send_to_id', 'tournament_id'])
+    delete_duplicates(apps.get_model('tournament', 'TournamentPlayerResult'), ['tournament_id', 'player_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0021_usertournamentresultsversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-17 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0022_delete_duplicate_tournament_rows'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tournamentrebuy',
+            index=models.Index(fields=['player', 'timestamp'], name='tournament__player__53109e_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamentinvite',
+            constraint=models.UniqueConstraint(fields=('send_to', 'tournament'), name='unique_tournament_invite'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamentplayer',
+            constraint=models.UniqueConstraint(fields=('user', 'tournament'), name='unique_tournament_player'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamentplayerresult',
+            constraint=models.UniqueConstraint(fields=('tournament', 'player'), name='unique_tournament_player_result'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-17 05:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0023_tournament_lookup_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TournamentSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('results_version', models.IntegerField(default=0)),
+                ('data', models.JSONField()),
+                ('tournament', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='tournament.tournament')),
+            ],
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2 on 2026-10-17 05:41
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_by_tournament(model, tournament_field):
+    return {
+        row[tournament_field]: row['count']
+        for row in model.objects.values(tournament_field).annotate(count=Count('id')).order_by()
+    }
+
+
+def populate_counters(apps, schema_editor):
+    """
+    Count the players, rebuys and eliminations of the existing tournaments.
+    """
+    Tournament = apps.get_model('tournament', 'Tournament')
+    players = count_by_tournament(apps.get_model('tournament', 'TournamentPlayer'), 'tournament_id')
+    rebuys = count_by_tournament(apps.get_model('tournament', 'TournamentRebuy'), 'player__tournament_id')
+    eliminations = count_by_tournament(apps.get_model('tournament', 'TournamentElimination'), 'eliminatee__tournament_id')
+    split_eliminations = count_by_tournament(apps.get_model('tournament', 'TournamentSplitElimination'), 'eliminatee__tournament_id')
+    tournaments = list(Tournament.objects.all())
+    for tournament in tournaments:
+        tournament.num_rebuys = rebuys.get(tournament.id, 0)
+        tournament.num_buyins = players.get(tournament.id, 0) + tournament.num_rebuys
+        tournament.num_eliminations = eliminations.get(tournament.id, 0) + split_eliminations.get(tournament.id, 0)
+    Tournament.objects.bulk_update(tournaments, ['num_buyins', 'num_rebuys', 'num_eliminations'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0025_tournamentresultsemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='num_buyins',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='num_eliminations',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='num_rebuys',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
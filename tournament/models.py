@@ -1,24 +1,44 @@
 import json
+import smtplib
 from decimal import Decimal
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.contrib.postgres.fields import ArrayField
 from django.core.exceptions import ValidationError
-from django.core.mail import EmailMessage
+from django.core.mail import EmailMessage, get_connection
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
-from email import encoders
-from email.mime.base import MIMEBase
-from email.mime.multipart import MIMEMultipart
 from enum import Enum
-from io import StringIO
 from itertools import chain
 
+from task_queue.models import Task
+from tournament.signals import tournament_completed, tournament_completion_undone
 from user.models import User
 
 PERCENTAGE_VALIDATOR = [MinValueValidator(0), MaxValueValidator(100)]
 
-from tournament.util import build_placement_string, PlayerTournamentPlacement, DID_NOT_PLACE_VALUE
+from tournament.util import (
+	build_json_from_tournament_summary_data,
+	build_placement_string,
+	build_tournament_summary_data_from_json,
+	build_tournament_summary_text,
+	calculate_bounty_earnings,
+	calculate_placement_earnings,
+	calculate_tournament_value,
+	get_or_create_head_to_head_data,
+	get_split_elimination_fraction,
+	PlayerTournamentPlacement,
+	TournamentPlayerLookups,
+	TournamentSummaryData,
+	TournamentSummaryEliminationData,
+	TournamentViewResultData,
+	DID_NOT_PLACE_VALUE,
+	EMAIL_TOURNAMENT_RESULTS_TASK,
+	REFRESH_TOURNAMENT_TOTALS_TASK,
+	RESULTS_EMAIL_BATCH_SIZE,
+	RESULTS_EMAIL_MAX_ATTEMPTS
+)
 
 
 """
@@ -168,113 +188,21 @@ class TournamentManager(models.Manager):
 	Email the results of a tournament to all the players.
 	This is mainly for data backup reasons. Like if for some reason an admin accidentally "undo-completion" and 
 	their data is lost. At least they'll have this text backup.
-	"""
-	def email_tournament_results(self, tournament_id):
-		try:
-			tournament = self.get(pk=tournament_id)
-			subject = f"{settings.ACCOUNT_EMAIL_SUBJECT_PREFIX} results for tournament."
-			message = f"Here are the results for the Tournament you played on {tournament.completed_at}."
-			payout_string = '('
-			for i, pct in enumerate(tournament.tournament_structure.payout_percentages):
-				if i != 0:
-					payout_string += ', '
-				payout_string += f'{build_placement_string(i)}: {pct}%'
-			payout_string += ')'
-			is_bounty_tournament = f'{tournament.tournament_structure.buyin_amount != None}'
-			allow_rebuys = f'{tournament.tournament_structure.allow_rebuys}'
-			buyin_amount = f'${tournament.tournament_structure.buyin_amount}'
-			bounty_amount = tournament.tournament_structure.bounty_amount
-			if bounty_amount == None:
-				bounty_amount = "N/A"
-			else:
-				bounty_amount = f"${bounty_amount}"
-			
-			players = TournamentPlayer.objects.get_tournament_players(
-				tournament_id = tournament.id
-			)
-			players_string = ''
-			total_players = 0
-			player_rebuys_string = '\n'
-			total_rebuys = 0
-			for i, player in enumerate(players):
-				total_players += 1
-				if i != 0:
-					players_string += ', '
-				players_string += f'{player.user.username}'
-				rebuys = TournamentRebuy.objects.get_rebuys_for_player(
-					player = player
-				)
-				if len(rebuys) > 0:
-					total_rebuys += len(rebuys)
-					player_rebuys_string += f'\t\t\t\t{player.user.username}: ({len(rebuys)})\n'
 
-			if not tournament.tournament_structure.allow_rebuys:
-				player_rebuys_string = "N/A"
+	Every player gets their own email and its delivery is tracked in a TournamentResultsEmail, so players who were
+	already sent their email aren't sent it again.
 
-			eliminations = TournamentElimination.objects.get_eliminations_by_tournament(
-				tournament_id = tournament.id,
-			)
-			split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_tournament(
-				tournament_id = tournament.id,
-			)
-			combined_eliminations = list(chain(eliminations, split_eliminations))
-			combined_eliminations.sort(key=lambda elimination: elimination.eliminated_at)
-			player_eliminations_string = '\n'
-			total_eliminations = 0
-			for elimination in combined_eliminations:
-				total_eliminations += 1
-				if type(elimination) is TournamentElimination:
-					player_eliminations_string += f'\t\t\t\t{elimination.eliminator.user.username}: eliminated {elimination.eliminatee.user.username} at {elimination.eliminated_at}\n'
-				if type(elimination) is TournamentSplitElimination:
-					player_split_elimination_string = [f"{player.user.username}, " for player in elimination.eliminators.all()]
-					player_eliminations_string += f'\t\t\t\t{player_split_elimination_string}: eliminated {elimination.eliminatee.user.username} at {elimination.eliminated_at}\n'
-			
-			results = TournamentPlayerResult.objects.get_results_for_tournament(
-				tournament_id = tournament.id
-			).order_by("placement")
-			placement_string = '\n'
-			for result in results:
-				placement_string += f'\t\t\t\t{build_placement_string(result.placement)}: {result.player.user.username}\n'
-				
-			total_pot_value = f'${round(Decimal((len(players) + total_rebuys) * tournament.tournament_structure.buyin_amount), 2)}'
-
-			f = StringIO()
-			f.write(f'''\n
-				Tournament Title: {tournament.title}\n
-				Completed on: {tournament.completed_at}\n
-				Bounty Tournament? {is_bounty_tournament}\n
-				Allow rebuys? {allow_rebuys}\n
-				Payout percentages: {payout_string}\n
-				Buyin amount: {buyin_amount}\n
-				Bounty amount: {bounty_amount}\n
-				Players: {players_string}\n
-				Num players: {total_players}\n
-				Placements: {placement_string}
-				Num rebuys: {total_rebuys}\n
-				Player rebuys: {player_rebuys_string}
-				Player Eliminations: {player_eliminations_string}
-				Total Tournament value: {total_pot_value}
-				\n''')
-			f.seek(0)
-			msg = MIMEBase('application', "octet-stream")
-			msg.set_payload(f.read())
-			encoders.encode_base64(msg)
-			msg.add_header(
-				'Content-Disposition',
-				'attachment',
-				filename='tournament_summary.txt'
-			)
-			players = TournamentPlayer.objects.get_tournament_players(
-				tournament_id = tournament.id
-			)
-			emails = [player.user.email for player in players]
-			mail = EmailMessage(subject, message, settings.EMAIL_HOST_USER, emails)
-			mail.attach(msg)
-			mail.send()
-		except Exception as e:
-			# Fail silently.
-			# TODO add bugsnag call here.
-			pass
+	This runs in the task queue (see tournament/tasks.py). If any email couldn't be sent it raises so the task is
+	retried. Nothing is sent if the completion was undone before the task ran.
+	"""
+	def email_tournament_results(self, tournament_id):
+		tournament = self.get(pk=tournament_id)
+		if tournament.completed_at == None:
+			return
+		TournamentResultsEmail.objects.create_results_emails(tournament_id)
+		num_pending = TournamentResultsEmail.objects.send_results_emails(tournament_id)
+		if num_pending > 0:
+			raise ValidationError(f"{num_pending} results email(s) could not be sent. They will be retried.")
 
 	def complete_tournament(self, user, tournament_id):
 		tournament = self.get(pk=tournament_id)
@@ -290,30 +218,42 @@ class TournamentManager(models.Manager):
 			self.is_completable(tournament_id)
 
 			tournament.completed_at = timezone.now()
-			tournament.save(using=self._db)
+			tournament.results_version += 1
+			tournament.save(using=self._db, update_fields=["completed_at", "results_version"])
 
 			# Calculate the TournamentPlayerResultData for each player. These are saved to db.
 			results = TournamentPlayerResult.objects.build_results_for_tournament(tournament_id)
+			TournamentSummary.objects.save_summary(tournament)
+			tournament_completed.send(sender=self.model, tournament_id=tournament.id)
 
-			# Email the results to all the players
-			self.email_tournament_results(tournament.id)
+			self.increment_tournament_results_version_for_players(tournament.id)
+
+			# Email the results and refresh TournamentTotals in the background.
+			self.enqueue_tournament_completion_tasks(tournament.id)
 
 			return tournament
 		except Exception as e:
 			# If anything goes wrong we need to reset the Tournament back into the active state.
 			tournament.completed_at = None
-			tournament.save(using=self._db)
+			tournament.save(using=self._db, update_fields=["completed_at"])
+			self.increment_tournament_results_version_for_players(tournament.id)
 			# Also delete any results that were generated.
 			results = TournamentPlayerResult.objects.get_results_for_tournament(
 				tournament_id = tournament.id
 			)
 			for result in results:
 				result.delete()
+			TournamentSummary.objects.delete_summary(tournament.id)
+			tournament_completion_undone.send(sender=self.model, tournament_id=tournament.id)
 			raise e
 
 	"""
 	Complete a Tournament that was create via a the backfill process (see tournament.views.tournament_backfill_view).
 
+	The players are loaded with one query, the whole payload is validated in memory and then the rebuys,
+	eliminations, split eliminations, ledgers and results are written with bulk_create in a single transaction. The
+	number of queries does not depend on the number of players or eliminations.
+
 	player_tournament_placements: list of PlayerTournamentPlacement.
 
 	elim_dict: dictionary containg the eliminations data.
@@ -342,15 +282,22 @@ class TournamentManager(models.Manager):
         "eliminatee":"<player9>"
       }, ...
       ]
+
+	completed_at: When the tournament was played. Defaults to now.
 	"""
-	def complete_tournament_for_backfill(self, user, tournament_id, player_tournament_placements, elim_dict, split_eliminations):
-		tournament = self.get(pk=tournament_id)
+	def complete_tournament_for_backfill(self, user, tournament_id, player_tournament_placements, elim_dict, split_eliminations, completed_at=None):
+		tournament = self.select_related("tournament_structure").get(pk=tournament_id)
 		if tournament.admin != user:
 			raise ValidationError("You cannot update a Tournament if you're not the admin.")
 		if tournament.started_at is not None:
 			raise ValidationError("You can't backfill an active Tournment.")
 		if tournament.completed_at is not None:
 			raise ValidationError("You can't backfill a completed Tournment.")
+		structure = tournament.tournament_structure
+
+		players = {
+			player.id: player for player in TournamentPlayer.objects.filter(tournament=tournament).select_related("user")
+		}
 
 		# Split elimination validation
 		for split_elim_data in split_eliminations:
@@ -360,16 +307,28 @@ class TournamentManager(models.Manager):
 				raise ValidationError("Split Elimination Error: You must specify more than one eliminator for a split elimination.")
 			if eliminatee in eliminators:
 				raise ValidationError(f"Split Elimination Error: {eliminatee.user.username} cannot eliminate themself.")
-			if eliminatee.tournament != tournament:
+			if eliminatee.id not in players:
 				raise ValidationError(f"Split Elimination Error: {eliminatee.user.username} is not part of this tournament.")
 			for eliminator in eliminators:
-				if eliminator.tournament != tournament:
+				if eliminator.id not in players:
 					raise ValidationError(f"Split Elimination Error: {eliminator.user.username} is not part of this tournament.")
 			if len(set(eliminators)) != len(eliminators):
 				raise ValidationError("Split Elimination Error: Cannot list the same eliminator more than once.")
 
+		# Elimination validation
+		eliminations = []
+		for eliminator_id in elim_dict:
+			if int(eliminator_id) not in players:
+				raise ValidationError("Eliminator is not part of that Tournament.")
+			for eliminatee in elim_dict[eliminator_id]:
+				if eliminatee.id not in players:
+					raise ValidationError("Eliminatee is not part of that Tournament.")
+				if eliminatee.id == int(eliminator_id):
+					raise ValidationError(f"{eliminatee.user.username} can't eliminate themselves!")
+				eliminations.append((int(eliminator_id), eliminatee.id))
+
 		# Verify the number of placements equals the number of payout percentages
-		num_placement_positions = len(tournament.tournament_structure.payout_percentages)
+		num_placement_positions = len(structure.payout_percentages)
 		placement_count = 0
 		for placed_player in player_tournament_placements:
 			if placed_player.placement != DID_NOT_PLACE_VALUE:
@@ -378,195 +337,208 @@ class TournamentManager(models.Manager):
 			raise ValidationError(f"The tournament structure requires you select {num_placement_positions} players who placed in the tournament.")
 
 		# Verify the same player isn't specified for multiple placements.
-		placed_player_ids = [value.player_id for value in player_tournament_placements]
+		placed_player_ids = [int(value.player_id) for value in player_tournament_placements]
 		if len(placed_player_ids) != len(set(placed_player_ids)):
 			raise ValidationError("You can't specify the same player for multiple placements.")
+		for player_id in placed_player_ids:
+			if player_id not in players:
+				raise ValidationError(f"Player {player_id} is not part of tournament: {tournament.title}.")
 
 		# Find winner
 		winning_player = None
 		for player_tournament_placement in player_tournament_placements:
 			if player_tournament_placement.placement == 0:
-				winning_player = TournamentPlayer.objects.get_by_id(player_tournament_placement.player_id)
+				winning_player = players[int(player_tournament_placement.player_id)]
 
 		"""
-		Add the rebuys. First we need to determine who needs rebuys from the elim_dict and split_eliminations.
-			'rebuys' is a dict of player id's as the key and a an integer representing the number 
-			of rebuys they need.
-		Format:
-		{
-			'<player_id>': <num_rebuys>
-		}
+		Count the number of times each player was eliminated. Every elimination except the last one needs a rebuy,
+		unless they won. Then every elimination needs a rebuy.
 		"""
-		rebuys_dict = {}
-		# Rebuys from eliminations
-		for player_id in elim_dict:
-			for eliminated_player in elim_dict[player_id]:
-				if eliminated_player.id not in rebuys_dict:
-					# First time they were eliminated. Add an entry to the dict with a value of 0
-					# since the initial buyin does not count as a rebuy.
-					if eliminated_player.id == winning_player.id:
-						# Start the winning players rebuy counter at 1 since a rebuy won't be added
-						# because they get populated based on eliminations.
-						rebuys_dict[eliminated_player.id] = 1
-					else:
-						rebuys_dict[eliminated_player.id] = 0
-				else:
-					# They already exist in the rebuys_dict. Increment the value.
-					num_rebuys = rebuys_dict[eliminated_player.id]
-					num_rebuys += 1
-					rebuys_dict[eliminated_player.id] = num_rebuys
-		# Rebuys from split eliminations
+		times_eliminated = {player_id: 0 for player_id in players}
+		for eliminator_id, eliminatee_id in eliminations:
+			times_eliminated[eliminatee_id] += 1
 		for elim_data in split_eliminations:
-			eliminatee = elim_data['eliminatee']
-			if eliminatee.id not in rebuys_dict:
-				# First time they were eliminated. Add an entry to the dict with a value of 0
-				# since the initial buyin does not count as a rebuy.
-				if eliminatee.id == winning_player.id:
-					# Start the winning players rebuy counter at 1 since a rebuy won't be added
-					# because they get populated based on eliminations.
-					rebuys_dict[eliminatee.id] = 1
-				else:
-					rebuys_dict[eliminatee.id] = 0
-			else:
-				# They already exist in the rebuys_dict. Increment the value.
-				num_rebuys = rebuys_dict[eliminatee.id]
-				num_rebuys += 1
-				rebuys_dict[eliminatee.id] = num_rebuys
-
-
-		# DEBUG
-		# for player_id in rebuys_dict:
-		# 	player = TournamentPlayer.objects.get_by_id(player_id)
-		# 	print(f"{player.user.username}, rebuys: {rebuys_dict[player_id]}")
+			times_eliminated[elim_data['eliminatee'].id] += 1
 
 		# Verify if a player did not win, they must have been eliminated at least once.
-		players = TournamentPlayer.objects.get_tournament_players(
-			tournament_id = tournament.id
-		).exclude(id=winning_player.id)
-		for player in players:
-			num_times_player_was_eliminated = 0
-			for player_id in  elim_dict.keys():
-				for eliminated_player in elim_dict[player_id]:
-					if player == eliminated_player:
-						num_times_player_was_eliminated += 1
-			for elim_data in split_eliminations:
-				eliminatee = elim_data['eliminatee']
-				if player == eliminatee:
-					num_times_player_was_eliminated += 1
-			if num_times_player_was_eliminated == 0:
+		for player in sorted(players.values(), key=lambda p: p.user.username):
+			if player != winning_player and times_eliminated[player.id] == 0:
 				raise ValidationError(f"{player.user.username} did not win, they must have been eliminated at least once.")
 
-		try:
-			# Activate the tournament
-			tournament.started_at = timezone.now()
-			tournament.save(using=self._db)
-
-			# Build the rebuys
-			if tournament.tournament_structure.allow_rebuys == True:
-				for player_id in rebuys_dict:
-					for i in range(0, rebuys_dict[player_id]):
-						rebuy = TournamentRebuy.objects.backfill_rebuy(
-							tournament_id = tournament.id,
-							player_id = player_id
-						)
-
-			# Add the eliminations
-			eliminations = self.build_eliminations_for_backfilled_tournament(
-				tournament_id = tournament.id,
-				elim_dict = elim_dict
-			)
+		rebuys_dict = {}
+		if structure.allow_rebuys:
+			for player_id in players:
+				if player_id == winning_player.id:
+					rebuys_dict[player_id] = times_eliminated[player_id]
+				else:
+					rebuys_dict[player_id] = times_eliminated[player_id] - 1
+		else:
+			for player in players.values():
+				if times_eliminated[player.id] > 1:
+					raise ValidationError(f"{player.user.username} has already been eliminated and has no more re-buys.")
+			if sum(times_eliminated.values()) >= len(players):
+				raise ValidationError("You can't eliminate any more players. Complete the Tournament.")
+
+		if completed_at == None:
+			completed_at = timezone.now()
+
+		with transaction.atomic(using=self._db):
+			TournamentRebuy.objects.create_backfill_rebuys(rebuys_dict)
+			TournamentElimination.objects.create_backfill_eliminations(eliminations)
+			TournamentSplitElimination.objects.create_backfill_split_eliminations([
+				([eliminator.id for eliminator in elim_data['eliminators']], elim_data['eliminatee'].id)
+				for elim_data in split_eliminations
+			])
+			ledgers = TournamentPlayerLedger.objects.rebuild_ledgers_for_tournament(tournament.id)
+			self.rebuild_counters(self.filter(pk=tournament.id))
+
+			tournament.started_at = completed_at
+			tournament.completed_at = completed_at
+			tournament.results_version += 1
+			tournament.save(using=self._db, update_fields=["started_at", "completed_at", "results_version"])
 
-			# Add split eliminations
-			split_eliminations = self.build_split_eliminations_for_backfilled_tournament(
-				tournament_id = tournament.id,
-				split_eliminations = split_eliminations
+			# Calculate the TournamentPlayerResult data for each player. These are saved to db.
+			TournamentPlayerResult.objects.build_results_for_backfilled_tournament(
+				tournament = tournament,
+				players = players,
+				ledgers = ledgers,
+				player_tournament_placements = player_tournament_placements
 			)
+			TournamentSummary.objects.save_summary(tournament)
 
-			# Complete the Tournament
-			tournament.completed_at = timezone.now()
-			tournament.save(using=self._db)
+		tournament_completed.send(sender=self.model, tournament_id=tournament.id)
 
-			# Calculate the TournamentPlayerResult data for each player. These are saved to db.
-			results = TournamentPlayerResult.objects.build_results_for_backfilled_tournament(
-				player_tournament_placements = player_tournament_placements,
-				tournament_id = tournament_id
-			)
-		except Exception as e:
-			"""
-			If something goes wrong building the results, we need:
-			1. undo activation
-			2. undo completion
-			3. delete rebuys
-			4. delete eliminations
-			5. delete split eliminations
-			"""
-			Tournament.objects.delete_all_rebuys_and_eliminations(
-				admin = tournament.admin,
-				tournament_id = tournament.id
-			)
-			# Delete any Tournament results.
-			TournamentPlayerResult.objects.delete_results_for_tournament(tournament.id)
-			tournament.started_at = None
-			tournament.completed_at = None
-			tournament.save(using=self._db)
-			raise e
+		self.increment_tournament_results_version_for_players(tournament.id)
 
+		self.enqueue_tournament_completion_tasks(
+			tournament_id = tournament.id,
+			email_results = False
+		)
 		return tournament
 
 	"""
-	elim_dict: dictionary containg the eliminations data.
-	Format: key = id of the eliminator player. values = list of players they eliminated.
-		{
-			'player_id0': [player1, player5, ...],
-			'player_id1': [player2, player3, ...],
-			...
-		}
+	Import historical tournaments (ex: from a CSV or JSON file, see tournament.util.iter_backfill_tournaments_from_csv
+	and iter_backfill_tournaments_from_json). Each tournament is created and completed with
+	complete_tournament_for_backfill.
+
+	Every username in the import is resolved with one query and the import is done in a single transaction. If any
+	tournament is invalid nothing is imported.
+
+	admin: The User who owns the imported tournaments and structures.
+	tournaments: list of BackfillTournamentData.
+
+	Returns the list of imported Tournaments.
 	"""
-	def build_eliminations_for_backfilled_tournament(self, tournament_id, elim_dict):
-		eliminations = []
-		for player_id in elim_dict:
-			eliminated_players = elim_dict[player_id]
-			for player in eliminated_players:
-				elimination = TournamentElimination.objects.create_backfill_elimination(
-					tournament_id = tournament_id,
-					eliminator_id = player_id,
-					eliminatee_id = player.id
+	def import_backfill_tournaments(self, admin, tournaments):
+		tournaments = list(tournaments)
+		usernames = {username for data in tournaments for username in data.usernames}
+		users_by_username = {user.username: user for user in User.objects.filter(username__in=usernames)}
+		structures = {}
+		imported = []
+		with transaction.atomic(using=self._db):
+			for data in tournaments:
+				imported.append(
+					self.import_backfill_tournament(
+						admin = admin,
+						data = data,
+						users_by_username = users_by_username,
+						structures = structures
+					)
 				)
-				eliminations.append(elimination)
-		return eliminations
+		return imported
 
 	"""
-	split_eliminations: data for split eliminations.
-	Format:
-	[{
-      "eliminators": [
-	    "<player5>"
-	    "<player23>"
-      ],
-      "eliminatee":"<player8>"
-     },
-     {
-       "eliminators": [
-	     "<player6>"
-	     "<player23>"
-         "<player67>"
-       ],
-        "eliminatee":"<player9>"
-      }, ...
-      ]
+	Import a single BackfillTournamentData. See import_backfill_tournaments.
+
+	users_by_username: dict of every User in the import keyed by username.
+	structures: dict of the TournamentStructures already used by the import. Tournaments with the same structure share
+	a TournamentStructure.
 	"""
-	def build_split_eliminations_for_backfilled_tournament(self, tournament_id, split_eliminations):
-		eliminations = []
-		for elim_data in split_eliminations:
-			eliminators = elim_data['eliminators']
-			eliminatee = elim_data['eliminatee']
-			elimination = TournamentSplitElimination.objects.create_backfill_split_elimination(
-				tournament_id = tournament_id,
-				eliminators = eliminators,
-				eliminatee = eliminatee
+	def import_backfill_tournament(self, admin, data, users_by_username, structures):
+		for username in data.usernames:
+			if username not in users_by_username:
+				raise ValidationError(f"{data.title}: There is no user with the username {username}.")
+		if len(set(data.usernames)) != len(data.usernames):
+			raise ValidationError(f"{data.title}: Players can only be listed once.")
+
+		structure_key = (
+			data.structure_title,
+			data.buyin_amount,
+			data.bounty_amount,
+			tuple(data.payout_percentages),
+			data.allow_rebuys
+		)
+		if structure_key not in structures:
+			structures[structure_key] = TournamentStructure.objects.create_tournament_struture(
+				title = data.structure_title,
+				user = admin,
+				buyin_amount = data.buyin_amount,
+				bounty_amount = data.bounty_amount,
+				payout_percentages = data.payout_percentages,
+				allow_rebuys = data.allow_rebuys
 			)
-			eliminations.append(elimination)
-		return eliminations
+
+		with transaction.atomic(using=self._db):
+			tournament = self.model(
+				title = data.title,
+				admin = admin,
+				tournament_structure = structures[structure_key],
+				num_buyins = len(data.usernames)
+			)
+			tournament.save(using=self._db)
+			players = TournamentPlayer.objects.bulk_create([
+				TournamentPlayer(user = users_by_username[username], tournament = tournament) for username in data.usernames
+			])
+			TournamentPlayerLedger.objects.create_ledgers([player.id for player in players])
+			players_by_username = {player.user.username: player for player in players}
+
+			def get_player(username):
+				if username not in players_by_username:
+					raise ValidationError(f"{data.title}: {username} is not listed as a player.")
+				return players_by_username[username]
+
+			player_tournament_placements = []
+			placed_usernames = set()
+			for placement, username in enumerate(data.placements):
+				player_tournament_placements.append(
+					PlayerTournamentPlacement(
+						player_id = get_player(username).id,
+						placement = placement
+					)
+				)
+				placed_usernames.add(username)
+			for player in players:
+				if player.user.username not in placed_usernames:
+					player_tournament_placements.append(
+						PlayerTournamentPlacement(
+							player_id = player.id,
+							placement = DID_NOT_PLACE_VALUE
+						)
+					)
+
+			elim_dict = {}
+			for eliminator_username, eliminatee_username in data.eliminations:
+				eliminator = get_player(eliminator_username)
+				elim_dict.setdefault(eliminator.id, []).append(get_player(eliminatee_username))
+
+			split_eliminations = []
+			for eliminator_usernames, eliminatee_username in data.split_eliminations:
+				split_eliminations.append({
+					'eliminatee': get_player(eliminatee_username),
+					'eliminators': [get_player(username) for username in eliminator_usernames]
+				})
+
+			try:
+				return self.complete_tournament_for_backfill(
+					user = admin,
+					tournament_id = tournament.id,
+					player_tournament_placements = player_tournament_placements,
+					elim_dict = elim_dict,
+					split_eliminations = split_eliminations,
+					completed_at = data.completed_at
+				)
+			except ValidationError as e:
+				raise ValidationError(f"{data.title}: {e.messages[0]}")
 
 	"""
 	Undo tournament completion.
@@ -586,32 +558,118 @@ class TournamentManager(models.Manager):
 
 		tournament.started_at = None
 		tournament.completed_at = None
-		tournament.save(using=self._db)
+		tournament.results_version += 1
+		tournament.save(using=self._db, update_fields=["started_at", "completed_at", "results_version"])
 
 		# Delete any Tournament results.
 		TournamentPlayerResult.objects.delete_results_for_tournament(tournament_id)
+		TournamentSummary.objects.delete_summary(tournament_id)
+		# The results will be emailed again when the Tournament is completed again.
+		TournamentResultsEmail.objects.get_results_emails_for_tournament(tournament_id).delete()
+		tournament_completion_undone.send(sender=self.model, tournament_id=tournament.id)
+
+		self.increment_tournament_results_version_for_players(tournament.id)
 
 		return tournament
 
+	"""
+	Queue the work that follows completing a Tournament: emailing the results and refreshing the TournamentTotals
+	of every player.
+
+	email_results: False for backfilled tournaments. They have never been emailed.
+	"""
+	def enqueue_tournament_completion_tasks(self, tournament_id, email_results=True):
+		tasks = []
+		if email_results:
+			tasks.append((EMAIL_TOURNAMENT_RESULTS_TASK, {'tournament_id': tournament_id}))
+		user_ids = TournamentPlayer.objects.filter(tournament_id=tournament_id).values_list("user_id", flat=True)
+		for user_id in user_ids:
+			tasks.append((REFRESH_TOURNAMENT_TOTALS_TASK, {'user_id': user_id}))
+		Task.objects.enqueue_tasks(tasks)
+
+	"""
+	The completed tournaments the players of this Tournament played in have changed. Increment
+	UserTournamentResultsVersion for each of them so their TournamentTotals are rebuilt.
+	"""
+	def increment_tournament_results_version_for_players(self, tournament_id):
+		UserTournamentResultsVersion.objects.increment_versions(
+			user_ids = TournamentPlayer.objects.filter(tournament_id=tournament_id).values_list("user_id", flat=True)
+		)
+
+	"""
+	Add to the live counters of a Tournament (see Tournament.num_buyins). The update uses F() expressions so
+	concurrent updates don't overwrite each other.
+	"""
+	def update_counters(self, tournament_id, buyins=0, rebuys=0, eliminations=0):
+		super().get_queryset().filter(pk=tournament_id).update(
+			num_buyins = models.F("num_buyins") + buyins,
+			num_rebuys = models.F("num_rebuys") + rebuys,
+			num_eliminations = models.F("num_eliminations") + eliminations
+		)
+
+	"""
+	Recompute the live counters of 'tournaments' from the TournamentPlayer, TournamentRebuy, TournamentElimination
+	and TournamentSplitElimination rows. Only the Tournaments whose counters were wrong are written.
+
+	Returns the Tournaments that were fixed.
+	"""
+	def rebuild_counters(self, tournaments):
+		def count_for_tournament(queryset, tournament_field):
+			return Coalesce(
+				models.Subquery(
+					queryset.filter(**{tournament_field: models.OuterRef("pk")}).order_by().values(tournament_field).annotate(
+						count = models.Count("id")
+					).values("count"),
+					output_field = models.IntegerField()
+				),
+				0
+			)
+		tournaments = tournaments.select_for_update(of=("self",)).annotate(
+			actual_num_players = count_for_tournament(TournamentPlayer.objects.all(), "tournament_id"),
+			actual_num_rebuys = count_for_tournament(TournamentRebuy.objects.all(), "player__tournament_id"),
+			actual_num_eliminations = count_for_tournament(TournamentElimination.objects.all(), "eliminatee__tournament_id"),
+			actual_num_split_eliminations = count_for_tournament(TournamentSplitElimination.objects.all(), "eliminatee__tournament_id"),
+		)
+		fixed_tournaments = []
+		# The Tournaments are locked so live eliminations and rebuys wait for the repair.
+		with transaction.atomic(using=self._db):
+			for tournament in tournaments:
+				num_buyins = tournament.actual_num_players + tournament.actual_num_rebuys
+				num_eliminations = tournament.actual_num_eliminations + tournament.actual_num_split_eliminations
+				if (tournament.num_buyins, tournament.num_rebuys, tournament.num_eliminations) != (num_buyins, tournament.actual_num_rebuys, num_eliminations):
+					tournament.num_buyins = num_buyins
+					tournament.num_rebuys = tournament.actual_num_rebuys
+					tournament.num_eliminations = num_eliminations
+					fixed_tournaments.append(tournament)
+			self.bulk_update(fixed_tournaments, ["num_buyins", "num_rebuys", "num_eliminations"])
+		return fixed_tournaments
+
 	def delete_all_rebuys_and_eliminations(self, admin, tournament_id):
 		tournament = self.get(pk=tournament_id)
 		if tournament.admin != admin:
 			raise ValidationError("You cannot update a Tournament if you're not the admin.")
 
-		# Delete all eliminations
-		eliminations = TournamentElimination.objects.get_eliminations_by_tournament(tournament_id)
-		for elimination in eliminations:
-			elimination.delete()
+		with transaction.atomic(using=self._db):
+			# Delete all eliminations
+			TournamentElimination.objects.get_eliminations_by_tournament(tournament_id).delete()
 
-		# Delete all split eliminations
-		split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament_id)
-		for split_elimination in split_eliminations:
-			split_elimination.delete()
+			# Delete all split eliminations
+			TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament_id).delete()
 
-		# Delete all the rebuy data
-		TournamentRebuy.objects.delete_tournament_rebuys(
-			tournament_id = tournament.id
-		)
+			# Delete all the rebuy data
+			TournamentRebuy.objects.delete_tournament_rebuys(
+				tournament_id = tournament.id
+			)
+
+			TournamentPlayerLedger.objects.reset_ledgers_for_tournament(
+				tournament_id = tournament.id
+			)
+
+			super().get_queryset().filter(pk=tournament.id).update(
+				num_buyins = models.F("num_buyins") - models.F("num_rebuys"),
+				num_rebuys = 0,
+				num_eliminations = 0
+			)
 
 		return tournament
 
@@ -623,7 +681,7 @@ class TournamentManager(models.Manager):
 			raise ValidationError("You can't start a Tournament that has already been completed.")
 
 		tournament.started_at = timezone.now()
-		tournament.save(using=self._db)
+		tournament.save(using=self._db, update_fields=["started_at"])
 		return tournament
 
 	def undo_start_tournament(self, user, tournament_id):
@@ -639,7 +697,7 @@ class TournamentManager(models.Manager):
 		)
 
 		tournament.started_at = None
-		tournament.save(using=self._db)
+		tournament.save(using=self._db, update_fields=["started_at"])
 
 		# Delete any Tournament results.
 		TournamentPlayerResult.objects.delete_results_for_tournament(tournament.id)
@@ -653,6 +711,18 @@ class TournamentManager(models.Manager):
 			tournament = None
 		return tournament
 
+	"""
+	Get a Tournament and lock its row until the end of the transaction. Must be called inside transaction.atomic.
+	The live elimination and rebuy write paths lock the Tournament first so two admins recording at the same time
+	are serialized and their checks see each other's writes. Returns None if it doesn't exist.
+	"""
+	def get_by_id_for_update(self, tournament_id):
+		try:
+			tournament = self.select_for_update(of=("self",)).select_related("tournament_structure").get(pk=tournament_id)
+		except Tournament.DoesNotExist:
+			tournament = None
+		return tournament
+
 	def get_by_user(self, user):
 		tournaments = super().get_queryset().filter(admin=user)
 		return tournaments
@@ -667,21 +737,9 @@ class TournamentManager(models.Manager):
 	"""
 	def is_completable(self, tournament_id):
 		tournament = self.get_by_id(tournament_id)
-		players = TournamentPlayer.objects.get_tournament_players(tournament_id)
-		eliminations = TournamentElimination.objects.get_eliminations_by_tournament(tournament_id)
-		split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament_id)
-
-		# sum buyins + rebuys
-		rebuys = TournamentRebuy.objects.get_rebuys_for_tournament(
-			tournament_id = tournament.id
-		)
-		total_buyins = len(rebuys) + len(players)
 
-		# Find the number of eliminations
-		total_eliminations = len(eliminations) + len(split_eliminations)
-
-		# If every play is eliminated, the difference will be 1
-		if total_buyins - total_eliminations != 1:
+		# If every player is eliminated, only the winner is left.
+		if tournament.num_remaining_players != 1:
 			raise ValidationError("Every player must be eliminated before completing a Tournament")
 		return True
 
@@ -693,29 +751,24 @@ class TournamentManager(models.Manager):
 		tournament = Tournament.objects.get_by_id(tournament_id)
 		if tournament.completed_at == None:
 			raise ValidationError("Tournament value cannot be calculated until a Tournament is complete.")
-		buyin_amount = tournament.tournament_structure.buyin_amount
-		# Sum the initial buyin amounts
 		players = TournamentPlayer.objects.get_tournament_players(tournament_id)
-		total_tournament_value = buyin_amount * len(players)
-		# Add amount from rebuys
-		total_tournament_value += buyin_amount * num_rebuys
-		return round(Decimal(total_tournament_value), 2)
+		return calculate_tournament_value(
+			buyin_amount = tournament.tournament_structure.buyin_amount,
+			num_players = len(players),
+			num_rebuys = num_rebuys
+		)
 
 	"""
 	Return True if all TournamentPlayers have joined.
 	Return False if there are any pending invites.
 	"""
 	def have_all_players_joined_tournament(self, tournament_id):
-		tournament = self.get_by_id(tournament_id)
-		players = TournamentPlayer.objects.get_tournament_players(tournament.id)
-		for player in players:
-			has_joined = TournamentPlayer.objects.has_player_joined_tournament(
-				player_id = player.id,
-				tournament_id = tournament.id
-			)
-			if not has_joined:
-				return False
-		return True
+		player_user_ids = TournamentPlayer.objects.filter(tournament_id=tournament_id).values("user_id")
+		has_pending_invites = TournamentInvite.objects.filter(
+			tournament_id = tournament_id,
+			send_to_id__in = player_user_ids
+		).exists()
+		return not has_pending_invites
 
 	"""
 	Returns all the Tournaments this user has joined (no pending invite) and is not an admin of.
@@ -755,11 +808,32 @@ class Tournament(models.Model):
 	# Set once the tournament has finished.
 	completed_at						= models.DateTimeField(null=True, blank=True)
 
+	# Incremented every time the results change (completion, backfill and undoing a completion). Used to version
+	# cached copies of the completed tournament page.
+	results_version					= models.IntegerField(default=0)
+
+	# Live counters. They are updated in the same transaction as the TournamentPlayer, TournamentElimination,
+	# TournamentSplitElimination and TournamentRebuy rows so the completion and elimination checks are single row
+	# reads. 'python manage.py repair_tournament_counters' recomputes them from the rows.
+	# num_buyins: Number of players + number of rebuys.
+	# num_eliminations: Number of eliminations + number of split eliminations.
+	num_buyins							= models.IntegerField(default=0)
+	num_rebuys							= models.IntegerField(default=0)
+	num_eliminations				= models.IntegerField(default=0)
+
 	objects = TournamentManager()
 
 	def __str__(self):
 		return self.title
 
+	"""
+	Number of players who haven't been eliminated (or rebought after their last elimination). Every buyin is either
+	eliminated or still in.
+	"""
+	@property
+	def num_remaining_players(self):
+		return self.num_buyins - self.num_eliminations
+
 	def get_state(self):
 		if self.started_at == None and self.completed_at == None:
 			return TournamentState.INACTIVE
@@ -811,10 +885,67 @@ class TournamentPlayerManager(models.Manager):
 			user=added_user,
 			tournament=tournament
 		)
-		player.save(using=self._db)
+		try:
+			with transaction.atomic(using=self._db):
+				player.save(using=self._db)
+				Tournament.objects.update_counters(tournament.id, buyins = 1)
+		except IntegrityError:
+			# Added by a concurrent request since the check above.
+			raise ValidationError(f"{added_user.username} is already added to this tournament.")
+		TournamentPlayerLedger.objects.create_ledgers([player.id])
+		UserTournamentResultsVersion.objects.increment_versions([added_user.id])
 
 		return player
 
+	"""
+	Add many users to a Tournament at once. Does the same validation as create_player_for_tournament, but with
+	set-based queries, and creates the TournamentPlayers and their ledgers with bulk inserts. The number of queries
+	doesn't depend on the number of users. Either every user is added or none are.
+
+	Returns the new TournamentPlayers.
+	"""
+	def create_players_for_tournament(self, user_ids, tournament_id):
+		user_ids = [int(user_id) for user_id in user_ids]
+		if len(user_ids) == 0:
+			raise ValidationError("Choose at least one player to add.")
+		if len(set(user_ids)) != len(user_ids):
+			raise ValidationError("There is a duplicate in the list of players you're trying to add.")
+		try:
+			with transaction.atomic(using=self._db):
+				tournament = Tournament.objects.get_by_id_for_update(tournament_id)
+				if tournament == None:
+					raise ValidationError("The tournament you're adding players to doesn't exist.")
+
+				if tournament.completed_at != None:
+					raise ValidationError("You can't add players to a Tournment that is completed.")
+
+				if tournament.started_at != None:
+					raise ValidationError("You can't add players to a Tournment that is started.")
+
+				usernames = dict(User.objects.filter(id__in=user_ids).values_list("id", "username"))
+				if len(usernames) != len(user_ids):
+					raise ValidationError("One of the users you're adding doesn't exist.")
+
+				added_user_ids = super().get_queryset().filter(
+					tournament_id = tournament.id,
+					user_id__in = user_ids
+				).values_list("user_id", flat=True)
+				if len(added_user_ids) > 0:
+					added_usernames = ", ".join(sorted(usernames[user_id] for user_id in added_user_ids))
+					raise ValidationError(f"Already added to this tournament: {added_usernames}.")
+
+				players = self.bulk_create(
+					[self.model(user_id = user_id, tournament = tournament) for user_id in user_ids]
+				)
+				TournamentPlayerLedger.objects.create_ledgers([player.id for player in players])
+				Tournament.objects.update_counters(tournament.id, buyins = len(players))
+		except IntegrityError:
+			# Added by a concurrent request since the check above.
+			raise ValidationError("One of those players was added to this tournament at the same time. Try again.")
+		UserTournamentResultsVersion.objects.increment_versions(user_ids)
+
+		return players
+
 	def remove_player_from_tournament(self, removed_by_user_id, removed_user_id, tournament_id):
 		removed_by_user = User.objects.get_by_id(removed_by_user_id)
 		removed_user = User.objects.get_by_id(removed_user_id)
@@ -840,34 +971,23 @@ class TournamentPlayerManager(models.Manager):
 		if player.tournament != tournament:
 			raise ValidationError(f"{player.user.username} is not part of this tournament.")
 
-		player.delete()
+		with transaction.atomic(using=self._db):
+			player.delete()
+			Tournament.objects.update_counters(tournament.id, buyins = -1)
+		UserTournamentResultsVersion.objects.increment_versions([removed_user.id])
 
 		return removed_user
 
 
-	# from tournament.models import TournamentPlayer
-	# TournamentPlayer.objects.get_tournament_player(user.id, tourament.id)
 	"""
-	If the query returns multiple players, the tournament is corrupt - multiple instances of the same player
-	have been added. Attempt to fix by removing them. The player will have to be re-added.
-
-	If the query returns a single list item, return that player.
-
-	If the query returns no results, return None.
+	Returns the TournamentPlayer for this user and tournament, or None if the user isn't in the tournament.
+	TournamentPlayer has a unique constraint on (user, tournament) so there can't be more than one.
 	"""
 	def get_tournament_player_by_user_id(self, user_id, tournament_id):
-		user = User.objects.get_by_id(user_id)
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		players = super().get_queryset().filter(user=user, tournament=tournament)
-		if len(players) > 1:
-			for player in players:
-				player.delete()
-			raise ValidationError("This tournament is corrupt. The same user has been added multiple times.  Attempting to fix...")
-		
-		if len(players) == 1:
-			return players.first()
-		else:
-			return None
+		return super().get_queryset().filter(
+			user_id = user_id,
+			tournament_id = tournament_id
+		).first()
 
 	"""
 	Get all the TournamentPlayers for this tournament.
@@ -899,22 +1019,36 @@ class TournamentPlayerManager(models.Manager):
 	Returns True if a player has joined a tournament. They are considered as "joined" if they TournamentInvite does not exist.
 	"""
 	def has_player_joined_tournament(self, tournament_id, player_id):
-		try:
-			player = self.get(id=player_id)
-			tournament = Tournament.objects.get_by_id(tournament_id)
-			if player.tournament != tournament:
-				raise ValidationError("That play is not part of this tournament.")
-			invites = TournamentInvite.objects.find_pending_invites(
-				send_to_user_id = player.user.id,
-				tournament_id = tournament_id
-			)
-			if len(invites) == 0:
-				return True
-			else:
-				return False
-		except TournamentPlayer.DoesNotExist:
-			pass
-		return False
+		player = super().get_queryset().filter(id=player_id).values("user_id", "tournament_id").first()
+		if player == None:
+			return False
+		if player['tournament_id'] != int(tournament_id):
+			raise ValidationError("That play is not part of this tournament.")
+		return not TournamentInvite.objects.find_pending_invites(
+			send_to_user_id = player['user_id'],
+			tournament_id = tournament_id
+		).exists()
+
+	"""
+	Build the TournamentPlayerLookups for a Tournament: the players that have joined and the number of rebuys of each
+	player. One query each.
+	"""
+	def build_player_lookups(self, tournament_id):
+		joined_player_ids = set(
+			super().get_queryset().filter(tournament_id=tournament_id).exclude(
+				user_id__in = TournamentInvite.objects.find_pending_invites_for_tournament(tournament_id).values("send_to_id")
+			).values_list("id", flat=True)
+		)
+		rebuys_by_player_id = dict(
+			TournamentRebuy.objects.filter(player__tournament_id=tournament_id).order_by().values("player_id").annotate(
+				count = models.Count("id")
+			).values_list("player_id", "count")
+		)
+		return TournamentPlayerLookups(
+			tournament_id = tournament_id,
+			joined_player_ids = joined_player_ids,
+			rebuys_by_player_id = rebuys_by_player_id
+		)
 
 	"""
 	Return True is a player has been eliminated from a Tournament (and has no more rebuys).
@@ -923,15 +1057,10 @@ class TournamentPlayerManager(models.Manager):
 	Remember: If they've rebought once they will have one existing elimination.
 	"""
 	def is_player_eliminated(self, player_id):
-		player = TournamentPlayer.objects.get_by_id(pk = player_id)
-		eliminations = TournamentElimination.objects.get_eliminations_by_eliminatee(player_id = player.id)
-		split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_eliminatee(player_id = player.id)
-		rebuys = TournamentRebuy.objects.get_rebuys_for_player(
-			player = player
+		ledger = TournamentPlayerLedger.objects.get_ledger_for_player(
+			player_id = player_id
 		)
-		if len(eliminations) + len(split_eliminations) > len(rebuys):
-			return True
-		return False
+		return ledger.is_eliminated
 
 """
 A player associated with specific tournament.
@@ -942,9 +1071,24 @@ class TournamentPlayer(models.Model):
 	
 	objects = TournamentPlayerManager()
 
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["user", "tournament"], name="unique_tournament_player"),
+		]
+
 	def __str__(self):
 		return self.user.username
 
+	"""
+	Returns this player's TournamentPlayerLedger. Returns an unsaved, zeroed ledger if one doesn't exist yet.
+	Use select_related("ledger") when loading many players.
+	"""
+	def get_ledger(self):
+		try:
+			return self.ledger
+		except TournamentPlayerLedger.DoesNotExist:
+			return TournamentPlayerLedger(player = self)
+
 class TournamentInviteManager(models.Manager):
 	
 	# Send a tournament invite to a user. When they accept, they will become a TournamentPlayer.
@@ -991,7 +1135,12 @@ class TournamentInviteManager(models.Manager):
 					send_to=send_to,
 					tournament=tournament
 				)
-				invite.save(using=self._db)
+				try:
+					with transaction.atomic(using=self._db):
+						invite.save(using=self._db)
+				except IntegrityError:
+					# Invited by a concurrent request since the check above.
+					raise ValidationError(f"{send_to.username} has already been invited.")
 
 				# Create a TournamentPlayer. Note: The player won't be considered as "Joined" until they accept the invitation.
 				TournamentPlayer.objects.create_player_for_tournament(
@@ -1005,6 +1154,75 @@ class TournamentInviteManager(models.Manager):
 		except User.DoesNotExist:
 			raise ValidationError("The user you're inviting doesn't exist.")
 
+	"""
+	Invite many users to a Tournament at once, e.g. everyone in a TournamentGroup. Does the same validation as
+	send_invite, but with set-based queries, and creates the TournamentInvites and TournamentPlayers with bulk inserts
+	in one transaction. Either every user is invited or none are.
+
+	If 'skip_existing_players' is True, the admin and users that are already in the Tournament (including the ones
+	with a pending invite) are left out instead of failing the whole request.
+
+	Returns the new TournamentInvites.
+	"""
+	def send_invites(self, sent_from_user_id, send_to_user_ids, tournament_id, skip_existing_players=False):
+		send_to_user_ids = [int(user_id) for user_id in send_to_user_ids]
+		if len(send_to_user_ids) == 0:
+			raise ValidationError("Choose at least one player to invite.")
+		try:
+			with transaction.atomic(using=self._db):
+				tournament = Tournament.objects.get_by_id_for_update(tournament_id)
+				if tournament == None:
+					raise ValidationError("The tournament you're inviting to doesn't exist.")
+
+				# Verify the person sending the invites is the tournament admin
+				if tournament.admin_id != int(sent_from_user_id):
+					raise ValidationError("You can't send invites unless you're the admin.")
+
+				# Verify the Tournament isn't completed
+				if tournament.get_state() == TournamentState.COMPLETED:
+					raise ValidationError("You can't invite to a Tournment that's completed.")
+
+				# Verify the Tournament isn't started
+				if tournament.get_state() == TournamentState.ACTIVE:
+					raise ValidationError("You can't invite to a Tournment that's started.")
+
+				if skip_existing_players:
+					existing_user_ids = set(
+						TournamentPlayer.objects.filter(
+							tournament_id = tournament.id,
+							user_id__in = send_to_user_ids
+						).values_list("user_id", flat=True)
+					)
+					existing_user_ids.add(tournament.admin_id)
+					send_to_user_ids = [user_id for user_id in send_to_user_ids if user_id not in existing_user_ids]
+					if len(send_to_user_ids) == 0:
+						raise ValidationError("Everyone you're inviting is already in this tournament.")
+
+				# Verify the admin is not inviting themself to the tournament
+				if tournament.admin_id in send_to_user_ids:
+					raise ValidationError("You can't invite yourself to the Tournament.")
+
+				# Verify there aren't already pending invites.
+				invited_usernames = self.find_pending_invites_for_tournament(tournament.id).filter(
+					send_to_id__in = send_to_user_ids
+				).values_list("send_to__username", flat=True)
+				if len(invited_usernames) > 0:
+					raise ValidationError(f"Already invited: {', '.join(sorted(invited_usernames))}.")
+
+				# Create the TournamentPlayers. This also verifies the users exist and aren't already players.
+				# Note: The players won't be considered as "Joined" until they accept the invitation.
+				TournamentPlayer.objects.create_players_for_tournament(
+					user_ids = send_to_user_ids,
+					tournament_id = tournament.id
+				)
+				invites = self.bulk_create(
+					[self.model(send_to_id = user_id, tournament = tournament) for user_id in send_to_user_ids]
+				)
+		except IntegrityError:
+			# Invited by a concurrent request since the check above.
+			raise ValidationError("One of those players was invited to this tournament at the same time. Try again.")
+		return invites
+
 	def uninvite_player_from_tournament(self, admin_id, uninvite_user_id, tournament_id):
 		admin = User.objects.get_by_id(admin_id)
 		uninvite_user = User.objects.get_by_id(uninvite_user_id)
@@ -1031,26 +1249,25 @@ class TournamentInviteManager(models.Manager):
 			tournament_id = tournament.id,
 			user_id = uninvite_user.id
 		)
-		player.delete()
+		with transaction.atomic(using=self._db):
+			player.delete()
+			Tournament.objects.update_counters(tournament.id, buyins = -1)
+		UserTournamentResultsVersion.objects.increment_versions([uninvite_user.id])
 
 		return uninvite_user
 
 
 	# Return a queryset containing any pending invites for a user and a tournament.
 	def find_pending_invites(self, send_to_user_id, tournament_id):
-		send_to = User.objects.get_by_id(send_to_user_id)
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		invites = super().get_queryset().filter(send_to=send_to, tournament=tournament)
+		invites = super().get_queryset().filter(send_to_id=send_to_user_id, tournament_id=tournament_id)
 		return invites
 
 	def find_pending_invites_for_user(self, send_to_user_id):
-		send_to = User.objects.get_by_id(send_to_user_id)
-		invites = super().get_queryset().filter(send_to=send_to)
+		invites = super().get_queryset().filter(send_to_id=send_to_user_id)
 		return invites
 
 	def find_pending_invites_for_tournament(self, tournament_id):
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		invites = super().get_queryset().filter(tournament=tournament)
+		invites = super().get_queryset().filter(tournament_id=tournament_id)
 		return invites
 
 class TournamentInvite(models.Model):
@@ -1059,24 +1276,42 @@ class TournamentInvite(models.Model):
 
 	objects = TournamentInviteManager()
 
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["send_to", "tournament"], name="unique_tournament_invite"),
+		]
+
 	def __str__(self):
 		return f"Invite for tournament {self.tournament.title} sent to {self.send_to.username}."
 
 
 
+"""
+The number of eliminators of a split elimination. For querysets over the TournamentSplitElimination.eliminators
+through table. The fraction each eliminator gets is then calculated with get_split_elimination_fraction so it's rounded
+the same way as the ledgers.
+"""
+def build_num_split_eliminators():
+	num_eliminators = TournamentSplitElimination.eliminators.through.objects.filter(
+		tournamentsplitelimination_id = models.OuterRef("tournamentsplitelimination_id")
+	).values("tournamentsplitelimination_id").annotate(
+		count = models.Count("id")
+	).values("count")
+	return models.Subquery(num_eliminators, output_field = models.IntegerField())
+
 class TournamentEliminationManager(models.Manager):
-	def get_eliminations_by_tournament(self, tournament_id):
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		players = TournamentPlayer.objects.get_tournament_players(
-			tournament_id = tournament.id
-		)
-		eliminations = []
-		for player in players:
-			eliminations_for_player = self.get_eliminations_by_eliminatee(
-				player_id = player.id
-			)
-			for elimination in eliminations_for_player:
-				eliminations.append(elimination)
+
+	"""
+	All the eliminations in a Tournament, ordered from (last elim) -> (first elim).
+	The eliminator and eliminatee users are loaded in the same query.
+	"""
+	def get_eliminations_by_tournament(self, tournament_id):
+		eliminations = super().get_queryset().filter(
+			eliminatee__tournament_id=tournament_id,
+		).select_related(
+			"eliminator__user",
+			"eliminatee__user"
+		).order_by("-eliminated_at", "-id")
 		return eliminations
 
 	def get_eliminations_by_eliminator(self, player_id):
@@ -1100,75 +1335,193 @@ class TournamentEliminationManager(models.Manager):
 		return eliminations
 
 	"""
-	eliminator_id: id of the TournamentPlayer doing the eliminating.
-	eliminatee_id: id of the TournamentPlayer being eliminated.
+	Head-to-head elimination matrix for 'tournaments'. Returns a list of HeadToHeadEliminationData, one for each
+	(eliminator user, eliminatee user) pair with at least one elimination.
+
+	Built with two GROUP BY queries no matter how many tournaments or eliminations there are:
+	1. TournamentElimination counted for each (eliminator user, eliminatee user).
+	2. The TournamentSplitElimination eliminators (M2M) counted for each (eliminator user, eliminatee user, number of
+	eliminators). Each eliminator gets get_split_elimination_fraction(number of eliminators) of the split elimination.
+
+	users: Only include eliminations where both the eliminator and eliminatee are in 'users'.
+
+	The head-to-head matrix of a single user across every tournament is served from the PlayerEliminationAnalytics
+	read model instead (see PlayerEliminationAnalyticsManager.get_head_to_head_data_for_user).
 	"""
-	def create_elimination(self, tournament_id, eliminator_id, eliminatee_id):
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		eliminator_player = TournamentPlayer.objects.get_by_id(
-			pk = eliminator_id
+	def build_head_to_head_data(self, tournaments, users = None):
+		eliminations = super().get_queryset().filter(
+			eliminatee__tournament__in = tournaments
 		)
-		eliminatee_player = TournamentPlayer.objects.get_by_id(
-			pk = eliminatee_id
+		split_eliminators = TournamentSplitElimination.eliminators.through.objects.filter(
+			tournamentsplitelimination__eliminatee__tournament__in = tournaments
 		)
+		if users != None:
+			eliminations = eliminations.filter(
+				eliminator__user__in = users,
+				eliminatee__user__in = users
+			)
+			split_eliminators = split_eliminators.filter(
+				tournamentplayer__user__in = users,
+				tournamentsplitelimination__eliminatee__user__in = users
+			)
 
-		if eliminator_player == None:
-			raise ValidationError("Eliminator is not part of that Tournament.")
-
-		if eliminatee_player == None:
-			raise ValidationError("Eliminatee is not part of that Tournament.")
+		head_to_head = {}
+		eliminations = eliminations.values(
+			"eliminator__user_id",
+			"eliminator__user__username",
+			"eliminatee__user_id",
+			"eliminatee__user__username"
+		).annotate(
+			count = models.Count("id")
+		).order_by()
+		for elimination in eliminations:
+			data = get_or_create_head_to_head_data(
+				head_to_head = head_to_head,
+				eliminator_user_id = elimination['eliminator__user_id'],
+				eliminator_username = elimination['eliminator__user__username'],
+				eliminatee_user_id = elimination['eliminatee__user_id'],
+				eliminatee_username = elimination['eliminatee__user__username']
+			)
+			data.eliminations += elimination['count']
+
+		split_eliminators = split_eliminators.annotate(
+			num_eliminators = build_num_split_eliminators()
+		).values(
+			"tournamentplayer__user_id",
+			"tournamentplayer__user__username",
+			"tournamentsplitelimination__eliminatee__user_id",
+			"tournamentsplitelimination__eliminatee__user__username",
+			"num_eliminators"
+		).annotate(
+			count = models.Count("id")
+		).order_by()
+		split_eliminations = {}
+		for eliminator in split_eliminators:
+			data = get_or_create_head_to_head_data(
+				head_to_head = head_to_head,
+				eliminator_user_id = eliminator['tournamentplayer__user_id'],
+				eliminator_username = eliminator['tournamentplayer__user__username'],
+				eliminatee_user_id = eliminator['tournamentsplitelimination__eliminatee__user_id'],
+				eliminatee_username = eliminator['tournamentsplitelimination__eliminatee__user__username']
+			)
+			key = (data.eliminator_user_id, data.eliminatee_user_id)
+			split_eliminations[key] = split_eliminations.get(key, Decimal(0)) + (
+				eliminator['count'] * get_split_elimination_fraction(eliminator['num_eliminators'])
+			)
+		for key, count in split_eliminations.items():
+			head_to_head[key].split_eliminations = float(count)
 
-		# Verify the Tournament has started
-		if tournament.get_state() != TournamentState.ACTIVE:
-			raise ValidationError("You can only eliminate players if the Tournament is Active.")
-		
-		# Make sure a player isn't trying to eliminate themself.
-		if eliminator_player == eliminatee_player:
-			raise ValueError(f"{eliminator_player.user.username} can't eliminate themselves!")
+		return sorted(
+			head_to_head.values(),
+			key = lambda x: (x.eliminator_username, x.eliminatee_username)
+		)
 
-		# Verify this is not the last player in the Tournament.
-		players = TournamentPlayer.objects.get_tournament_players(
-			tournament_id = tournament.id
+	"""
+	Every elimination in 'tournaments' where the eliminator or the eliminatee is one of 'users', for exporting (see
+	tournament.export). Returns two values_list querysets, one for the whole eliminations and one for the split
+	eliminations (one row for each eliminator). The columns of both are:
+	(tournament id, tournament title, eliminated_at, eliminator username, eliminatee username, eliminations,
+	is_split, is_backfill)
+
+	eliminations is 1 for a whole elimination. For a split elimination it's the number of eliminators instead (the
+	eliminator's fraction is get_split_elimination_fraction of it, see tournament.export.iter_export_rows).
+	"""
+	def get_eliminations_for_export(self, tournaments, users):
+		eliminations = super().get_queryset().filter(
+			models.Q(eliminator__user__in = users) | models.Q(eliminatee__user__in = users),
+			eliminatee__tournament__in = tournaments
+		).annotate(
+			eliminations = models.Value(1.0, output_field = models.FloatField()),
+			is_split = models.Value(False, output_field = models.BooleanField())
+		).order_by("eliminated_at", "id").values_list(
+			"eliminatee__tournament_id",
+			"eliminatee__tournament__title",
+			"eliminated_at",
+			"eliminator__user__username",
+			"eliminatee__user__username",
+			"eliminations",
+			"is_split",
+			"is_backfill"
 		)
-		num_rebuys = 0
-		if tournament.tournament_structure.allow_rebuys:
-			tournament_rebuys = TournamentRebuy.objects.get_rebuys_for_tournament(
-				tournament_id = tournament.id
-			)
-			num_rebuys += len(tournament_rebuys)
-		total_buyins = num_rebuys + len(players)
-		eliminations = TournamentElimination.objects.get_eliminations_by_tournament(
-			tournament_id = tournament.id
+		split_eliminations = TournamentSplitElimination.eliminators.through.objects.filter(
+			models.Q(tournamentplayer__user__in = users) | models.Q(tournamentsplitelimination__eliminatee__user__in = users),
+			tournamentsplitelimination__eliminatee__tournament__in = tournaments
+		).annotate(
+			eliminations = build_num_split_eliminators(),
+			is_split = models.Value(True, output_field = models.BooleanField())
+		).order_by("tournamentsplitelimination__eliminated_at", "id").values_list(
+			"tournamentsplitelimination__eliminatee__tournament_id",
+			"tournamentsplitelimination__eliminatee__tournament__title",
+			"tournamentsplitelimination__eliminated_at",
+			"tournamentplayer__user__username",
+			"tournamentsplitelimination__eliminatee__user__username",
+			"eliminations",
+			"is_split",
+			"tournamentsplitelimination__is_backfill"
 		)
-		if total_buyins <= (len(eliminations) + 1):
-			raise ValidationError("You can't eliminate any more players. Complete the Tournament.")
+		return eliminations, split_eliminations
 
-		# Verify a multiple-eliminations aren't happening unless they've rebought.
-		is_player_eliminated = TournamentPlayer.objects.is_player_eliminated(
-			player_id = eliminatee_player.id
-		)
-		if is_player_eliminated:
-			raise ValidationError(f"{eliminatee_player.user.username} has already been eliminated and has no more re-buys.")
+	"""
+	eliminator_id: id of the TournamentPlayer doing the eliminating.
+	eliminatee_id: id of the TournamentPlayer being eliminated.
+	"""
+	def create_elimination(self, tournament_id, eliminator_id, eliminatee_id):
+		with transaction.atomic(using=self._db):
+			tournament = Tournament.objects.get_by_id_for_update(tournament_id)
+			eliminator_player = TournamentPlayer.objects.get_by_id(
+				pk = eliminator_id
+			)
+			eliminatee_player = TournamentPlayer.objects.get_by_id(
+				pk = eliminatee_id
+			)
 
-		elimination = self.model(
-			eliminator=eliminator_player,
-			eliminatee=eliminatee_player
-		)
-		elimination.save(using=self._db)
+			if tournament == None or eliminator_player == None or eliminator_player.tournament_id != tournament.id:
+				raise ValidationError("Eliminator is not part of that Tournament.")
+
+			if eliminatee_player == None or eliminatee_player.tournament_id != tournament.id:
+				raise ValidationError("Eliminatee is not part of that Tournament.")
+
+			# Verify the Tournament has started
+			if tournament.get_state() != TournamentState.ACTIVE:
+				raise ValidationError("You can only eliminate players if the Tournament is Active.")
+			
+			# Make sure a player isn't trying to eliminate themself.
+			if eliminator_player == eliminatee_player:
+				raise ValueError(f"{eliminator_player.user.username} can't eliminate themselves!")
+
+			# Verify this is not the last player in the Tournament and they haven't been eliminated already.
+			TournamentPlayerLedger.objects.validate_elimination(
+				tournament = tournament,
+				eliminatee_player = eliminatee_player
+			)
+
+			elimination = self.model(
+				eliminator=eliminator_player,
+				eliminatee=eliminatee_player
+			)
+			elimination.save(using=self._db)
+			TournamentPlayerLedger.objects.record_elimination(
+				eliminator_id = eliminator_player.id,
+				eliminatee_id = eliminatee_player.id
+			)
+			Tournament.objects.update_counters(tournament.id, eliminations = 1)
 		return elimination
 
 	"""
-	Creates an elimination for a backfilled tournament. Because its a backfill, the `is_backfill' flag is set to True.
+	Creates the eliminations for a backfilled tournament with a single bulk_create. Because its a backfill, the
+	`is_backfill' flag is set to True. The eliminations must already be validated (see
+	TournamentManager.complete_tournament_for_backfill) and the ledgers are not updated.
+
+	eliminations: list of (eliminator player id, eliminatee player id).
 	"""
-	def create_backfill_elimination(self, tournament_id, eliminator_id, eliminatee_id):
-		elimination = self.create_elimination(
-			tournament_id = tournament_id,
-			eliminator_id = eliminator_id,
-			eliminatee_id = eliminatee_id,
-		)
-		elimination.is_backfill = True
-		elimination.save()
-		return elimination
+	def create_backfill_eliminations(self, eliminations):
+		return self.bulk_create([
+			self.model(
+				eliminator_id = eliminator_id,
+				eliminatee_id = eliminatee_id,
+				is_backfill = True
+			) for eliminator_id, eliminatee_id in eliminations
+		])
 
 """
 Tracks the data for eliminations. 
@@ -1198,34 +1551,32 @@ class TournamentElimination(models.Model):
 
 class TournamentSplitEliminationManager(models.Manager):
 
+	"""
+	All the split eliminations in a Tournament, ordered from (last elim) -> (first elim).
+	The eliminatee user is loaded in the same query and the eliminators (and their users) are prefetched.
+	"""
 	def get_split_eliminations_by_tournament(self, tournament_id):
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		players = TournamentPlayer.objects.get_tournament_players(
-			tournament_id = tournament.id
-		)
-		split_eliminations = []
-		for player in players:
-			split_eliminations_for_player = self.get_split_eliminations_by_eliminatee(
-				player_id = player.id
-			)
-			for split_elimination in split_eliminations_for_player:
-				split_eliminations.append(split_elimination)
+		split_eliminations = super().get_queryset().filter(
+			eliminatee__tournament_id=tournament_id,
+		).select_related(
+			"eliminatee__user"
+		).prefetch_related(
+			models.Prefetch("eliminators", queryset=TournamentPlayer.objects.select_related("user"))
+		).order_by("-eliminated_at", "-id")
 		return split_eliminations
 
+	"""
+	Split eliminations where this player was one of the eliminators, ordered from (last elim) -> (first elim).
+	"""
 	def get_split_eliminations_by_eliminator(self, player_id):
-		player = TournamentPlayer.objects.get_by_id(
-			pk = player_id
-		)
-		# Get the split eliminations for the tournament
-		split_eliminations = self.get_split_eliminations_by_tournament(
-			tournament_id = player.tournament.id
-		)
-		# Find Split eliminations where this player was the eliminator.
-		player_split_eliminations = []
-		for split_elimination in split_eliminations:
-			if player in split_elimination.eliminators.all():
-				player_split_eliminations.append(split_elimination)
-		return player_split_eliminations
+		split_eliminations = super().get_queryset().filter(
+			eliminators__id=player_id,
+		).select_related(
+			"eliminatee__user"
+		).prefetch_related(
+			models.Prefetch("eliminators", queryset=TournamentPlayer.objects.select_related("user"))
+		).order_by("-eliminated_at", "-id")
+		return split_eliminations
 
 	def get_split_eliminations_by_eliminatee(self, player_id):
 		player = TournamentPlayer.objects.get_by_id(
@@ -1241,87 +1592,87 @@ class TournamentSplitEliminationManager(models.Manager):
 	Creates a TournamentSplitElimination using the list of eliminators in 'eliminator_ids'.
 	"""
 	def create_split_elimination(self, tournament_id, eliminator_ids, eliminatee_id):
-		tournament = Tournament.objects.get_by_id(tournament_id)
-
-		# Get eliminated player
-		eliminatee_player = TournamentPlayer.objects.get_by_id(
-			pk = eliminatee_id
-		)
-		if eliminatee_player == None:
-			raise ValidationError("Eliminatee is not part of that Tournament.")
+		with transaction.atomic(using=self._db):
+			tournament = Tournament.objects.get_by_id_for_update(tournament_id)
 
-		# Get the players doing the eliminating (splitting the elimination)
-		eliminator_players = []
-		for eliminator_id in eliminator_ids:
-			eliminator_player = TournamentPlayer.objects.get_by_id(
-				pk = eliminator_id
+			# Get eliminated player
+			eliminatee_player = TournamentPlayer.objects.get_by_id(
+				pk = eliminatee_id
 			)
-			
-			# Verify they are part of this tournament
-			if eliminator_player == None:
-				raise ValidationError("Eliminator is not part of that Tournament.")
-			
-			# Make sure a player isn't trying to eliminate themself.
-			if eliminator_player == eliminatee_player:
-				raise ValidationError(f"{eliminator_player.user.username} can't eliminate themselves!")
+			if tournament == None or eliminatee_player == None or eliminatee_player.tournament_id != tournament.id:
+				raise ValidationError("Eliminatee is not part of that Tournament.")
+
+			# Get the players doing the eliminating (splitting the elimination)
+			eliminator_players = []
+			for eliminator_id in eliminator_ids:
+				eliminator_player = TournamentPlayer.objects.get_by_id(
+					pk = eliminator_id
+				)
+				
+				# Verify they are part of this tournament
+				if eliminator_player == None or eliminator_player.tournament_id != tournament.id:
+					raise ValidationError("Eliminator is not part of that Tournament.")
+				
+				# Make sure a player isn't trying to eliminate themself.
+				if eliminator_player == eliminatee_player:
+					raise ValidationError(f"{eliminator_player.user.username} can't eliminate themselves!")
 
-			# Make sure they didn't specify the same user twice
-			if eliminator_player in eliminator_players:
-				raise ValidationError(f"You specified {eliminator_player.user.username} more than once as an eliminator.")
+				# Make sure they didn't specify the same user twice
+				if eliminator_player in eliminator_players:
+					raise ValidationError(f"You specified {eliminator_player.user.username} more than once as an eliminator.")
 
-			eliminator_players.append(eliminator_player)
+				eliminator_players.append(eliminator_player)
 
-		if len(eliminator_players) <= 1:
-			raise ValidationError("You must choose more than one eliminator for a split elimination.")
+			if len(eliminator_players) <= 1:
+				raise ValidationError("You must choose more than one eliminator for a split elimination.")
 
-		# Verify the Tournament has started
-		if tournament.get_state() != TournamentState.ACTIVE:
-			raise ValidationError("You can only eliminate players if the Tournament is Active.")
+			# Verify the Tournament has started
+			if tournament.get_state() != TournamentState.ACTIVE:
+				raise ValidationError("You can only eliminate players if the Tournament is Active.")
 
-		# Verify this is not the last player in the Tournament.
-		players = TournamentPlayer.objects.get_tournament_players(
-			tournament_id = tournament.id
-		)
-		num_rebuys = 0
-		if tournament.tournament_structure.allow_rebuys:
-			tournament_rebuys = TournamentRebuy.objects.get_rebuys_for_tournament(
-				tournament_id = tournament.id
+			# Verify this is not the last player in the Tournament and they haven't been eliminated already.
+			TournamentPlayerLedger.objects.validate_elimination(
+				tournament = tournament,
+				eliminatee_player = eliminatee_player
 			)
-			num_rebuys += len(tournament_rebuys)
-		total_buyins = num_rebuys + len(players)
-		eliminations = TournamentElimination.objects.get_eliminations_by_tournament(
-			tournament_id = tournament.id
-		)
-		if total_buyins <= (len(eliminations) + 1):
-			raise ValidationError("You can't eliminate any more players. Complete the Tournament.")
-
-		# Verify a multiple-eliminations aren't happening unless they've rebought.
-		is_player_eliminated = TournamentPlayer.objects.is_player_eliminated(
-			player_id = eliminatee_player.id
-		)
-		if is_player_eliminated:
-			raise ValidationError(f"{eliminatee_player.user.username} has already been eliminated and has no more re-buys.")
 
-		split_elimination = self.model(
-			eliminatee = eliminatee_player
-		)
-		split_elimination.save(using=self._db)
-		split_elimination.eliminators.add(*eliminator_players)
-		split_elimination.save()
+			split_elimination = self.model(
+				eliminatee = eliminatee_player
+			)
+			split_elimination.save(using=self._db)
+			split_elimination.eliminators.add(*eliminator_players)
+			TournamentPlayerLedger.objects.record_split_elimination(
+				eliminator_ids = [eliminator_player.id for eliminator_player in eliminator_players],
+				eliminatee_id = eliminatee_player.id
+			)
+			Tournament.objects.update_counters(tournament.id, eliminations = 1)
 		return split_elimination
 
 	"""
-	Creates a TouramentSplitElimination for a backfilled tournament. Because its a backfill, the `is_backfill' flag is set to True.
+	Creates the TouramentSplitEliminations for a backfilled tournament. The split eliminations and their eliminators
+	are each written with a single bulk_create. Because its a backfill, the `is_backfill' flag is set to True. The
+	split eliminations must already be validated (see TournamentManager.complete_tournament_for_backfill) and the
+	ledgers are not updated.
+
+	split_eliminations: list of ([eliminator player ids], eliminatee player id).
 	"""
-	def create_backfill_split_elimination(self, tournament_id, eliminators, eliminatee):
-		split_elimination = self.create_split_elimination(
-			tournament_id = tournament_id,
-			eliminator_ids = [eliminator.id for eliminator in eliminators],
-			eliminatee_id = eliminatee.id,
-		)
-		split_elimination.is_backfill = True
-		split_elimination.save()
-		return split_elimination
+	def create_backfill_split_eliminations(self, split_eliminations):
+		created = self.bulk_create([
+			self.model(
+				eliminatee_id = eliminatee_id,
+				is_backfill = True
+			) for eliminator_ids, eliminatee_id in split_eliminations
+		])
+		Eliminator = self.model.eliminators.through
+		Eliminator.objects.bulk_create([
+			Eliminator(
+				tournamentsplitelimination_id = split_elimination.id,
+				tournamentplayer_id = eliminator_id
+			)
+			for split_elimination, (eliminator_ids, eliminatee_id) in zip(created, split_eliminations)
+			for eliminator_id in eliminator_ids
+		])
+		return created
 
 class TournamentSplitElimination(models.Model):
 	eliminators				= models.ManyToManyField(TournamentPlayer, related_name="Eliminators_for_split")
@@ -1348,67 +1699,74 @@ class TournamentSplitElimination(models.Model):
 class TournamentRebuyManager(models.Manager):
 
 	def rebuy(self, tournament_id, player_id):
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		player = TournamentPlayer.objects.get_by_id(player_id)
+		with transaction.atomic(using=self._db):
+			tournament = Tournament.objects.get_by_id_for_update(tournament_id)
+			player = TournamentPlayer.objects.get_by_id(player_id)
 
-		# Verify this player is in this tournament
-		if player == None or player.tournament != tournament:
-			raise ValidationError("That player is not part of this tournament.")
+			# Verify this player is in this tournament
+			if tournament == None or player == None or player.tournament_id != tournament.id:
+				raise ValidationError("That player is not part of this tournament.")
 
-		# Verify the tournament allows rebuys
-		if not tournament.tournament_structure.allow_rebuys:
-			raise ValidationError("This tournament does not allow rebuys. Update the Tournament Structure.")
+			# Verify the tournament allows rebuys
+			if not tournament.tournament_structure.allow_rebuys:
+				raise ValidationError("This tournament does not allow rebuys. Update the Tournament Structure.")
 
-		# Verify Tournament is active
-		if tournament.get_state() != TournamentState.ACTIVE:
-			raise ValidationError("Cannot rebuy if Tournament is not active.")
+			# Verify Tournament is active
+			if tournament.get_state() != TournamentState.ACTIVE:
+				raise ValidationError("Cannot rebuy if Tournament is not active.")
 
-		# Verify they're out of rebuys.
-		num_eliminations = len(
-			TournamentElimination.objects.get_eliminations_by_eliminatee(
+			# Verify they're out of rebuys.
+			ledger = TournamentPlayerLedger.objects.get_ledger_for_player(
 				player_id = player.id
 			)
-		)
-		num_eliminations += len(
-			TournamentSplitElimination.objects.get_split_eliminations_by_eliminatee(
-				player_id = player.id
+			if not ledger.is_eliminated:
+				raise ValidationError(
+					f"{player.user.username} has not been eliminated. Eliminate them before adding another rebuy."
+				)
+
+			tournament_rebuy = self.model(
+				player = player
 			)
-		)
-		rebuys = self.get_rebuys_for_player(
-			player = player
-		)
-		if num_eliminations <= len(rebuys):
-			raise ValidationError(
-				f"{player.user.username} has not been eliminated. Eliminate them before adding another rebuy."
+			tournament_rebuy.save(using=self._db)
+			TournamentPlayerLedger.objects.record_rebuy(
+				player_id = player.id
 			)
-		tournament_rebuy = self.model(
-			player = player
-		)
-		tournament_rebuy.save(using=self._db)
+			Tournament.objects.update_counters(tournament.id, buyins = 1, rebuys = 1)
 		return tournament_rebuy
 
 	"""
-	Similar to 'rebuy', but because this is used in a "tournament backfill" context, some of the validation is ignored.
-	Basically rebuys are added without determining if one is actually needed. Also the 'is_backfill' flag is set to true.
-	"""
-	def backfill_rebuy(self, tournament_id, player_id):
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		player = TournamentPlayer.objects.get_by_id(player_id)
-
-		# Verify this player is in this tournament
-		if player == None or player.tournament != tournament:
-			raise ValidationError("That player is not part of this tournament.")
+	Similar to 'rebuy', but because this is used in a "tournament backfill" context, the validation is done by
+	TournamentManager.complete_tournament_for_backfill. Every rebuy is written with a single bulk_create, the
+	'is_backfill' flag is set to true and the ledgers are not updated.
 
-		# Verify the tournament allows rebuys
-		if not tournament.tournament_structure.allow_rebuys:
-			raise ValidationError("This tournament does not allow rebuys. Update the Tournament Structure.")
+	rebuys_dict: {<player_id>: <num_rebuys>}
+	"""
+	def create_backfill_rebuys(self, rebuys_dict):
+		return self.bulk_create([
+			self.model(
+				player_id = player_id,
+				is_backfill = True
+			)
+			for player_id, num_rebuys in rebuys_dict.items()
+			for i in range(0, num_rebuys)
+		])
 
-		tournament_rebuy = self.model(
-			player = player,
-			is_backfill = True
+	"""
+	Every rebuy in 'tournaments' by one of 'users', for exporting (see tournament.export). Returns a values_list
+	queryset with the columns:
+	(tournament id, tournament title, timestamp, username, is_backfill)
+	"""
+	def get_rebuys_for_export(self, tournaments, users):
+		return super().get_queryset().filter(
+			player__tournament__in = tournaments,
+			player__user__in = users
+		).order_by("timestamp", "id").values_list(
+			"player__tournament_id",
+			"player__tournament__title",
+			"timestamp",
+			"player__user__username",
+			"is_backfill"
 		)
-		tournament_rebuy.save(using=self._db)
-		return tournament_rebuy
 
 	def get_rebuys_for_player(self, player):
 		rebuys = super().get_queryset().filter(
@@ -1416,26 +1774,20 @@ class TournamentRebuyManager(models.Manager):
 		)
 		return rebuys
 
+	"""
+	All the rebuys in a Tournament. The player's user is loaded in the same query.
+	"""
 	def get_rebuys_for_tournament(self, tournament_id):
-		players = TournamentPlayer.objects.get_tournament_players(
-			tournament_id = tournament_id
-		)
-		rebuys = []
-		for player in players:
-			rebuys_for_player = self.get_rebuys_for_player(
-				player = player
-			)
-			for rebuy in rebuys_for_player:
-				rebuys.append(rebuy)
+		rebuys = super().get_queryset().filter(
+			player__tournament_id=tournament_id
+		).select_related("player__user").order_by("-timestamp", "-id")
 		return rebuys
 
 	"""
 	Delete all the rebuy data for a Tournament.
 	"""
 	def delete_tournament_rebuys(self, tournament_id):
-		rebuys = self.get_rebuys_for_tournament(tournament_id)
-		for rebuy in rebuys:
-			rebuy.delete()
+		self.get_rebuys_for_tournament(tournament_id).delete()
 
 """
 Denotes a "Rebuy" event for a particular TournamentPlayer.
@@ -1450,6 +1802,11 @@ class TournamentRebuy(models.Model):
 	
 	objects = TournamentRebuyManager()
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["player", "timestamp"]),
+		]
+
 	def __str__(self):
 		return f"{self.player.user.username} rebought at {self.timestamp}."
 
@@ -1460,19 +1817,238 @@ class TournamentRebuy(models.Model):
 		return self.player.user.username
 
 
+class TournamentPlayerLedgerManager(models.Manager):
+
+	"""
+	Make sure a ledger exists for each of the TournamentPlayer ids. Existing ledgers are left alone.
+	"""
+	def create_ledgers(self, player_ids):
+		self.bulk_create(
+			[self.model(player_id = player_id) for player_id in player_ids],
+			ignore_conflicts = True
+		)
+
+	"""
+	Returns a dict of the ledgers for a Tournament, keyed by TournamentPlayer id. Players that have no ledger yet
+	get an unsaved, zeroed ledger.
+	"""
+	def get_ledgers_for_tournament(self, tournament_id):
+		ledgers = {
+			ledger.player_id: ledger for ledger in super().get_queryset().filter(player__tournament_id=tournament_id)
+		}
+		player_ids = TournamentPlayer.objects.filter(tournament_id=tournament_id).values_list("id", flat=True)
+		for player_id in player_ids:
+			if player_id not in ledgers:
+				ledgers[player_id] = self.model(player_id = player_id)
+		return ledgers
+
+	"""
+	Get the ledger for a TournamentPlayer. Returns an unsaved, zeroed ledger if one doesn't exist yet.
+	"""
+	def get_ledger_for_player(self, player_id):
+		try:
+			return self.get(player_id=player_id)
+		except TournamentPlayerLedger.DoesNotExist:
+			return self.model(player_id = player_id)
+
+	"""
+	Raise a ValidationError if 'eliminatee_player' can't be eliminated: everyone else has already been eliminated, or
+	they have already been eliminated and have no more rebuys. 'tournament' must be locked
+	(see TournamentManager.get_by_id_for_update) so its counters and the ledger can't change before the elimination
+	is saved. This is a single ledger read.
+	"""
+	def validate_elimination(self, tournament, eliminatee_player):
+		if tournament.num_remaining_players <= 1:
+			raise ValidationError("You can't eliminate any more players. Complete the Tournament.")
+
+		if self.get_ledger_for_player(eliminatee_player.id).is_eliminated:
+			raise ValidationError(f"{eliminatee_player.user.username} has already been eliminated and has no more re-buys.")
+
+	def record_elimination(self, eliminator_id, eliminatee_id):
+		self.create_ledgers([eliminator_id, eliminatee_id])
+		super().get_queryset().filter(player_id=eliminator_id).update(eliminations=models.F("eliminations") + 1)
+		super().get_queryset().filter(player_id=eliminatee_id).update(times_eliminated=models.F("times_eliminated") + 1)
+
+	"""
+	Each eliminator is credited with the same rounded fraction of the elimination that is used to calculate bounties.
+	"""
+	def record_split_elimination(self, eliminator_ids, eliminatee_id):
+		self.create_ledgers(list(eliminator_ids) + [eliminatee_id])
+		fraction = get_split_elimination_fraction(len(eliminator_ids))
+		super().get_queryset().filter(player_id__in=eliminator_ids).update(
+			split_eliminations=models.F("split_eliminations") + fraction
+		)
+		super().get_queryset().filter(player_id=eliminatee_id).update(times_eliminated=models.F("times_eliminated") + 1)
+
+	def record_rebuy(self, player_id):
+		self.create_ledgers([player_id])
+		super().get_queryset().filter(player_id=player_id).update(rebuys=models.F("rebuys") + 1)
+
+	"""
+	Zero out every ledger in a Tournament. Used when all the eliminations and rebuys are deleted.
+	"""
+	def reset_ledgers_for_tournament(self, tournament_id):
+		super().get_queryset().filter(player__tournament_id=tournament_id).update(
+			eliminations = 0,
+			split_eliminations = 0,
+			times_eliminated = 0,
+			rebuys = 0
+		)
+
+	"""
+	Set the totals of 'ledgers' from a Tournament's eliminations, split eliminations and rebuys. This is done in
+	memory, nothing is saved.
+
+	ledgers: dict of TournamentPlayerLedgers keyed by TournamentPlayer id.
+	eliminations: iterable of (eliminator id, eliminatee id).
+	split_eliminations: iterable of ([eliminator ids], eliminatee id).
+	rebuys: iterable of TournamentPlayer ids, one per rebuy.
+	"""
+	def count_ledgers(self, ledgers, eliminations, split_eliminations, rebuys):
+		for ledger in ledgers.values():
+			ledger.eliminations = 0
+			ledger.split_eliminations = Decimal(0)
+			ledger.times_eliminated = 0
+			ledger.rebuys = 0
+		for eliminator_id, eliminatee_id in eliminations:
+			ledgers[eliminator_id].eliminations += 1
+			ledgers[eliminatee_id].times_eliminated += 1
+		for eliminator_ids, eliminatee_id in split_eliminations:
+			fraction = get_split_elimination_fraction(len(eliminator_ids))
+			for eliminator_id in eliminator_ids:
+				ledgers[eliminator_id].split_eliminations += fraction
+			ledgers[eliminatee_id].times_eliminated += 1
+		for player_id in rebuys:
+			ledgers[player_id].rebuys += 1
+
+	"""
+	Recalculate the ledgers for a Tournament from the TournamentElimination, TournamentSplitElimination and
+	TournamentRebuy rows. The totals are computed in memory and written with a single bulk_update.
+
+	Returns a dict of the ledgers keyed by TournamentPlayer id.
+	"""
+	def rebuild_ledgers_for_tournament(self, tournament_id):
+		with transaction.atomic(using=self._db):
+			player_ids = list(TournamentPlayer.objects.filter(tournament_id=tournament_id).values_list("id", flat=True))
+			self.create_ledgers(player_ids)
+			ledgers = {
+				ledger.player_id: ledger for ledger in super().get_queryset().filter(player__tournament_id=tournament_id)
+			}
+
+			eliminations = TournamentElimination.objects.filter(
+				eliminatee__tournament_id=tournament_id
+			).values_list("eliminator_id", "eliminatee_id")
+
+			# {split elimination id: ([eliminator ids], eliminatee id)}
+			split_eliminations = {
+				split_elimination_id: ([], eliminatee_id)
+				for split_elimination_id, eliminatee_id in TournamentSplitElimination.objects.filter(
+					eliminatee__tournament_id=tournament_id
+				).values_list("id", "eliminatee_id")
+			}
+			split_eliminators = TournamentSplitElimination.eliminators.through.objects.filter(
+				tournamentsplitelimination_id__in = split_eliminations.keys()
+			).values_list("tournamentsplitelimination_id", "tournamentplayer_id")
+			for split_elimination_id, player_id in split_eliminators:
+				split_eliminations[split_elimination_id][0].append(player_id)
+
+			rebuys = TournamentRebuy.objects.filter(player__tournament_id=tournament_id).values_list("player_id", flat=True)
+
+			self.count_ledgers(
+				ledgers = ledgers,
+				eliminations = eliminations,
+				split_eliminations = split_eliminations.values(),
+				rebuys = rebuys
+			)
+			self.bulk_update(
+				ledgers.values(),
+				["eliminations", "split_eliminations", "times_eliminated", "rebuys"]
+			)
+		return ledgers
+
+"""
+Running totals for a TournamentPlayer. These are denormalized from the TournamentElimination,
+TournamentSplitElimination and TournamentRebuy rows and are updated in the same transaction as those rows.
+
+eliminations: Number of players this player eliminated. Does not include split eliminations.
+
+split_eliminations: Sum of the fractions from split eliminations this player was part of. Ex: 0.5 + 0.33
+
+times_eliminated: Number of times this player was eliminated (including split eliminations).
+
+rebuys: Number of rebuys.
+"""
+class TournamentPlayerLedger(models.Model):
+	player						= models.OneToOneField(TournamentPlayer, related_name="ledger", on_delete=models.CASCADE)
+	eliminations			= models.IntegerField(default=0)
+	split_eliminations		= models.DecimalField(max_digits=9, decimal_places=2, default=0)
+	times_eliminated		= models.IntegerField(default=0)
+	rebuys						= models.IntegerField(default=0)
+
+	objects = TournamentPlayerLedgerManager()
+
+	def __str__(self):
+		return f"Ledger for {self.player.user.username}"
+
+	"""
+	Eliminated and has no more rebuys.
+	"""
+	@property
+	def is_eliminated(self):
+		return self.times_eliminated > self.rebuys
+
+	"""
+	Number of bounties. Fractional if the player was part of a split elimination.
+	"""
+	@property
+	def bounties(self):
+		return self.eliminations + self.split_eliminations
+
+
+class UserTournamentResultsVersionManager(models.Manager):
+
+	"""
+	The current version for a user. 0 if the completed tournaments they played in have never changed.
+	"""
+	def get_version(self, user_id):
+		version = super().get_queryset().filter(user_id=user_id).values_list("version", flat=True).first()
+		if version == None:
+			return 0
+		return version
+
+	"""
+	Increment the version for each of the users. Creates the row if it doesn't exist yet.
+	"""
+	def increment_versions(self, user_ids):
+		user_ids = list(user_ids)
+		with transaction.atomic(using=self._db):
+			self.bulk_create(
+				[self.model(user_id = user_id) for user_id in user_ids],
+				ignore_conflicts = True
+			)
+			super().get_queryset().filter(user_id__in=user_ids).update(version=models.F("version") + 1)
+
+"""
+Incremented every time the completed tournaments a user played in change (completion, undo, players added or removed).
+It's a cheap way to check if something built from those tournaments (like TournamentTotals) is out of date.
+"""
+class UserTournamentResultsVersion(models.Model):
+	user						= models.OneToOneField(User, related_name="tournament_results_version", on_delete=models.CASCADE)
+	version					= models.PositiveIntegerField(default=0)
+
+	objects = UserTournamentResultsVersionManager()
+
+	def __str__(self):
+		return f"{self.user.username}: {self.version}"
+
+
 class TournamentPlayerResultManager(models.Manager):
 
 	def get_results_for_tournament(self, tournament_id):
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		return super().get_queryset().filter(tournament=tournament)
+		return super().get_queryset().filter(tournament_id=tournament_id)
 
 	def get_results_for_user_by_tournament(self, user_id, tournament_id):
-		player = TournamentPlayer.objects.get_tournament_player_by_user_id(
-			tournament_id = tournament_id,
-			user_id = user_id,
-		)
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		return super().get_queryset().filter(tournament=tournament, player=player)
+		return super().get_queryset().filter(tournament_id=tournament_id, player__user_id=user_id)
 
 	def delete_results_for_tournament(self, tournament_id):
 		results = self.get_results_for_tournament(tournament_id)
@@ -1483,237 +2059,192 @@ class TournamentPlayerResultManager(models.Manager):
 	Build TournamentPlayerResult's for each player in the Tournament. This is different from
 	build_results_for_tournament because this is used for Tournament backfills. In otherwords,
 	Tournaments that were completed at some point in the past and the admin is just now filling
-	in the data.
+	in the data. The placements are given instead of being determined from the eliminations.
+
+	Everything is computed in memory from the already loaded players and ledgers and written with a single
+	bulk_create.
 
-	See complete_tournament_for_backfill for information about the args.
+	players: dict of the Tournament's TournamentPlayers keyed by id.
+	ledgers: dict of the TournamentPlayerLedgers keyed by TournamentPlayer id.
+	See complete_tournament_for_backfill for information about the other args.
 	"""
-	def build_results_for_backfilled_tournament(self, tournament_id, player_tournament_placements):
-		tournament = Tournament.objects.get_by_id(tournament_id)
+	def build_results_for_backfilled_tournament(self, tournament, players, ledgers, player_tournament_placements):
 		if tournament.completed_at == None:
 			raise ValidationError("You cannot build Tournament results until the Tournament is complete.")
+		structure = tournament.tournament_structure
 
 		# First, make sure all these players are part of this tournament.
 		for player_placement in player_tournament_placements:
-			player = TournamentPlayer.objects.get_by_id(player_placement.player_id)
-			if player.tournament != tournament:
-				raise ValidationError(f"{player.user.username} is not part of tournament: {tournament.title}.")
-		
-		# Build the results
-		results = []
+			if int(player_placement.player_id) not in players:
+				raise ValidationError(f"Player {player_placement.player_id} is not part of tournament: {tournament.title}.")
 
-		# First build the results for the players who placed
+		num_players = len(players)
+		num_rebuys = sum(ledger.rebuys for ledger in ledgers.values())
+		results = []
 		for player_placement in player_tournament_placements:
-			if player_placement.placement != DID_NOT_PLACE_VALUE:
-				# Build result using forced placement
-				player = TournamentPlayer.objects.get_by_id(player_placement.player_id)
-				placement = player_placement.placement
-				result = self.create_tournament_player_result(
-					user_id = player.user.id,
-					tournament_id = tournament.id,
-					placement = placement,
-					is_backfill = True
+			player = players[int(player_placement.player_id)]
+			ledger = ledgers[player.id]
+			placement = player_placement.placement
+
+			bounty_earnings = calculate_bounty_earnings(
+				bounty_amount = structure.bounty_amount,
+				num_eliminations = ledger.eliminations,
+				split_eliminations_count = ledger.split_eliminations
+			)
+			investment = structure.buyin_amount + (ledger.rebuys * structure.buyin_amount)
+			placement_earnings = 0
+			if placement != DID_NOT_PLACE_VALUE:
+				placement_earnings = calculate_placement_earnings(
+					buyin_amount = structure.buyin_amount,
+					bounty_amount = structure.bounty_amount,
+					payout_percentages = structure.payout_percentages,
+					num_players = num_players,
+					num_rebuys = num_rebuys,
+					placement = placement
 				)
-				results.append(result)
-			else:
-				# Build result using placement = DID_NOT_PLACE_VALUE
-				player = TournamentPlayer.objects.get_by_id(player_placement.player_id)
-				result = self.create_tournament_player_result(
-					user_id = player.user.id,
-					tournament_id = tournament.id,
-					placement = DID_NOT_PLACE_VALUE,
+			gross_earnings = placement_earnings + bounty_earnings
+			results.append(
+				self.model(
+					player = player,
+					tournament = tournament,
+					investment = investment,
+					placement = placement,
+					placement_earnings = placement_earnings,
+					bounty_earnings = bounty_earnings,
+					gross_earnings = gross_earnings,
+					net_earnings = gross_earnings - investment,
 					is_backfill = True
 				)
-				results.append(result)
-
-		return results
-
-
-	def build_results_for_tournament(self, tournament_id):
-		tournament = Tournament.objects.get_by_id(tournament_id)
-		if tournament.completed_at == None:
-			raise ValidationError("You cannot build Tournament results until the Tournament is complete.")
-		players = TournamentPlayer.objects.get_tournament_players(
-			tournament_id = tournament_id
-		)
-		results = []
-		for player in players:
-			placement = self.determine_placement(user_id=player.user.id, tournament_id=tournament_id)
-			result = self.create_tournament_player_result(
-				user_id = player.user.id,
-				placement = placement,
-				tournament_id = tournament_id,
-				is_backfill = False
 			)
-			results.append(result)
-		return results
 
-	"""
-	Determine what a player placed in a tournament.
-	Note: This is -1 indexed! So whoever came first will have placement = 0
-	"""
-	def determine_placement(self, user_id, tournament_id):
-		player = TournamentPlayer.objects.get_tournament_player_by_user_id(
-			user_id = user_id,
-			tournament_id = tournament_id
-		)
-		tournament = Tournament.objects.get_by_id(tournament_id)
-
-		# Verify the tournament is completed
-		if tournament.completed_at == None:
-			raise ValidationError("Cannot determine placement until tourment is completed.")
-
-		# -- Determine placement --
-		placement = None
-		# First, figure out if this player came first. They came first if:
-		# (1) They did not get eliminated at all
-		# (2) OR the number of rebuys exceeds the number of times they were eliminated.
-		player_eliminations = TournamentElimination.objects.get_eliminations_by_eliminatee(
-			player_id = player.id
-		)
-		player_split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_eliminatee(
-			player_id = player.id
-		)
-		rebuys = TournamentRebuy.objects.get_rebuys_for_player(
-			player = player
-		)
-		if len(player_eliminations) == 0 and len(player_split_eliminations) == 0:
-			# They were never eliminated
-			placement = 0
-		if len(player_eliminations) + len(player_split_eliminations) < len(rebuys) + 1:
-			# The Tournament completed and they still had a rebuy remaining
-			placement = 0
-		if placement == None:
-			# If they didn't come first, figure out what they placed.
-			# This queryset is ordered from (last elim) -> (first elim)
-			all_eliminations = TournamentElimination.objects.get_eliminations_by_tournament(tournament_id)
-			# {user_id, timestamp of elimination}
-			elimations_dict = {} 
-			for elimination in all_eliminations:
-				if elimination.eliminatee.id not in elimations_dict.keys():
-					elimations_dict[elimination.eliminatee.id] = elimination.eliminated_at
-				elif elimination.eliminated_at > elimations_dict[elimination.eliminatee.id]:
-					# Only replace the value in the dictionary if the timestamp is newer (more recent)
-					elimations_dict[elimination.eliminatee.id] = elimination.eliminated_at
-			tournament_split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_tournament(
-				tournament_id = tournament.id
-			)
-			for split_elimination in tournament_split_eliminations:
-				if split_elimination.eliminatee.id not in elimations_dict.keys():
-					elimations_dict[split_elimination.eliminatee.id] = split_elimination.eliminated_at
-				elif split_elimination.eliminated_at > elimations_dict[split_elimination.eliminatee.id]:
-					# Only replace the value in the dictionary if the timestamp is newer (more recent)
-					elimations_dict[split_elimination.eliminatee.id] = split_elimination.eliminated_at
-
-			# Loop through the sorted list. Whatever index this player is in, thats what they placed
-			sorted_reversed_list = [k for k, v in sorted(elimations_dict.items(), key=lambda p: p[1], reverse=True)]
-			for i,player_id in enumerate(sorted_reversed_list):
-				if player_id == player.id:
-					placement = i + 1 # add 1 b/c person in first won't show up in eliminations lists
-					break
-		return placement
+		with transaction.atomic(using=self._db):
+			# Make sure results don't already exist.
+			super().get_queryset().filter(tournament=tournament).delete()
+			return self.bulk_create(results)
 
 	"""
-	Determine the amount this player made from where they placed in the Tournament.
-	This does not include bounties. This is strictly earnings from how they placed.
-	"""
-	def determine_placement_earnings(self, tournament, placement):
-		placement_earnings = 0
-		tournament_id = tournament.id
-		players = TournamentPlayer.objects.get_tournament_players(tournament_id)
-		rebuys = TournamentRebuy.objects.get_rebuys_for_tournament(
-			tournament_id = tournament_id,
-		)
-		num_rebuys = len(rebuys)
-		total_tournament_value = Tournament.objects.calculate_tournament_value(
-			tournament_id = tournament_id, 
-			num_rebuys = num_rebuys
-		)
-		bounty_amount = tournament.tournament_structure.bounty_amount
-		if bounty_amount != None:
-			# subtract the bounties from total value
-			total_tournament_value -= Decimal(len(players) * bounty_amount)
-			total_tournament_value -= Decimal(num_rebuys * bounty_amount)
-		# Determine the % paid to this users placement
-		for i,pct in enumerate(tournament.tournament_structure.payout_percentages):
-			if i == placement:
-				placement_earnings = Decimal(float(pct) / float(100.00) * float(total_tournament_value))
-		return round(placement_earnings, 2)
-
-	def create_tournament_player_result(self, user_id, tournament_id, placement, is_backfill):
-		player = TournamentPlayer.objects.get_tournament_player_by_user_id(
-			user_id = user_id,
-			tournament_id = tournament_id
-		)
-		# Make sure a result doesn't already exist.
-		results = TournamentPlayerResult.objects.get_results_for_user_by_tournament(
-			user_id = user_id,
-			tournament_id = tournament_id
-		)
-		# If any exist, delete them.
-		for result in results:
-			result.delete()
+	Build the TournamentPlayerResult's for every player in a completed Tournament in memory. Nothing is saved.
 
-		tournament = Tournament.objects.get_by_id(tournament_id)
+	Placements are determined from the eliminations: a player that still had a rebuy when the Tournament was completed
+	came first, everyone else placed in reverse order of their most recent elimination.
 
-		# -- Get eliminations --
-		eliminations = TournamentElimination.objects.get_eliminations_by_eliminator(
-			player_id = player.id
-		)
-		split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_eliminator(
-			player_id = player.id
-		)
+	players: list of the Tournament's TournamentPlayers.
+	ledgers: dict of the TournamentPlayerLedgers keyed by TournamentPlayer id.
+	eliminations: iterable of (eliminatee id, eliminated_at), one for every elimination and split elimination.
+	"""
+	def build_results(self, tournament, players, ledgers, eliminations):
+		structure = tournament.tournament_structure
 
-		# Determine what fraction comes from split eliminations
-		split_eliminations_count = 0.00
-		for split_elimination in split_eliminations:
-			eliminators = split_elimination.eliminators.all()
-			split_eliminations_count += round(1.00 / len(eliminators), 2)
+		# {player id: timestamp of their most recent elimination}
+		elimations_dict = {}
+		for eliminatee_id, eliminated_at in eliminations:
+			if eliminatee_id not in elimations_dict or eliminated_at > elimations_dict[eliminatee_id]:
+				elimations_dict[eliminatee_id] = eliminated_at
 
-		# -- Get bounty earnings (if this is a bounty tournament). Otherwise 0.00. --
-		bounty_earnings = None
-		if tournament.tournament_structure.bounty_amount != None:
-			bounty_earnings = round((Decimal(len(eliminations)) + Decimal(split_eliminations_count)) * Decimal(tournament.tournament_structure.bounty_amount), 2)
-		else:
-			bounty_earnings = round(Decimal(0.00), 2)
+		# Whatever index a player is in, thats what they placed (ordered from last elim -> first elim).
+		sorted_reversed_list = [k for k, v in sorted(elimations_dict.items(), key=lambda p: p[1], reverse=True)]
 
-		# -- Get rebuys --
-		rebuys = TournamentRebuy.objects.get_rebuys_for_player(
-			player = player
-		)
+		num_players = len(players)
+		num_rebuys = sum(ledger.rebuys for ledger in ledgers.values())
+		results = []
+		for player in players:
+			ledger = ledgers[player.id]
+			rebuys = ledger.rebuys
 
-		# -- Calculate 'investment' --
-		buyin_amount = tournament.tournament_structure.buyin_amount
-		investment = buyin_amount + (len(rebuys) * buyin_amount)
+			# They came first if the Tournament completed and they still had a rebuy remaining.
+			placement = None
+			if not ledger.is_eliminated:
+				placement = 0
+			else:
+				placement = sorted_reversed_list.index(player.id) + 1 # add 1 b/c person in first won't show up in eliminations lists
 
-		# -- Calculate placement earnings --
-		placement_earnings = 0
-		if placement != DID_NOT_PLACE_VALUE:
-			placement_earnings = self.determine_placement_earnings(
-				tournament = tournament,
+			bounty_earnings = calculate_bounty_earnings(
+				bounty_amount = structure.bounty_amount,
+				num_eliminations = ledger.eliminations,
+				split_eliminations_count = ledger.split_eliminations
+			)
+			investment = structure.buyin_amount + (rebuys * structure.buyin_amount)
+			placement_earnings = calculate_placement_earnings(
+				buyin_amount = structure.buyin_amount,
+				bounty_amount = structure.bounty_amount,
+				payout_percentages = structure.payout_percentages,
+				num_players = num_players,
+				num_rebuys = num_rebuys,
 				placement = placement
 			)
+			gross_earnings = placement_earnings + bounty_earnings
+			results.append(
+				self.model(
+					player = player,
+					tournament = tournament,
+					investment = investment,
+					placement = placement,
+					placement_earnings = placement_earnings,
+					bounty_earnings = bounty_earnings,
+					gross_earnings = gross_earnings,
+					net_earnings = gross_earnings - investment,
+					is_backfill = False
+				)
+			)
+		return results
 
-		# -- Calculate 'gross_earnings' --
-		# Sum of placement_earnings + bounty_earnings
-		gross_earnings = placement_earnings + bounty_earnings
+	"""
+	Build TournamentPlayerResult's for every player in the Tournament.
 
-		# -- Calculate 'net_earnings' --
-		# Difference of gross_earnings - investment
-		net_earnings = gross_earnings - investment
+	The players and their TournamentPlayerLedger's are loaded once, along with the elimination timestamps used to
+	determine placements. Placements and earnings are then computed in memory (see build_results) and every result is
+	written with a single bulk_create. The number of queries does not depend on the number of players.
+	"""
+	def build_results_for_tournament(self, tournament_id):
+		tournament = Tournament.objects.select_related("tournament_structure").get(pk=tournament_id)
+		if tournament.completed_at == None:
+			raise ValidationError("You cannot build Tournament results until the Tournament is complete.")
 
-		result = self.model(
-			player = player,
+		players = list(
+			TournamentPlayer.objects.filter(tournament=tournament).order_by("user__username")
+		)
+		ledgers = TournamentPlayerLedger.objects.get_ledgers_for_tournament(tournament.id)
+		eliminations = TournamentElimination.objects.filter(
+			eliminatee__tournament=tournament
+		).order_by("eliminatee__user__username", "id").values_list("eliminatee_id", "eliminated_at")
+		split_eliminations = TournamentSplitElimination.objects.filter(
+			eliminatee__tournament=tournament
+		).order_by("eliminatee__user__username", "id").values_list("eliminatee_id", "eliminated_at")
+
+		results = self.build_results(
 			tournament = tournament,
-			investment = investment,
-			placement = placement,
-			placement_earnings = placement_earnings,
-			bounty_earnings = bounty_earnings,
-			gross_earnings = gross_earnings,
-			net_earnings = net_earnings,
-			is_backfill = is_backfill
+			players = players,
+			ledgers = ledgers,
+			eliminations = chain(eliminations, split_eliminations)
+		)
+		with transaction.atomic(using=self._db):
+			# Make sure results don't already exist.
+			super().get_queryset().filter(tournament=tournament).delete()
+			return self.bulk_create(results)
+
+	"""
+	Every TournamentPlayerResult in 'tournaments' for one of 'users', for exporting (see tournament.export). Returns a
+	values_list queryset with the columns:
+	(tournament id, tournament title, completed_at, username, placement, investment, placement_earnings,
+	bounty_earnings, gross_earnings, net_earnings, is_backfill)
+	"""
+	def get_results_for_export(self, tournaments, users):
+		return super().get_queryset().filter(
+			tournament__in = tournaments,
+			player__user__in = users
+		).order_by("tournament__completed_at", "tournament_id", "placement", "id").values_list(
+			"tournament_id",
+			"tournament__title",
+			"tournament__completed_at",
+			"player__user__username",
+			"placement",
+			"investment",
+			"placement_earnings",
+			"bounty_earnings",
+			"gross_earnings",
+			"net_earnings",
+			"is_backfill"
 		)
-		result.save(using=self._db)
-		return result
 
 	def get_results_by_player(self, player):
 		return super().get_queryset().filter(player=player)
@@ -1746,37 +2277,292 @@ class TournamentPlayerResult(models.Model):
 
 	objects = TournamentPlayerResultManager()
 
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["tournament", "player"], name="unique_tournament_player_result"),
+		]
+
 	def __str__(self):
 		return f"TournamentPlayerResult data for {self.player.user.username}"
 
 	def placement_string(self):
 		return build_placement_string(self.placement)
 
+class TournamentSummaryManager(models.Manager):
 
+	"""
+	Build the TournamentSummaryData for a completed Tournament. Everything is loaded in a fixed number of queries,
+	regardless of the number of players or eliminations.
+	"""
+	def build_summary(self, tournament_id):
+		tournament = Tournament.objects.select_related("tournament_structure").get(pk=tournament_id)
+		structure = tournament.tournament_structure
+		players = list(
+			TournamentPlayer.objects.filter(tournament_id=tournament.id).select_related("user", "ledger").order_by("user__username")
+		)
+		players_by_id = {player.id: player for player in players}
 
+		results = TournamentPlayerResult.objects.get_results_for_tournament(
+			tournament_id = tournament.id
+		).order_by("placement", "id")
+		results_data = []
+		for result in results:
+			player = players_by_id[result.player_id]
+			results_data.append(
+				TournamentViewResultData(
+					player_id = player.id,
+					username = player.user.username,
+					placement = result.placement,
+					placement_string = result.placement_string(),
+					placement_earnings = result.placement_earnings,
+					bounty_earnings = result.bounty_earnings,
+					gross_earnings = result.gross_earnings,
+					investment = result.investment,
+					net_earnings = result.net_earnings,
+					rebuys = player.get_ledger().rebuys
+				)
+			)
 
+		eliminations = TournamentElimination.objects.get_eliminations_by_tournament(tournament.id)
+		split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament.id)
+		eliminations_data = [
+			TournamentSummaryEliminationData(
+				eliminator_usernames = [elimination.eliminator.user.username],
+				eliminatee_username = elimination.eliminatee.user.username,
+				eliminated_at = elimination.eliminated_at,
+				is_split = False
+			)
+			for elimination in eliminations
+		] + [
+			TournamentSummaryEliminationData(
+				eliminator_usernames = sorted([eliminator.user.username for eliminator in split_elimination.eliminators.all()]),
+				eliminatee_username = split_elimination.eliminatee.user.username,
+				eliminated_at = split_elimination.eliminated_at,
+				is_split = True
+			)
+			for split_elimination in split_eliminations
+		]
+		eliminations_data.sort(key=lambda elimination: elimination.eliminated_at)
 
+		total_rebuys = sum([player.get_ledger().rebuys for player in players])
+		return TournamentSummaryData(
+			tournament_id = tournament.id,
+			title = tournament.title,
+			completed_at = tournament.completed_at,
+			buyin_amount = structure.buyin_amount,
+			bounty_amount = structure.bounty_amount,
+			payout_percentages = list(structure.payout_percentages),
+			allow_rebuys = structure.allow_rebuys,
+			usernames = [player.user.username for player in players],
+			results = results_data,
+			eliminations = eliminations_data,
+			total_rebuys = total_rebuys,
+			total_pot_value = calculate_tournament_value(
+				buyin_amount = structure.buyin_amount,
+				num_players = len(players),
+				num_rebuys = total_rebuys
+			)
+		)
 
+	"""
+	Build the TournamentSummaryData for a Tournament and save it. Called when the Tournament is completed.
+	"""
+	def save_summary(self, tournament):
+		data = build_json_from_tournament_summary_data(self.build_summary(tournament.id))
+		self.update_or_create(
+			tournament = tournament,
+			defaults = {
+				'results_version': tournament.results_version,
+				'data': data
+			}
+		)
+		return build_tournament_summary_data_from_json(data)
 
+	"""
+	Returns the TournamentSummaryData for a completed Tournament. Returns None if the Tournament is not completed.
+	If the saved summary is missing or was built from older results (ex: the Tournament was completed before
+	summaries were saved) it's rebuilt and saved.
+	"""
+	def get_summary(self, tournament):
+		if tournament.completed_at == None:
+			return None
+		saved_summary = super().get_queryset().filter(
+			tournament_id = tournament.id,
+			results_version = tournament.results_version
+		).first()
+		if saved_summary == None:
+			return self.save_summary(tournament)
+		return build_tournament_summary_data_from_json(saved_summary.data)
 
+	def delete_summary(self, tournament_id):
+		super().get_queryset().filter(tournament_id=tournament_id).delete()
 
+"""
+The TournamentSummaryData of a completed Tournament (see tournament.util.TournamentSummaryData). It's saved when the
+Tournament is completed, so the results email, the tournament_view results tables and the summary download don't
+need to rebuild it.
 
+results_version: The Tournament.results_version the summary was built from.
+"""
+class TournamentSummary(models.Model):
+	tournament							= models.OneToOneField(Tournament, related_name="summary", on_delete=models.CASCADE)
+	results_version					= models.IntegerField(default=0)
+	data										= models.JSONField()
 
+	objects = TournamentSummaryManager()
 
+	def __str__(self):
+		return f"Summary for {self.tournament.title}"
 
+"""
+The delivery states of a TournamentResultsEmail.
+PENDING: Not sent yet, or the last attempt failed with an error that is worth retrying.
+SENT: Accepted by the mail server.
+FAILED: Rejected permanently, or it failed RESULTS_EMAIL_MAX_ATTEMPTS times.
+"""
+class ResultsEmailStatus(Enum):
+	PENDING = 0
+	SENT = 1
+	FAILED = 2
 
+class TournamentResultsEmailManager(models.Manager):
 
+	"""
+	Create a PENDING TournamentResultsEmail for every player in the Tournament who doesn't have one yet.
+	"""
+	def create_results_emails(self, tournament_id):
+		user_ids = TournamentPlayer.objects.filter(tournament_id=tournament_id).values_list("user_id", flat=True)
+		self.bulk_create(
+			[self.model(tournament_id = tournament_id, user_id = user_id) for user_id in user_ids],
+			ignore_conflicts = True
+		)
 
+	"""
+	Send every PENDING TournamentResultsEmail for a Tournament. Each player gets their own message with their placement
+	and net earnings, and the TournamentSummary attached. All the messages are sent over one connection, in batches of
+	'batch_size'. The status of each batch is saved before the next one is sent.
 
+	Errors the mail server reports as permanent (5xx, or the recipient was refused) mark the email FAILED. Anything
+	else leaves it PENDING so the next call retries it, until it has been attempted RESULTS_EMAIL_MAX_ATTEMPTS times.
 
+	Raises a ValidationError if the Tournament isn't completed.
 
+	Returns the number of emails that are still PENDING.
+	"""
+	def send_results_emails(self, tournament_id, batch_size=RESULTS_EMAIL_BATCH_SIZE):
+		tournament = Tournament.objects.select_related("tournament_structure").get(pk=tournament_id)
+		summary = TournamentSummary.objects.get_summary(tournament)
+		if summary == None:
+			raise ValidationError("The tournament is not completed.")
+		summary_text = build_tournament_summary_text(summary)
+		results_by_username = {result.username: result for result in summary.results}
+		results_emails = list(
+			super().get_queryset().filter(
+				tournament_id = tournament.id,
+				status = ResultsEmailStatus.PENDING.value
+			).select_related("user").order_by("id")
+		)
+		if len(results_emails) == 0:
+			return 0
 
+		connection = get_connection()
+		connection.open()
+		try:
+			for i in range(0, len(results_emails), batch_size):
+				batch = results_emails[i:i + batch_size]
+				is_connected = True
+				try:
+					for results_email in batch:
+						message = build_results_email_message(
+							summary = summary,
+							summary_text = summary_text,
+							result = results_by_username.get(results_email.user.username),
+							email = results_email.user.email,
+							connection = connection
+						)
+						results_email.attempts += 1
+						try:
+							message.send()
+							results_email.status = ResultsEmailStatus.SENT.value
+							results_email.sent_at = timezone.now()
+							results_email.error = None
+						except Exception as e:
+							results_email.error = f"{type(e).__name__}: {e}"
+							if is_permanent_email_error(e) or results_email.attempts >= RESULTS_EMAIL_MAX_ATTEMPTS:
+								results_email.status = ResultsEmailStatus.FAILED.value
+							if isinstance(e, smtplib.SMTPServerDisconnected):
+								# Reconnect so the rest of the batch isn't lost with it. If the server is still down,
+								# the rest of the emails are left PENDING for the next call.
+								connection.close()
+								try:
+									connection.open()
+								except Exception as reconnect_error:
+									results_email.error += f" Reconnecting failed: {type(reconnect_error).__name__}: {reconnect_error}"
+									is_connected = False
+									break
+				finally:
+					# Save what was sent even if something unexpected is raised, so it isn't sent again.
+					self.bulk_update(batch, ["status", "attempts", "error", "sent_at"])
+				if not is_connected:
+					break
+		finally:
+			connection.close()
+		return len([results_email for results_email in results_emails if results_email.status == ResultsEmailStatus.PENDING.value])
 
+	def get_results_emails_for_tournament(self, tournament_id):
+		return super().get_queryset().filter(tournament_id=tournament_id)
 
+"""
+Is this an error from sending an email that won't go away by retrying?
+"""
+def is_permanent_email_error(e):
+	if isinstance(e, smtplib.SMTPRecipientsRefused):
+		return True
+	if isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500:
+		return True
+	return False
 
+"""
+The results email for one player.
+result: The player's TournamentViewResultData from the summary. None if they don't have a result.
+"""
+def build_results_email_message(summary, summary_text, result, email, connection):
+	body = f"Here are the results for the Tournament you played on {summary.completed_at}."
+	if result != None:
+		body += f"\n\nYou placed {result.placement_string} with net earnings of ${result.net_earnings}."
+	message = EmailMessage(
+		subject = f"{settings.ACCOUNT_EMAIL_SUBJECT_PREFIX} results for {summary.title}.",
+		body = body,
+		from_email = settings.EMAIL_HOST_USER,
+		to = [email],
+		connection = connection
+	)
+	message.attach("tournament_summary.txt", summary_text, "text/plain")
+	return message
 
+"""
+The delivery of the results email to one player of a completed Tournament.
 
+attempts: Number of times sending has been attempted.
+error: The error from the most recent failed attempt.
+"""
+class TournamentResultsEmail(models.Model):
+	tournament							= models.ForeignKey(Tournament, on_delete=models.CASCADE)
+	user										= models.ForeignKey(User, on_delete=models.CASCADE)
+	status									= models.IntegerField(default=ResultsEmailStatus.PENDING.value)
+	attempts								= models.IntegerField(default=0)
+	error										= models.TextField(null=True, blank=True)
+	sent_at									= models.DateTimeField(null=True, blank=True)
 
+	objects = TournamentResultsEmailManager()
 
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["tournament", "user"], name="unique_tournament_results_email"),
+		]
 
+	def __str__(self):
+		return f"Results email for {self.user.username} ({ResultsEmailStatus(self.status).name})"
 
+	def get_status(self):
+		return ResultsEmailStatus(self.status)
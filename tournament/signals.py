@@ -0,0 +1,17 @@
+from django.dispatch import Signal
+
+"""
+Sent once a Tournament is completed (this includes backfilled tournaments) and its TournamentPlayerResult's
+have been built.
+
+kwargs: tournament_id
+"""
+tournament_completed = Signal()
+
+"""
+Sent when the results of a completed Tournament are deleted. Either the completion was undone or completing the
+tournament failed part way through.
+
+kwargs: tournament_id
+"""
+tournament_completion_undone = Signal()
@@ -0,0 +1,8 @@
+from task_queue.util import register_task
+
+from tournament.models import Tournament
+from tournament.util import EMAIL_TOURNAMENT_RESULTS_TASK
+
+@register_task(EMAIL_TOURNAMENT_RESULTS_TASK)
+def email_tournament_results(tournament_id):
+	Tournament.objects.email_tournament_results(tournament_id)
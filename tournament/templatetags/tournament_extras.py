@@ -4,6 +4,7 @@ from django.template.defaultfilters import stringfilter
 from tournament.models import TournamentPlayer, TournamentRebuy, TournamentElimination
 from tournament.util import (
 	build_placement_string,
+	get_tournament_player_lookups,
 	TournamentEliminationEvent,
 	TournamentRebuyEvent,
 	TournamentCompleteEvent,
@@ -99,10 +100,15 @@ def format_placement(placement):
 
 """
 Return True if a player has joined the tournament. 
+Uses the TournamentPlayerLookups the view set with use_tournament_player_lookups if there are any for this tournament,
+otherwise queries the database.
 """
 @register.filter(name='has_player_joined_tournament')
 @stringfilter
 def has_player_joined_tournament(player_id, tournament_id):
+	lookups = get_tournament_player_lookups()
+	if lookups != None and lookups.tournament_id == int(tournament_id):
+		return int(player_id) in lookups.joined_player_ids
 	has_joined = TournamentPlayer.objects.has_player_joined_tournament(
 		player_id = player_id,
 		tournament_id = tournament_id
@@ -165,11 +171,16 @@ def does_value_exist_in_list(data_list, value):
 
 """
 Get the number of rebuys for a TournamentPlayer.
+'player' can be a TournamentPlayer or a TournamentViewPlayerData. Uses the TournamentPlayerLookups the view set with
+use_tournament_player_lookups if there are any for the player's tournament, otherwise queries the database.
 """
 @register.filter
 def get_rebuys_for_player(player):
-	rebuys = TournamentRebuy.objects.get_rebuys_for_player(player)
-	return rebuys
+	player_id = player.player_id if hasattr(player, "player_id") else player.id
+	lookups = get_tournament_player_lookups()
+	if lookups != None and lookups.tournament_id == player.tournament_id:
+		return lookups.rebuys_by_player_id.get(player_id, 0)
+	return TournamentRebuy.objects.filter(player_id = player_id).count()
 
 """
 Determine if an object is a TournamentRebuyEvent.
@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 
-from tournament.models import Tournament, TournamentPlayer, TournamentElimination, TournamentStructure, TournamentRebuy, TournamentSplitElimination
+from tournament.models import Tournament, TournamentPlayer, TournamentElimination, TournamentStructure, TournamentRebuy, TournamentSplitElimination, TournamentPlayerLedger
 from user.models import User
 
 
@@ -138,6 +138,8 @@ def rebuy_for_test(tournament_id, player_id):
 		player = player
 	)
 	tournament_rebuy.save()
+	TournamentPlayerLedger.objects.record_rebuy(player_id = player.id)
+	Tournament.objects.update_counters(tournament.id, buyins = 1, rebuys = 1)
 	return tournament_rebuy
 
 
@@ -1,18 +1,40 @@
+import csv
 from decimal import Decimal
+from io import BytesIO, StringIO
+import json
+import os
+import smtplib
+import tempfile
+import threading
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core.exceptions import ValidationError
-from django.test import TransactionTestCase
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.template import Context, Template
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from unittest import mock
+import pyarrow.parquet as pq
 
 from tournament.models import (
+	ResultsEmailStatus,
 	TournamentInvite,
 	TournamentPlayerResult,
 	TournamentStructure,
 	TournamentElimination,
 	Tournament,
 	TournamentPlayer,
+	TournamentPlayerLedger,
 	TournamentState,
 	TournamentRebuy,
-	TournamentSplitElimination
+	TournamentResultsEmail,
+	TournamentSplitElimination,
+	TournamentSummary
 )
 from tournament.test_util import (
 	add_players_to_tournament,
@@ -25,13 +47,67 @@ from tournament.test_util import (
 	rebuy_for_test,
 	split_eliminate_player
 )
-from tournament.util import PlayerTournamentPlacement, build_placement_string
+from tournament.util import (
+	DID_NOT_PLACE_VALUE,
+	PlayerTournamentPlacement,
+	build_placement_string,
+	iter_backfill_tournaments_from_csv,
+	iter_backfill_tournaments_from_json,
+	use_tournament_player_lookups
+)
+from tournament_analytics.models import PlayerEliminationAnalytics, PlayerTournamentAnalytics
+from tournament_group.models import TournamentGroup
 from user.models import User
 from user.test_util import (
 	create_users,
 	build_user
 )
 
+"""
+Run each function in its own thread, all starting at the same time. Each thread closes its database connection when
+it's done. Returns (return values, exceptions raised).
+"""
+def run_in_threads(functions):
+	barrier = threading.Barrier(len(functions))
+	results = []
+	errors = []
+	def run(function):
+		try:
+			barrier.wait()
+			results.append(function())
+		except Exception as e:
+			errors.append(e)
+		finally:
+			connection.close()
+	threads = [threading.Thread(target = run, args = (function,)) for function in functions]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	return results, errors
+
+"""
+A locmem email backend that raises for the addresses in 'errors' and counts how many connections are opened.
+"""
+class FlakyEmailBackend(locmem.EmailBackend):
+	errors = {}
+	num_opened = 0
+	# The connection can't be opened more than this many times. None for no limit.
+	max_opened = None
+
+	def open(self):
+		FlakyEmailBackend.num_opened += 1
+		if FlakyEmailBackend.max_opened != None and FlakyEmailBackend.num_opened > FlakyEmailBackend.max_opened:
+			raise smtplib.SMTPConnectError(421, b"Service not available")
+		return super().open()
+
+	def send_messages(self, messages):
+		for message in messages:
+			error = FlakyEmailBackend.errors.get(message.to[0])
+			if error != None:
+				raise error
+		return super().send_messages(messages)
+
 class TournamentInvitesTestCase(TransactionTestCase):
 
 	# Reset primary keys after each test function run
@@ -335,6 +411,157 @@ class TournamentInvitesTestCase(TransactionTestCase):
 		self.assertEqual(players[0].user, admin)
 
 
+	"""
+	send_invites invites everyone with a fixed number of queries and creates the TournamentPlayers, their ledgers and
+	the buyin counter, like send_invite does for one user.
+	"""
+	def test_send_invites(self):
+		tournament = Tournament.objects.get_by_id(1)
+		admin = User.objects.get_by_username("cat")
+		league = create_users(
+			identifiers = [f"league{i}" for i in range(0, 50)]
+		)
+
+		def send_invites(users):
+			with CaptureQueriesContext(connection) as queries:
+				invites = TournamentInvite.objects.send_invites(
+					sent_from_user_id = admin.id,
+					send_to_user_ids = [user.id for user in users],
+					tournament_id = tournament.id
+				)
+			return invites, len(queries)
+
+		invites, num_queries_small = send_invites(league[:5])
+		self.assertEqual(len(invites), 5)
+		invites, num_queries_large = send_invites(league[5:])
+		self.assertEqual(len(invites), 45)
+		self.assertEqual(num_queries_small, num_queries_large)
+
+		self.assertEqual(TournamentInvite.objects.find_pending_invites_for_tournament(tournament.id).count(), 50)
+		players = TournamentPlayer.objects.get_tournament_players(tournament.id).select_related("ledger")
+		self.assertEqual(len(players), 51)
+		for player in players:
+			self.assertEqual(player.ledger.rebuys, 0)
+		self.assertEqual(Tournament.objects.get_by_id(tournament.id).num_buyins, 51)
+		player = TournamentPlayer.objects.get_tournament_player_by_user_id(
+			user_id = league[0].id,
+			tournament_id = tournament.id
+		)
+		self.assertFalse(
+			TournamentPlayer.objects.has_player_joined_tournament(
+				tournament_id = tournament.id,
+				player_id = player.id
+			)
+		)
+
+	"""
+	If any of the users can't be invited, nobody is invited.
+	"""
+	def test_send_invites_is_all_or_nothing(self):
+		tournament = Tournament.objects.get_by_id(1)
+		users = list(User.objects.all().order_by("id"))
+		admin = users[0]
+		TournamentInvite.objects.send_invite(
+			sent_from_user_id = admin.id,
+			send_to_user_id = users[1].id,
+			tournament_id = tournament.id
+		)
+
+		def assert_nobody_invited(send_to_user_ids, message, sent_from_user_id=admin.id):
+			with self.assertRaisesMessage(ValidationError, message):
+				TournamentInvite.objects.send_invites(
+					sent_from_user_id = sent_from_user_id,
+					send_to_user_ids = send_to_user_ids,
+					tournament_id = tournament.id
+				)
+			self.assertEqual(TournamentInvite.objects.find_pending_invites_for_tournament(tournament.id).count(), 1)
+			self.assertEqual(TournamentPlayer.objects.get_tournament_players(tournament.id).count(), 2)
+			self.assertEqual(Tournament.objects.get_by_id(tournament.id).num_buyins, 2)
+
+		assert_nobody_invited([], "Choose at least one player to invite.")
+		assert_nobody_invited([users[2].id], "You can't send invites unless you're the admin.", sent_from_user_id = users[1].id)
+		assert_nobody_invited([users[2].id, admin.id], "You can't invite yourself to the Tournament.")
+		assert_nobody_invited([users[2].id, users[1].id], f"Already invited: {users[1].username}.")
+		assert_nobody_invited([users[2].id, users[2].id], "There is a duplicate in the list of players you're trying to add.")
+		assert_nobody_invited([users[2].id, 999], "One of the users you're adding doesn't exist.")
+
+		# The admin and the users that are already invited can be skipped instead.
+		invites = TournamentInvite.objects.send_invites(
+			sent_from_user_id = admin.id,
+			send_to_user_ids = [user.id for user in users],
+			tournament_id = tournament.id,
+			skip_existing_players = True
+		)
+		self.assertEqual([invite.send_to_id for invite in invites], [user.id for user in users[2:]])
+		with self.assertRaisesMessage(ValidationError, "Everyone you're inviting is already in this tournament."):
+			TournamentInvite.objects.send_invites(
+				sent_from_user_id = admin.id,
+				send_to_user_ids = [user.id for user in users],
+				tournament_id = tournament.id,
+				skip_existing_players = True
+			)
+
+		Tournament.objects.start_tournament(user = admin, tournament_id = tournament.id)
+		other = create_users(identifiers = ["latecomer"])[0]
+		with self.assertRaisesMessage(ValidationError, "You can't invite to a Tournment that's started."):
+			TournamentInvite.objects.send_invites(
+				sent_from_user_id = admin.id,
+				send_to_user_ids = [other.id],
+				tournament_id = tournament.id
+			)
+
+	"""
+	The admin can invite everyone in one of their TournamentGroups from tournament_view.
+	"""
+	def test_invite_group_to_tournament(self):
+		tournament = Tournament.objects.get_by_id(1)
+		users = list(User.objects.all().order_by("id"))
+		admin = users[0]
+		group = TournamentGroup.objects.create_tournament_group(
+			admin = admin,
+			title = "League"
+		)
+		TournamentGroup.objects.add_users_to_group(
+			admin = admin,
+			group = group,
+			users = users[1:5]
+		)
+		TournamentInvite.objects.send_invite(
+			sent_from_user_id = admin.id,
+			send_to_user_id = users[1].id,
+			tournament_id = tournament.id
+		)
+
+		self.client.force_login(admin)
+		response = self.client.get(reverse("tournament:tournament_view", kwargs={"pk": tournament.id}))
+		self.assertEqual(list(response.context['tournament_groups']), [group])
+
+		response = self.client.post(
+			reverse("tournament:invite_players", kwargs={"tournament_id": tournament.id}),
+			{"group_id": group.id}
+		)
+		self.assertEqual(response.status_code, 200)
+		invited_user_ids = set(
+			TournamentInvite.objects.find_pending_invites_for_tournament(tournament.id).values_list("send_to_id", flat=True)
+		)
+		self.assertEqual(invited_user_ids, {user.id for user in users[1:5]})
+
+		# A list of users.
+		response = self.client.post(
+			reverse("tournament:invite_players", kwargs={"tournament_id": tournament.id}),
+			{"user_ids": [users[5].id, users[6].id]}
+		)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(TournamentInvite.objects.find_pending_invites_for_tournament(tournament.id).count(), 6)
+
+		# Only the admin can invite.
+		self.client.force_login(users[7])
+		self.client.post(
+			reverse("tournament:invite_players", kwargs={"tournament_id": tournament.id}),
+			{"user_ids": [users[8].id]}
+		)
+		self.assertEqual(TournamentInvite.objects.find_pending_invites_for_tournament(tournament.id).count(), 6)
+
 class TournamentPlayersTestCase(TransactionTestCase):
 
 	# Reset primary keys after each test function run
@@ -458,6 +685,28 @@ class TournamentPlayersTestCase(TransactionTestCase):
 					tournament_id = tournament.id
 				)
 
+	"""
+	Verify the database rejects a duplicate TournamentPlayer even if the already-added check is skipped. This is
+	what happens when two requests add the same user at the same time.
+	"""
+	def test_duplicate_player_is_rejected_by_constraint(self):
+		admin = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+
+		tournament = self.setup_tournament(admin=admin, allow_rebuys=False)
+
+		TournamentPlayer.objects.create_player_for_tournament(
+			user_id = dog.id,
+			tournament_id = tournament.id
+		)
+		with mock.patch.object(TournamentPlayer.objects, "get_tournament_player_by_user_id", return_value = None):
+			with self.assertRaisesMessage(ValidationError, 'dog is already added to this tournament.'):
+				TournamentPlayer.objects.create_player_for_tournament(
+					user_id = dog.id,
+					tournament_id = tournament.id
+				)
+		self.assertEqual(TournamentPlayer.objects.filter(user = dog, tournament = tournament).count(), 1)
+
 	"""
 	Verifying the is_player_eliminated function works as expected when a player is split eliminated.
 	"""
@@ -1239,6 +1488,161 @@ class TournamentEliminationsTestCase(TransactionTestCase):
 			)
 
 
+	"""
+	get_eliminations_by_tournament returns the eliminations newest-first in a single query, including the users.
+	"""
+	def test_get_eliminations_by_tournament(self):
+		tournament = Tournament.objects.get_by_id(1)
+		players = TournamentPlayer.objects.get_tournament_players(
+			tournament_id = tournament.id
+		)
+		Tournament.objects.start_tournament(user = tournament.admin, tournament_id = tournament.id)
+		created_eliminations = []
+		for player in players[1:5]:
+			created_eliminations.append(
+				eliminate_player(
+					tournament_id = tournament.id,
+					eliminator_id = players[0].id,
+					eliminatee_id = player.id
+				)
+			)
+
+		with self.assertNumQueries(1):
+			eliminations = TournamentElimination.objects.get_eliminations_by_tournament(tournament.id)
+			usernames = [(elimination.eliminator.user.username, elimination.eliminatee.user.username) for elimination in eliminations]
+
+		self.assertEqual([elimination.id for elimination in eliminations], [elimination.id for elimination in reversed(created_eliminations)])
+		self.assertEqual(usernames[0], (players[0].user.username, players[4].user.username))
+
+	"""
+	Verify the Tournament counters follow the players, eliminations and split eliminations, that is_completable is a
+	single query and that repair_tournament_counters fixes counters that are wrong.
+	"""
+	def test_tournament_counters(self):
+		tournament = Tournament.objects.get_by_id(1)
+		players = TournamentPlayer.objects.get_tournament_players(tournament.id)
+		self.assertEqual((tournament.num_buyins, tournament.num_rebuys, tournament.num_eliminations), (9, 0, 0))
+
+		Tournament.objects.start_tournament(user = tournament.admin, tournament_id = tournament.id)
+		eliminate_player(
+			tournament_id = tournament.id,
+			eliminator_id = players[0].id,
+			eliminatee_id = players[1].id
+		)
+		split_eliminate_player(
+			tournament_id = tournament.id,
+			eliminator_ids = [players[0].id, players[2].id],
+			eliminatee_id = players[3].id
+		)
+		tournament = Tournament.objects.get_by_id(tournament.id)
+		self.assertEqual(tournament.num_eliminations, 2)
+		self.assertEqual(tournament.num_remaining_players, 7)
+
+		with self.assertNumQueries(1):
+			with self.assertRaisesMessage(ValidationError, "Every player must be eliminated before completing a Tournament"):
+				Tournament.objects.is_completable(tournament.id)
+
+		Tournament.objects.filter(pk = tournament.id).update(num_buyins = 0, num_eliminations = 0)
+		out = StringIO()
+		call_command("repair_tournament_counters", stdout = out)
+		self.assertIn("Done. Checked 1 tournament(s), fixed 1.", out.getvalue())
+		tournament = Tournament.objects.get_by_id(tournament.id)
+		self.assertEqual((tournament.num_buyins, tournament.num_rebuys, tournament.num_eliminations), (9, 0, 2))
+
+		# Undoing the start resets the elimination counter.
+		Tournament.objects.undo_start_tournament(user = tournament.admin, tournament_id = tournament.id)
+		tournament = Tournament.objects.get_by_id(tournament.id)
+		self.assertEqual((tournament.num_buyins, tournament.num_rebuys, tournament.num_eliminations), (9, 0, 0))
+
+	"""
+	Fire eliminations and rebuys at the same time from multiple threads (each with its own database connection). The
+	Tournament row lock must let exactly one of the conflicting writes through.
+	"""
+	def test_concurrent_eliminations_and_rebuys(self):
+		tournament = Tournament.objects.get_by_id(1)
+		cat = tournament.admin
+		players = {
+			player.user.username: player for player in TournamentPlayer.objects.get_tournament_players(tournament.id)
+		}
+		Tournament.objects.start_tournament(user = cat, tournament_id = tournament.id)
+
+		# Everyone tries to eliminate dog at once.
+		eliminators = [player for username, player in players.items() if username not in ("dog", "racoon")]
+		results, errors = run_in_threads(
+			[
+				lambda eliminator=eliminator: TournamentElimination.objects.create_elimination(
+					tournament_id = tournament.id,
+					eliminator_id = eliminator.id,
+					eliminatee_id = players["dog"].id
+				)
+				for eliminator in eliminators
+			] + [
+				lambda: TournamentSplitElimination.objects.create_split_elimination(
+					tournament_id = tournament.id,
+					eliminator_ids = [players["cat"].id, players["monkey"].id],
+					eliminatee_id = players["dog"].id
+				)
+			]
+		)
+		self.assertEqual(len(results), 1)
+		self.assertEqual(len(errors), len(eliminators))
+		for error in errors:
+			self.assertEqual(error.message, "dog has already been eliminated and has no more re-buys.")
+		self.assertEqual(TournamentPlayerLedger.objects.get_ledger_for_player(players["dog"].id).times_eliminated, 1)
+
+		# Leave cat, monkey and racoon. Each of them is eliminated at once, but only two of them can be.
+		for username in ["bird", "donkey", "elephant", "gator", "insect"]:
+			eliminate_player(
+				tournament_id = tournament.id,
+				eliminator_id = players["cat"].id,
+				eliminatee_id = players[username].id
+			)
+		results, errors = run_in_threads([
+			lambda eliminator=eliminator, eliminatee=eliminatee: TournamentElimination.objects.create_elimination(
+				tournament_id = tournament.id,
+				eliminator_id = players[eliminator].id,
+				eliminatee_id = players[eliminatee].id
+			)
+			for eliminator, eliminatee in [("cat", "monkey"), ("cat", "racoon"), ("racoon", "cat")]
+		])
+		self.assertEqual(len(results), 2)
+		self.assertEqual([error.message for error in errors], ["You can't eliminate any more players. Complete the Tournament."])
+		Tournament.objects.is_completable(tournament.id)
+
+		# Only one of the simultaneous rebuys for an eliminated player is recorded.
+		structure = build_structure(
+			admin = cat,
+			buyin_amount = 100,
+			bounty_amount = None,
+			payout_percentages = (100,),
+			allow_rebuys = True
+		)
+		rebuy_tournament = build_tournament(structure)
+		add_players_to_tournament(
+			users = [players["dog"].user],
+			tournament = rebuy_tournament
+		)
+		rebuy_players = {
+			player.user.username: player for player in TournamentPlayer.objects.get_tournament_players(rebuy_tournament.id)
+		}
+		Tournament.objects.start_tournament(user = cat, tournament_id = rebuy_tournament.id)
+		eliminate_player(
+			tournament_id = rebuy_tournament.id,
+			eliminator_id = rebuy_players["cat"].id,
+			eliminatee_id = rebuy_players["dog"].id
+		)
+		results, errors = run_in_threads([
+			lambda: TournamentRebuy.objects.rebuy(
+				tournament_id = rebuy_tournament.id,
+				player_id = rebuy_players["dog"].id
+			)
+			for i in range(4)
+		])
+		self.assertEqual(len(results), 1)
+		self.assertEqual(len(errors), 3)
+		self.assertEqual(TournamentRebuy.objects.get_rebuys_for_tournament(rebuy_tournament.id).count(), 1)
+		self.assertEqual(TournamentPlayerLedger.objects.get_ledger_for_player(rebuy_players["dog"].id).rebuys, 1)
+
 class TournamentTestCase(TransactionTestCase):
 
 	# Reset primary keys after each test function run
@@ -1556,9 +1960,9 @@ class TournamentTestCase(TransactionTestCase):
 
 	"""
 	Verify cannot complete a Tournament if not the admin.
-	Using @mock to verify 'email_tournament_results' is called when a Tournament is successfully completed.
+	Using @mock to verify 'enqueue_tournament_completion_tasks' is called when a Tournament is successfully completed.
 	"""
-	@mock.patch.object(Tournament.objects, "email_tournament_results")
+	@mock.patch.object(Tournament.objects, "enqueue_tournament_completion_tasks")
 	def test_cannot_complete_tournament_if_not_admin(self, mock):
 		# Build a structure made by cat
 		cat = User.objects.get_by_username("cat")
@@ -1607,7 +2011,7 @@ class TournamentTestCase(TransactionTestCase):
 				)
 				self.assertTrue(tournament.completed_at != None)
 
-				# Verify the 'email_tournament_results' function is called when a Tournament is successfully completed.
+				# Verify the results email and totals refreshes are queued when a Tournament is successfully completed.
 				mock.assert_called()
 			else:
 				with self.assertRaisesMessage(ValidationError, "You cannot update a Tournament if you're not the admin."):
@@ -3080,6 +3484,571 @@ class TournamentTestCase(TransactionTestCase):
 		self.assertEqual(tournament.started_at, None)
 
 
+	"""
+	Build an inactive tournament with cat as the admin and 'num_players' players. Returns the tournament and a backfill
+	payload where cat wins and eliminates everyone except the last two players, who are split eliminated by cat and
+	the first player.
+	"""
+	def build_backfill_payload(self, num_players):
+		cat = User.objects.get_by_username("cat")
+		for i in range(User.objects.count(), num_players):
+			build_user(f"player{i}")
+		structure = self.build_structure(
+			user = cat,
+			buyin_amount = 100,
+			bounty_amount = 10,
+			payout_percentages = [100],
+			allow_rebuys = True
+		)
+		tournament = self.build_tournament(
+			title = "Cat Tournament",
+			admin = cat,
+			structure = structure
+		)
+		add_players_to_tournament(
+			users = User.objects.exclude(id = cat.id)[:num_players - 1],
+			tournament = tournament
+		)
+		cat_player = TournamentPlayer.objects.get_tournament_player_by_user_id(
+			tournament_id = tournament.id,
+			user_id = cat.id
+		)
+		players = list(TournamentPlayer.objects.get_tournament_players(tournament.id).exclude(id = cat_player.id))
+		placements = [PlayerTournamentPlacement(player_id = cat_player.id, placement = 0)]
+		elim_dict = {cat_player.id: players[:-2]}
+		split_eliminations = [
+			{'eliminatee': player, 'eliminators': [cat_player, players[0]]} for player in players[-2:]
+		]
+		return tournament, placements, elim_dict, split_eliminations
+
+	"""
+	Verify the number of queries used to complete a backfilled tournament doesn't depend on the number of players.
+	"""
+	def test_complete_tournament_for_backfill_query_count(self):
+		query_counts = []
+		for num_players in [5, 30]:
+			tournament, placements, elim_dict, split_eliminations = self.build_backfill_payload(num_players)
+			with CaptureQueriesContext(connection) as context:
+				Tournament.objects.complete_tournament_for_backfill(
+					user = tournament.admin,
+					tournament_id = tournament.id,
+					player_tournament_placements = placements,
+					elim_dict = elim_dict,
+					split_eliminations = split_eliminations,
+				)
+			query_counts.append(len(context.captured_queries))
+
+			results = TournamentPlayerResult.objects.get_results_for_tournament(tournament.id)
+			self.assertEqual(len(results), 1)
+			self.assertEqual(results[0].is_backfill, True)
+			# 1 whole elimination for each player except the last two. Half of the last two.
+			self.assertEqual(results[0].bounty_earnings, round(Decimal((num_players - 3) + 1) * 10, 2))
+			self.assertEqual(len(TournamentElimination.objects.get_eliminations_by_tournament(tournament.id)), num_players - 3)
+			self.assertEqual(len(TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament.id)), 2)
+			self.assertTrue(all(elimination.is_backfill for elimination in TournamentElimination.objects.get_eliminations_by_tournament(tournament.id)))
+
+			# Clean up so the next tournament starts from an empty database.
+			Tournament.objects.all().delete()
+		self.assertEqual(query_counts[0], query_counts[1])
+
+	"""
+	Verify nothing is written if the backfill payload is invalid.
+	"""
+	def test_complete_tournament_for_backfill_eliminator_not_in_tournament(self):
+		tournament, placements, elim_dict, split_eliminations = self.build_backfill_payload(5)
+		other_tournament, other_placements, other_elim_dict, other_split_eliminations = self.build_backfill_payload(5)
+		elim_dict[other_placements[0].player_id] = elim_dict.pop(placements[0].player_id)
+		with self.assertRaisesMessage(ValidationError, "Eliminator is not part of that Tournament."):
+			Tournament.objects.complete_tournament_for_backfill(
+				user = tournament.admin,
+				tournament_id = tournament.id,
+				player_tournament_placements = placements,
+				elim_dict = elim_dict,
+				split_eliminations = split_eliminations,
+			)
+		self.verify_tournament_reset(tournament.id)
+		self.assertEqual(len(TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament.id)), 0)
+
+	"""
+	Verify tournaments are imported from a CSV file. Tournaments with the same structure share a TournamentStructure.
+	"""
+	def test_import_backfill_tournaments_from_csv(self):
+		cat = User.objects.get_by_username("cat")
+		csv_file = StringIO(
+			"tournament,completed_at,structure,buyin_amount,bounty_amount,payout_percentages,allow_rebuys,player,placement,eliminated_by\n"
+			"Tournament A,2022-03-04T23:30:00+00:00,Bounty,100,10,70|30,true,cat,1,\n"
+			"Tournament A,2022-03-04T23:30:00+00:00,Bounty,100,10,70|30,true,dog,2,cat+monkey\n"
+			"Tournament A,2022-03-04T23:30:00+00:00,Bounty,100,10,70|30,true,monkey,,cat|dog\n"
+			"Tournament A,2022-03-04T23:30:00+00:00,Bounty,100,10,70|30,true,bird,,cat\n"
+			"Tournament B,2022-03-11T23:30:00+00:00,Bounty,100,10,70|30,true,dog,1,\n"
+			"Tournament B,2022-03-11T23:30:00+00:00,Bounty,100,10,70|30,true,cat,2,dog\n"
+		)
+		tournaments = Tournament.objects.import_backfill_tournaments(
+			admin = cat,
+			tournaments = iter_backfill_tournaments_from_csv(csv_file)
+		)
+		self.assertEqual([tournament.title for tournament in tournaments], ["Tournament A", "Tournament B"])
+		self.assertEqual(TournamentStructure.objects.filter(user = cat).count(), 1)
+		self.assertEqual(tournaments[0].completed_at.isoformat(), "2022-03-04T23:30:00+00:00")
+		self.assertEqual(tournaments[0].get_state(), TournamentState.COMPLETED)
+
+		results = {
+			result.player.user.username: result
+			for result in TournamentPlayerResult.objects.get_results_for_tournament(tournaments[0].id)
+		}
+		self.assertEqual({username: result.placement for username, result in results.items()}, {
+			"cat": 0,
+			"dog": 1,
+			"monkey": DID_NOT_PLACE_VALUE,
+			"bird": DID_NOT_PLACE_VALUE,
+		})
+		self.assertEqual({username: result.net_earnings for username, result in results.items()}, {
+			"cat": Decimal("240.00"),
+			"dog": Decimal("45.00"),
+			"monkey": Decimal("-195.00"),
+			"bird": Decimal("-100.00"),
+		})
+		monkey_player = results["monkey"].player
+		self.assertEqual(len(TournamentRebuy.objects.get_rebuys_for_player(monkey_player)), 1)
+
+		results = TournamentPlayerResult.objects.get_results_for_tournament(tournaments[1].id)
+		self.assertEqual({result.player.user.username: result.placement for result in results}, {"dog": 0, "cat": 1})
+
+	"""
+	Verify tournaments are imported from JSON lines, and nothing is imported if one of the tournaments is invalid.
+	"""
+	def test_import_backfill_tournaments_from_json(self):
+		cat = User.objects.get_by_username("cat")
+		structure = {
+			"title": "No bounty",
+			"buyin_amount": "50",
+			"bounty_amount": None,
+			"payout_percentages": [100],
+			"allow_rebuys": False
+		}
+		tournament = {
+			"title": "Tournament A",
+			"structure": structure,
+			"players": ["cat", "dog", "monkey"],
+			"placements": ["monkey"],
+			"eliminations": [{"eliminator": "monkey", "eliminatee": "cat"}],
+			"split_eliminations": [{"eliminators": ["monkey", "cat"], "eliminatee": "dog"}]
+		}
+		invalid_tournament = dict(tournament, title = "Tournament B", players = ["cat", "dog", "monkey", "nobody"])
+
+		with self.assertRaisesMessage(ValidationError, "Tournament B: There is no user with the username nobody."):
+			Tournament.objects.import_backfill_tournaments(
+				admin = cat,
+				tournaments = iter_backfill_tournaments_from_json(
+					StringIO(json.dumps(tournament) + "\n" + json.dumps(invalid_tournament) + "\n")
+				)
+			)
+		self.assertEqual(Tournament.objects.count(), 0)
+
+		tournaments = Tournament.objects.import_backfill_tournaments(
+			admin = cat,
+			tournaments = iter_backfill_tournaments_from_json(StringIO(json.dumps([tournament])))
+		)
+		results = TournamentPlayerResult.objects.get_results_for_tournament(tournaments[0].id)
+		self.assertEqual({result.player.user.username: result.net_earnings for result in results}, {
+			"monkey": Decimal("100.00"),
+			"cat": Decimal("-50.00"),
+			"dog": Decimal("-50.00"),
+		})
+
+
+	"""
+	Verify the import_tournaments command imports in batches and continues from the checkpoint after a failure.
+	"""
+	def test_import_tournaments_command(self):
+		structure = {
+			"title": "No bounty",
+			"buyin_amount": "50",
+			"bounty_amount": None,
+			"payout_percentages": [100],
+			"allow_rebuys": False
+		}
+		with tempfile.TemporaryDirectory() as directory:
+			path = os.path.join(directory, "tournaments.jsonl")
+			with open(path, "w") as file:
+				for i, loser in enumerate(["dog", "monkey", "bird", "newbie"]):
+					file.write(json.dumps({
+						"title": f"Tournament {i}",
+						"structure": structure,
+						"players": ["cat", loser],
+						"placements": ["cat"],
+						"eliminations": [{"eliminator": "cat", "eliminatee": loser}],
+					}) + "\n")
+
+			# 'newbie' doesn't exist yet. The first batch is imported and the second fails.
+			out = StringIO()
+			with self.assertRaisesMessage(CommandError, "Import stopped after 2 tournament(s): Tournament 3: There is no user with the username newbie."):
+				call_command("import_tournaments", path, admin = "cat", batch_size = 2, stdout = out)
+			self.assertEqual(
+				list(Tournament.objects.order_by("id").values_list("title", flat = True)),
+				["Tournament 0", "Tournament 1"]
+			)
+			self.assertTrue(os.path.exists(f"{path}.checkpoint"))
+
+			# Run again once the user exists. It continues after the first batch.
+			build_user("newbie")
+			out = StringIO()
+			call_command("import_tournaments", path, admin = "cat", batch_size = 2, stdout = out)
+			self.assertIn("Resuming after 2 tournament(s).", out.getvalue())
+			self.assertIn("Done. 4 tournament(s) imported.", out.getvalue())
+			self.assertEqual(
+				list(Tournament.objects.order_by("id").values_list("title", flat = True)),
+				["Tournament 0", "Tournament 1", "Tournament 2", "Tournament 3"]
+			)
+			self.assertEqual(TournamentPlayerResult.objects.count(), 8)
+			self.assertFalse(os.path.exists(f"{path}.checkpoint"))
+
+	"""
+	Verify the TournamentSummary is saved when a tournament is completed, is the source of the results table and the
+	summary download, and is removed when the completion is undone.
+	"""
+	def test_tournament_summary(self):
+		cat = User.objects.get_by_username("cat")
+		tournaments = Tournament.objects.import_backfill_tournaments(
+			admin = cat,
+			tournaments = iter_backfill_tournaments_from_json(StringIO(json.dumps([{
+				"title": "Tournament A",
+				"structure": {
+					"title": "Bounty",
+					"buyin_amount": "50",
+					"bounty_amount": "10",
+					"payout_percentages": [100],
+					"allow_rebuys": False
+				},
+				"players": ["cat", "dog", "monkey"],
+				"placements": ["monkey"],
+				"eliminations": [{"eliminator": "monkey", "eliminatee": "cat"}],
+				"split_eliminations": [{"eliminators": ["monkey", "cat"], "eliminatee": "dog"}]
+			}])))
+		)
+		tournament = Tournament.objects.get_by_id(tournaments[0].id)
+		self.assertEqual(TournamentSummary.objects.get(tournament = tournament).results_version, tournament.results_version)
+
+		with CaptureQueriesContext(connection) as context:
+			summary = TournamentSummary.objects.get_summary(tournament)
+		self.assertEqual(len(context.captured_queries), 1)
+		self.assertEqual(summary.usernames, ["cat", "dog", "monkey"])
+		self.assertEqual(summary.total_pot_value, Decimal("150.00"))
+		self.assertEqual([(result.username, result.placement_string) for result in summary.results], [("monkey", "1st"), ("cat", "--"), ("dog", "--")])
+		self.assertEqual(summary.results[0].net_earnings, Decimal("85.00"))
+		self.assertEqual(
+			sorted([(elimination.eliminator_usernames, elimination.eliminatee_username, elimination.is_split) for elimination in summary.eliminations]),
+			[(["cat", "monkey"], "dog", True), (["monkey"], "cat", False)]
+		)
+
+		# The saved summary is rebuilt when it's older than the tournament's results.
+		TournamentSummary.objects.filter(tournament = tournament).update(data = {}, results_version = 0)
+		self.assertEqual(TournamentSummary.objects.get_summary(tournament), summary)
+		self.assertEqual(TournamentSummary.objects.get(tournament = tournament).results_version, tournament.results_version)
+
+		self.client.force_login(cat)
+		response = self.client.get(reverse("tournament:download_summary", kwargs={"pk": tournament.id}))
+		self.assertEqual(response.status_code, 200)
+		text = response.content.decode()
+		self.assertIn("Tournament Title: Tournament A\n", text)
+		self.assertIn("Bounty Tournament? True\n", text)
+		self.assertIn("Placements:\n\t1st: monkey\n", text)
+		self.assertIn("\tcat, monkey: eliminated dog at ", text)
+		self.assertIn("Total Tournament value: $150.00\n", text)
+
+		cache.clear()
+		response = self.client.get(reverse("tournament:tournament_view", kwargs={"pk": tournament.id}))
+		self.assertEqual(response.context['results'], summary.results)
+
+		Tournament.objects.undo_complete_tournament(user = cat, tournament_id = tournament.id)
+		self.assertFalse(TournamentSummary.objects.filter(tournament = tournament).exists())
+		response = self.client.get(reverse("tournament:download_summary", kwargs={"pk": tournament.id}))
+		self.assertEqual(response.status_code, 400)
+
+	"""
+	Verify every player is sent their own results email over one connection, permanent failures aren't retried and
+	the emails that failed with a temporary error are sent when the task is retried.
+	"""
+	@override_settings(EMAIL_BACKEND = "tournament.tests.FlakyEmailBackend")
+	def test_results_emails(self):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		monkey = User.objects.get_by_username("monkey")
+		tournaments = Tournament.objects.import_backfill_tournaments(
+			admin = cat,
+			tournaments = iter_backfill_tournaments_from_json(StringIO(json.dumps([{
+				"title": "Tournament A",
+				"structure": {
+					"title": "No bounty",
+					"buyin_amount": "50",
+					"bounty_amount": None,
+					"payout_percentages": [100],
+					"allow_rebuys": False
+				},
+				"players": ["cat", "dog", "monkey"],
+				"placements": ["monkey"],
+				"eliminations": [{"eliminator": "monkey", "eliminatee": "cat"}, {"eliminator": "monkey", "eliminatee": "dog"}]
+			}])))
+		)
+		tournament_id = tournaments[0].id
+		FlakyEmailBackend.num_opened = 0
+		FlakyEmailBackend.errors = {
+			cat.email: smtplib.SMTPRecipientsRefused({cat.email: (550, b"No such user")}),
+			dog.email: smtplib.SMTPResponseException(421, b"Try again later"),
+		}
+
+		with self.assertRaisesMessage(ValidationError, "1 results email(s) could not be sent. They will be retried."):
+			Tournament.objects.email_tournament_results(tournament_id)
+		self.assertEqual(FlakyEmailBackend.num_opened, 1)
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertEqual(mail.outbox[0].to, [monkey.email])
+		self.assertIn("You placed 1st with net earnings of $100.00.", mail.outbox[0].body)
+		self.assertEqual(mail.outbox[0].attachments[0][0], "tournament_summary.txt")
+		self.assertIn("Tournament Title: Tournament A", mail.outbox[0].attachments[0][1])
+		results_emails = {
+			results_email.user.username: results_email
+			for results_email in TournamentResultsEmail.objects.get_results_emails_for_tournament(tournament_id)
+		}
+		self.assertEqual(results_emails["cat"].get_status(), ResultsEmailStatus.FAILED)
+		self.assertEqual(results_emails["dog"].get_status(), ResultsEmailStatus.PENDING)
+		self.assertIn("Try again later", results_emails["dog"].error)
+		self.assertEqual(results_emails["monkey"].get_status(), ResultsEmailStatus.SENT)
+
+		# The retry only sends dog's email.
+		FlakyEmailBackend.errors = {}
+		Tournament.objects.email_tournament_results(tournament_id)
+		self.assertEqual(len(mail.outbox), 2)
+		self.assertEqual(mail.outbox[1].to, [dog.email])
+		self.assertIn("You placed -- with net earnings of $-50.00.", mail.outbox[1].body)
+		dog_results_email = TournamentResultsEmail.objects.get(tournament_id = tournament_id, user = dog)
+		self.assertEqual(dog_results_email.get_status(), ResultsEmailStatus.SENT)
+		self.assertEqual(dog_results_email.attempts, 2)
+		self.assertEqual(
+			TournamentResultsEmail.objects.get(tournament_id = tournament_id, user = cat).get_status(),
+			ResultsEmailStatus.FAILED
+		)
+
+	"""
+	Verify that when the mail server disconnects and can't be reconnected to, the emails already sent are saved as
+	SENT and the rest are left PENDING for the retry.
+	"""
+	@override_settings(EMAIL_BACKEND = "tournament.tests.FlakyEmailBackend")
+	def test_results_emails_reconnect_fails(self):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		tournaments = Tournament.objects.import_backfill_tournaments(
+			admin = cat,
+			tournaments = iter_backfill_tournaments_from_json(StringIO(json.dumps([{
+				"title": "Tournament A",
+				"structure": {
+					"title": "No bounty",
+					"buyin_amount": "50",
+					"bounty_amount": None,
+					"payout_percentages": [100],
+					"allow_rebuys": False
+				},
+				"players": ["cat", "dog", "monkey"],
+				"placements": ["monkey"],
+				"eliminations": [{"eliminator": "monkey", "eliminatee": "cat"}, {"eliminator": "monkey", "eliminatee": "dog"}]
+			}])))
+		)
+		tournament_id = tournaments[0].id
+		FlakyEmailBackend.num_opened = 0
+		FlakyEmailBackend.max_opened = 1
+		FlakyEmailBackend.errors = {
+			dog.email: smtplib.SMTPServerDisconnected("Connection unexpectedly closed"),
+		}
+		try:
+			with self.assertRaisesMessage(ValidationError, "2 results email(s) could not be sent. They will be retried."):
+				Tournament.objects.email_tournament_results(tournament_id)
+		finally:
+			FlakyEmailBackend.max_opened = None
+		self.assertEqual([message.to for message in mail.outbox], [[cat.email]])
+		results_emails = {
+			results_email.user.username: results_email
+			for results_email in TournamentResultsEmail.objects.get_results_emails_for_tournament(tournament_id)
+		}
+		self.assertEqual(results_emails["cat"].get_status(), ResultsEmailStatus.SENT)
+		self.assertEqual(results_emails["dog"].get_status(), ResultsEmailStatus.PENDING)
+		self.assertEqual(results_emails["dog"].attempts, 1)
+		self.assertIn("Reconnecting failed: SMTPConnectError", results_emails["dog"].error)
+		self.assertEqual(results_emails["monkey"].get_status(), ResultsEmailStatus.PENDING)
+		self.assertEqual(results_emails["monkey"].attempts, 0)
+
+		# The retry doesn't send cat's email again.
+		FlakyEmailBackend.errors = {}
+		Tournament.objects.email_tournament_results(tournament_id)
+		self.assertEqual(len(mail.outbox), 3)
+		self.assertEqual(TournamentResultsEmail.objects.filter(tournament_id = tournament_id, status = ResultsEmailStatus.SENT.value).count(), 3)
+
+	"""
+	Verify a user's tournament history is streamed as CSV and parquet, and that only their rows are exported.
+	"""
+	def test_export_tournament_history(self):
+		cat = User.objects.get_by_username("cat")
+		structure = {
+			"title": "No bounty",
+			"buyin_amount": "50",
+			"bounty_amount": None,
+			"payout_percentages": [100],
+			"allow_rebuys": False
+		}
+		Tournament.objects.import_backfill_tournaments(
+			admin = cat,
+			tournaments = iter_backfill_tournaments_from_json(StringIO(json.dumps([
+				{
+					"title": "Tournament A",
+					"structure": structure,
+					"players": ["cat", "dog", "monkey"],
+					"placements": ["monkey"],
+					"eliminations": [{"eliminator": "monkey", "eliminatee": "cat"}],
+					"split_eliminations": [{"eliminators": ["monkey", "cat"], "eliminatee": "dog"}]
+				},
+				{
+					"title": "Tournament B",
+					"structure": structure,
+					"players": ["dog", "monkey"],
+					"placements": ["dog"],
+					"eliminations": [{"eliminator": "dog", "eliminatee": "monkey"}]
+				}
+			])))
+		)
+		self.client.force_login(cat)
+
+		response = self.client.get(reverse("tournament:export_tournament_history", kwargs={"table": "results", "file_format": "csv"}))
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response.streaming)
+		self.assertEqual(response["Content-Disposition"], 'attachment; filename="cat_tournament_history_results.csv"')
+		rows = list(csv.DictReader(StringIO(b"".join(response.streaming_content).decode())))
+		self.assertEqual(len(rows), 1)
+		self.assertEqual(rows[0]["tournament_title"], "Tournament A")
+		self.assertEqual(rows[0]["net_earnings"], "-50.00")
+
+		# cat eliminated dog with monkey and was eliminated by monkey. Tournament B isn't included.
+		response = self.client.get(reverse("tournament:export_tournament_history", kwargs={"table": "eliminations", "file_format": "parquet"}))
+		self.assertEqual(response.status_code, 200)
+		table = pq.read_table(BytesIO(b"".join(response.streaming_content)))
+		self.assertEqual(
+			sorted(zip(
+				table.column("eliminator_username").to_pylist(),
+				table.column("eliminatee_username").to_pylist(),
+				table.column("eliminations").to_pylist(),
+				table.column("is_split").to_pylist()
+			)),
+			[("cat", "dog", 0.5, True), ("monkey", "cat", 1.0, False)]
+		)
+
+		response = self.client.get(reverse("tournament:export_tournament_history", kwargs={"table": "rebuys", "file_format": "parquet"}))
+		table = pq.read_table(BytesIO(b"".join(response.streaming_content)))
+		self.assertEqual(table.num_rows, 0)
+		self.assertEqual(table.column_names, ["tournament_id", "tournament_title", "timestamp", "username", "is_backfill"])
+
+		response = self.client.get(reverse("tournament:export_tournament_history", kwargs={"table": "results", "file_format": "xlsx"}))
+		self.assertEqual(response.status_code, 400)
+
+		# The management command writes one file per table.
+		with tempfile.TemporaryDirectory() as directory:
+			call_command("export_tournament_history", user = "dog", format = "parquet", output_dir = directory, stdout = StringIO())
+			self.assertEqual(sorted(os.listdir(directory)), [
+				"dog_tournament_history_eliminations.parquet",
+				"dog_tournament_history_rebuys.parquet",
+				"dog_tournament_history_results.parquet",
+			])
+			table = pq.read_table(os.path.join(directory, "dog_tournament_history_results.parquet"))
+			self.assertEqual(
+				dict(zip(table.column("tournament_title").to_pylist(), table.column("net_earnings").to_pylist())),
+				{"Tournament A": Decimal("-50.00"), "Tournament B": Decimal("50.00")}
+			)
+
+	"""
+	Verify generate_league writes consistent data: rebuilding the ledgers, results, analytics and counters from the
+	generated players, rebuys and eliminations changes nothing. The same seed generates the same tournaments.
+	"""
+	def test_generate_league(self):
+		options = {
+			"users": 20,
+			"leagues": 2,
+			"tournaments": 12,
+			"min_players": 3,
+			"max_players": 6,
+			"rebuy_probability": 0.3,
+			"split_elimination_probability": 0.3,
+			"seed": 3,
+		}
+		out = StringIO()
+		call_command("generate_league", username_prefix = "gen", batch_size = 5, stdout = out, **options)
+		self.assertIn("Done. Generated 20 user(s), 2 league(s) and 12 tournament(s).", out.getvalue())
+
+		tournaments = Tournament.objects.filter(admin__username__startswith = "gen")
+		self.assertEqual(tournaments.count(), 12)
+		self.assertEqual(Tournament.objects.rebuild_counters(tournaments), [])
+		self.assertTrue(TournamentRebuy.objects.filter(player__tournament__in = tournaments).exists())
+		self.assertTrue(TournamentSplitElimination.objects.filter(eliminatee__tournament__in = tournaments).exists())
+
+		ledger_fields = ["player_id", "eliminations", "split_eliminations", "times_eliminated", "rebuys"]
+		result_fields = ["player_id", "investment", "placement", "placement_earnings", "bounty_earnings", "gross_earnings", "net_earnings"]
+		analytics_fields = ["user_id", "placement", "gross_earnings", "net_earnings", "investment", "eliminations", "rebuys"]
+		elimination_analytics_fields = ["user_id", "eliminated_user_id", "eliminations"]
+		for tournament in tournaments:
+			self.assertEqual(tournament.get_state(), TournamentState.COMPLETED)
+			ledgers = TournamentPlayerLedger.objects.filter(player__tournament = tournament).order_by("player_id")
+			results = TournamentPlayerResult.objects.filter(tournament = tournament).order_by("player_id")
+			analytics = PlayerTournamentAnalytics.objects.filter(tournament = tournament).order_by("user_id")
+			elimination_analytics = PlayerEliminationAnalytics.objects.filter(tournament = tournament).order_by("user_id", "eliminated_user_id")
+			generated = (
+				list(ledgers.values_list(*ledger_fields)),
+				list(results.values_list(*result_fields)),
+				list(analytics.values_list(*analytics_fields)),
+				list(elimination_analytics.values_list(*elimination_analytics_fields)),
+			)
+			self.assertEqual(len(generated[1]), TournamentPlayer.objects.filter(tournament = tournament).count())
+			self.assertEqual(len([result for result in generated[1] if result[2] == 0]), 1)
+
+			# The generated timestamps are kept, not replaced with the time they were written.
+			self.assertFalse(TournamentElimination.objects.filter(eliminatee__tournament = tournament, eliminated_at__gt = tournament.completed_at).exists())
+			self.assertFalse(TournamentSplitElimination.objects.filter(eliminatee__tournament = tournament, eliminated_at__gt = tournament.completed_at).exists())
+			self.assertFalse(TournamentRebuy.objects.filter(player__tournament = tournament, timestamp__gt = tournament.completed_at).exists())
+
+			TournamentPlayerLedger.objects.rebuild_ledgers_for_tournament(tournament.id)
+			TournamentPlayerResult.objects.build_results_for_tournament(tournament.id)
+			PlayerTournamentAnalytics.objects.build_for_tournament(tournament.id)
+			rebuilt = (
+				list(ledgers.values_list(*ledger_fields)),
+				list(results.values_list(*result_fields)),
+				list(analytics.values_list(*analytics_fields)),
+				list(elimination_analytics.values_list(*elimination_analytics_fields)),
+			)
+			self.assertEqual(generated, rebuilt)
+
+		# Every tournament is in its league's group and the group charts can be built.
+		groups = TournamentGroup.objects.filter(admin__username__startswith = "gen")
+		self.assertEqual(sum(group.get_tournaments().count() for group in groups), 12)
+		for group in groups:
+			data = TournamentGroup.objects.build_group_data(group)
+			self.assertEqual(len(data.net_earnings), 10)
+
+		# Same seed, different batch size: the same tournaments are generated.
+		call_command("generate_league", username_prefix = "again", batch_size = 12, stdout = StringIO(), **options)
+		def build_snapshot(prefix):
+			return [
+				(title, started_at, completed_at, username[len(prefix):], placement, net_earnings)
+				for title, started_at, completed_at, username, placement, net_earnings in TournamentPlayerResult.objects.filter(
+					tournament__admin__username__startswith = prefix
+				).order_by("tournament__started_at", "tournament__title", "player__user__username").values_list(
+					"tournament__title",
+					"tournament__started_at",
+					"tournament__completed_at",
+					"player__user__username",
+					"placement",
+					"net_earnings"
+				)
+			]
+		self.assertEqual(build_snapshot("gen"), build_snapshot("again"))
+
+		with self.assertRaisesMessage(CommandError, "There are already users named gen<n>. Use a different username_prefix."):
+			call_command("generate_league", username_prefix = "gen", stdout = StringIO(), **options)
+
+
 class TournamentSplitEliminationsTestCase(TransactionTestCase):
 
 	# Reset primary keys after each test function run
@@ -3383,6 +4352,49 @@ class TournamentSplitEliminationsTestCase(TransactionTestCase):
 			)
 
 
+	"""
+	get_split_eliminations_by_tournament and get_split_eliminations_by_eliminator prefetch the eliminators.
+	"""
+	def test_get_split_eliminations_prefetches_eliminators(self):
+		tournament = Tournament.objects.get_by_id(1)
+		players = TournamentPlayer.objects.get_tournament_players(
+			tournament_id = tournament.id
+		)
+		Tournament.objects.start_tournament(user = tournament.admin, tournament_id = tournament.id)
+		split_eliminate_player(
+			tournament_id = tournament.id,
+			eliminator_ids = [players[0].id, players[1].id],
+			eliminatee_id = players[2].id
+		)
+		split_eliminate_player(
+			tournament_id = tournament.id,
+			eliminator_ids = [players[3].id, players[4].id, players[5].id],
+			eliminatee_id = players[6].id
+		)
+
+		# One query for the split eliminations and one for the eliminators (with their users).
+		with self.assertNumQueries(2):
+			split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament.id)
+			eliminators = [
+				[eliminator.user.username for eliminator in split_elimination.eliminators.all()] for split_elimination in split_eliminations
+			]
+			eliminatees = [split_elimination.eliminatee.user.username for split_elimination in split_eliminations]
+
+		# Newest first
+		self.assertEqual(eliminatees, [players[6].user.username, players[2].user.username])
+		self.assertEqual(len(eliminators[0]), 3)
+		self.assertEqual(len(eliminators[1]), 2)
+
+		split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_eliminator(
+			player_id = players[4].id
+		)
+		self.assertEqual(len(split_eliminations), 1)
+		self.assertEqual(split_eliminations[0].eliminatee, players[6])
+		split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_eliminator(
+			player_id = players[2].id
+		)
+		self.assertEqual(len(split_eliminations), 0)
+
 class TournamentPlayerResultTestCase(TransactionTestCase):
 
 	# Reset primary keys after each test function run
@@ -3502,31 +4514,6 @@ class TournamentPlayerResultTestCase(TransactionTestCase):
 		with self.assertRaisesMessage(ValidationError, "You cannot build Tournament results until the Tournament is complete."):
 			results = TournamentPlayerResult.objects.build_results_for_tournament(tournament.id)
 
-	"""
-	Verify cannot calculate placement until tournament completed.
-	"""
-	def test_cannot_calculate_placement_until_tournament_completed(self):
-		# Build a structure made by cat
-		cat = User.objects.get_by_username("cat")
-
-		structure = self.build_structure(
-			user = cat,
-			buyin_amount = 100,
-			bounty_amount = None,
-			payout_percentages = [100],
-			allow_rebuys = False
-		)
-
-		tournament = self.build_tournament(
-			admin = cat,
-			title = "Results tournament",
-			structure= structure
-		)
-
-		with self.assertRaisesMessage(ValidationError, "Cannot determine placement until tourment is completed."):
-			results = TournamentPlayerResult.objects.determine_placement(user_id=cat.id, tournament_id=tournament.id)
-
-
 	"""
 	Verify placement is calculated correctly.
 	No rebuys.
@@ -4389,30 +5376,504 @@ class TournamentPlayerResultTestCase(TransactionTestCase):
 				self.assertEqual(len(placement_dict[place].rebuys), 2)
 				self.assertEqual(placement_dict[place].rebuys[0].player.id, 1)
 
+	"""
+	Build a completed bounty Tournament with a rebuy and a split elimination. The first user is the admin and the winner.
+	"""
+	def build_completed_tournament_with_rebuys_and_split_eliminations(self, users):
+		admin = users[0]
+		structure = self.build_structure(
+			user = admin,
+			buyin_amount = 100,
+			bounty_amount = 10,
+			payout_percentages = [60, 40],
+			allow_rebuys = True
+		)
+		tournament = self.build_tournament(
+			admin = admin,
+			title = "Results tournament",
+			structure= structure
+		)
+		players = add_players_to_tournament(
+			users = users,
+			tournament = tournament
+		)
+		admin_player = TournamentPlayer.objects.get_tournament_player_by_user_id(
+			tournament_id = tournament.id,
+			user_id = admin.id
+		)
+		Tournament.objects.start_tournament(user = admin, tournament_id = tournament.id)
 
+		# The first player is split eliminated and rebuys.
+		split_eliminate_player(
+			tournament_id = tournament.id,
+			eliminator_ids = [admin_player.id, players[1].id],
+			eliminatee_id = players[0].id
+		)
+		TournamentRebuy.objects.rebuy(
+			tournament_id = tournament.id,
+			player_id = players[0].id
+		)
+
+		eliminate_all_players_except(
+			players = players,
+			except_player = admin_player,
+			tournament = tournament
+		)
+		return Tournament.objects.complete_tournament(user = admin, tournament_id = tournament.id)
 
+	"""
+	Verify the number of queries used to build the results does not depend on the number of players.
+	"""
+	def test_build_results_for_tournament_query_count_is_constant(self):
+		users = list(User.objects.all().order_by("id"))
+		small_tournament = self.build_completed_tournament_with_rebuys_and_split_eliminations(users[0:3])
+		large_tournament = self.build_completed_tournament_with_rebuys_and_split_eliminations(users)
 
+		with CaptureQueriesContext(connection) as small_tournament_queries:
+			small_results = TournamentPlayerResult.objects.build_results_for_tournament(small_tournament.id)
+		with CaptureQueriesContext(connection) as large_tournament_queries:
+			large_results = TournamentPlayerResult.objects.build_results_for_tournament(large_tournament.id)
 
-		
+		self.assertEqual(len(small_results), 3)
+		self.assertEqual(len(large_results), 9)
+		self.assertEqual(len(small_tournament_queries), len(large_tournament_queries))
 
-		
+		# Rebuilding replaces the existing results rather than adding to them.
+		self.assertEqual(len(TournamentPlayerResult.objects.get_results_for_tournament(large_tournament.id)), 9)
 
-		
+		# The admin won and everyone else placed in order of elimination.
+		results = TournamentPlayerResult.objects.get_results_for_tournament(large_tournament.id).order_by("placement")
+		self.assertEqual(results[0].player.user, users[0])
+		self.assertEqual([result.placement for result in results], list(range(0, 9)))
+
+class TournamentPlayerLedgerTestCase(TransactionTestCase):
+
+	# Reset primary keys after each test function run
+	reset_sequences = True
+
+	def setUp(self):
+		users = create_users(
+			identifiers = ["cat", "dog", "monkey", "bird"]
+		)
+		structure = build_structure(
+			admin = users[0], # Cat is admin
+			buyin_amount = 115,
+			bounty_amount = 15,
+			payout_percentages = (60, 30, 10),
+			allow_rebuys = True
+		)
+		self.tournament = build_tournament(structure)
+		add_players_to_tournament(
+			users = users[1:],
+			tournament = self.tournament
+		)
+		self.cat = users[0]
+		Tournament.objects.start_tournament(user = self.cat, tournament_id = self.tournament.id)
 
+	def get_player(self, username):
+		return TournamentPlayer.objects.get_tournament_player_by_user_id(
+			tournament_id = self.tournament.id,
+			user_id = User.objects.get_by_username(username).id
+		)
 
+	def get_ledger(self, username):
+		return TournamentPlayerLedger.objects.get(player = self.get_player(username))
 
+	def play_eliminations_and_rebuys(self):
+		cat_player = self.get_player("cat")
+		dog_player = self.get_player("dog")
+		monkey_player = self.get_player("monkey")
+		bird_player = self.get_player("bird")
 
+		# Cat eliminates dog, dog rebuys.
+		eliminate_player(
+			tournament_id = self.tournament.id,
+			eliminator_id = cat_player.id,
+			eliminatee_id = dog_player.id
+		)
+		TournamentRebuy.objects.rebuy(
+			tournament_id = self.tournament.id,
+			player_id = dog_player.id
+		)
 
+		# Cat, dog and monkey split the elimination of bird.
+		split_eliminate_player(
+			tournament_id = self.tournament.id,
+			eliminator_ids = [cat_player.id, dog_player.id, monkey_player.id],
+			eliminatee_id = bird_player.id
+		)
 
+	"""
+	Every player gets an empty ledger when they are added to the Tournament.
+	"""
+	def test_ledgers_created_for_players(self):
+		for username in ["cat", "dog", "monkey", "bird"]:
+			ledger = self.get_ledger(username)
+			self.assertEqual(ledger.eliminations, 0)
+			self.assertEqual(ledger.split_eliminations, Decimal("0.00"))
+			self.assertEqual(ledger.times_eliminated, 0)
+			self.assertEqual(ledger.rebuys, 0)
+			self.assertFalse(ledger.is_eliminated)
 
+	"""
+	Eliminations, split eliminations and rebuys update the ledgers.
+	"""
+	def test_ledgers_track_eliminations_and_rebuys(self):
+		self.play_eliminations_and_rebuys()
 
+		cat_ledger = self.get_ledger("cat")
+		self.assertEqual(cat_ledger.eliminations, 1)
+		self.assertEqual(cat_ledger.split_eliminations, Decimal("0.33"))
+		self.assertEqual(cat_ledger.bounties, Decimal("1.33"))
+		self.assertFalse(cat_ledger.is_eliminated)
 
+		dog_ledger = self.get_ledger("dog")
+		self.assertEqual(dog_ledger.eliminations, 0)
+		self.assertEqual(dog_ledger.split_eliminations, Decimal("0.33"))
+		self.assertEqual(dog_ledger.times_eliminated, 1)
+		self.assertEqual(dog_ledger.rebuys, 1)
+		self.assertFalse(dog_ledger.is_eliminated)
 
+		bird_ledger = self.get_ledger("bird")
+		self.assertEqual(bird_ledger.times_eliminated, 1)
+		self.assertTrue(bird_ledger.is_eliminated)
+		self.assertTrue(TournamentPlayer.objects.is_player_eliminated(player_id = self.get_player("bird").id))
 
+	"""
+	A rejected elimination does not change the ledgers.
+	"""
+	def test_ledgers_unchanged_by_rejected_elimination(self):
+		self.play_eliminations_and_rebuys()
+		with self.assertRaisesMessage(ValidationError, "bird has already been eliminated and has no more re-buys."):
+			eliminate_player(
+				tournament_id = self.tournament.id,
+				eliminator_id = self.get_player("cat").id,
+				eliminatee_id = self.get_player("bird").id
+			)
+		self.assertEqual(self.get_ledger("cat").eliminations, 1)
+		self.assertEqual(self.get_ledger("bird").times_eliminated, 1)
 
+	"""
+	Deleting all the eliminations and rebuys resets the ledgers.
+	"""
+	def test_ledgers_reset_when_tournament_is_deactivated(self):
+		self.play_eliminations_and_rebuys()
+		Tournament.objects.undo_start_tournament(user = self.cat, tournament_id = self.tournament.id)
 
+		for username in ["cat", "dog", "monkey", "bird"]:
+			ledger = self.get_ledger(username)
+			self.assertEqual(ledger.bounties, Decimal("0.00"))
+			self.assertEqual(ledger.times_eliminated, 0)
+			self.assertEqual(ledger.rebuys, 0)
 
+	"""
+	Rebuilding the ledgers from the elimination and rebuy rows gives the same values as the incremental updates.
+	"""
+	def test_rebuild_ledgers_for_tournament(self):
+		self.play_eliminations_and_rebuys()
+		expected = {
+			ledger.player_id: (ledger.eliminations, ledger.split_eliminations, ledger.times_eliminated, ledger.rebuys)
+			for ledger in TournamentPlayerLedger.objects.all()
+		}
+		TournamentPlayerLedger.objects.all().delete()
 
+		TournamentPlayerLedger.objects.rebuild_ledgers_for_tournament(self.tournament.id)
 
+		rebuilt = {
+			ledger.player_id: (ledger.eliminations, ledger.split_eliminations, ledger.times_eliminated, ledger.rebuys)
+			for ledger in TournamentPlayerLedger.objects.all()
+		}
+		self.assertEqual(expected, rebuilt)
+
+	"""
+	Migration 0022 merges the history of a duplicate TournamentPlayer into the oldest one instead of deleting it, and
+	rebuilds the ledgers of that Tournament.
+	"""
+	def test_migration_merges_duplicate_players(self):
+		before_constraints = [("tournament", "0021_usertournamentresultsversion")]
+		executor = MigrationExecutor(connection)
+		executor.migrate(before_constraints)
+		apps = executor.loader.project_state(before_constraints).apps
+		HistoricalTournamentPlayer = apps.get_model("tournament", "TournamentPlayer")
+		HistoricalTournamentPlayerLedger = apps.get_model("tournament", "TournamentPlayerLedger")
+		HistoricalTournamentElimination = apps.get_model("tournament", "TournamentElimination")
+		HistoricalTournamentSplitElimination = apps.get_model("tournament", "TournamentSplitElimination")
+		HistoricalTournamentRebuy = apps.get_model("tournament", "TournamentRebuy")
+
+		dog_player = self.get_player("dog")
+		cat_player = self.get_player("cat")
+		duplicate_dog = HistoricalTournamentPlayer.objects.create(
+			user_id = dog_player.user_id,
+			tournament_id = self.tournament.id
+		)
+		HistoricalTournamentPlayerLedger.objects.create(player = duplicate_dog, eliminations = 1, rebuys = 1)
+		# The duplicate eliminates monkey, rebuys, and splits the elimination of bird with dog and cat.
+		HistoricalTournamentElimination.objects.create(
+			eliminator = duplicate_dog,
+			eliminatee_id = self.get_player("monkey").id
+		)
+		HistoricalTournamentRebuy.objects.create(player = duplicate_dog)
+		split_elimination = HistoricalTournamentSplitElimination.objects.create(eliminatee_id = self.get_player("bird").id)
+		split_elimination.eliminators.add(duplicate_dog.id, dog_player.id, cat_player.id)
+
+		executor.loader.build_graph()
+		executor.migrate(executor.loader.graph.leaf_nodes())
+
+		self.assertEqual(TournamentPlayer.objects.filter(user_id = dog_player.user_id).count(), 1)
+		self.assertEqual(self.get_player("dog").id, dog_player.id)
+		self.assertEqual(TournamentElimination.objects.get().eliminator_id, dog_player.id)
+		self.assertEqual(TournamentRebuy.objects.get().player_id, dog_player.id)
+		self.assertEqual(
+			set(TournamentSplitElimination.objects.get().eliminators.values_list("id", flat = True)),
+			{dog_player.id, cat_player.id}
+		)
+
+		dog_ledger = self.get_ledger("dog")
+		self.assertEqual(dog_ledger.eliminations, 1)
+		self.assertEqual(dog_ledger.split_eliminations, Decimal("0.50"))
+		self.assertEqual(dog_ledger.rebuys, 1)
+		self.assertEqual(self.get_ledger("cat").split_eliminations, Decimal("0.50"))
+		self.assertEqual(self.get_ledger("monkey").times_eliminated, 1)
+		self.assertEqual(self.get_ledger("bird").times_eliminated, 1)
+		self.assertEqual(Tournament.objects.get_by_id(self.tournament.id).results_version, self.tournament.results_version + 1)
+
+# Hashing passwords with the default hasher makes creating hundreds of users very slow.
+@override_settings(PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"])
+class TournamentViewTestCase(TransactionTestCase):
 
+	# Reset primary keys after each test function run
+	reset_sequences = True
 
+	def setUp(self):
+		# The completed tournament page is cached using the tournament id, which is reused between tests.
+		cache.clear()
+
+	"""
+	Build a completed bounty Tournament with 'num_players' players. It includes a split elimination, a rebuy and
+	a player who never accepted their invite.
+	"""
+	def build_completed_tournament(self, num_players):
+		users = create_users(
+			identifiers = [f"player{i}" for i in range(0, num_players)]
+		)
+		admin = users[0]
+		structure = build_structure(
+			admin = admin,
+			buyin_amount = 115,
+			bounty_amount = 15,
+			payout_percentages = (60, 30, 10),
+			allow_rebuys = True
+		)
+		tournament = build_tournament(structure, admin_user = admin)
+		add_players_to_tournament(
+			users = users[:-1],
+			tournament = tournament
+		)
+		TournamentInvite.objects.send_invite(
+			sent_from_user_id = admin.id,
+			send_to_user_id = users[-1].id,
+			tournament_id = tournament.id
+		)
+		players = [
+			TournamentPlayer.objects.get_tournament_player_by_user_id(user_id = user.id, tournament_id = tournament.id) for user in users
+		]
+		Tournament.objects.start_tournament(user = admin, tournament_id = tournament.id)
+		split_eliminate_player(
+			tournament_id = tournament.id,
+			eliminator_ids = [players[0].id, players[2].id],
+			eliminatee_id = players[1].id
+		)
+		TournamentRebuy.objects.rebuy(
+			tournament_id = tournament.id,
+			player_id = players[1].id
+		)
+		eliminate_all_players_except(
+			players = players,
+			except_player = players[0],
+			tournament = tournament
+		)
+		return Tournament.objects.complete_tournament(user = admin, tournament_id = tournament.id)
+
+	def render_tournament_view(self, tournament):
+		self.client.force_login(tournament.admin)
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(reverse("tournament:tournament_view", kwargs={"pk": tournament.id}))
+		self.assertEqual(response.status_code, 200)
+		return response, len(queries)
+
+	"""
+	The number of queries used to render a completed tournament does not depend on the number of players.
+	"""
+	def test_tournament_view_query_count(self):
+		query_counts = []
+		for num_players in [10, 50, 200]:
+			tournament = self.build_completed_tournament(num_players)
+			response, num_queries = self.render_tournament_view(tournament)
+			query_counts.append(num_queries)
+
+			results = response.context['results']
+			self.assertEqual(len(results), num_players)
+			self.assertEqual(results[0].username, "player0")
+			self.assertEqual(response.context['have_all_players_joined_tournament'], False)
+			self.assertContains(response, f"player{num_players - 1}")
+
+			# Clean up so the next tournament starts from an empty database.
+			Tournament.objects.all().delete()
+			User.objects.all().delete()
+
+		# Includes the session and request.user lookups.
+		self.assertEqual(query_counts, [11, 11, 11])
+
+	"""
+	The completed-state data is served from the cache until the results change.
+	"""
+	def test_completed_tournament_view_is_cached(self):
+		tournament = self.build_completed_tournament(10)
+		self.assertEqual(tournament.results_version, 1)
+		admin = tournament.admin
+
+		response, num_queries_miss = self.render_tournament_view(tournament)
+		self.assertEqual(response.context['results'][0].username, "player0")
+		response, num_queries_hit = self.render_tournament_view(tournament)
+		self.assertEqual(response.context['results'][0].username, "player0")
+		self.assertTrue(num_queries_hit < num_queries_miss)
+
+		# Undo the completion and play the tournament again with a different winner.
+		tournament = Tournament.objects.undo_complete_tournament(user = admin, tournament_id = tournament.id)
+		self.assertEqual(tournament.results_version, 2)
+		response, num_queries = self.render_tournament_view(tournament)
+		self.assertFalse('results' in response.context)
+
+		Tournament.objects.start_tournament(user = admin, tournament_id = tournament.id)
+		players = TournamentPlayer.objects.get_tournament_players(tournament.id)
+		winner = players.get(user__username = "player1")
+		eliminate_all_players_except(
+			players = players,
+			except_player = winner,
+			tournament = tournament
+		)
+		tournament = Tournament.objects.complete_tournament(user = admin, tournament_id = tournament.id)
+		self.assertEqual(tournament.results_version, 3)
+
+		response, num_queries = self.render_tournament_view(tournament)
+		self.assertTrue(num_queries > num_queries_hit)
+		self.assertEqual(response.context['results'][0].username, "player1")
+
+	"""
+	has_player_joined_tournament and get_rebuys_for_player don't query the database per player when the view has set
+	the TournamentPlayerLookups, and return the same values as without them.
+	"""
+	def test_player_template_filters_use_lookups(self):
+		tournament = self.build_completed_tournament(10)
+		with self.assertNumQueries(2):
+			lookups = TournamentPlayer.objects.build_player_lookups(tournament.id)
+		players = list(TournamentPlayer.objects.get_tournament_players(tournament.id).order_by("id"))
+		self.assertEqual(len(lookups.joined_player_ids), 9)
+		self.assertEqual(lookups.rebuys_by_player_id, {players[1].id: 1})
+
+		template = Template(
+			"{% load tournament_extras %}"
+			"{% for player in players %}"
+			"{{ player.id|has_player_joined_tournament:tournament_id }},{{ player|get_rebuys_for_player }};"
+			"{% endfor %}"
+		)
+		context = Context({"players": players, "tournament_id": tournament.id})
+		# Three queries per player.
+		with self.assertNumQueries(30):
+			without_lookups = template.render(context)
+		with self.assertNumQueries(0):
+			with use_tournament_player_lookups(lookups):
+				with_lookups = template.render(context)
+		self.assertEqual(with_lookups, without_lookups)
+		self.assertEqual(without_lookups, "True,0;True,1;" + "True,0;" * 7 + "False,0;")
+
+		# The lookups built by tournament_view match the ones built by the manager.
+		response, num_queries = self.render_tournament_view(tournament)
+		self.assertEqual(response.context['player_lookups'].joined_player_ids, lookups.joined_player_ids)
+		self.assertEqual(
+			{player_id: rebuys for player_id, rebuys in response.context['player_lookups'].rebuys_by_player_id.items() if rebuys > 0},
+			lookups.rebuys_by_player_id
+		)
+
+	"""
+	With SQL_PROFILING on, requests that exceed a threshold are written to the log file with their duplicate query
+	fingerprints and call sites, and listed on the staff-only profiling page.
+	"""
+	def test_sql_profiling_middleware(self):
+		tournament = self.build_completed_tournament(10)
+		with tempfile.TemporaryDirectory() as directory:
+			log_file = os.path.join(directory, "sql_profiling.jsonl")
+			def read_entries():
+				with open(log_file) as file:
+					return [json.loads(line) for line in file]
+
+			# Off by default: nothing is recorded.
+			with override_settings(SQL_PROFILING_LOG_FILE = log_file, SQL_PROFILING_MAX_QUERIES = 0):
+				self.render_tournament_view(tournament)
+			self.assertFalse(os.path.exists(log_file))
+
+			thresholds = {
+				"SQL_PROFILING": True,
+				"SQL_PROFILING_LOG_FILE": log_file,
+				"SQL_PROFILING_MAX_QUERIES": 1000,
+				"SQL_PROFILING_MAX_DUPLICATE_QUERIES": 2,
+				"SQL_PROFILING_MAX_DB_TIME_MS": 100000,
+			}
+			with override_settings(**thresholds):
+				# The middleware is loaded once per client.
+				self.client = self.client_class()
+				# No duplicate queries. Not logged.
+				self.render_tournament_view(tournament)
+				self.assertFalse(os.path.exists(log_file))
+
+				# The tournament list runs a query per joined tournament.
+				for host in create_users(identifiers = [f"host{i}" for i in range(0, 5)]):
+					hosted_structure = build_structure(
+						admin = host,
+						buyin_amount = 100,
+						bounty_amount = None,
+						payout_percentages = (100,),
+						allow_rebuys = False
+					)
+					hosted_tournament = build_tournament(hosted_structure, admin_user = host)
+					add_players_to_tournament(users = [tournament.admin], tournament = hosted_tournament)
+				with self.assertLogs("root.profiling", "WARNING"):
+					response = self.client.get(reverse("tournament:tournament_list"))
+				self.assertEqual(response.status_code, 200)
+			entries = read_entries()
+			self.assertEqual(len(entries), 1)
+			entry = entries[0]
+			self.assertEqual(entry["path"], reverse("tournament:tournament_list"))
+			self.assertEqual(entry["status_code"], 200)
+			self.assertEqual(entry["exceeded"], ["duplicate_queries"])
+			self.assertTrue(entry["num_duplicate_queries"] > 2)
+			self.assertEqual(entry["num_duplicate_queries"], sum(duplicate["count"] - 1 for duplicate in entry["duplicates"]))
+			duplicate = entry["duplicates"][0]
+			self.assertTrue(duplicate["count"] >= 5)
+			self.assertTrue(len(duplicate["call_sites"]) > 0)
+			for call_site in duplicate["call_sites"]:
+				self.assertRegex(call_site, r"^\S+\.py:\d+ in \w+")
+
+			# The number of queries matches what was run.
+			thresholds["SQL_PROFILING_MAX_QUERIES"] = 0
+			with override_settings(**thresholds):
+				self.client = self.client_class()
+				with self.assertLogs("root.profiling", "WARNING"):
+					response, num_queries = self.render_tournament_view(tournament)
+			entry = read_entries()[-1]
+			self.assertEqual(entry["exceeded"], ["queries"])
+			self.assertEqual(entry["num_queries"], num_queries)
+
+			# The profiling page is only for staff.
+			thresholds["SQL_PROFILING_MAX_QUERIES"] = 1000
+			with override_settings(**thresholds):
+				self.client = self.client_class()
+				self.client.force_login(tournament.admin)
+				response = self.client.get(reverse("sql_profiling"))
+				self.assertEqual(response.status_code, 302)
+				staff = User.objects.create_superuser(email = "staff@staff.com", username = "staff", password = "password")
+				self.client.force_login(staff)
+				response = self.client.get(reverse("sql_profiling"))
+				self.assertEqual(response.status_code, 200)
+				self.assertEqual(response.context["entries"][0]["path"], reverse("tournament:tournament_view", kwargs={"pk": tournament.id}))
+				self.assertContains(response, reverse("tournament:tournament_list"))
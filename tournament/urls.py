@@ -2,8 +2,11 @@ from django.urls import include, path
 
 from tournament.views import (
     complete_tournament,
+    download_tournament_summary,
     eliminate_player_from_tournament,
+    export_tournament_history,
     invite_player_to_tournament,
+    invite_players_to_tournament,
     get_tournament_structure,
     join_tournament,
     rebuy_player_in_tournament,
@@ -28,8 +31,11 @@ urlpatterns = [
     path('complete/<int:pk>/', complete_tournament, name="complete"),
     path('create_tournament/', tournament_create_view, name="create_tournament"),
     path('create_tournament_structure/', tournament_structure_create_view, name="create_tournament_structure"),
+    path('download_summary/<int:pk>/', download_tournament_summary, name="download_summary"),
     path('eliminate_player/<int:tournament_id>/<int:eliminator_id>/<int:eliminatee_id>/', eliminate_player_from_tournament, name="eliminate_player"),
+    path('export/<str:table>/<str:file_format>/', export_tournament_history, name="export_tournament_history"),
     path('invite_player_to_tournament/<int:player_id>/<int:tournament_id>/', invite_player_to_tournament, name="invite_player"),
+    path('invite_players_to_tournament/<int:tournament_id>/', invite_players_to_tournament, name="invite_players"),
     path('get_tournament_structure/', get_tournament_structure, name="get_tournament_structure"),
     path('join_tournament/<int:pk>/', join_tournament, name="join_tournament"),
     path('player_rebuy/<int:player_id>/<int:tournament_id>/', rebuy_player_in_tournament, name="player_rebuy"),
@@ -1,9 +1,28 @@
-from dataclasses import dataclass
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from itertools import chain
+import csv
 import datetime
+import json
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 DID_NOT_PLACE_VALUE = 999999999
 
+# Names of the task_queue tasks queued when a tournament is completed.
+EMAIL_TOURNAMENT_RESULTS_TASK = "tournament.email_tournament_results"
+REFRESH_TOURNAMENT_TOTALS_TASK = "tournament_analytics.refresh_tournament_totals"
+
+# Results emails are sent over one connection in batches of this size. The delivery status is saved after each batch.
+RESULTS_EMAIL_BATCH_SIZE = 50
+
+# A results email that keeps failing with errors worth retrying is marked FAILED after this many attempts.
+RESULTS_EMAIL_MAX_ATTEMPTS = 3
+
 """
 A Split Elimination event for tournament timelines.
 """
@@ -107,6 +126,194 @@ class PlayerTournamentData:
 	bounties: float
 	is_eliminated: bool
 
+"""
+A TournamentPlayer as displayed in tournament_view.
+player_id: TournamentPlayer pk
+
+has_joined: False if the player still has a pending TournamentInvite.
+"""
+@dataclass
+class TournamentViewPlayerData:
+	player_id: int
+	user_id: int
+	username: str
+	tournament_id: int
+	is_admin: bool
+	has_joined: bool
+
+"""
+Lookup maps for the players of a Tournament, so the has_player_joined_tournament and get_rebuys_for_player template
+filters don't run a query per row. Built once per request (see TournamentPlayerManager.build_player_lookups) and made
+available to the filters with use_tournament_player_lookups.
+
+joined_player_ids: TournamentPlayer pks of the players that don't have a pending TournamentInvite.
+rebuys_by_player_id: {TournamentPlayer pk: number of rebuys}
+"""
+@dataclass
+class TournamentPlayerLookups:
+	tournament_id: int
+	joined_player_ids: set
+	rebuys_by_player_id: dict
+
+_tournament_player_lookups = ContextVar("tournament_player_lookups", default=None)
+
+"""
+Make 'lookups' (TournamentPlayerLookups) available to the template filters while rendering. Wrap the call to render().
+"""
+@contextmanager
+def use_tournament_player_lookups(lookups):
+	token = _tournament_player_lookups.set(lookups)
+	try:
+		yield lookups
+	finally:
+		_tournament_player_lookups.reset(token)
+
+"""
+The TournamentPlayerLookups set with use_tournament_player_lookups, or None.
+"""
+def get_tournament_player_lookups():
+	return _tournament_player_lookups.get()
+
+"""
+A TournamentPlayerResult as displayed in tournament_view.
+player_id: TournamentPlayer pk
+"""
+@dataclass
+class TournamentViewResultData:
+	player_id: int
+	username: str
+	placement: int
+	placement_string: str
+	placement_earnings: Decimal
+	bounty_earnings: Decimal
+	gross_earnings: Decimal
+	investment: Decimal
+	net_earnings: Decimal
+	rebuys: int
+
+"""
+One elimination in a TournamentSummaryData. A split elimination has more than one eliminator.
+"""
+@dataclass
+class TournamentSummaryEliminationData:
+	eliminator_usernames: list[str]
+	eliminatee_username: str
+	eliminated_at: datetime
+	is_split: bool
+
+"""
+The results of a completed Tournament. The results email, the results tables in tournament_view and the downloadable
+summary are all rendered from this. Built by TournamentSummaryManager.build_summary and saved in TournamentSummary.
+
+bounty_amount: None if it's not a bounty tournament.
+results: TournamentViewResultData ordered by placement.
+eliminations: TournamentSummaryEliminationData ordered by eliminated_at.
+"""
+@dataclass
+class TournamentSummaryData:
+	tournament_id: int
+	title: str
+	completed_at: datetime
+	buyin_amount: Decimal
+	bounty_amount: Decimal
+	payout_percentages: list[Decimal]
+	allow_rebuys: bool
+	usernames: list[str]
+	results: list[TournamentViewResultData]
+	eliminations: list[TournamentSummaryEliminationData]
+	total_rebuys: int
+	total_pot_value: Decimal
+
+"""
+Convert a TournamentSummaryData to a dict that can be saved in a JSONField. Decimals and datetimes become strings.
+"""
+def build_json_from_tournament_summary_data(summary):
+	return json.loads(json.dumps(asdict(summary), cls=DjangoJSONEncoder))
+
+"""
+Convert the dict from build_json_from_tournament_summary_data back into a TournamentSummaryData.
+"""
+def build_tournament_summary_data_from_json(data):
+	def to_decimal(value):
+		return Decimal(f"{value}") if value != None else None
+	return TournamentSummaryData(
+		tournament_id = data['tournament_id'],
+		title = data['title'],
+		completed_at = parse_datetime(data['completed_at']),
+		buyin_amount = to_decimal(data['buyin_amount']),
+		bounty_amount = to_decimal(data['bounty_amount']),
+		payout_percentages = [to_decimal(pct) for pct in data['payout_percentages']],
+		allow_rebuys = data['allow_rebuys'],
+		usernames = data['usernames'],
+		results = [
+			TournamentViewResultData(
+				player_id = result['player_id'],
+				username = result['username'],
+				placement = result['placement'],
+				placement_string = result['placement_string'],
+				placement_earnings = to_decimal(result['placement_earnings']),
+				bounty_earnings = to_decimal(result['bounty_earnings']),
+				gross_earnings = to_decimal(result['gross_earnings']),
+				investment = to_decimal(result['investment']),
+				net_earnings = to_decimal(result['net_earnings']),
+				rebuys = result['rebuys']
+			)
+			for result in data['results']
+		],
+		eliminations = [
+			TournamentSummaryEliminationData(
+				eliminator_usernames = elimination['eliminator_usernames'],
+				eliminatee_username = elimination['eliminatee_username'],
+				eliminated_at = parse_datetime(elimination['eliminated_at']),
+				is_split = elimination['is_split']
+			)
+			for elimination in data['eliminations']
+		],
+		total_rebuys = data['total_rebuys'],
+		total_pot_value = to_decimal(data['total_pot_value'])
+	)
+
+"""
+The plain text version of a TournamentSummaryData. This is the attachment on the results email and the downloadable
+summary.
+"""
+def build_tournament_summary_text(summary):
+	payout_string = ", ".join(
+		[f"{build_placement_string(i)}: {pct}%" for i, pct in enumerate(summary.payout_percentages)]
+	)
+	bounty_amount = "N/A" if summary.bounty_amount == None else f"${summary.bounty_amount}"
+	placements = "".join(
+		[f"\t{result.placement_string}: {result.username}\n" for result in summary.results if result.placement != DID_NOT_PLACE_VALUE]
+	)
+	if summary.allow_rebuys:
+		player_rebuys = "".join(
+			[f"\t{result.username}: ({result.rebuys})\n" for result in summary.results if result.rebuys > 0]
+		)
+	else:
+		player_rebuys = "\tN/A\n"
+	eliminations = "".join(
+		[
+			f"\t{', '.join(elimination.eliminator_usernames)}: eliminated {elimination.eliminatee_username} at {elimination.eliminated_at}\n"
+			for elimination in summary.eliminations
+		]
+	)
+	return (
+		f"Tournament Title: {summary.title}\n"
+		f"Completed on: {summary.completed_at}\n"
+		f"Bounty Tournament? {summary.bounty_amount != None}\n"
+		f"Allow rebuys? {summary.allow_rebuys}\n"
+		f"Payout percentages: ({payout_string})\n"
+		f"Buyin amount: ${summary.buyin_amount}\n"
+		f"Bounty amount: {bounty_amount}\n"
+		f"Players: {', '.join(summary.usernames)}\n"
+		f"Num players: {len(summary.usernames)}\n"
+		f"Placements:\n{placements}"
+		f"Num rebuys: {summary.total_rebuys}\n"
+		f"Player rebuys:\n{player_rebuys}"
+		f"Player Eliminations:\n{eliminations}"
+		f"Total Tournament value: ${summary.total_pot_value}\n"
+	)
+
 """
 Summary eliminations data. This includes split eliminations.
 """
@@ -152,6 +359,201 @@ class SplitEliminationsData:
 	# username of the player who was eliminated.
 	eliminated_player_username: str
 
+"""
+The fraction of a split elimination each eliminator gets: 1 / (number of eliminators), rounded to 2 decimal places.
+Every count of split eliminations (ledgers, bounties, head-to-head and the analytics read models) uses this so they
+always agree.
+"""
+def get_split_elimination_fraction(num_eliminators):
+	return round(Decimal(1.00 / num_eliminators), 2)
+
+"""
+One cell of a head-to-head elimination matrix. How many times the eliminator user eliminated the eliminatee user.
+"""
+@dataclass
+class HeadToHeadEliminationData:
+	eliminator_user_id: int
+	eliminator_username: str
+	eliminatee_user_id: int
+	eliminatee_username: str
+
+	# Number of whole eliminations.
+	eliminations: int
+
+	# Sum of the fractions from split eliminations. Ex: 0.5 + 0.33
+	split_eliminations: float
+
+"""
+Returns the HeadToHeadEliminationData for (eliminator_user_id, eliminatee_user_id) in 'head_to_head', adding an
+empty one if it's not there yet.
+"""
+def get_or_create_head_to_head_data(head_to_head, eliminator_user_id, eliminator_username, eliminatee_user_id, eliminatee_username):
+	key = (eliminator_user_id, eliminatee_user_id)
+	if key not in head_to_head:
+		head_to_head[key] = HeadToHeadEliminationData(
+			eliminator_user_id = eliminator_user_id,
+			eliminator_username = eliminator_username,
+			eliminatee_user_id = eliminatee_user_id,
+			eliminatee_username = eliminatee_username,
+			eliminations = 0,
+			split_eliminations = 0.00
+		)
+	return head_to_head[key]
+
+"""
+Build json from a list of HeadToHeadEliminationData.
+"""
+def build_json_from_head_to_head_data(head_to_head_data):
+	data_list = []
+	for item in head_to_head_data:
+		data_list.append({
+			'eliminator_username': item.eliminator_username,
+			'eliminatee_username': item.eliminatee_username,
+			'eliminations': item.eliminations,
+			'split_eliminations': item.split_eliminations,
+		})
+	return json.dumps(data_list)
+
+"""
+A historical tournament to import with TournamentManager.import_backfill_tournaments. Players are referenced by
+username.
+
+placements: usernames ordered from 1st place down. One for each payout percentage.
+eliminations: list of (eliminator username, eliminatee username).
+split_eliminations: list of ([eliminator usernames], eliminatee username).
+completed_at: When the tournament was played. None for now.
+"""
+@dataclass
+class BackfillTournamentData:
+	title: str
+	structure_title: str
+	buyin_amount: Decimal
+	bounty_amount: Decimal
+	payout_percentages: list[Decimal]
+	allow_rebuys: bool
+	usernames: list[str]
+	placements: list[str]
+	eliminations: list[tuple[str, str]]
+	split_eliminations: list[tuple[list[str], str]]
+	completed_at: datetime
+
+"""
+Build a BackfillTournamentData from a dict. This is the format of a JSON import file (see
+iter_backfill_tournaments_from_json):
+{
+	"title": "Friday night",
+	"completed_at": "2022-03-04T23:30:00+00:00",
+	"structure": {
+		"title": "$100 bounty",
+		"buyin_amount": "100",
+		"bounty_amount": "10",
+		"payout_percentages": [70, 30],
+		"allow_rebuys": true
+	},
+	"players": ["cat", "dog", "monkey"],
+	"placements": ["cat", "dog"],
+	"eliminations": [{"eliminator": "cat", "eliminatee": "monkey"}],
+	"split_eliminations": [{"eliminators": ["cat", "monkey"], "eliminatee": "dog"}]
+}
+"""
+def build_backfill_tournament_data(data):
+	try:
+		structure = data['structure']
+		bounty_amount = structure.get('bounty_amount')
+		completed_at = data.get('completed_at')
+		if completed_at:
+			completed_at = datetime.datetime.fromisoformat(completed_at)
+			if timezone.is_naive(completed_at):
+				completed_at = timezone.make_aware(completed_at)
+		return BackfillTournamentData(
+			title = data['title'],
+			structure_title = structure['title'],
+			buyin_amount = Decimal(f"{structure['buyin_amount']}"),
+			bounty_amount = Decimal(f"{bounty_amount}") if bounty_amount not in (None, "") else None,
+			payout_percentages = [Decimal(f"{pct}") for pct in structure['payout_percentages']],
+			allow_rebuys = structure.get('allow_rebuys', False) in (True, "true", "True", "1", 1),
+			usernames = list(data['players']),
+			placements = get_placements_list(data['placements']),
+			eliminations = [
+				(elimination['eliminator'], elimination['eliminatee']) for elimination in data.get('eliminations', [])
+			],
+			split_eliminations = [
+				(list(elimination['eliminators']), elimination['eliminatee']) for elimination in data.get('split_eliminations', [])
+			],
+			completed_at = completed_at or None
+		)
+	except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+		raise ValidationError(f"Invalid tournament data for '{data.get('title') if isinstance(data, dict) else data}': {e}")
+
+"""
+Placements are either a list of usernames ordered from 1st place down, or a dict of {<place (1 for 1st)>: <username>}.
+"""
+def get_placements_list(placements):
+	if isinstance(placements, dict):
+		return [username for place, username in sorted(placements.items(), key=lambda item: int(item[0]))]
+	return list(placements)
+
+"""
+Yields a BackfillTournamentData for each tournament in a JSON file. The file is either a JSON list of tournaments or
+JSON lines (one tournament per line). See build_backfill_tournament_data for the format.
+"""
+def iter_backfill_tournaments_from_json(file):
+	first_line = file.readline()
+	if first_line.lstrip().startswith("["):
+		for data in json.loads(first_line + file.read()):
+			yield build_backfill_tournament_data(data)
+		return
+	for line in chain([first_line], file):
+		if line.strip():
+			yield build_backfill_tournament_data(json.loads(line))
+
+"""
+Yields a BackfillTournamentData for each tournament in a CSV file. There is one row per player and the rows for a
+tournament must be next to each other:
+
+tournament,completed_at,structure,buyin_amount,bounty_amount,payout_percentages,allow_rebuys,player,placement,eliminated_by
+Friday night,2022-03-04T23:30:00+00:00,$100 bounty,100,10,70|30,true,cat,1,
+Friday night,2022-03-04T23:30:00+00:00,$100 bounty,100,10,70|30,true,dog,2,cat+monkey
+Friday night,2022-03-04T23:30:00+00:00,$100 bounty,100,10,70|30,true,monkey,,cat|dog
+
+placement: 1 for 1st place. Empty if they did not place.
+eliminated_by: Every time the player was eliminated, separated by '|'. Split eliminations separate the eliminators
+with '+'.
+"""
+def iter_backfill_tournaments_from_csv(file):
+	data = None
+	for row in csv.DictReader(file):
+		if data == None or data['title'] != row['tournament']:
+			if data != None:
+				yield build_backfill_tournament_data(data)
+			data = {
+				'title': row['tournament'],
+				'completed_at': row['completed_at'],
+				'structure': {
+					'title': row['structure'],
+					'buyin_amount': row['buyin_amount'],
+					'bounty_amount': row['bounty_amount'],
+					'payout_percentages': [pct for pct in row['payout_percentages'].split("|") if pct != ""],
+					'allow_rebuys': row['allow_rebuys'].lower() == "true",
+				},
+				'players': [],
+				'placements': {},
+				'eliminations': [],
+				'split_eliminations': [],
+			}
+		username = row['player']
+		data['players'].append(username)
+		if row['placement']:
+			data['placements'][int(row['placement'])] = username
+		for eliminated_by in (row['eliminated_by'] or "").split("|"):
+			eliminators = [eliminator for eliminator in eliminated_by.split("+") if eliminator != ""]
+			if len(eliminators) == 1:
+				data['eliminations'].append({'eliminator': eliminators[0], 'eliminatee': username})
+			elif len(eliminators) > 1:
+				data['split_eliminations'].append({'eliminators': eliminators, 'eliminatee': username})
+	if data != None:
+		yield build_backfill_tournament_data(data)
+
 def build_placement_string(placement):
 	if placement == 0:
 		return '1st'
@@ -164,6 +566,56 @@ def build_placement_string(placement):
 	else:
 		return f'{placement + 1}th'
 
+"""
+Calculate the total value of a Tournament given the number of players and the number of rebuys.
+"""
+def calculate_tournament_value(buyin_amount, num_players, num_rebuys):
+	total_tournament_value = buyin_amount * num_players
+	total_tournament_value += buyin_amount * num_rebuys
+	return round(Decimal(total_tournament_value), 2)
+
+"""
+Determine the amount a player made from where they placed in a Tournament.
+This does not include bounties. This is strictly earnings from how they placed.
+
+bounty_amount: None if this is not a bounty tournament.
+"""
+def calculate_placement_earnings(buyin_amount, bounty_amount, payout_percentages, num_players, num_rebuys, placement):
+	placement_earnings = 0
+	total_tournament_value = calculate_tournament_value(
+		buyin_amount = buyin_amount,
+		num_players = num_players,
+		num_rebuys = num_rebuys
+	)
+	if bounty_amount != None:
+		# subtract the bounties from total value
+		total_tournament_value -= Decimal(num_players * bounty_amount)
+		total_tournament_value -= Decimal(num_rebuys * bounty_amount)
+	# Determine the % paid to this placement
+	for i,pct in enumerate(payout_percentages):
+		if i == placement:
+			placement_earnings = Decimal(float(pct) / float(100.00) * float(total_tournament_value))
+	return round(placement_earnings, 2)
+
+"""
+Determine the amount a player made from bounties.
+
+num_eliminations: Number of whole eliminations.
+split_eliminations_count: Sum of the fractions from split eliminations. Ex: 0.5 + 0.33
+bounty_amount: None if this is not a bounty tournament.
+"""
+def calculate_bounty_earnings(bounty_amount, num_eliminations, split_eliminations_count):
+	if bounty_amount != None:
+		return round((Decimal(num_eliminations) + Decimal(split_eliminations_count)) * Decimal(bounty_amount), 2)
+	return round(Decimal(0.00), 2)
+
+"""
+Cache key for the completed-state data of tournament_view. 'results_version' is Tournament.results_version so
+the key changes every time the results change.
+"""
+def build_tournament_view_cache_key(tournament_id, results_version):
+	return f"tournament_view:{tournament_id}:{results_version}"
+
 """
 Used in a template to apply styling based on placement.
 
@@ -1,7 +1,7 @@
 import json
-from decimal import Decimal
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render, redirect
@@ -9,6 +9,7 @@ from django.urls import reverse
 from django.utils import timezone
 
 from tournament_group.models import TournamentGroup
+from tournament.export import build_export_response
 from tournament.forms import CreateTournamentForm, CreateTournamentStructureForm, EditTournamentForm
 from tournament.models import (
 	Tournament,
@@ -17,9 +18,9 @@ from tournament.models import (
 	TournamentInvite,
 	TournamentPlayer,
 	TournamentElimination,
-	TournamentPlayerResult,
 	TournamentRebuy,
-	TournamentSplitElimination
+	TournamentSplitElimination,
+	TournamentSummary
 )
 from tournament.util import (
 	PlayerTournamentData,
@@ -34,9 +35,14 @@ from tournament.util import (
 	build_in_progress_event,
 	build_split_elimination_event,
 	build_split_eliminations_data,
+	build_tournament_summary_text,
+	build_tournament_view_cache_key,
 	build_player_eliminations_data_from_eliminations,
 	build_player_eliminations_summary_data_from_eliminations,
-	get_tournament_started_at
+	get_tournament_started_at,
+	TournamentPlayerLookups,
+	TournamentViewPlayerData,
+	use_tournament_player_lookups
 )
 from user.models import User
 
@@ -280,6 +286,45 @@ def invite_player_to_tournament(request, *args, **kwargs):
 		messages.error(request, e.args[0])
 	return render_tournament_view(request, tournament_id)
 
+"""
+Invite many players to a tournament at once: the users in the 'user_ids' POST list or, if 'group_id' is set, everyone
+in that TournamentGroup who isn't in the tournament yet.
+HTMX request for tournament_view
+"""
+@login_required
+def invite_players_to_tournament(request, *args, **kwargs):
+	tournament_id = kwargs['tournament_id']
+	try:
+		user = request.user
+
+		# Verify the admin is sending the invites
+		verify_admin(
+			user = user,
+			tournament_id = tournament_id,
+			error_message = "Only the admin can invite players."
+		)
+
+		group_id = request.POST.get("group_id")
+		if group_id != None and group_id != "":
+			group = TournamentGroup.objects.get_by_id(group_id)
+			if group == None or not group.users.filter(id=user.id).exists():
+				raise ValidationError("You're not part of that TournamentGroup.")
+			invites = TournamentInvite.objects.send_invites(
+				sent_from_user_id = user.id,
+				send_to_user_ids = group.users.values_list("id", flat=True),
+				tournament_id = tournament_id,
+				skip_existing_players = True
+			)
+		else:
+			invites = TournamentInvite.objects.send_invites(
+				sent_from_user_id = user.id,
+				send_to_user_ids = request.POST.getlist("user_ids"),
+				tournament_id = tournament_id
+			)
+	except Exception as e:
+		messages.error(request, e.args[0])
+	return render_tournament_view(request, tournament_id)
+
 """
 Eliminate a player from a tournament.
 Returns a generic HttpResponse with a status code representing whether it was successful or not.
@@ -391,19 +436,11 @@ def rebuy_player_in_tournament(request, *args, **kwargs):
 Common function shared between tournament_view and htmx requests used in that view.
 """
 def render_tournament_view(request, tournament_id):
-	context = {}
-	tournament = Tournament.objects.get_by_id(tournament_id)
-	context['tournament'] = tournament
-	context['tournament_state'] = tournament.get_state()
-
-	# Get all the players that have joined the Tournament. They are a TournamentPlayer
-	players = TournamentPlayer.objects.get_tournament_players(tournament.id)
-	context['players'] = players
+	context = load_tournament_view_data(tournament_id)
+	tournament = context['tournament']
+	players = context['players']
+	invites = context['invites']
 
-	# Get the pending invites
-	invites = TournamentInvite.objects.find_pending_invites_for_tournament(tournament.id)
-	context['invites'] = invites
-	
 	# Search for users with htmx
 	search = request.GET.get("search")
 	if search != None and search != "":
@@ -411,125 +448,280 @@ def render_tournament_view(request, tournament_id):
 		# Exclude the admin,
 		users = users.exclude(email__iexact=request.user.email)
 		# Exclude pending invites
-		for invite in invites:
-			users = users.exclude(email__iexact=invite.send_to.email)
+		users = users.exclude(id__in=[invite.send_to_id for invite in invites])
 		# Exclude users who have already joined
-		for player in players:
-			users = users.exclude(email__iexact=player.user.email)
+		users = users.exclude(id__in=[player.user_id for player in players])
 		context['users'] = users
 		context['search'] = search
 
+	# The admin can invite everyone in one of their TournamentGroups before the Tournament starts.
+	if request.user == tournament.admin and tournament.get_state() == TournamentState.INACTIVE:
+		context['tournament_groups'] = TournamentGroup.objects.filter(users__id=request.user.id).order_by("title")
+
+	with use_tournament_player_lookups(context['player_lookups']):
+		return render(request=request, template_name="tournament/tournament_view.html", context=context)
+
+"""
+Loads everything tournament_view.html needs in a fixed number of queries, regardless of the number of players,
+eliminations or rebuys. The players and results are handed to the templates as TournamentViewPlayerData and
+TournamentViewResultData.
+
+The completed-state data (results, eliminations tables and timeline) is cached. See get_completed_tournament_view_data.
+"""
+def load_tournament_view_data(tournament_id):
+	context = {}
+	tournament = Tournament.objects.select_related("admin", "tournament_structure").get(pk=tournament_id)
+	tournament_state = tournament.get_state()
+	context['tournament'] = tournament
+	context['tournament_state'] = tournament_state
+
+	# Get the pending invites
+	invites = list(
+		TournamentInvite.objects.find_pending_invites_for_tournament(tournament.id).select_related("send_to", "tournament")
+	)
+	context['invites'] = invites
+	invited_user_ids = {invite.send_to_id for invite in invites}
+
+	# Get all the players that have joined the Tournament. They are a TournamentPlayer
+	players = list(
+		TournamentPlayer.objects.filter(tournament=tournament).select_related("user", "ledger").order_by("user__username")
+	)
+	for player in players:
+		player.tournament = tournament
+	context['players'] = [
+		TournamentViewPlayerData(
+			player_id = player.id,
+			user_id = player.user.id,
+			username = player.user.username,
+			tournament_id = tournament.id,
+			is_admin = player.user_id == tournament.admin_id,
+			has_joined = player.user_id not in invited_user_ids
+		)
+		for player in players
+	]
+	# For the has_player_joined_tournament and get_rebuys_for_player template filters. Built from the rows loaded
+	# above so the player tables don't run a query per row.
+	context['player_lookups'] = TournamentPlayerLookups(
+		tournament_id = tournament.id,
+		joined_player_ids = {player.id for player in players if player.user_id not in invited_user_ids},
+		rebuys_by_player_id = {player.id: player.get_ledger().rebuys for player in players}
+	)
+
 	context['is_bounty_tournament'] = tournament.tournament_structure.bounty_amount != None
 	context['allow_rebuys'] = tournament.tournament_structure.allow_rebuys
-	context['player_tournament_data'] = get_player_tournament_data(tournament_id)
+	context['player_tournament_data'] = build_player_tournament_data(players)
 
-	# If it's completed, determine the results
-	results = None
-	if tournament.get_state() == TournamentState.COMPLETED:
-		results = TournamentPlayerResult.objects.get_results_for_tournament(
-			tournament_id = tournament.id
-		)
-		context['results'] = results.order_by("placement")
-		context['payout_positions'] = payout_positions(tournament.tournament_structure.payout_percentages)
-		
-		eliminations_summary_data = []
-		eliminations_data = []
-		for result in results:
-			# Determine who they eliminated in this tournament.
-			eliminations = TournamentElimination.objects.get_eliminations_by_eliminator(
-				player_id = result.player.id
-			)
-			split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_eliminator(
-				player_id = result.player.id
+	if tournament_state == TournamentState.COMPLETED:
+		context.update(
+			get_completed_tournament_view_data(
+				tournament = tournament,
+				players = players
 			)
-			# --- Build PlayerEliminationsSummaryData for each player ---
-			if len(eliminations) > 0 or len(split_eliminations) > 0:
-				data = build_player_eliminations_summary_data_from_eliminations(
-					eliminator = result.player,
-					eliminations = eliminations,
-					split_eliminations = split_eliminations
-				)
-				if data != None:
-					eliminations_summary_data.append(data)
-
-			# --- Build PlayerEliminationsData for each player ---
-			if len(eliminations) > 0:
-				data = build_player_eliminations_data_from_eliminations(
-					eliminator = result.player,
-					eliminations = eliminations,
-				)
-				if data != None:
-					eliminations_data.append(data)
+		)
 
-		# --- Build SplitEliminationsData for the tournament ---
-		split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_tournament(
-			tournament_id = tournament.id
+		# --- Add a "Warning" section if not all TournamentPlayers have joined the Tournament. ---
+		# Not cached since players can still accept their invite after the Tournament is completed.
+		context['have_all_players_joined_tournament'] = all(player.has_joined for player in context['players'])
+	elif tournament_state == TournamentState.ACTIVE:
+		eliminations = list(TournamentElimination.objects.get_eliminations_by_tournament(tournament.id))
+		split_eliminations = list(TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament.id))
+		events = build_tournament_timeline(
+			tournament = tournament,
+			eliminations = eliminations,
+			split_eliminations = split_eliminations,
+			winning_player = None
 		)
-		if len(split_eliminations) > 0:
-			data = build_split_eliminations_data(
-				split_eliminations = split_eliminations
-			)
-			if data != None:
-				context['split_eliminations_data'] = data
+		if len(events) > 0:
+			context['events'] = events
 
-		context['eliminations_summary_data'] = eliminations_summary_data
-		context['eliminations_data'] = eliminations_data
+	return context
 
+"""
+The completed-state data for tournament_view. A completed Tournament doesn't change until the completion is undone,
+so this is cached using a key built from the Tournament id and Tournament.results_version.
 
-		# --- Add a "Warning" section if not all TournamentPlayers have joined the Tournament. ---
-		has_all_joined = Tournament.objects.have_all_players_joined_tournament(
-			tournament_id = tournament.id
+players: TournamentPlayers loaded with their user and ledger.
+"""
+def get_completed_tournament_view_data(tournament, players):
+	cache_key = build_tournament_view_cache_key(
+		tournament_id = tournament.id,
+		results_version = tournament.results_version
+	)
+	data = cache.get(cache_key)
+	if data == None:
+		data = build_completed_tournament_view_data(
+			tournament = tournament,
+			players = players
 		)
-		context['have_all_players_joined_tournament'] = has_all_joined
+		cache.set(cache_key, data)
+	return data
+
+"""
+Builds the results, eliminations tables and timeline for a completed Tournament.
+
+players: TournamentPlayers loaded with their user and ledger.
+"""
+def build_completed_tournament_view_data(tournament, players):
+	data = {}
+	players_by_id = {player.id: player for player in players}
+
+	# Every elimination in the Tournament. These are grouped by eliminator for the results and reused for the timeline.
+	eliminations = list(TournamentElimination.objects.get_eliminations_by_tournament(tournament.id))
+	split_eliminations = list(TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament.id))
+
+	# The results tables are rendered from the saved TournamentSummary, the same data the results email uses.
+	results_data = TournamentSummary.objects.get_summary(tournament).results
+	winning_player = None
+	for result in results_data:
+		if result.placement == 0:
+			winning_player = players_by_id[result.player_id]
+	data['results'] = results_data
+	data['payout_positions'] = payout_positions(tournament.tournament_structure.payout_percentages)
+
+	# {eliminator player id: [eliminations]}
+	eliminations_by_eliminator = {}
+	for elimination in eliminations:
+		eliminations_by_eliminator.setdefault(elimination.eliminator_id, []).append(elimination)
+	split_eliminations_by_eliminator = {}
+	for split_elimination in split_eliminations:
+		for eliminator in split_elimination.eliminators.all():
+			split_eliminations_by_eliminator.setdefault(eliminator.id, []).append(split_elimination)
+
+	eliminations_summary_data = []
+	eliminations_data = []
+	for result in results_data:
+		player = players_by_id[result.player_id]
+		# Determine who they eliminated in this tournament.
+		player_eliminations = eliminations_by_eliminator.get(player.id, [])
+		player_split_eliminations = split_eliminations_by_eliminator.get(player.id, [])
+		# --- Build PlayerEliminationsSummaryData for each player ---
+		if len(player_eliminations) > 0 or len(player_split_eliminations) > 0:
+			summary_data = build_player_eliminations_summary_data_from_eliminations(
+				eliminator = player,
+				eliminations = player_eliminations,
+				split_eliminations = player_split_eliminations
+			)
+			if summary_data != None:
+				eliminations_summary_data.append(summary_data)
+
+		# --- Build PlayerEliminationsData for each player ---
+		if len(player_eliminations) > 0:
+			player_eliminations_data = build_player_eliminations_data_from_eliminations(
+				eliminator = player,
+				eliminations = player_eliminations,
+			)
+			if player_eliminations_data != None:
+				eliminations_data.append(player_eliminations_data)
 
-	# --- Build timeline ---
-	# Note: Only build a timeline if this is not a backfill tournament and the state is either ACTIVE or COMPLETED.
-	eliminations = TournamentElimination.objects.get_eliminations_by_tournament(tournament.id)
-	split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_tournament(tournament.id)
+	# --- Build SplitEliminationsData for the tournament ---
+	if len(split_eliminations) > 0:
+		split_eliminations_data = build_split_eliminations_data(
+			split_eliminations = split_eliminations
+		)
+		if split_eliminations_data != None:
+			data['split_eliminations_data'] = split_eliminations_data
+
+	data['eliminations_summary_data'] = eliminations_summary_data
+	data['eliminations_data'] = eliminations_data
+
+	events = build_tournament_timeline(
+		tournament = tournament,
+		eliminations = eliminations,
+		split_eliminations = split_eliminations,
+		winning_player = winning_player
+	)
+	if len(events) > 0:
+		data['events'] = events
+	return data
+
+"""
+Builds the timeline events for an ACTIVE or COMPLETED Tournament, sorted on timestamp.
+Note: Only build a timeline if this is not a backfill tournament.
+
+winning_player: The TournamentPlayer who won. None if the Tournament is not completed.
+"""
+def build_tournament_timeline(tournament, eliminations, split_eliminations, winning_player):
 	events = []
 	if (len(eliminations) > 0 and not eliminations[0].is_backfill) or (len(split_eliminations) > 0 and not split_eliminations[0].is_backfill):
-		if tournament.get_state() == TournamentState.ACTIVE or tournament.get_state() == TournamentState.COMPLETED:
-			# Get all the TournamentElimination's and TournamentRebuyEvent's and add to the context as an event.
-			# Sort on timestamp. This is for building the timeline.
-			# Eliminations
-			for elimination in eliminations:
-				event = build_elimination_event(elimination)
-				events.append(event)
-			# Rebuys
-			rebuys = TournamentRebuy.objects.get_rebuys_for_tournament(tournament.id)
-			for rebuy in rebuys:
-				event = build_rebuy_event(rebuy)
-				events.append(event)
-
-			# If the tournament is completed, build the completion event.
-			if results != None:
-				winning_player_result = results.filter(placement=0)[0]
-				event = build_completion_event(
-					completed_at = tournament.completed_at,
-					winning_player = winning_player_result.player
-				)
-				events.append(event)
-			else:
-				# if it's not completed, add a "TournamentInProgressEvent"
-				event = build_in_progress_event(
-					started_at = tournament.started_at
-				)
-				events.append(event)
+		# Get all the TournamentElimination's and TournamentRebuyEvent's and add to the context as an event.
+		# Eliminations
+		for elimination in eliminations:
+			event = build_elimination_event(elimination)
+			events.append(event)
+		# Rebuys
+		rebuys = TournamentRebuy.objects.get_rebuys_for_tournament(tournament.id)
+		for rebuy in rebuys:
+			event = build_rebuy_event(rebuy)
+			events.append(event)
+
+		# If the tournament is completed, build the completion event.
+		if winning_player != None:
+			event = build_completion_event(
+				completed_at = tournament.completed_at,
+				winning_player = winning_player
+			)
+			events.append(event)
+		else:
+			# if it's not completed, add a "TournamentInProgressEvent"
+			event = build_in_progress_event(
+				started_at = tournament.started_at
+			)
+			events.append(event)
 	
 	# SPLIT ELIMINATIONS for timeline
-	if len(split_eliminations) > 0:
-		if not split_eliminations[0].is_backfill:
-			if tournament.get_state() == TournamentState.ACTIVE or tournament.get_state() == TournamentState.COMPLETED:
-				for split_elimination in split_eliminations:
-					event = build_split_elimination_event(split_elimination)
-					events.append(event)
+	if len(split_eliminations) > 0 and not split_eliminations[0].is_backfill:
+		for split_elimination in split_eliminations:
+			event = build_split_elimination_event(split_elimination)
+			events.append(event)
+
+	events.sort(key=lambda event: event.timestamp)
+	return events
 
-	if len(events) > 0:
-		events.sort(key=lambda event: event.timestamp)
-		context['events'] = events
 
-	return render(request=request, template_name="tournament/tournament_view.html", context=context)
+"""
+Download the summary of a completed Tournament as a text file. This is the same summary that is attached to the
+results email.
+"""
+@login_required
+def download_tournament_summary(request, *args, **kwargs):
+	try:
+		tournament = Tournament.objects.select_related("tournament_structure").get(pk=kwargs['pk'])
+		summary = TournamentSummary.objects.get_summary(tournament)
+		if summary == None:
+			raise ValidationError("The tournament is not completed.")
+		response = HttpResponse(build_tournament_summary_text(summary), content_type="text/plain")
+		response['Content-Disposition'] = f'attachment; filename="tournament_{tournament.id}_summary.txt"'
+		return response
+	except Exception as e:
+		error = {
+			'error': "Unable to download the tournament summary.",
+			'message': f"{e.args[0]}"
+		}
+		return JsonResponse(error, status=400)
 
+"""
+Download the logged in user's full tournament history as a CSV or parquet file.
+table: results, eliminations or rebuys.
+file_format: csv or parquet.
+The file is streamed so it can be any size.
+"""
+@login_required
+def export_tournament_history(request, *args, **kwargs):
+	try:
+		user = request.user
+		return build_export_response(
+			table = kwargs['table'],
+			file_format = kwargs['file_format'],
+			tournaments = Tournament.objects.exclude(completed_at = None),
+			users = [user],
+			filename = f"{user.username}_tournament_history"
+		)
+	except Exception as e:
+		error = {
+			'error': "Unable to export tournament history.",
+			'message': f"{e.args[0]}"
+		}
+		return JsonResponse(error, status=400)
 
 """
 Retrieve a TournamentStructure and serialize to Json.
@@ -592,7 +784,7 @@ def tournament_edit_view(request, *args, **kwargs):
 		if form.is_valid():
 			tournament.tournament_structure = form.cleaned_data['tournament_structure']
 			tournament.title = form.cleaned_data['title']
-			tournament.save()
+			tournament.save(update_fields=["tournament_structure", "title"])
 
 			messages.success(request, "Tournament Updated!")
 
@@ -649,35 +841,22 @@ def render_tournament_admin_view(request, tournament_id):
 Builds a list of PlayerTournamentData.
 """
 def get_player_tournament_data(tournament_id):
+	players = TournamentPlayer.objects.get_tournament_players(tournament_id).select_related("user", "ledger")
+	return build_player_tournament_data(players)
+
+"""
+Builds a list of PlayerTournamentData from TournamentPlayers loaded with their user and ledger.
+"""
+def build_player_tournament_data(players):
 	player_tournament_data = []
-	players = TournamentPlayer.objects.get_tournament_players(tournament_id)
 	for player in players:
-		eliminations = TournamentElimination.objects.get_eliminations_by_eliminator(
-			player_id = player.id
-		)
-		is_eliminated = TournamentPlayer.objects.is_player_eliminated(
-			player_id = player.id
-		)
-		rebuys = TournamentRebuy.objects.get_rebuys_for_player(
-			player = player
-		)
-
-		split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_eliminator(
-			player_id = player.id
-		)
-
-		# Initialize bounties to the len(eliminations), then add the fractional quantities from split eliminations.
-		bounties = len(eliminations)
-		for split_elimination in split_eliminations:
-			bounty_fraction = round(Decimal(1.0 / len(split_elimination.eliminators.all())), 2)
-			bounties += bounty_fraction
-
+		ledger = player.get_ledger()
 		data = PlayerTournamentData(
 					player_id = player.id,
 					username = player.user.username,
-					rebuys = len(rebuys),
-					bounties = bounties,
-					is_eliminated = is_eliminated
+					rebuys = ledger.rebuys,
+					bounties = ledger.bounties,
+					is_eliminated = ledger.is_eliminated
 				)
 		player_tournament_data.append(data)
 	return player_tournament_data
@@ -691,6 +870,14 @@ def verify_admin(user, tournament_id, error_message):
 	if user != tournament.admin:
 		raise ValidationError(error_message)
 
+"""
+Look up a TournamentPlayer from the players loaded by tournament_backfill_view.
+"""
+def get_backfill_player(players_by_id, player_id):
+	if player_id not in players_by_id:
+		raise ValidationError("That player is not part of this tournament.")
+	return players_by_id[player_id]
+
 """
 This view is insanely complicated. The source of truth for the placements and eliminations data is held in a hidden 
 field in the UI. The data structure in that hidden field is JSON.
@@ -755,14 +942,13 @@ def tournament_backfill_view(request, *args, **kwargs):
 			messages.error(request, error)
 			return redirect("tournament:tournament_view", pk=tournament.id)
 		context['tournament'] = tournament
-		context['players'] = TournamentPlayer.objects.get_tournament_players(
-			tournament_id = tournament.id
-		)
-		
+
 		# --- START: Update Eliminations and Placements with htmx ---
+		# Every player is loaded once. The ids in the json data are resolved from this dict.
 		players = TournamentPlayer.objects.get_tournament_players(
 			tournament_id = tournament.id
-		)
+		).select_related("user")
+		players_by_id = {player.id: player for player in players}
 		context['players'] = players
 		player_eliminations = []
 		data_json = None
@@ -791,7 +977,7 @@ def tournament_backfill_view(request, *args, **kwargs):
 				for elimination in json_dict['eliminations']:
 					eliminator_id = int(elimination['eliminator_id'])
 					eliminatee_id = int(elimination['eliminatee_id'])
-					player = TournamentPlayer.objects.get_by_id(eliminatee_id)
+					player = get_backfill_player(players_by_id, eliminatee_id)
 					if eliminator_id in elim_dict:
 						current_values = elim_dict[eliminator_id]
 						current_values.append(player)
@@ -822,9 +1008,9 @@ def tournament_backfill_view(request, *args, **kwargs):
 				for split_elimination in json_dict['split_eliminations']:
 					eliminator_players = []
 					for player_id in split_elimination['eliminator_ids']:
-						player = TournamentPlayer.objects.get_by_id(int(player_id))
+						player = get_backfill_player(players_by_id, int(player_id))
 						eliminator_players.append(player)
-					eliminatee_player = TournamentPlayer.objects.get_by_id(int(split_elimination['eliminatee_id']))
+					eliminatee_player = get_backfill_player(players_by_id, int(split_elimination['eliminatee_id']))
 					split_elim_dict = {
 						'eliminatee': eliminatee_player,
 						'eliminators': eliminator_players
@@ -851,7 +1037,7 @@ def tournament_backfill_view(request, *args, **kwargs):
 					)
 					# Check for duplicates. Cannot assign the same player multiple placements
 					if player_id in player_tournament_placements.keys():
-						player = TournamentPlayer.objects.get_by_id(player_id)
+						player = get_backfill_player(players_by_id, int(player_id))
 						raise ValidationError(f"Cannot assign multiple placements to {player.user.username}.")
 					player_tournament_placements[player_id] = player_tournament_placement
 
@@ -860,9 +1046,6 @@ def tournament_backfill_view(request, *args, **kwargs):
 				raise ValidationError("You must select a player for each placement position.")
 
 			# Find players who did not place
-			players = TournamentPlayer.objects.get_tournament_players(
-				tournament_id = tournament.id
-			)
 			for player in players:
 				if f"{player.id}" not in player_tournament_placements.keys():
 					player_tournament_placement = PlayerTournamentPlacement(
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TournamentAnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tournament_analytics'
+
+    def ready(self):
+        # Connect the receivers that keep the analytics read models up to date.
+        import tournament_analytics.receivers
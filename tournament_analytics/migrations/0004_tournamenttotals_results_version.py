@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-17 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament_analytics', '0003_alter_tournamenttotals_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournamenttotals',
+            name='results_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,116 @@
+# Generated by Django 3.2 on 2026-10-17 04:48
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_player_analytics(apps, schema_editor):
+    TournamentPlayerResult = apps.get_model('tournament', 'TournamentPlayerResult')
+    TournamentPlayerLedger = apps.get_model('tournament', 'TournamentPlayerLedger')
+    TournamentElimination = apps.get_model('tournament', 'TournamentElimination')
+    TournamentSplitElimination = apps.get_model('tournament', 'TournamentSplitElimination')
+    PlayerTournamentAnalytics = apps.get_model('tournament_analytics', 'PlayerTournamentAnalytics')
+    PlayerEliminationAnalytics = apps.get_model('tournament_analytics', 'PlayerEliminationAnalytics')
+
+    ledgers = {ledger.player_id: ledger for ledger in TournamentPlayerLedger.objects.all()}
+    summaries = []
+    results = TournamentPlayerResult.objects.exclude(
+        tournament__completed_at=None
+    ).select_related('tournament', 'player')
+    for result in results:
+        ledger = ledgers.get(result.player_id)
+        summaries.append(
+            PlayerTournamentAnalytics(
+                user_id=result.player.user_id,
+                tournament_id=result.tournament_id,
+                tournament_title=result.tournament.title,
+                completed_at=result.tournament.completed_at,
+                placement=result.placement,
+                gross_earnings=result.gross_earnings,
+                net_earnings=result.net_earnings,
+                investment=result.investment,
+                eliminations=(ledger.eliminations + ledger.split_eliminations) if ledger else Decimal(0),
+                rebuys=ledger.rebuys if ledger else 0,
+            )
+        )
+    PlayerTournamentAnalytics.objects.bulk_create(summaries, batch_size=1000)
+
+    # Head-to-head counts, keyed by (eliminator user, eliminated user, tournament).
+    counts = {}
+    eliminations = TournamentElimination.objects.exclude(
+        eliminatee__tournament__completed_at=None
+    ).values_list('eliminator__user_id', 'eliminatee__user_id', 'eliminatee__tournament_id')
+    for key in eliminations:
+        counts[key] = counts.get(key, Decimal(0)) + 1
+    split_eliminations = TournamentSplitElimination.objects.exclude(
+        eliminatee__tournament__completed_at=None
+    ).select_related('eliminatee').prefetch_related('eliminators')
+    for split_elimination in split_eliminations:
+        eliminators = split_elimination.eliminators.all()
+        for eliminator in eliminators:
+            key = (eliminator.user_id, split_elimination.eliminatee.user_id, split_elimination.eliminatee.tournament_id)
+            counts[key] = counts.get(key, Decimal(0)) + round(Decimal(1.00 / len(eliminators)), 2)
+    PlayerEliminationAnalytics.objects.bulk_create(
+        [
+            PlayerEliminationAnalytics(
+                user_id=user_id,
+                eliminated_user_id=eliminated_user_id,
+                tournament_id=tournament_id,
+                eliminations=count,
+            ) for (user_id, eliminated_user_id, tournament_id), count in counts.items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament', '0021_usertournamentresultsversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tournament_analytics', '0004_tournamenttotals_results_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerTournamentAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tournament_title', models.CharField(max_length=254)),
+                ('completed_at', models.DateTimeField()),
+                ('placement', models.IntegerField(blank=True, null=True)),
+                ('gross_earnings', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=9)),
+                ('net_earnings', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=9)),
+                ('investment', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=9)),
+                ('eliminations', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=9)),
+                ('rebuys', models.IntegerField(default=0)),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournament.tournament')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlayerEliminationAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('eliminations', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=9)),
+                ('eliminated_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eliminated_by_analytics', to=settings.AUTH_USER_MODEL)),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournament.tournament')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='elimination_analytics', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='playertournamentanalytics',
+            index=models.Index(fields=['user', 'completed_at'], name='tournament__user_id_a501fe_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='playertournamentanalytics',
+            constraint=models.UniqueConstraint(fields=('user', 'tournament'), name='unique_player_tournament_analytics'),
+        ),
+        migrations.AddIndex(
+            model_name='playereliminationanalytics',
+            index=models.Index(fields=['user', 'eliminated_user'], name='tournament__user_id_9ad6b2_idx'),
+        ),
+        migrations.RunPython(build_player_analytics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-17 06:24
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def build_split_eliminations(apps, schema_editor):
+    TournamentSplitElimination = apps.get_model('tournament', 'TournamentSplitElimination')
+    PlayerEliminationAnalytics = apps.get_model('tournament_analytics', 'PlayerEliminationAnalytics')
+
+    # Split elimination fractions, keyed by (eliminator user, eliminated user, tournament). Rounded the same way as
+    # PlayerEliminationAnalytics.eliminations.
+    counts = {}
+    split_eliminations = TournamentSplitElimination.objects.exclude(
+        eliminatee__tournament__completed_at=None
+    ).select_related('eliminatee').prefetch_related('eliminators')
+    for split_elimination in split_eliminations:
+        eliminators = split_elimination.eliminators.all()
+        for eliminator in eliminators:
+            key = (eliminator.user_id, split_elimination.eliminatee.user_id, split_elimination.eliminatee.tournament_id)
+            counts[key] = counts.get(key, Decimal(0)) + round(Decimal(1.00 / len(eliminators)), 2)
+
+    analytics = []
+    for row in PlayerEliminationAnalytics.objects.all():
+        key = (row.user_id, row.eliminated_user_id, row.tournament_id)
+        if key in counts:
+            row.split_eliminations = counts[key]
+            analytics.append(row)
+    PlayerEliminationAnalytics.objects.bulk_update(analytics, ['split_eliminations'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament_analytics', '0005_player_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playereliminationanalytics',
+            name='split_eliminations',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=9),
+        ),
+        migrations.RunPython(build_split_eliminations, migrations.RunPython.noop),
+    ]
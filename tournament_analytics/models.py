@@ -1,5 +1,5 @@
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
 import hashlib
 
 from tournament.models import (
@@ -7,9 +7,9 @@ from tournament.models import (
 	TournamentPlayerResult,
 	TournamentElimination,
 	TournamentSplitElimination,
-	TournamentRebuy,
-	TournamentPlayer
+	UserTournamentResultsVersion
 )
+from tournament.util import get_or_create_head_to_head_data, get_split_elimination_fraction
 from user.models import User
 
 class TournamentTotalsManager(models.Manager):
@@ -28,114 +28,155 @@ class TournamentTotalsManager(models.Manager):
 		return hex_dig
 
 	"""
-	return True if TournamentTotals needs to be rebuilt for this user.
+	Builds the hash for every prefix of 'tournaments'. The hash at index i is the same as
+	build_hash(tournaments[:i + 1]).
+	"""
+	def build_prefix_hashes(self, tournaments):
+		hashes = []
+		hash_object = hashlib.sha1()
+		for tournament in tournaments:
+			hash_object.update(f"{tournament.id}+{tournament.completed_at}".encode())
+			hashes.append(hash_object.copy().hexdigest())
+		return hashes
 
-	return False if they do not need rebuilding.
 	"""
-	def do_tournament_totals_need_rebuild(self, user):
-		players = TournamentPlayer.objects.get_all_tournament_players_by_user_id(user.id).exclude(tournament__completed_at=None)
-		tournaments = [player.tournament for player in players]
+	All the completed Tournaments this user has participated in, ordered from first completed -> last completed.
+	"""
+	def get_participated_tournaments(self, user):
+		tournaments = Tournament.objects.filter(
+			tournamentplayer__user = user
+		).exclude(completed_at = None).order_by("completed_at", "id")
+		return list(tournaments)
 
-		# They haven't participated in any tournaments. No need to build anything.
-		if len(tournaments) == 0:
-			return False
+	"""
+	return True if TournamentTotals needs to be rebuilt for this user.
 
-		# Get the TournamentTotals for this user.
-		tournament_totals = self.get_tournament_totals_for_user(user).order_by("timestamp")
+	return False if they do not need rebuilding.
 
-		# If they have existing TournamentTotals
-		if len(tournament_totals) != 0:
-			# Check to see if the hash has changed on the newest one.
-			newest_totals = tournament_totals[len(tournament_totals) - 1]
-			current_hash = newest_totals.rebuild_hash
-			new_hash = self.build_hash(tournaments)
-			# The hash is the same, do not rebuild the TournamentTotals.
-			if current_hash == new_hash:
-				return False
-		# If the newest hash has changed, the tournaments this user has participated in have changed.
-		return True
+	The newest TournamentTotals stores the UserTournamentResultsVersion it was built from. If they match, nothing
+	has changed since.
+	"""
+	def do_tournament_totals_need_rebuild(self, user):
+		newest_totals = self.get_tournament_totals_for_user(user).order_by("timestamp", "tournaments_played").last()
+		if newest_totals == None:
+			# Only needs building if they have completed a tournament.
+			return Tournament.objects.filter(tournamentplayer__user = user).exclude(completed_at = None).exists()
+		return newest_totals.results_version != UserTournamentResultsVersion.objects.get_version(user.id)
 
 	"""
-	Determine if a new TournamentTotals needs to be built for the given user.
-	If it does not, return the existing ones.
+	Determine if new TournamentTotals need to be built for the given user.
+	If they do not, return the existing ones.
 	"""
 	def get_or_build_tournament_totals_by_user_id(self, user_id):
+		results_version = UserTournamentResultsVersion.objects.get_version(user_id)
+		tournament_totals = list(super().get_queryset().filter(user_id=user_id).order_by("timestamp", "tournaments_played"))
+		if len(tournament_totals) > 0 and tournament_totals[len(tournament_totals) - 1].results_version == results_version:
+			return tournament_totals
 		user = User.objects.get_by_id(user_id)
+		return self.update_tournament_totals_for_user(user, results_version)
 
-		# Get the existing TournamentTotals.
-		tournament_totals = self.get_tournament_totals_for_user(user)
+	"""
+	Bring the TournamentTotals for a user up to date and return all of them, ordered by timestamp.
 
-		if not self.do_tournament_totals_need_rebuild(user):
+	1. Nothing changed: The hash of the newest TournamentTotals matches. Return the existing totals.
+	2. New tournaments were completed after the newest TournamentTotals: The hash of the newest TournamentTotals
+		matches the tournaments it covers. Only the new tournaments are added, as a running sum starting from the
+		newest TournamentTotals.
+	3. History changed (a tournament was undone, re-completed, etc): Rebuild everything in a single pass.
+
+	Every TournamentTotals is stamped with 'results_version' (the UserTournamentResultsVersion it is now up to date with).
+	Read it before calling this so a change that happens while building results in another rebuild.
+	"""
+	def update_tournament_totals_for_user(self, user, results_version):
+		tournaments = self.get_participated_tournaments(user)
+		tournament_totals = list(self.get_tournament_totals_for_user(user).order_by("timestamp", "tournaments_played"))
+
+		if len(tournament_totals) > 0 and len(tournaments) > 0:
+			newest_totals = tournament_totals[len(tournament_totals) - 1]
+			num_tournaments = newest_totals.tournaments_played
+			if num_tournaments <= len(tournaments) and self.build_hash(tournaments[:num_tournaments]) == newest_totals.rebuild_hash:
+				new_tournament_totals = self.build_running_tournament_totals(
+					user = user,
+					tournaments = tournaments,
+					start_index = num_tournaments,
+					previous_totals = newest_totals,
+					results_version = results_version
+				)
+				with transaction.atomic(using=self._db):
+					self.get_tournament_totals_for_user(user).update(results_version = results_version)
+					self.bulk_create(new_tournament_totals)
+				for totals in tournament_totals:
+					totals.results_version = results_version
+				return tournament_totals + new_tournament_totals
+
+		if len(tournament_totals) == 0 and len(tournaments) == 0:
 			return tournament_totals
 
-		# If you get this far, TournamentTotals needs to be re-built.
-		return self.generate_tournament_totals_retroactively_for_user(user=user)
+		return self.generate_tournament_totals_retroactively_for_user(
+			user = user,
+			results_version = results_version
+		)
 
 	"""
-	Build a new TournamentTotals object for the given user.
-
-	This will build a single TournamentTotals object for all tournaments up to and including the 'tournament' passed as an argument.
+	Build (but do not save) a TournamentTotals for each of tournaments[start_index:]. Each one is a running sum of
+	all the tournaments up to and including it.
 
-	WARNING: This should only ever be invoked in two scenarios:
-	1. You are completely resetting tournament totals for a user.
-	2. A users tournament data has changed (there is a new hash), so the data needs to be regenerated.
+	tournaments: Every completed Tournament the user participated in, ordered by completed_at.
+	previous_totals: The TournamentTotals for tournaments[start_index - 1]. None if start_index is 0.
+	results_version: The UserTournamentResultsVersion these are built from. None if unknown.
 	"""
-	def build_tournament_totals_for_timestamp(self, user, participated_tournaments, end_at_tournament):
-		tournaments = []
-		for tournament in participated_tournaments:
-			if tournament.completed_at <= end_at_tournament.completed_at:
-				tournaments.append(tournament)
+	def build_running_tournament_totals(self, user, tournaments, start_index, previous_totals, results_version=None):
+		new_tournaments = tournaments[start_index:]
+		if len(new_tournaments) == 0:
+			return []
 
-		new_hash = self.build_hash(tournaments)
+		# Load the PlayerTournamentAnalytics for every new tournament at once.
+		summaries = PlayerTournamentAnalytics.objects.filter(
+			user = user,
+			tournament__in = new_tournaments
+		)
+		summaries_by_tournament_id = {summary.tournament_id: summary for summary in summaries}
 
-		tournaments_played = len(tournaments)
+		hashes = self.build_prefix_hashes(tournaments)
 
 		gross_earnings = Decimal(0.00)
 		net_earnings = Decimal(0.00)
 		losses = Decimal(0.00)
 		eliminations_count = Decimal(0.00)
 		rebuy_count = 0
+		if previous_totals != None:
+			gross_earnings = previous_totals.gross_earnings
+			net_earnings = previous_totals.net_earnings
+			losses = previous_totals.losses
+			eliminations_count = previous_totals.eliminations
+			rebuy_count = previous_totals.rebuys
 
-		for tournament in tournaments:
-			# This should return a queryset of length 1
-			result = TournamentPlayerResult.objects.get_results_for_user_by_tournament(
-				tournament_id = tournament.id,
-				user_id = user.id
-			)[0]
-			gross_earnings += round(result.gross_earnings, 2)
-			net_earnings += round(result.net_earnings, 2)
-			losses += round(result.investment, 2)
-			eliminations = TournamentElimination.objects.get_eliminations_by_eliminator(
-				player_id = result.player.id
-			)
-			eliminations_count += len(eliminations)
-			split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_eliminator(
-				player_id = result.player.id
-			)
-			for split_elimination in split_eliminations:
-				eliminator_count = len(split_elimination.eliminators.all())
-				eliminations_count += round(Decimal((1.00 / eliminator_count)), 2)
-			rebuys = TournamentRebuy.objects.get_rebuys_for_player(
-				player = result.player
+		tournament_totals = []
+		for i, tournament in enumerate(new_tournaments):
+			summary = summaries_by_tournament_id.get(tournament.id)
+			if summary != None:
+				gross_earnings += round(summary.gross_earnings, 2)
+				net_earnings += round(summary.net_earnings, 2)
+				losses += round(summary.investment, 2)
+				eliminations_count += summary.eliminations
+				rebuy_count += summary.rebuys
+			tournament_totals.append(
+				self.model(
+					user = user,
+					rebuild_hash = hashes[start_index + i],
+					tournaments_played = start_index + i + 1,
+					gross_earnings = gross_earnings,
+					net_earnings = net_earnings,
+					losses = losses,
+					eliminations = eliminations_count,
+					rebuys = rebuy_count,
+					results_version = results_version,
+					# override the timestamp since this is retroactive
+					timestamp = tournament.completed_at
+				)
 			)
-			rebuy_count += len(rebuys)
-
-		tournament_totals = self.model(
-			user = user,
-			rebuild_hash = new_hash,
-			tournaments_played = tournaments_played,
-			gross_earnings = gross_earnings,
-			net_earnings = net_earnings,
-			losses = losses,
-			eliminations = eliminations_count,
-			rebuys = rebuy_count,
-			# override the timestamp since this is retroactive
-			timestamp = end_at_tournament.completed_at
-		)
-		tournament_totals.save(using=self._db)
 		return tournament_totals
 
-
 	def get_tournament_totals_for_user(self, user):
 		tournament_totals = super().get_queryset().filter(user=user)
 		return tournament_totals
@@ -143,27 +184,23 @@ class TournamentTotalsManager(models.Manager):
 	"""
 	Generate TournamentTotals data retroactively for a user.
 
-	This is a very heavy operation. It's essentially a "reset" for all TournamentTotals data for a given user.
+	This is essentially a "reset" for all TournamentTotals data for a given user. The totals are built in a single
+	pass over the tournaments they participated in.
 	"""
-	def generate_tournament_totals_retroactively_for_user(self, user):
-		# Delete existing totals.
-		existing_tournament_totals = TournamentTotals.objects.get_tournament_totals_for_user(user)
-		for total in existing_tournament_totals:
-			total.delete()
-
-		players = TournamentPlayer.objects.get_all_tournament_players_by_user_id(user.id).exclude(tournament__completed_at=None)
-		participated_tournaments = [player.tournament for player in players]
-		participated_tournaments = sorted(participated_tournaments, key=lambda x: x.completed_at, reverse=False)
+	def generate_tournament_totals_retroactively_for_user(self, user, results_version=None):
+		with transaction.atomic(using=self._db):
+			# Delete existing totals.
+			self.get_tournament_totals_for_user(user).delete()
 
-		tournament_totals = []
-		for tournament in participated_tournaments:
-			# Generate new totals retroactively.
-			tournament_total = self.build_tournament_totals_for_timestamp(
+			participated_tournaments = self.get_participated_tournaments(user)
+			tournament_totals = self.build_running_tournament_totals(
 				user = user,
-				participated_tournaments = participated_tournaments,
-				end_at_tournament = tournament
+				tournaments = participated_tournaments,
+				start_index = 0,
+				previous_totals = None,
+				results_version = results_version
 			)
-			tournament_totals.append(tournament_total)
+			self.bulk_create(tournament_totals)
 		return tournament_totals
 	
 
@@ -173,6 +210,9 @@ Summary of all the tournaments a particular user has played in.
 rebuild_hash: A has generated from the tournament ids and tournament completed at date. So if a user participates in a new tournament or 
 the tournment data has changed, a new hash will be generated which will result in new TournamentTotals data for this user. 
 Essentially the has is a mechanism to prevent unnecessary rebuilding.
+
+results_version: The UserTournamentResultsVersion these totals were built from. Checking this is how we know if the
+totals are up to date without loading the users tournaments.
 """
 class TournamentTotals(models.Model):
 	user					= models.ForeignKey(User, on_delete=models.CASCADE)
@@ -184,6 +224,7 @@ class TournamentTotals(models.Model):
 	eliminations			= models.DecimalField(max_digits=9, decimal_places=2, blank=True, null=True, default=Decimal(0.00))
 	rebuys					= models.IntegerField(blank=True, null=True, default=0)
 	timestamp				= models.DateTimeField(auto_now_add=False, null=False, blank=False)
+	results_version			= models.PositiveIntegerField(blank=True, null=True)
 
 	objects = TournamentTotalsManager()
 
@@ -200,15 +241,222 @@ class TournamentTotals(models.Model):
 		"""
 
 
+class PlayerTournamentAnalyticsManager(models.Manager):
+
+	"""
+	Build the PlayerTournamentAnalytics for a Tournament's TournamentPlayerResults in memory. Nothing is saved.
+
+	ledgers: dict of the TournamentPlayerLedgers keyed by TournamentPlayer id.
+	"""
+	def build_analytics(self, results, ledgers):
+		summaries = []
+		for result in results:
+			ledger = ledgers[result.player_id]
+			summaries.append(
+				self.model(
+					user_id = result.player.user_id,
+					tournament_id = result.tournament_id,
+					tournament_title = result.tournament.title,
+					completed_at = result.tournament.completed_at,
+					placement = result.placement,
+					gross_earnings = result.gross_earnings,
+					net_earnings = result.net_earnings,
+					investment = result.investment,
+					eliminations = ledger.eliminations + ledger.split_eliminations,
+					rebuys = ledger.rebuys
+				)
+			)
+		return summaries
+
+	"""
+	Build the PlayerTournamentAnalytics and PlayerEliminationAnalytics for a completed Tournament. Anything that
+	already exists for the tournament is replaced.
+	"""
+	def build_for_tournament(self, tournament_id):
+		results = list(
+			TournamentPlayerResult.objects.filter(
+				tournament_id = tournament_id
+			).select_related("tournament", "player__ledger")
+		)
+		summaries = self.build_analytics(
+			results = results,
+			ledgers = {result.player_id: result.player.get_ledger() for result in results}
+		)
+		with transaction.atomic(using=self._db):
+			self.delete_for_tournament(tournament_id)
+			self.bulk_create(summaries)
+			PlayerEliminationAnalytics.objects.build_for_tournament(tournament_id)
+		return summaries
+
+	def delete_for_tournament(self, tournament_id):
+		super().get_queryset().filter(tournament_id=tournament_id).delete()
+		PlayerEliminationAnalytics.objects.filter(tournament_id=tournament_id).delete()
+
+	"""
+	The PlayerTournamentAnalytics for every completed tournament the user played in, ordered from oldest to newest.
+	"""
+	def get_for_user(self, user_id):
+		return super().get_queryset().filter(user_id=user_id).order_by("completed_at", "tournament_id")
+
+"""
+Read model: A summary of how a user did in a single completed Tournament. Built from the TournamentPlayerResult and
+TournamentPlayerLedger when the tournament is completed and deleted when the completion is undone.
+
+eliminations: Includes the fractions from split eliminations.
+"""
+class PlayerTournamentAnalytics(models.Model):
+	user					= models.ForeignKey(User, on_delete=models.CASCADE)
+	tournament				= models.ForeignKey(Tournament, on_delete=models.CASCADE)
+	tournament_title		= models.CharField(max_length=254)
+	completed_at			= models.DateTimeField()
+	placement				= models.IntegerField(blank=True, null=True)
+	gross_earnings			= models.DecimalField(max_digits=9, decimal_places=2, default=Decimal(0.00))
+	net_earnings			= models.DecimalField(max_digits=9, decimal_places=2, default=Decimal(0.00))
+	investment				= models.DecimalField(max_digits=9, decimal_places=2, default=Decimal(0.00))
+	eliminations			= models.DecimalField(max_digits=9, decimal_places=2, default=Decimal(0.00))
+	rebuys					= models.IntegerField(default=0)
+
+	objects = PlayerTournamentAnalyticsManager()
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["user", "tournament"], name="unique_player_tournament_analytics"),
+		]
+		indexes = [
+			models.Index(fields=["user", "completed_at"]),
+		]
+
+	def __str__(self):
+		return f"{self.user.username}: {self.tournament_title}"
 
 
+class PlayerEliminationAnalyticsManager(models.Manager):
 
+	"""
+	Build the head-to-head elimination counts for a Tournament in memory. Nothing is saved. A split elimination counts
+	as a fraction for each eliminator (see get_split_elimination_fraction), which is also added to split_eliminations.
 
+	eliminations: iterable of (eliminator user id, eliminatee user id, count).
+	split_eliminations: iterable of ([eliminator user ids], eliminatee user id).
+	"""
+	def build_analytics(self, tournament_id, eliminations, split_eliminations):
+		counts = {}
+		split_counts = {}
+		for eliminator_user_id, eliminatee_user_id, count in eliminations:
+			key = (eliminator_user_id, eliminatee_user_id)
+			counts[key] = counts.get(key, Decimal(0)) + count
+		for eliminator_user_ids, eliminatee_user_id in split_eliminations:
+			fraction = get_split_elimination_fraction(len(eliminator_user_ids))
+			for eliminator_user_id in eliminator_user_ids:
+				key = (eliminator_user_id, eliminatee_user_id)
+				counts[key] = counts.get(key, Decimal(0)) + fraction
+				split_counts[key] = split_counts.get(key, Decimal(0)) + fraction
+		return [
+			self.model(
+				user_id = user_id,
+				eliminated_user_id = eliminated_user_id,
+				tournament_id = tournament_id,
+				eliminations = count,
+				split_eliminations = split_counts.get((user_id, eliminated_user_id), Decimal(0))
+			) for (user_id, eliminated_user_id), count in counts.items()
+		]
 
+	"""
+	Build the head-to-head elimination counts for a Tournament (see build_analytics).
+	"""
+	def build_for_tournament(self, tournament_id):
+		eliminations = TournamentElimination.objects.filter(
+			eliminatee__tournament_id = tournament_id
+		).values("eliminator__user_id", "eliminatee__user_id").annotate(
+			count = models.Count("id")
+		).values_list("eliminator__user_id", "eliminatee__user_id", "count")
+
+		# {split elimination id: ([eliminator user ids], eliminatee user id)}
+		split_eliminations = {
+			split_elimination_id: ([], eliminatee_user_id)
+			for split_elimination_id, eliminatee_user_id in TournamentSplitElimination.objects.filter(
+				eliminatee__tournament_id = tournament_id
+			).values_list("id", "eliminatee__user_id")
+		}
+		eliminators = TournamentSplitElimination.eliminators.through.objects.filter(
+			tournamentsplitelimination_id__in = split_eliminations.keys()
+		).values_list("tournamentsplitelimination_id", "tournamentplayer__user_id")
+		for split_elimination_id, user_id in eliminators:
+			split_eliminations[split_elimination_id][0].append(user_id)
+
+		self.bulk_create(
+			self.build_analytics(
+				tournament_id = tournament_id,
+				eliminations = eliminations,
+				split_eliminations = split_eliminations.values()
+			)
+		)
+
+	"""
+	How many times 'user_id' eliminated each user, across every tournament. Returns a queryset of dicts:
+	{'eliminated_user__username': <username>, 'eliminations': <Decimal>}
+	"""
+	def get_eliminations_by_eliminated_user(self, user_id):
+		return super().get_queryset().filter(
+			user_id = user_id
+		).values("eliminated_user__username").annotate(
+			eliminations = models.Sum("eliminations")
+		)
 
+	"""
+	Head-to-head elimination matrix for a user across every completed tournament: who they eliminated and who
+	eliminated them. Returns a list of HeadToHeadEliminationData, like
+	TournamentEliminationManager.build_head_to_head_data. One GROUP BY query over the read model.
+	"""
+	def get_head_to_head_data_for_user(self, user_id):
+		rows = super().get_queryset().filter(
+			models.Q(user_id = user_id) | models.Q(eliminated_user_id = user_id)
+		).values(
+			"user_id",
+			"user__username",
+			"eliminated_user_id",
+			"eliminated_user__username"
+		).annotate(
+			eliminations = models.Sum("eliminations"),
+			split_eliminations = models.Sum("split_eliminations")
+		).order_by()
+		head_to_head = {}
+		for row in rows:
+			data = get_or_create_head_to_head_data(
+				head_to_head = head_to_head,
+				eliminator_user_id = row['user_id'],
+				eliminator_username = row['user__username'],
+				eliminatee_user_id = row['eliminated_user_id'],
+				eliminatee_username = row['eliminated_user__username']
+			)
+			data.eliminations = int(row['eliminations'] - row['split_eliminations'])
+			data.split_eliminations = float(row['split_eliminations'])
+		return sorted(
+			head_to_head.values(),
+			key = lambda x: (x.eliminator_username, x.eliminatee_username)
+		)
 
+"""
+Read model: How many times 'user' eliminated 'eliminated_user' in 'tournament'. Fractional if there were split
+eliminations.
 
+eliminations: Whole eliminations plus the fractions from split eliminations.
+split_eliminations: The part of 'eliminations' that came from split eliminations.
+"""
+class PlayerEliminationAnalytics(models.Model):
+	user					= models.ForeignKey(User, related_name="elimination_analytics", on_delete=models.CASCADE)
+	eliminated_user			= models.ForeignKey(User, related_name="eliminated_by_analytics", on_delete=models.CASCADE)
+	tournament				= models.ForeignKey(Tournament, on_delete=models.CASCADE)
+	eliminations			= models.DecimalField(max_digits=9, decimal_places=2, default=Decimal(0.00))
+	split_eliminations		= models.DecimalField(max_digits=9, decimal_places=2, default=Decimal(0.00))
 
+	objects = PlayerEliminationAnalyticsManager()
 
+	class Meta:
+		indexes = [
+			models.Index(fields=["user", "eliminated_user"]),
+		]
 
+	def __str__(self):
+		return f"{self.user.username} eliminated {self.eliminated_user.username} {self.eliminations} time(s)"
 
@@ -0,0 +1,15 @@
+from django.dispatch import receiver
+
+from tournament.signals import tournament_completed, tournament_completion_undone
+from tournament_analytics.models import PlayerTournamentAnalytics
+
+"""
+Keep the analytics read models in sync with completed tournaments.
+"""
+@receiver(tournament_completed)
+def build_player_analytics(sender, tournament_id, **kwargs):
+	PlayerTournamentAnalytics.objects.build_for_tournament(tournament_id)
+
+@receiver(tournament_completion_undone)
+def delete_player_analytics(sender, tournament_id, **kwargs):
+	PlayerTournamentAnalytics.objects.delete_for_tournament(tournament_id)
@@ -0,0 +1,8 @@
+from task_queue.util import register_task
+
+from tournament.util import REFRESH_TOURNAMENT_TOTALS_TASK
+from tournament_analytics.models import TournamentTotals
+
+@register_task(REFRESH_TOURNAMENT_TOTALS_TASK)
+def refresh_tournament_totals(user_id):
+	TournamentTotals.objects.get_or_build_tournament_totals_by_user_id(user_id)
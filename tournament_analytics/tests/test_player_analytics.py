@@ -0,0 +1,244 @@
+from decimal import Decimal
+import json
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tournament.models import (
+	Tournament,
+	TournamentElimination,
+	TournamentPlayer,
+	TournamentPlayerResult,
+	TournamentSplitElimination
+)
+from tournament.test_util import (
+	build_tournament,
+	build_structure,
+	add_players_to_tournament
+)
+
+from tournament_analytics.models import (
+	PlayerEliminationAnalytics,
+	PlayerTournamentAnalytics
+)
+from tournament_group.models import TournamentGroup
+
+from user.models import User
+from user.test_util import create_users
+
+
+class PlayerAnalyticsTestCase(TransactionTestCase):
+
+	# Reset primary keys after each test function run
+	reset_sequences = True
+
+	def setUp(self):
+		# Build some users for the tests
+		users = create_users(
+			identifiers = ["cat", "dog", "monkey", "bird"]
+		)
+
+		self.structure = build_structure(
+			admin = users[0], # Cat is admin
+			buyin_amount = 100,
+			bounty_amount = 10,
+			payout_percentages = (100,),
+			allow_rebuys = False
+		)
+
+	"""
+	Build and complete a tournament with cat, dog, monkey and bird.
+	1. Cat, dog and monkey split the elimination of bird.
+	2. Cat eliminates dog.
+	3. Cat eliminates monkey.
+	"""
+	def build_completed_tournament(self):
+		cat = User.objects.get_by_username("cat")
+		tournament = build_tournament(self.structure)
+		add_players_to_tournament(
+			users = User.objects.all(),
+			tournament = tournament
+		)
+		players = TournamentPlayer.objects.get_tournament_players(tournament_id = tournament.id)
+		cat_player = players.get(user__username = "cat")
+		dog_player = players.get(user__username = "dog")
+		monkey_player = players.get(user__username = "monkey")
+		bird_player = players.get(user__username = "bird")
+		Tournament.objects.start_tournament(user = cat, tournament_id = tournament.id)
+		TournamentSplitElimination.objects.create_split_elimination(
+			tournament_id = tournament.id,
+			eliminator_ids = [cat_player.id, dog_player.id, monkey_player.id],
+			eliminatee_id = bird_player.id
+		)
+		for player in [dog_player, monkey_player]:
+			TournamentElimination.objects.create_elimination(
+				tournament_id = tournament.id,
+				eliminator_id = cat_player.id,
+				eliminatee_id = player.id
+			)
+		return Tournament.objects.complete_tournament(user = cat, tournament_id = tournament.id)
+
+	"""
+	Completing a tournament builds the read model. Undoing the completion deletes it.
+	"""
+	def test_read_model_follows_completion_and_undo(self):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		bird = User.objects.get_by_username("bird")
+		tournament = self.build_completed_tournament()
+
+		self.assertEqual(PlayerTournamentAnalytics.objects.filter(tournament = tournament).count(), 4)
+		for result in TournamentPlayerResult.objects.get_results_for_tournament(tournament.id):
+			summary = PlayerTournamentAnalytics.objects.get(user = result.player.user, tournament = tournament)
+			self.assertEqual(summary.net_earnings, result.net_earnings)
+			self.assertEqual(summary.gross_earnings, result.gross_earnings)
+			self.assertEqual(summary.investment, result.investment)
+			self.assertEqual(summary.placement, result.placement)
+			self.assertEqual(summary.completed_at, tournament.completed_at)
+			self.assertEqual(summary.tournament_title, tournament.title)
+		self.assertEqual(
+			PlayerTournamentAnalytics.objects.get(user = cat, tournament = tournament).eliminations,
+			round(Decimal(2.33), 2)
+		)
+
+		# Head-to-head
+		head_to_head = {
+			item['eliminated_user__username']: item['eliminations']
+			for item in PlayerEliminationAnalytics.objects.get_eliminations_by_eliminated_user(cat.id)
+		}
+		self.assertEqual(head_to_head, {
+			"dog": Decimal(1),
+			"monkey": Decimal(1),
+			"bird": round(Decimal(0.33), 2),
+		})
+		head_to_head = {
+			item['eliminated_user__username']: item['eliminations']
+			for item in PlayerEliminationAnalytics.objects.get_eliminations_by_eliminated_user(dog.id)
+		}
+		self.assertEqual(head_to_head, {"bird": round(Decimal(0.33), 2)})
+		self.assertEqual(PlayerEliminationAnalytics.objects.filter(user = bird).count(), 0)
+
+		Tournament.objects.undo_complete_tournament(user = cat, tournament_id = tournament.id)
+		self.assertEqual(PlayerTournamentAnalytics.objects.filter(tournament = tournament).count(), 0)
+		self.assertEqual(PlayerEliminationAnalytics.objects.filter(tournament = tournament).count(), 0)
+
+	"""
+	Each endpoint is served with a single query on the read model, no matter how many tournaments were played.
+	"""
+	def test_endpoints_are_served_from_read_model(self):
+		cat = User.objects.get_by_username("cat")
+		self.client.force_login(cat)
+		for i in range(0, 2):
+			self.build_completed_tournament()
+
+		urls = [
+			reverse("tournament_analytics:fetch_tournament_player_results_data", kwargs={'user_id': cat.id}),
+			reverse("tournament_analytics:fetch_tournament_player_eliminations_data", kwargs={'user_id': cat.id}),
+			reverse("tournament_analytics:fetch_tournament_eliminations_and_rebuys_data", kwargs={'user_id': cat.id}),
+		]
+		num_queries = {}
+		for url in urls:
+			with CaptureQueriesContext(connection) as context:
+				response = self.client.get(url)
+			self.assertEqual(response.status_code, 200)
+			self.assertNotIn('error', response.json())
+			num_queries[url] = len(context.captured_queries)
+
+		data = self.client.get(urls[0]).json()
+		results = json.loads(data['tournament_player_results'])
+		self.assertEqual(len(results), 2)
+		for result in results.values():
+			self.assertEqual(result['eliminations'], "2.33")
+			self.assertEqual(result['placement'], 0)
+
+		data = self.client.get(urls[1]).json()
+		eliminations = json.loads(data['eliminations'])
+		self.assertEqual(
+			{item['username']: item['count'] for item in eliminations},
+			{"dog": 2.0, "monkey": 2.0, "bird": 0.66}
+		)
+
+		data = self.client.get(urls[2]).json()
+		self.assertEqual(len(json.loads(data['rebuys_and_eliminations'])), 2)
+
+		# More tournaments. Same number of queries.
+		self.build_completed_tournament()
+		for url in urls:
+			with CaptureQueriesContext(connection) as context:
+				response = self.client.get(url)
+			self.assertEqual(response.status_code, 200)
+			self.assertNotIn('error', response.json())
+			self.assertEqual(len(context.captured_queries), num_queries[url])
+
+	"""
+	The head-to-head endpoint returns who the user eliminated and who eliminated them, with split eliminations
+	summed as fractions.
+	"""
+	def test_head_to_head_data_for_user(self):
+		dog = User.objects.get_by_username("dog")
+		self.client.force_login(dog)
+		for i in range(0, 3):
+			self.build_completed_tournament()
+
+		url = reverse("tournament_analytics:fetch_head_to_head_data", kwargs={'user_id': dog.id})
+		with CaptureQueriesContext(connection) as context:
+			data = self.client.get(url).json()
+		num_queries = len(context.captured_queries)
+		head_to_head = {
+			(item['eliminator_username'], item['eliminatee_username']): (item['eliminations'], item['split_eliminations'])
+			for item in json.loads(data['head_to_head'])
+		}
+		# Each split elimination is 0.33, rounded like the ledgers.
+		self.assertEqual(head_to_head, {
+			("cat", "dog"): (3, 0.0),
+			("dog", "bird"): (0, 0.99),
+		})
+
+		# More tournaments. Same number of queries.
+		self.build_completed_tournament()
+		with CaptureQueriesContext(connection) as context:
+			self.client.get(url)
+		self.assertEqual(len(context.captured_queries), num_queries)
+
+	"""
+	Split eliminations are counted with the same rounded fraction everywhere, so the head-to-head matrices add up to
+	the same eliminations as the ledgers, the read models and the group eliminations chart.
+	"""
+	def test_head_to_head_data_matches_eliminations(self):
+		cat = User.objects.get_by_username("cat")
+		tournaments = [self.build_completed_tournament() for i in range(0, 3)]
+		group = TournamentGroup.objects.create_tournament_group(
+			admin = cat,
+			title = "Cat's tournament group"
+		)
+		TournamentGroup.objects.add_users_to_group(
+			admin = cat,
+			group = group,
+			users = list(User.objects.exclude(id = cat.id))
+		)
+		TournamentGroup.objects.add_tournaments_to_group(
+			admin = cat,
+			group = group,
+			tournaments = tournaments
+		)
+		group_data = TournamentGroup.objects.build_group_data(group)
+
+		for user in User.objects.all():
+			summaries = PlayerTournamentAnalytics.objects.get_for_user(user.id)
+			expected = sum(summary.eliminations for summary in summaries)
+			group_eliminations = [item.eliminations for item in group_data.eliminations_and_rebuys if item.username == user.username][0]
+			self.assertEqual(Decimal(str(group_eliminations)), expected)
+			for head_to_head in [
+				group_data.head_to_head,
+				PlayerEliminationAnalytics.objects.get_head_to_head_data_for_user(user.id)
+			]:
+				eliminations = sum(
+					Decimal(item.eliminations) + Decimal(str(item.split_eliminations))
+					for item in head_to_head if item.eliminator_username == user.username
+				)
+				self.assertEqual(eliminations, expected, user.username)
+		self.assertEqual(
+			sum(summary.eliminations for summary in PlayerTournamentAnalytics.objects.get_for_user(cat.id)),
+			round(Decimal(3 * 2.33), 2)
+		)
@@ -1,6 +1,8 @@
 from decimal import Decimal
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from tournament.models import (
@@ -12,7 +14,8 @@ from tournament.models import (
 	TournamentPlayer,
 	TournamentState,
 	TournamentRebuy,
-	TournamentSplitElimination
+	TournamentSplitElimination,
+	UserTournamentResultsVersion
 )
 from tournament.util import (
 	PlayerTournamentPlacement,
@@ -21,7 +24,8 @@ from tournament.util import (
 from tournament.test_util import (
 	build_tournament,
 	build_structure,
-	add_players_to_tournament
+	add_players_to_tournament,
+	eliminate_players_and_complete_tournament
 )
 
 from tournament_analytics.models import (
@@ -363,7 +367,7 @@ class TournamentTotalsTestCase(TransactionTestCase):
 
 		# Second tournament
 		structure = build_structure(
-			admin = users[0], # Cat is admin
+			admin = cat,
 			buyin_amount = 115,
 			bounty_amount = 15,
 			payout_percentages = (60, 30, 10),
@@ -516,26 +520,133 @@ class TournamentTotalsTestCase(TransactionTestCase):
 					expected_rebuys_count = 6
 				)
 
+	"""
+	Build, start and complete a tournament where cat eliminates everyone.
+	"""
+	def build_and_complete_tournament(self, users):
+		cat = User.objects.get_by_username("cat")
+		structure = TournamentStructure.objects.all()[0]
+		tournament = build_tournament(structure)
+		add_players_to_tournament(
+			users = users,
+			tournament = tournament
+		)
+		Tournament.objects.start_tournament(user = cat, tournament_id = tournament.id)
+		eliminate_players_and_complete_tournament(
+			admin = cat,
+			tournament = tournament
+		)
+		return Tournament.objects.get_by_id(tournament.id)
 
+	"""
+	Completing new tournaments only appends TournamentTotals. The existing ones are kept and the new ones are a
+	running sum starting from the newest existing one.
+	"""
+	def test_new_tournaments_are_appended_to_tournament_totals(self):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		# verify_result expects every tournament to be completed. Remove the one from setUp.
+		Tournament.objects.get_by_id(1).delete()
+		for i in range(0, 3):
+			self.build_and_complete_tournament(users = [dog])
+
+		tournament_totals = TournamentTotals.objects.get_or_build_tournament_totals_by_user_id(cat.id)
+		self.assertEqual(len(tournament_totals), 3)
+		existing_ids = [totals.id for totals in tournament_totals]
+
+		# Nothing changed. Nothing is built. Only the version and the totals are queried.
+		with CaptureQueriesContext(connection) as context:
+			tournament_totals = TournamentTotals.objects.get_or_build_tournament_totals_by_user_id(cat.id)
+		self.assertEqual(len(context.captured_queries), 2)
+		self.assertEqual([totals.id for totals in tournament_totals], existing_ids)
+
+		# Complete two more tournaments.
+		for i in range(0, 2):
+			self.build_and_complete_tournament(users = [dog])
+		with CaptureQueriesContext(connection) as context:
+			tournament_totals = TournamentTotals.objects.get_or_build_tournament_totals_by_user_id(cat.id)
+		# version, totals, user, tournaments, totals, results + ledgers, stamp the version, bulk insert
+		self.assertEqual(len(context.captured_queries), 8)
+		self.assertEqual(len(tournament_totals), 5)
+		self.assertEqual(
+			list(TournamentTotals.objects.filter(id__in = existing_ids).values_list("id", flat = True).order_by("id")),
+			existing_ids
+		)
+		self.verify_result(
+			user = cat,
+			num_tournaments = 5,
+			expected_eliminations_count = round(Decimal(5), 2),
+			expected_rebuys_count = 0
+		)
+		self.verify_result(
+			user = dog,
+			num_tournaments = 5,
+			expected_eliminations_count = round(Decimal(0), 2),
+			expected_rebuys_count = 0
+		)
 
+	"""
+	If a tournament the TournamentTotals are built from changes, all the TournamentTotals are rebuilt.
+	"""
+	def test_tournament_totals_are_rebuilt_when_history_changes(self):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		monkey = User.objects.get_by_username("monkey")
+		first_tournament = self.build_and_complete_tournament(users = [dog, monkey])
+		self.build_and_complete_tournament(users = [dog])
+		self.build_and_complete_tournament(users = [dog, monkey])
+
+		tournament_totals = TournamentTotals.objects.get_or_build_tournament_totals_by_user_id(cat.id)
+		self.assertEqual(len(tournament_totals), 3)
+		self.assertEqual(tournament_totals[2].eliminations, round(Decimal(5), 2))
+
+		# Undo the first tournament. It is no longer completed.
+		Tournament.objects.undo_complete_tournament(user = cat, tournament_id = first_tournament.id)
+
+		tournament_totals = TournamentTotals.objects.get_or_build_tournament_totals_by_user_id(cat.id)
+		self.assertEqual(len(tournament_totals), 2)
+		self.assertEqual(TournamentTotals.objects.filter(user = cat).count(), 2)
+		self.assertEqual(tournament_totals[0].tournaments_played, 1)
+		self.assertEqual(tournament_totals[0].eliminations, round(Decimal(1), 2))
+		self.assertEqual(tournament_totals[1].tournaments_played, 2)
+		self.assertEqual(tournament_totals[1].eliminations, round(Decimal(3), 2))
+
+		# Rebuilding in a single pass is a constant number of queries.
+		with CaptureQueriesContext(connection) as context:
+			TournamentTotals.objects.generate_tournament_totals_retroactively_for_user(cat)
+		num_queries = len(context.captured_queries)
+		self.build_and_complete_tournament(users = [dog, monkey])
+		self.build_and_complete_tournament(users = [dog])
+		with CaptureQueriesContext(connection) as context:
+			tournament_totals = TournamentTotals.objects.generate_tournament_totals_retroactively_for_user(cat)
+		self.assertEqual(len(context.captured_queries), num_queries)
+		self.assertEqual(len(tournament_totals), 4)
 
+	"""
+	Completing and undoing a tournament changes the results version of every player in it. TournamentTotals are
+	stamped with the version they were built from.
+	"""
+	def test_tournament_totals_results_version(self):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		monkey = User.objects.get_by_username("monkey")
+		self.assertEqual(UserTournamentResultsVersion.objects.get_version(monkey.id), 0)
 
+		tournament = self.build_and_complete_tournament(users = [dog])
+		self.assertTrue(TournamentTotals.objects.do_tournament_totals_need_rebuild(cat))
+		self.assertFalse(TournamentTotals.objects.do_tournament_totals_need_rebuild(monkey))
 
+		tournament_totals = TournamentTotals.objects.get_or_build_tournament_totals_by_user_id(cat.id)
+		cat_version = UserTournamentResultsVersion.objects.get_version(cat.id)
+		self.assertEqual(tournament_totals[0].results_version, cat_version)
+		self.assertFalse(TournamentTotals.objects.do_tournament_totals_need_rebuild(cat))
 
+		# Monkey didn't play so their version didn't change.
+		self.assertEqual(UserTournamentResultsVersion.objects.get_version(monkey.id), 0)
 
+		Tournament.objects.undo_complete_tournament(user = cat, tournament_id = tournament.id)
+		self.assertEqual(UserTournamentResultsVersion.objects.get_version(cat.id), cat_version + 1)
+		self.assertTrue(TournamentTotals.objects.do_tournament_totals_need_rebuild(cat))
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+		tournament_totals = TournamentTotals.objects.get_or_build_tournament_totals_by_user_id(cat.id)
+		self.assertEqual(len(tournament_totals), 0)
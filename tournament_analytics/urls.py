@@ -1,6 +1,7 @@
 from django.urls import include, path
 
 from tournament_analytics.views import (
+	fetch_head_to_head_data,
 	fetch_tournament_totals_data,
 	fetch_tournament_player_results_data,
 	fetch_tournament_player_eliminations_data,
@@ -10,6 +11,7 @@ from tournament_analytics.views import (
 app_name = 'tournament_analytics'
 
 urlpatterns = [
+    path('fetch_head_to_head_data/<int:user_id>/', fetch_head_to_head_data, name="fetch_head_to_head_data"),
     path('fetch_tournament_totals_data/<int:user_id>/', fetch_tournament_totals_data, name="fetch_tournament_totals_data"),
     path('fetch_tournament_player_results_data/<int:user_id>/', fetch_tournament_player_results_data, name="fetch_tournament_player_results_data"),
     path('fetch_tournament_player_eliminations_data/<int:user_id>/', fetch_tournament_player_eliminations_data, name="fetch_tournament_player_eliminations_data"),
@@ -6,8 +6,8 @@ from django.http import JsonResponse
 
 
 import json
-from tournament.models import TournamentPlayer
-from tournament_analytics.models import TournamentTotals
+from tournament.util import build_json_from_head_to_head_data
+from tournament_analytics.models import PlayerEliminationAnalytics, TournamentTotals
 from tournament_analytics.util import (
 	build_json_from_tournament_totals_data,
 	build_tournament_player_result_data,
@@ -47,8 +47,7 @@ def fetch_tournament_player_results_data(request, *args, **kwargs):
 	try:
 		user_id = kwargs['user_id']
 
-		tournament_players = TournamentPlayer.objects.get_all_tournament_players_by_user_id(user_id)
-		tournament_player_results_json = build_tournament_player_result_data(tournament_players)
+		tournament_player_results_json = build_tournament_player_result_data(user_id)
 		if tournament_player_results_json:
 			context['tournament_player_results'] = tournament_player_results_json
 		else:
@@ -70,8 +69,7 @@ def fetch_tournament_player_eliminations_data(request, *args, **kwargs):
 	try:
 		user_id = kwargs['user_id']
 
-		tournament_players = TournamentPlayer.objects.get_all_tournament_players_by_user_id(user_id)
-		eliminations_json = build_player_eliminations_data(tournament_players)
+		eliminations_json = build_player_eliminations_data(user_id)
 		if eliminations_json:
 			context['eliminations'] = eliminations_json
 		else:
@@ -93,8 +91,7 @@ def fetch_tournament_eliminations_and_rebuys_data(request, *args, **kwargs):
 	try:
 		user_id = kwargs['user_id']
 
-		tournament_players = TournamentPlayer.objects.get_all_tournament_players_by_user_id(user_id)
-		rebuys_and_eliminations_json = build_rebuys_and_eliminations_data(tournament_players)
+		rebuys_and_eliminations_json = build_rebuys_and_eliminations_data(user_id)
 		if rebuys_and_eliminations_json:
 			context['rebuys_and_eliminations'] = rebuys_and_eliminations_json
 		else:
@@ -120,3 +117,22 @@ def fetch_tournament_eliminations_and_rebuys_data(request, *args, **kwargs):
 
 
 
+
+"""
+Request for retrieving the head-to-head elimination matrix for a player: who they eliminated and who eliminated them.
+"""
+@login_required
+def fetch_head_to_head_data(request, *args, **kwargs):
+	context = {}
+	try:
+		user_id = kwargs['user_id']
+
+		head_to_head_data = PlayerEliminationAnalytics.objects.get_head_to_head_data_for_user(user_id = user_id)
+		context['head_to_head'] = build_json_from_head_to_head_data(head_to_head_data)
+	except Exception as e:
+		error = {
+			'error': "Unable to retrieve head-to-head data.",
+			'message': f"{e.args[0]}"
+		}
+		return JsonResponse(error, status=200)
+	return JsonResponse(context, status=200)
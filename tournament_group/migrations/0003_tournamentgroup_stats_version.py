@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-17 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournament_group', '0002_auto_20230302_1329'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournamentgroup',
+            name='stats_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,26 +1,29 @@
 from enum import Enum
 from itertools import chain
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Count, Sum
 from django.utils import timezone
 from datetime import datetime
 import pytz
 
 from tournament.models import (
 	Tournament,
+	TournamentElimination,
 	TournamentPlayer,
 	TournamentPlayerResult,
-	TournamentState,
-	TournamentElimination,
-	TournamentSplitElimination,
-	TournamentRebuy
+	TournamentState
 )
 from tournament_group.util import (
 	TournamentGroupNetEarnings,
 	TournamentGroupPotContributions,
 	TournamentGroupEliminationsAndRebuys,
-	TournamentGroupTournamentsPlayed
+	TournamentGroupTournamentsPlayed,
+	TournamentGroupData,
+	build_tournament_group_stats_cache_key
 )
+from tournament.util import get_value_or_default
 from user.models import User
 
 class TournamentGroupManager(models.Manager):
@@ -51,6 +54,7 @@ class TournamentGroupManager(models.Manager):
 		
 		updated_group = group
 		updated_group.users.add(*users)
+		updated_group.stats_version += 1
 		updated_group.save()
 		return updated_group
 
@@ -70,6 +74,7 @@ class TournamentGroupManager(models.Manager):
 
 		updated_group = group
 		updated_group.users.remove(*[user])
+		updated_group.stats_version += 1
 		updated_group.save()
 		return updated_group
 
@@ -138,6 +143,7 @@ class TournamentGroupManager(models.Manager):
 
 		updated_group = group
 		updated_group.tournaments.add(*tournaments)
+		updated_group.stats_version += 1
 		updated_group.save()
 		return updated_group
 
@@ -151,6 +157,7 @@ class TournamentGroupManager(models.Manager):
 
 		updated_group = group
 		updated_group.tournaments.remove(*[tournament])
+		updated_group.stats_version += 1
 		updated_group.save()
 		return updated_group
 
@@ -207,99 +214,74 @@ class TournamentGroupManager(models.Manager):
 			return None
 
 	"""
-	Build a list of TournamentGroupNetEarnings for each user in the group.
-	Note: This is a heavy operation and should be done async.
+	Build every dataset for the group charts at once. Returns a TournamentGroupData.
+
+	Everything is aggregated in the database with GROUP BY queries over the group's completed tournaments and
+	users, so the number of queries does not depend on how many tournaments or users are in the group:
+	1. The users in the group.
+	2. TournamentPlayerResult totals for each user.
+	3. TournamentPlayer count and TournamentPlayerLedger totals (eliminations and rebuys) for each user.
+	4. The head-to-head elimination matrix between the users (two queries, see
+	TournamentEliminationManager.build_head_to_head_data).
 	"""
-	def build_group_net_earnings_data(self, group):
+	def build_group_data(self, group):
+		users = list(group.get_users())
+		completed_tournaments = group.tournaments.exclude(completed_at = None)
+
+		results_by_user_id = {
+			row['player__user_id']: row for row in TournamentPlayerResult.objects.filter(
+				tournament__in = completed_tournaments,
+				player__user__in = users
+			).values("player__user_id").annotate(
+				net_earnings = Sum("net_earnings"),
+				investment = Sum("investment")
+			)
+		}
+
+		players_by_user_id = {
+			row['user_id']: row for row in TournamentPlayer.objects.filter(
+				tournament__in = completed_tournaments,
+				user__in = users
+			).values("user_id").annotate(
+				num_players = Count("id"),
+				num_tournaments = Count("tournament", distinct = True),
+				eliminations = Sum("ledger__eliminations"),
+				split_eliminations = Sum("ledger__split_eliminations"),
+				rebuys = Sum("ledger__rebuys")
+			)
+		}
+
 		net_earnings_data = []
-		tournaments = group.get_tournaments()
-		for user in group.get_users():
-			net_earnings = 0
-			for tournament in tournaments:
-				if tournament.get_state() == TournamentState.COMPLETED:
-					result = TournamentPlayerResult.objects.get_results_for_user_by_tournament(
-						user_id = user.id,
-						tournament_id = tournament.id
-					)
-					if len(result) == 0:
-						continue
-					else:
-						net_earnings += result[0].net_earnings
+		pot_contributions = []
+		eliminations_and_rebuys_data = []
+		tournaments_played_data = []
+		for user in users:
+			result = results_by_user_id.get(user.id)
+			players = players_by_user_id.get(user.id)
+			if players != None and players['num_players'] != players['num_tournaments']:
+				raise ValidationError(f"According to our records {user.username} was added to a tournament more than once.")
+
 			net_earnings_data.append(
 				TournamentGroupNetEarnings(
 					username = f"{user.username}",
-					net_earnings = net_earnings
+					net_earnings = result['net_earnings'] if result != None else 0
 				)
 			)
-		return sorted(
-			net_earnings_data,
-			key = lambda x: x.net_earnings,
-			reverse = True 
-		)
-
-	"""
-	Build a list of TournamentGroupPotContributions for each user in the group.
-	Note: This is a heavy operation and should be done async.
-	"""
-	def build_group_pot_contributions_data(self, group):
-		pot_contributions = []
-		tournaments = group.get_tournaments()
-		for user in group.get_users():
-			contribution = 0
-			for tournament in tournaments:
-				if tournament.get_state() == TournamentState.COMPLETED:
-					result = TournamentPlayerResult.objects.get_results_for_user_by_tournament(
-						user_id = user.id,
-						tournament_id = tournament.id
-					)
-					if len(result) == 0:
-						continue
-					else:
-						contribution += result[0].investment
 			pot_contributions.append(
 				TournamentGroupPotContributions(
 					username = f"{user.username}",
-					contribution = contribution
+					contribution = result['investment'] if result != None else 0
 				)
 			)
-		return sorted(
-			pot_contributions,
-			key = lambda x: x.contribution,
-			reverse = True 
-		)
-
-	"""
-	Build a list of TournamentGroupEliminationsAndRebuys for each user in the group.
-	Note: This is a heavy operation and should be done async.
-	"""
-	def build_group_eliminations_and_rebuys_data(self, group):
-		eliminations_and_rebuys_data = []
-		tournaments = group.get_tournaments()
-		for user in group.get_users():
 			eliminations_count = 0.00
 			rebuys_count = 0
-			for tournament in tournaments:
-				if tournament.get_state() == TournamentState.COMPLETED:
-					players = TournamentPlayer.objects.get_all_tournament_players_by_user_id(user.id).filter(tournament = tournament)
-					if len(players) > 1:
-						raise ValidationError(f"According to our records {user.username} was added to {tournament.title} more than once.")
-					elif len(players) == 0:
-						continue
-					player = players[0]
-					eliminations = TournamentElimination.objects.get_eliminations_by_eliminator(
-						player_id = player.id
-					)
-					eliminations_count += len(eliminations)
-					split_eliminations = TournamentSplitElimination.objects.get_split_eliminations_by_eliminator(
-						player_id = player.id
-					)
-					for split_elimination in split_eliminations:
-						eliminator_count = len(split_elimination.eliminators.all())
-						eliminations_count += round((1.00 / eliminator_count), 2)
-					rebuys = TournamentRebuy.objects.get_rebuys_for_player(
-						player = player
-					)
-					rebuys_count += len(rebuys)
+			tournaments_played = 0
+			if players != None:
+				eliminations_count = float(
+					get_value_or_default(players['eliminations'], 0) + get_value_or_default(players['split_eliminations'], 0)
+				)
+				rebuys_count = get_value_or_default(players['rebuys'], 0)
+				tournaments_played = players['num_tournaments']
 			eliminations_and_rebuys_data.append(
 				TournamentGroupEliminationsAndRebuys(
 					username = f"{user.username}",
@@ -307,40 +289,42 @@ class TournamentGroupManager(models.Manager):
 					rebuys = rebuys_count
 				)
 			)
-		return sorted(
-			eliminations_and_rebuys_data,
-			key = lambda x: x.eliminations,
-			reverse = True
-		)
-
-	"""
-	Build a list of TournamentGroupTournamentsPlayed for each user in the group.
-	Note: This is a heavy operation and should be done async.
-	"""
-	def build_group_tournaments_played_data(self, group):
-		tournaments_played_data = []
-		tournaments = group.get_tournaments()
-		for user in group.get_users():
-			count = 0
-			for tournament in tournaments:
-				if tournament.get_state() == TournamentState.COMPLETED:
-					players = TournamentPlayer.objects.get_all_tournament_players_by_user_id(user.id).filter(tournament = tournament)
-					if len(players) > 1:
-						raise ValidationError(f"According to our records {user.username} was added to {tournament.title} more than once.")
-					elif len(players) == 0:
-						continue
-					count += 1
 			tournaments_played_data.append(
 				TournamentGroupTournamentsPlayed(
 					username = f"{user.username}",
-					count = count,
+					count = tournaments_played,
 				)
 			)
-		return sorted(
-			tournaments_played_data,
-			key = lambda x: x.count,
-			reverse = True
+
+		return TournamentGroupData(
+			net_earnings = sorted(net_earnings_data, key = lambda x: x.net_earnings, reverse = True),
+			pot_contributions = sorted(pot_contributions, key = lambda x: x.contribution, reverse = True),
+			eliminations_and_rebuys = sorted(eliminations_and_rebuys_data, key = lambda x: x.eliminations, reverse = True),
+			tournaments_played = sorted(tournaments_played_data, key = lambda x: x.count, reverse = True),
+			head_to_head = TournamentElimination.objects.build_head_to_head_data(
+				tournaments = completed_tournaments,
+				users = users
+			)
+		)
+
+	"""
+	Returns the TournamentGroupData for the group from the cache, building it if it's not there.
+
+	The cache key includes TournamentGroup.stats_version (changes when users, tournaments or dates change) and the
+	sum of Tournament.results_version for the tournaments in the group (changes when a tournament's results change).
+	"""
+	def get_group_stats_data(self, group):
+		results_version = group.tournaments.aggregate(results_version = Sum("results_version"))["results_version"]
+		cache_key = build_tournament_group_stats_cache_key(
+			group_id = group.id,
+			stats_version = group.stats_version,
+			results_version = get_value_or_default(results_version, 0)
 		)
+		data = cache.get(cache_key)
+		if data == None:
+			data = self.build_group_data(group)
+			cache.set(cache_key, data)
+		return data
 
 	"""
 	Format of 'end_at_date': 2023/03/16
@@ -360,6 +344,7 @@ class TournamentGroupManager(models.Manager):
 
 		updated_group = TournamentGroup.objects.get_by_id(group.id)
 		updated_group.end_at = datetime_object
+		updated_group.stats_version += 1
 		updated_group.save()
 		return updated_group
 
@@ -381,6 +366,7 @@ class TournamentGroupManager(models.Manager):
 
 		updated_group = TournamentGroup.objects.get_by_id(group.id)
 		updated_group.start_at = datetime_object
+		updated_group.stats_version += 1
 		updated_group.save()
 		return updated_group
 
@@ -408,6 +394,9 @@ class TournamentGroup(models.Model):
 	start_at				= models.DateTimeField(null=True, blank=True)
 	end_at					= models.DateTimeField(null=True, blank=True)
 
+	# Incremented every time the users, tournaments or dates change. Used to version the cached chart data.
+	stats_version			= models.IntegerField(default=0)
+
 	objects = TournamentGroupManager()
 
 	def __str__(self):
@@ -1,13 +1,25 @@
+import csv
+from io import StringIO
+import json
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 from tournament.models import (
-	Tournament
+	Tournament,
+	TournamentElimination,
+	TournamentPlayer,
+	TournamentPlayerResult,
+	TournamentSplitElimination
 )
 from tournament.test_util import (
 	build_tournament,
 	build_structure,
-	add_players_to_tournament
+	add_players_to_tournament,
+	eliminate_players_and_complete_tournament
 )
 
 from tournament_group.models import TournamentGroup
@@ -495,29 +507,310 @@ class TournamentGroupTestCase(TransactionTestCase):
 		self.assertEqual(len(groups), 1)
 		self.assertEqual(len(groups[0].get_tournaments()), 0)
 
-		
-
-
-
-
-
-
-
-
-
-
-
+	"""
+	Build, start and complete a tournament with cat as the admin.
+	'split_eliminatee': If set, this user is eliminated by a split elimination between cat and dog first.
+	"""
+	def build_completed_tournament(self, structure, users, split_eliminatee=None):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		tournament = build_tournament(structure)
+		add_players_to_tournament(
+			users = users,
+			tournament = tournament
+		)
+		Tournament.objects.start_tournament(user = cat, tournament_id = tournament.id)
+		if split_eliminatee != None:
+			players = TournamentPlayer.objects.get_tournament_players(tournament_id = tournament.id)
+			TournamentSplitElimination.objects.create_split_elimination(
+				tournament_id = tournament.id,
+				eliminator_ids = [players.get(user = cat).id, players.get(user = dog).id],
+				eliminatee_id = players.get(user = split_eliminatee).id
+			)
+			players = players.exclude(user = split_eliminatee)
+			for player in players.exclude(user = cat):
+				TournamentElimination.objects.create_elimination(
+					tournament_id = tournament.id,
+					eliminator_id = players.get(user = cat).id,
+					eliminatee_id = player.id
+				)
+			Tournament.objects.complete_tournament(user = cat, tournament_id = tournament.id)
+		else:
+			eliminate_players_and_complete_tournament(
+				admin = cat,
+				tournament = tournament
+			)
+		return Tournament.objects.get_by_id(tournament.id)
 
+	"""
+	Verify the group datasets are aggregated from the completed tournaments only, and the number of queries
+	doesn't grow with the number of tournaments.
+	"""
+	def test_build_group_data(self):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		monkey = User.objects.get_by_username("monkey")
+		bird = User.objects.get_by_username("bird")
+		group = self.create_tournament_group(
+			admin = cat,
+			title = "Cat's tournament group"
+		)
+		TournamentGroup.objects.add_users_to_group(
+			admin = cat,
+			group = group,
+			users = [dog, monkey, bird]
+		)
+		structure = build_structure(
+			admin = cat,
+			buyin_amount = 100,
+			bounty_amount = 10,
+			payout_percentages = (100,),
+			allow_rebuys = False
+		)
+		tournaments = [
+			self.build_completed_tournament(structure, [dog, monkey]),
+			self.build_completed_tournament(structure, [dog, monkey], split_eliminatee = monkey),
+		]
+		undone_tournament = self.build_completed_tournament(structure, [dog, monkey])
+		tournaments.append(undone_tournament)
+		TournamentGroup.objects.add_tournaments_to_group(
+			admin = cat,
+			group = group,
+			tournaments = tournaments
+		)
+		# No longer completed. Should not be counted.
+		Tournament.objects.undo_complete_tournament(user = cat, tournament_id = undone_tournament.id)
+
+		with CaptureQueriesContext(connection) as context:
+			data = TournamentGroup.objects.build_group_data(group)
+		num_queries = len(context.captured_queries)
+
+		net_earnings = {item.username: item.net_earnings for item in data.net_earnings}
+		contributions = {item.username: item.contribution for item in data.pot_contributions}
+		eliminations = {item.username: item.eliminations for item in data.eliminations_and_rebuys}
+		rebuys = {item.username: item.rebuys for item in data.eliminations_and_rebuys}
+		tournaments_played = {item.username: item.count for item in data.tournaments_played}
+		for user in [cat, dog, monkey]:
+			results = TournamentPlayerResult.objects.filter(player__user = user)
+			self.assertEqual(net_earnings[user.username], sum([result.net_earnings for result in results]))
+			self.assertEqual(contributions[user.username], sum([result.investment for result in results]))
+			self.assertEqual(tournaments_played[user.username], 2)
+			self.assertEqual(rebuys[user.username], 0)
+		self.assertEqual(eliminations["cat"], 3.5)
+		self.assertEqual(eliminations["dog"], 0.5)
+		self.assertEqual(eliminations["monkey"], 0.0)
+
+		# Bird is in the group but didn't play.
+		self.assertEqual(net_earnings["bird"], 0)
+		self.assertEqual(contributions["bird"], 0)
+		self.assertEqual(tournaments_played["bird"], 0)
+
+		# Sorted from highest to lowest.
+		self.assertEqual(data.net_earnings[0].username, "cat")
+		self.assertEqual(data.eliminations_and_rebuys[0].username, "cat")
+
+		# Adding another tournament doesn't add queries.
+		TournamentGroup.objects.add_tournaments_to_group(
+			admin = cat,
+			group = group,
+			tournaments = [self.build_completed_tournament(structure, [dog, monkey, bird])]
+		)
+		with CaptureQueriesContext(connection) as context:
+			data = TournamentGroup.objects.build_group_data(group)
+		self.assertEqual(len(context.captured_queries), num_queries)
+		tournaments_played = {item.username: item.count for item in data.tournaments_played}
+		self.assertEqual(tournaments_played["cat"], 3)
+		self.assertEqual(tournaments_played["bird"], 1)
 
+	"""
+	The head-to-head elimination matrix only counts the users in the group, and split eliminations are counted as
+	fractions.
+	"""
+	def test_build_group_head_to_head_data(self):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		monkey = User.objects.get_by_username("monkey")
+		bird = User.objects.get_by_username("bird")
+		group = self.create_tournament_group(
+			admin = cat,
+			title = "Cat's tournament group"
+		)
+		TournamentGroup.objects.add_users_to_group(
+			admin = cat,
+			group = group,
+			users = [dog, monkey]
+		)
+		structure = build_structure(
+			admin = cat,
+			buyin_amount = 100,
+			bounty_amount = 10,
+			payout_percentages = (100,),
+			allow_rebuys = False
+		)
+		# Bird is not in the group. Cat eliminating bird should not be counted.
+		tournaments = [
+			self.build_completed_tournament(structure, [dog, monkey, bird], split_eliminatee = monkey),
+			self.build_completed_tournament(structure, [dog, monkey], split_eliminatee = monkey),
+		]
+		TournamentGroup.objects.add_tournaments_to_group(
+			admin = cat,
+			group = group,
+			tournaments = tournaments
+		)
 
+		with CaptureQueriesContext(connection) as context:
+			data = TournamentGroup.objects.build_group_data(group)
+		num_queries = len(context.captured_queries)
 
+		head_to_head = {
+			(item.eliminator_username, item.eliminatee_username): (item.eliminations, item.split_eliminations)
+			for item in data.head_to_head
+		}
+		self.assertEqual(head_to_head, {
+			("cat", "dog"): (2, 0.0),
+			("cat", "monkey"): (0, 1.0),
+			("dog", "monkey"): (0, 1.0),
+		})
 
+		# Adding another tournament doesn't add queries.
+		TournamentGroup.objects.add_tournaments_to_group(
+			admin = cat,
+			group = group,
+			tournaments = [self.build_completed_tournament(structure, [dog, monkey])]
+		)
+		with CaptureQueriesContext(connection) as context:
+			data = TournamentGroup.objects.build_group_data(group)
+		self.assertEqual(len(context.captured_queries), num_queries)
+		head_to_head = {
+			(item.eliminator_username, item.eliminatee_username): item.eliminations
+			for item in data.head_to_head
+		}
+		self.assertEqual(head_to_head[("cat", "dog")], 3)
+		self.assertEqual(head_to_head[("cat", "monkey")], 1)
 
+	"""
+	The combined stats endpoint returns every chart dataset. The data is cached per group and the cache is
+	invalidated when the group or the results of its tournaments change.
+	"""
+	def test_group_stats_data_is_cached(self):
+		cache.clear()
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		monkey = User.objects.get_by_username("monkey")
+		group = self.create_tournament_group(
+			admin = cat,
+			title = "Cat's tournament group"
+		)
+		TournamentGroup.objects.add_users_to_group(
+			admin = cat,
+			group = group,
+			users = [dog]
+		)
+		structure = build_structure(
+			admin = cat,
+			buyin_amount = 100,
+			bounty_amount = 10,
+			payout_percentages = (100,),
+			allow_rebuys = False
+		)
+		tournament = self.build_completed_tournament(structure, [dog, monkey])
+		TournamentGroup.objects.add_tournaments_to_group(
+			admin = cat,
+			group = group,
+			tournaments = [tournament]
+		)
 
+		self.client.force_login(cat)
+		response = self.client.get(reverse("tournament_group:fetch_group_stats_data", kwargs={'pk': group.id}))
+		data = response.json()
+		self.assertEqual(len(json.loads(data['net_earnings_data'])), 2)
+		self.assertEqual(len(json.loads(data['pot_contributions_data'])), 2)
+		self.assertEqual(len(json.loads(data['eliminations_and_rebuys_data'])), 2)
+		tournaments_played = json.loads(data['tournaments_played'])
+		self.assertEqual({item['username']: item['count'] for item in tournaments_played}, {"cat": "1", "dog": "1"})
+		head_to_head = json.loads(data['head_to_head_data'])
+		self.assertEqual(
+			[(item['eliminator_username'], item['eliminatee_username'], item['eliminations']) for item in head_to_head],
+			[("cat", "dog", 1)]
+		)
+
+		# Served from the cache. Only the results version is queried.
+		group = TournamentGroup.objects.get_by_id(group.id)
+		with CaptureQueriesContext(connection) as context:
+			TournamentGroup.objects.get_group_stats_data(group)
+		self.assertEqual(len(context.captured_queries), 1)
+
+		# Adding a user invalidates the cache.
+		group = TournamentGroup.objects.add_users_to_group(
+			admin = cat,
+			group = group,
+			users = [monkey]
+		)
+		data = TournamentGroup.objects.get_group_stats_data(group)
+		self.assertEqual(len(data.tournaments_played), 3)
 
+		# Undoing a tournament in the group invalidates the cache.
+		Tournament.objects.undo_complete_tournament(user = cat, tournament_id = tournament.id)
+		group = TournamentGroup.objects.get_by_id(group.id)
+		data = TournamentGroup.objects.get_group_stats_data(group)
+		self.assertEqual(sum([item.count for item in data.tournaments_played]), 0)
 
+		# Removing a user invalidates the cache.
+		group = TournamentGroup.objects.remove_user_from_group(
+			admin = cat,
+			group = group,
+			user = monkey
+		)
+		data = TournamentGroup.objects.get_group_stats_data(group)
+		self.assertEqual(len(data.tournaments_played), 2)
 
 
+	"""
+	The group export streams the rows of the users in the group for the tournaments in the group. Users who aren't in
+	the group can't export it.
+	"""
+	def test_export_tournament_group_history(self):
+		cat = User.objects.get_by_username("cat")
+		dog = User.objects.get_by_username("dog")
+		monkey = User.objects.get_by_username("monkey")
+		group = self.create_tournament_group(
+			admin = cat,
+			title = "Cat's tournament group"
+		)
+		TournamentGroup.objects.add_users_to_group(
+			admin = cat,
+			group = group,
+			users = [dog]
+		)
+		structure = build_structure(
+			admin = cat,
+			buyin_amount = 100,
+			bounty_amount = 10,
+			payout_percentages = (100,),
+			allow_rebuys = False
+		)
+		tournament = self.build_completed_tournament(structure, [dog, monkey], split_eliminatee = monkey)
+		TournamentGroup.objects.add_tournaments_to_group(
+			admin = cat,
+			group = group,
+			tournaments = [tournament]
+		)
 
+		self.client.force_login(dog)
+		response = self.client.get(reverse("tournament_group:export_tournament_group_history", kwargs={'pk': group.id, 'table': "results", 'file_format': "csv"}))
+		self.assertEqual(response.status_code, 200)
+		rows = list(csv.DictReader(StringIO(b"".join(response.streaming_content).decode())))
+		self.assertEqual(sorted([row['username'] for row in rows]), ["cat", "dog"])
 
+		# monkey was split eliminated by cat and dog, then cat eliminated dog.
+		response = self.client.get(reverse("tournament_group:export_tournament_group_history", kwargs={'pk': group.id, 'table': "eliminations", 'file_format': "csv"}))
+		rows = list(csv.DictReader(StringIO(b"".join(response.streaming_content).decode())))
+		self.assertEqual(
+			sorted([(row['eliminator_username'], row['eliminatee_username'], row['eliminations'], row['is_split']) for row in rows]),
+			[("cat", "dog", "1.0", "False"), ("cat", "monkey", "0.5", "True"), ("dog", "monkey", "0.5", "True")]
+		)
 
+		self.client.force_login(monkey)
+		response = self.client.get(reverse("tournament_group:export_tournament_group_history", kwargs={'pk': group.id, 'table': "results", 'file_format': "csv"}))
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(response.json()['message'], "You must be in this TournamentGroup to export it.")
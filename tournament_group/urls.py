@@ -3,10 +3,12 @@ from django.urls import include, path
 from tournament_group.views import (
 	add_tournament_to_group,
 	add_user_to_group,
+	export_tournament_group_history,
 	fetch_rbg_colors,
 	fetch_tournament_group_eliminations_and_rebuys_data,
 	fetch_tournament_group_net_earnings_data,
 	fetch_tournament_group_pot_contributions_data,
+	fetch_tournament_group_stats_data,
 	fetch_tournament_group_touraments_played_data,
 	remove_tournament_from_group,
 	remove_user_from_group,
@@ -22,9 +24,11 @@ urlpatterns = [
     path('add_user_to_group/<int:user_id>/<int:tournament_group_id>/', add_user_to_group, name="add_user_to_group"),
     path('add_tourament_to_group/<int:tournament_id>/<int:tournament_group_id>/', add_tournament_to_group, name="add_tournament_to_group"),
     path('remove_tournament_from_group/<int:tournament_id>/<int:tournament_group_id>/', remove_tournament_from_group, name="remove_tournament_from_group"),
+    path('export/<int:pk>/<str:table>/<str:file_format>/', export_tournament_group_history, name="export_tournament_group_history"),
     path('fetch_elim_and_rebuys_data/<int:pk>/', fetch_tournament_group_eliminations_and_rebuys_data, name="fetch_elim_and_rebuys_data"),
     path('fetch_net_earnings_data/<int:pk>/', fetch_tournament_group_net_earnings_data, name="fetch_net_earnings_data"),
     path('fetch_pot_contributions_data/<int:pk>/', fetch_tournament_group_pot_contributions_data, name="fetch_pot_contributions_data"),
+    path('fetch_group_stats_data/<int:pk>/', fetch_tournament_group_stats_data, name="fetch_group_stats_data"),
     path('fetch_rbg_colors/<int:num_colors>/', fetch_rbg_colors, name="fetch_rbg_colors"),
     path('fetch_tournaments_played_data/<int:pk>/', fetch_tournament_group_touraments_played_data, name="fetch_tournaments_played_data"),
     path('create/', tournament_group_create_view, name="create"),
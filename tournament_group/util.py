@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 import json
 
+from tournament.util import HeadToHeadEliminationData
+
 @dataclass
 class TournamentGroupNetEarnings:
 	username: str
@@ -63,24 +65,21 @@ def build_json_from_tournaments_played_data(list_of_group_tournaments_played):
 		data_list.append(data)
 	return json.dumps(data_list)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+"""
+Every dataset for the TournamentGroup charts. Built by TournamentGroupManager.build_group_data.
+"""
+@dataclass
+class TournamentGroupData:
+	net_earnings: list[TournamentGroupNetEarnings]
+	pot_contributions: list[TournamentGroupPotContributions]
+	eliminations_and_rebuys: list[TournamentGroupEliminationsAndRebuys]
+	tournaments_played: list[TournamentGroupTournamentsPlayed]
+	head_to_head: list[HeadToHeadEliminationData]
+
+"""
+Cache key for the TournamentGroupData of a group.
+stats_version: TournamentGroup.stats_version
+results_version: Sum of Tournament.results_version for the tournaments in the group.
+"""
+def build_tournament_group_stats_cache_key(group_id, stats_version, results_version):
+	return f"tournament_group_stats:{group_id}:{stats_version}:{results_version}"
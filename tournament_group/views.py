@@ -8,7 +8,9 @@ from datetime import datetime
 import random
 import json
 
+from tournament.export import build_export_response
 from tournament.models import Tournament, TournamentPlayer, TournamentState
+from tournament.util import build_json_from_head_to_head_data
 from tournament_group.forms import CreateTournamentGroupForm
 from tournament_group.models import TournamentGroup
 from tournament_group.util import (
@@ -234,8 +236,11 @@ def view_tournament_group(request, *args, **kwargs):
 		messages.error(request, e.args[0])
 	return render(request=request, template_name='tournament_group/tournament_group_view.html', context=context)
 
+"""
+Request for retrieving every dataset for the TournamentGroup charts in a single response.
+"""
 @login_required
-def fetch_tournament_group_net_earnings_data(request, *args, **kwargs):
+def fetch_tournament_group_stats_data(request, *args, **kwargs):
 	context = {}
 	try:
 		pk = kwargs['pk']
@@ -243,9 +248,66 @@ def fetch_tournament_group_net_earnings_data(request, *args, **kwargs):
 		if tournament_group == None:
 			raise ValidationError("Our records indicate that TournamentGroup does not exist.")
 
-		net_earnings_data = TournamentGroup.objects.build_group_net_earnings_data(
+		data = TournamentGroup.objects.get_group_stats_data(
 			group = tournament_group
 		)
+		context['net_earnings_data'] = build_json_from_net_earnings_data(data.net_earnings)
+		context['pot_contributions_data'] = build_json_from_pot_contributions_data(data.pot_contributions)
+		context['eliminations_and_rebuys_data'] = build_json_from_eliminations_and_rebuys_data(data.eliminations_and_rebuys)
+		context['tournaments_played'] = build_json_from_tournaments_played_data(data.tournaments_played)
+		context['head_to_head_data'] = build_json_from_head_to_head_data(data.head_to_head)
+	except Exception as e:
+		error = {
+			'error': "Unable to retrieve tournament group data.",
+			'message': f"{e.args[0]}"
+		}
+		return JsonResponse(error, status=200)
+	return JsonResponse(context, status=200)
+
+"""
+Download the tournament history of every user in a TournamentGroup for the tournaments in the group as a CSV or
+parquet file. Only the admin and the users in the group can export it.
+table: results, eliminations or rebuys.
+file_format: csv or parquet.
+"""
+@login_required
+def export_tournament_group_history(request, *args, **kwargs):
+	try:
+		pk = kwargs['pk']
+		tournament_group = TournamentGroup.objects.get_by_id(pk)
+		if tournament_group == None:
+			raise ValidationError("Our records indicate that TournamentGroup does not exist.")
+
+		users = tournament_group.get_users()
+		if request.user != tournament_group.admin and request.user not in users:
+			raise ValidationError("You must be in this TournamentGroup to export it.")
+
+		return build_export_response(
+			table = kwargs['table'],
+			file_format = kwargs['file_format'],
+			tournaments = tournament_group.tournaments.exclude(completed_at = None),
+			users = users,
+			filename = f"tournament_group_{tournament_group.id}"
+		)
+	except Exception as e:
+		error = {
+			'error': "Unable to export tournament group.",
+			'message': f"{e.args[0]}"
+		}
+		return JsonResponse(error, status=400)
+
+@login_required
+def fetch_tournament_group_net_earnings_data(request, *args, **kwargs):
+	context = {}
+	try:
+		pk = kwargs['pk']
+		tournament_group = TournamentGroup.objects.get_by_id(pk)
+		if tournament_group == None:
+			raise ValidationError("Our records indicate that TournamentGroup does not exist.")
+
+		net_earnings_data = TournamentGroup.objects.get_group_stats_data(
+			group = tournament_group
+		).net_earnings
 		context['net_earnings_data'] = build_json_from_net_earnings_data(net_earnings_data)
 	except Exception as e:
 		error = {
@@ -283,9 +345,9 @@ def fetch_tournament_group_pot_contributions_data(request, *args, **kwargs):
 		if tournament_group == None:
 			raise ValidationError("Our records indicate that TournamentGroup does not exist.")
 
-		pot_contributions_data = TournamentGroup.objects.build_group_pot_contributions_data(
+		pot_contributions_data = TournamentGroup.objects.get_group_stats_data(
 			group = tournament_group
-		)
+		).pot_contributions
 		context['pot_contributions_data'] = build_json_from_pot_contributions_data(pot_contributions_data)
 	except Exception as e:
 		error = {
@@ -304,9 +366,9 @@ def fetch_tournament_group_eliminations_and_rebuys_data(request, *args, **kwargs
 		if tournament_group == None:
 			raise ValidationError("Our records indicate that TournamentGroup does not exist.")
 
-		eliminations_and_rebuys_data = TournamentGroup.objects.build_group_eliminations_and_rebuys_data(
+		eliminations_and_rebuys_data = TournamentGroup.objects.get_group_stats_data(
 			group = tournament_group
-		)
+		).eliminations_and_rebuys
 		context['eliminations_and_rebuys_data'] = build_json_from_eliminations_and_rebuys_data(eliminations_and_rebuys_data)
 	except Exception as e:
 		error = {
@@ -325,9 +387,9 @@ def fetch_tournament_group_touraments_played_data(request, *args, **kwargs):
 		if tournament_group == None:
 			raise ValidationError("Our records indicate that TournamentGroup does not exist.")
 
-		tournaments_played = TournamentGroup.objects.build_group_tournaments_played_data(
+		tournaments_played = TournamentGroup.objects.get_group_stats_data(
 			group = tournament_group
-		)
+		).tournaments_played
 		context['tournaments_played'] = build_json_from_tournaments_played_data(tournaments_played)
 	except Exception as e:
 		error = {